@@ -4,11 +4,19 @@
 """Interact with a remote MAAS server."""
 
 __all__ = [
+    "index_description",
     "register_api_commands",
     ]
 
 import argparse
 from collections import defaultdict
+from concurrent.futures import (
+    ALL_COMPLETED,
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
 from functools import partial
 import http.client
 import json
@@ -20,6 +28,7 @@ from textwrap import (
     fill,
     wrap,
 )
+import threading
 from urllib.parse import (
     urljoin,
     urlparse,
@@ -49,10 +58,16 @@ from maascli.utils import (
 )
 
 
-def http_request(url, method, body=None, headers=None, insecure=False):
-    """Issue an http request."""
-    http = httplib2.Http(
-        disable_ssl_certificate_validation=insecure)
+def http_request(
+        url, method, body=None, headers=None, insecure=False, http=None):
+    """Issue an http request.
+
+    :param http: The `httplib2.Http` to issue the request with, reusing its
+        open connections. A new one is created if this is not given.
+    """
+    if http is None:
+        http = httplib2.Http(
+            disable_ssl_certificate_validation=insecure)
     try:
         # XXX mpontillo 2015-12-15: Should force input to be in bytes here.
         # This calls into httplib2, which is going to call a parser which
@@ -248,6 +263,147 @@ class Action(Command):
         auth.sign_request(uri, headers)
 
 
+class Batch(Command):
+    """Run API operations read from stdin, one JSON object per line.
+
+    Each operation names a handler and an action as they are given on the
+    command line. The action's positional arguments go in "params" and its
+    keyword arguments in "data"; a list of values passes the same keyword
+    several times. An "id", if given, is copied to the result::
+
+      {"id": 1, "handler": "machine", "action": "deploy",
+       "params": {"system_id": "4y3h7n"}, "data": {"distro_series": "bionic"}}
+
+    Up to --concurrency operations are in flight at once, each worker
+    reusing its connections to the region for all of its requests. The
+    result of each operation is written to stdout as a JSON object on its
+    own line, in the order the operations complete, with "line" giving the
+    line of input it came from.
+    """
+
+    # Override this in subclasses; see `register_batch`.
+    profile = None
+
+    credentials = property(lambda self: self.profile["credentials"])
+
+    def __init__(self, parser):
+        super(Batch, self).__init__(parser)
+        parser.add_argument(
+            "-j", "--concurrency", type=int, default=4, help=(
+                "The maximum number of operations in flight at once "
+                "(default: 4)."))
+        parser.add_argument(
+            '-k', '--insecure', action='store_true', help=(
+                "Disable SSL certificate check"), default=False)
+
+    def __call__(self, options):
+        if options.concurrency < 1:
+            raise CommandError("The concurrency must be at least 1.")
+        operations = {
+            (handler_command_name(handler["name"]), safe_name(action["name"])):
+            (handler, action)
+            for handler in get_resource_handlers(self.profile)
+            for action in handler["actions"]
+        }
+        connections = threading.local()
+
+        def run(operation):
+            request = self.prepare_request(operations, operation)
+            if not hasattr(connections, "http"):
+                connections.http = httplib2.Http(
+                    disable_ssl_certificate_validation=options.insecure)
+            return http_request(*request, http=connections.http)
+
+        failed = False
+        compare_api_hashes = True
+
+        def write_result(line, operation, outcome):
+            nonlocal failed, compare_api_hashes
+            result = {"line": line}
+            if isinstance(operation, dict) and "id" in operation:
+                result["id"] = operation["id"]
+            try:
+                response, content = outcome()
+            except (Exception, CommandError) as error:
+                result["error"] = str(error)
+                failed = True
+            else:
+                if compare_api_hashes:
+                    Action.compare_api_hashes(self.profile, response)
+                    compare_api_hashes = False
+                result.update(self.format_response(response, content))
+                failed = failed or response.status // 100 != 2
+            print(json.dumps(result), flush=True)
+
+        with ThreadPoolExecutor(options.concurrency) as executor:
+            pending = {}
+
+            def write_results(return_when):
+                done, _ = wait(pending, return_when=return_when)
+                for future in done:
+                    line, operation = pending.pop(future)
+                    write_result(line, operation, future.result)
+
+            for line, text in enumerate(sys.stdin, 1):
+                if text.strip() == "":
+                    continue
+                try:
+                    operation = json.loads(text)
+                except ValueError as error:
+                    future = Future()
+                    future.set_exception(error)
+                    write_result(line, None, future.result)
+                    continue
+                future = executor.submit(run, operation)
+                pending[future] = line, operation
+                if len(pending) >= options.concurrency:
+                    write_results(FIRST_COMPLETED)
+            if len(pending) != 0:
+                write_results(ALL_COMPLETED)
+
+        if failed:
+            raise CommandError(2)
+
+    def prepare_request(self, operations, operation):
+        """Return the arguments to `http_request` for `operation`."""
+        if not isinstance(operation, dict):
+            raise ValueError("An operation must be a JSON object.")
+        key = operation.get("handler"), operation.get("action")
+        if key not in operations:
+            raise ValueError("Unknown handler or action: %s %s" % key)
+        handler, action = operations[key]
+        if get_action_class(handler, action) is not None:
+            raise ValueError(
+                "%s %s cannot be used in a batch; run it on its own." % key)
+        params = operation.get("params", {})
+        missing = set(handler["params"]).difference(params)
+        if len(missing) != 0:
+            raise ValueError(
+                "Missing params: %s" % ", ".join(sorted(missing)))
+        data = []
+        for name, value in sorted(operation.get("data", {}).items()):
+            values = value if isinstance(value, list) else [value]
+            data.extend(
+                (name, value if isinstance(value, str) else str(value))
+                for value in values)
+        uri, body, headers = Action.prepare_payload(
+            action["op"], action["method"], handler["uri"].format(**params),
+            data)
+        headers = dict(headers)
+        if self.credentials is not None:
+            Action.sign(uri, headers, self.credentials)
+        return uri, action["method"], body, headers
+
+    @staticmethod
+    def format_response(response, content):
+        """Return the parts of a result that describe an API response."""
+        if utils.get_response_content_type(response).endswith("/json"):
+            content = json.loads(content.decode("utf-8"))
+        else:
+            content = content.decode("utf-8", "replace")
+        return {"status": response.status, "content": content}
+
+
 class ActionHelp(argparse.Action):
     """Custom "help" function for an action `ArgumentParser`.
 
@@ -386,25 +542,40 @@ def get_action_class_bases(handler, action):
     return (Action,)
 
 
+def register_action(profile, handler, action, parser):
+    """Register one of a handler's actions."""
+    help_title, help_body = parse_docstring(action["doc"])
+    action_name = safe_name(action["name"])
+    action_bases = get_action_class_bases(handler, action)
+    action_ns = {
+        "action": action,
+        "handler": handler,
+        "profile": profile,
+        }
+    action_class = type(action_name, action_bases, action_ns)
+    action_parser = parser.subparsers.add_parser(
+        action_name, help=help_title, description=help_title,
+        epilog=help_body, add_help=False)
+    action_parser.add_argument(
+        '--help', '-h', action=ActionHelp, nargs=0,
+        help="Show this help message and exit.")
+    action_parser.set_defaults(execute=action_class(action_parser))
+
+
 def register_actions(profile, handler, parser):
     """Register a handler's actions."""
     for action in handler["actions"]:
-        help_title, help_body = parse_docstring(action["doc"])
-        action_name = safe_name(action["name"])
-        action_bases = get_action_class_bases(handler, action)
-        action_ns = {
-            "action": action,
-            "handler": handler,
-            "profile": profile,
-            }
-        action_class = type(action_name, action_bases, action_ns)
-        action_parser = parser.subparsers.add_parser(
-            action_name, help=help_title, description=help_title,
-            epilog=help_body, add_help=False)
-        action_parser.add_argument(
-            '--help', '-h', action=ActionHelp, nargs=0,
-            help="Show this help message and exit.")
-        action_parser.set_defaults(execute=action_class(action_parser))
+        register_action(profile, handler, action, parser)
+
+
+def register_batch(profile, parser):
+    """Register a profile's batch command."""
+    help_title, help_body = parse_docstring(Batch)
+    batch_class = type("batch", (Batch,), {"profile": profile})
+    batch_parser = parser.subparsers.add_parser(
+        "batch", help=help_title, description=help_title,
+        epilog=help_body)
+    batch_parser.set_defaults(execute=batch_class(batch_parser))
 
 
 def register_handler(profile, handler, parser):
@@ -417,41 +588,138 @@ def register_handler(profile, handler, parser):
     register_actions(profile, handler, handler_parser)
 
 
+def get_resource_handler(resource, anonymous):
+    """Return the handler that represents `resource` on the command line.
+
+    :param anonymous: Whether the profile has no credentials.
+    :return: A handler description, or `None` if the resource has no
+        actions available to the profile.
+    """
+    # Don't consider the authenticated handler if this profile has no
+    # credentials associated with it.
+    if anonymous:
+        handlers = [resource["anon"]]
+    else:
+        handlers = [resource["auth"], resource["anon"]]
+    # Merge actions from the active handlers. This could be slightly
+    # simpler using a dict and going through the handlers in reverse, but
+    # doing it forwards with a defaultdict(list) leaves an easier-to-debug
+    # structure, and ought to be easier to understand.
+    actions = defaultdict(list)
+    for handler in handlers:
+        if handler is not None:
+            for action in handler["actions"]:
+                action_name = action["name"]
+                actions[action_name].append(action)
+    # Always represent this resource using the authenticated handler, if
+    # defined, before the fall-back anonymous handler, even if this
+    # profile does not have credentials.
+    represent_as = dict(
+        resource["auth"] or resource["anon"],
+        name=resource["name"], actions=[])
+    # Each value in the actions dict is a list of one or more action
+    # descriptions. Here we represent the handler with only the first of
+    # each of those.
+    if len(actions) == 0:
+        return None
+    represent_as["actions"].extend(
+        value[0] for value in actions.values())
+    return represent_as
+
+
+def get_resource_handlers(profile):
+    """Yield the handler that represents each of a profile's resources."""
+    anonymous = profile["credentials"] is None
+    resources = profile["description"]["resources"]
+    for resource in sorted(resources, key=itemgetter("name")):
+        handler = get_resource_handler(resource, anonymous)
+        if handler is not None:
+            yield handler
+
+
 def register_resources(profile, parser):
     """Register a profile's resources."""
+    for handler in get_resource_handlers(profile):
+        register_handler(profile, handler, parser)
+
+
+def index_description(profile):
+    """Return an index of the commands in a profile's API description.
+
+    The index holds the names and help titles of the profile's handlers and
+    their actions: all that is needed to list them in help output, along
+    with the profile's name and URL. It is stored apart from the profile so
+    that `register_api_commands` does not have to load and process every
+    profile's description on every invocation.
+    """
+    return {
+        "name": profile["name"],
+        "url": profile["url"],
+        "hash": profile["description"].get("hash"),
+        "anonymous": profile["credentials"] is None,
+        "handlers": [
+            {
+                "name": handler_command_name(handler["name"]),
+                "resource": handler["name"],
+                "help": parse_docstring(handler["doc"])[0],
+                "actions": [
+                    [safe_name(action["name"]),
+                     parse_docstring(action["doc"])[0]]
+                    for action in handler["actions"]
+                ],
+            }
+            for handler in get_resource_handlers(profile)
+        ],
+    }
+
+
+def is_index_current(index, profile):
+    """Is `index` up to date with `profile`?"""
+    return (
+        index is not None and
+        index["hash"] == profile["description"].get("hash") and
+        index["anonymous"] == (profile["credentials"] is None))
+
+
+def register_indexed_resources(
+        profile, index, parser, handler_name, action_name):
+    """Register a profile's resources using its index.
+
+    Only the named handler and action are registered in full. The others
+    are registered with just their help titles, so that they are still
+    listed in help output and suggested when a name is mistyped.
+
+    :param index: The profile's index, from `index_description`.
+    :param handler_name: The handler named on the command line, or `None`.
+    :param action_name: The action named on the command line, or `None`.
+    """
     anonymous = profile["credentials"] is None
-    description = profile["description"]
-    resources = description["resources"]
-    for resource in sorted(resources, key=itemgetter("name")):
-        # Don't consider the authenticated handler if this profile has no
-        # credentials associated with it.
-        if anonymous:
-            handlers = [resource["anon"]]
-        else:
-            handlers = [resource["auth"], resource["anon"]]
-        # Merge actions from the active handlers. This could be slightly
-        # simpler using a dict and going through the handlers in reverse, but
-        # doing it forwards with a defaultdict(list) leaves an easier-to-debug
-        # structure, and ought to be easier to understand.
-        actions = defaultdict(list)
-        for handler in handlers:
-            if handler is not None:
-                for action in handler["actions"]:
-                    action_name = action["name"]
-                    actions[action_name].append(action)
-        # Always represent this resource using the authenticated handler, if
-        # defined, before the fall-back anonymous handler, even if this
-        # profile does not have credentials.
-        represent_as = dict(
-            resource["auth"] or resource["anon"],
-            name=resource["name"], actions=[])
-        # Each value in the actions dict is a list of one or more action
-        # descriptions. Here we register the handler with only the first of
-        # each of those.
-        if len(actions) != 0:
-            represent_as["actions"].extend(
-                value[0] for value in actions.values())
-            register_handler(profile, represent_as, parser)
+    for entry in index["handlers"]:
+        handler = None
+        if entry["name"] == handler_name:
+            for resource in profile["description"]["resources"]:
+                if resource["name"] == entry["resource"]:
+                    handler = get_resource_handler(resource, anonymous)
+                    break
+        if handler is None:
+            # Not named, or not in the description after all: list it.
+            parser.subparsers.add_parser(entry["name"], help=entry["help"])
+            continue
+        help_title, help_body = parse_docstring(handler["doc"])
+        handler_parser = parser.subparsers.add_parser(
+            handler_name, help=help_title, description=help_title,
+            epilog=help_body)
+        actions = {
+            safe_name(action["name"]): action
+            for action in handler["actions"]
+        }
+        for name, help_title in entry["actions"]:
+            if name == action_name and name in actions:
+                register_action(
+                    profile, handler, actions[name], handler_parser)
+            else:
+                handler_parser.subparsers.add_parser(
+                    name, help=help_title, add_help=False)
 
 profile_help_paragraphs = [
     """\
@@ -471,15 +739,54 @@ profile_help = '\n\n'.join(
     fill(dedent(paragraph)) for paragraph in profile_help_paragraphs)
 
 
-def register_api_commands(parser):
-    """Register all profiles as subcommands on `parser`."""
+def register_profile(profile, parser):
+    """Register a profile, returning its parser.
+
+    :param profile: A profile, or its index; only the name and URL are used.
+    """
+    return parser.subparsers.add_parser(
+        profile["name"], help="Interact with %(url)s" % profile,
+        description=(
+            "Issue commands to the MAAS region controller at %(url)s."
+            % profile),
+        epilog=profile_help)
+
+
+def register_api_commands(parser, argv=None):
+    """Register all profiles as subcommands on `parser`.
+
+    :param argv: The command line, if known. When given, only the profile,
+        handler, and action that it names are registered in full, from the
+        index stored for each profile.
+    """
+    if argv is not None:
+        # None of the parsers down to an action take options with values,
+        # so the first words are the profile, handler, and action names.
+        names = [arg for arg in argv[1:] if not arg.startswith("-")]
+        names = (names + [None, None, None])[:3]
     with ProfileConfig.open() as config:
         for profile_name in config:
-            profile = config[profile_name]
-            profile_parser = parser.subparsers.add_parser(
-                profile["name"], help="Interact with %(url)s" % profile,
-                description=(
-                    "Issue commands to the MAAS region controller at %(url)s."
-                    % profile),
-                epilog=profile_help)
-            register_resources(profile, profile_parser)
+            if argv is None:
+                profile = config[profile_name]
+                profile_parser = register_profile(profile, parser)
+                register_resources(profile, profile_parser)
+                register_batch(profile, profile_parser)
+                continue
+            # Other profiles are listed from their index alone; only the
+            # named profile is loaded.
+            index = config.get_index(profile_name)
+            if index is None:
+                index = index_description(config[profile_name])
+                config.set_index(profile_name, index)
+            profile_parser = register_profile(index, parser)
+            if index["name"] == names[0]:
+                profile = config[profile_name]
+                if not is_index_current(index, profile):
+                    index = index_description(profile)
+                    config.set_index(profile_name, index)
+                register_indexed_resources(
+                    profile, index, profile_parser, names[1], names[2])
+                register_batch(profile, profile_parser)
+            else:
+                help_title, _ = parse_docstring(Batch)
+                profile_parser.subparsers.add_parser("batch", help=help_title)
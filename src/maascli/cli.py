@@ -14,7 +14,10 @@ import sys
 from textwrap import fill
 
 from apiclient.creds import convert_tuple_to_string
-from maascli.api import fetch_api_description
+from maascli.api import (
+    fetch_api_description,
+    index_description,
+)
 from maascli.auth import (
     check_valid_apikey,
     obtain_credentials,
@@ -87,13 +90,15 @@ class cmd_login(Command):
         description = fetch_api_description(options.url, options.insecure)
         # Save the config.
         profile_name = options.profile_name
+        profile = {
+            "credentials": credentials,
+            "description": description,
+            "name": profile_name,
+            "url": options.url,
+            }
         with ProfileConfig.open() as config:
-            config[profile_name] = {
-                "credentials": credentials,
-                "description": description,
-                "name": profile_name,
-                "url": options.url,
-                }
+            config[profile_name] = profile
+            config.set_index(profile_name, index_description(profile))
             profile = config[profile_name]
         self.print_whats_next(profile)
 
@@ -128,6 +133,7 @@ class cmd_refresh(Command):
                 url = profile["url"]
                 profile["description"] = fetch_api_description(url)
                 config[profile_name] = profile
+                config.set_index(profile_name, index_description(profile))
 
 
 class cmd_logout(Command):
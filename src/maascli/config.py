@@ -20,7 +20,12 @@ from maascli import utils
 
 
 class ProfileConfig:
-    """Store profile configurations in an sqlite3 database."""
+    """Store profile configurations in an sqlite3 database.
+
+    Each profile can also have an index of its API description stored
+    alongside it, in a table of its own, so that the index can be read
+    without loading the (much larger) profile.
+    """
 
     def __init__(self, database):
         self.database = database
@@ -31,30 +36,30 @@ class ProfileConfig:
                 "(id INTEGER PRIMARY KEY,"
                 " name TEXT NOT NULL UNIQUE,"
                 " data BLOB)")
-        self.__fill_cache()
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS indexes "
+                "(id INTEGER PRIMARY KEY,"
+                " name TEXT NOT NULL UNIQUE,"
+                " data BLOB)")
+        self.__fill_names()
 
     def cursor(self):
         return closing(self.database.cursor())
 
-    def __fill_cache(self):
-        """Touch each entry in the database to fill the cache. This cache is
-        needed to enforce a consistent view. Without it, the list of items can
-        be out of sync with the items actually in the database leading to
-        KeyErrors when traversing the profiles.
+    def __fill_names(self):
+        """Read the names of all the profiles. These are needed to enforce a
+        consistent view. Without them, the list of items can be out of sync
+        with the items actually in the database leading to KeyErrors when
+        traversing the profiles. The profiles themselves are only loaded when
+        they are first used.
         """
-        for name in self:
-            try:
-                self[name]
-            except KeyError:
-                pass
-
-    def __iter__(self):
-        if self.cache:
-            return (name for name in self.cache)
         with self.cursor() as cursor:
             results = cursor.execute(
                 "SELECT name FROM profiles").fetchall()
-        return (name for (name,) in results)
+        self.names = [name for (name,) in results]
+
+    def __iter__(self):
+        return iter(list(self.names))
 
     def __getitem__(self, name):
         if name in self.cache:
@@ -75,6 +80,12 @@ class ProfileConfig:
             cursor.execute(
                 "INSERT OR REPLACE INTO profiles (name, data) "
                 "VALUES (?, ?)", (name, json.dumps(data)))
+            # Any stored index describes the profile as it was.
+            cursor.execute(
+                "DELETE FROM indexes"
+                " WHERE name = ?", (name,))
+        if name not in self.names:
+            self.names.append(name)
         self.cache[name] = data
 
     def __delitem__(self, name):
@@ -82,11 +93,37 @@ class ProfileConfig:
             cursor.execute(
                 "DELETE FROM profiles"
                 " WHERE name = ?", (name,))
+            cursor.execute(
+                "DELETE FROM indexes"
+                " WHERE name = ?", (name,))
+        if name in self.names:
+            self.names.remove(name)
         try:
             del self.cache[name]
         except KeyError:
             pass
 
+    def get_index(self, name):
+        """Return the index stored for the named profile, or `None`."""
+        with self.cursor() as cursor:
+            data = cursor.execute(
+                "SELECT data FROM indexes"
+                " WHERE name = ?", (name,)).fetchone()
+        if data is None:
+            return None
+        else:
+            return json.loads(data[0])
+
+    def set_index(self, name, index):
+        """Store an index for the named profile.
+
+        The index is discarded when the profile is next replaced.
+        """
+        with self.cursor() as cursor:
+            cursor.execute(
+                "INSERT OR REPLACE INTO indexes (name, data) "
+                "VALUES (?, ?)", (name, json.dumps(index)))
+
     @classmethod
     def create_database(cls, dbpath):
         # Initialise the database file with restrictive permissions.
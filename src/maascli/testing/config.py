@@ -14,6 +14,21 @@ from maastesting.factory import factory
 
 class FakeConfig(dict):
     """Fake `ProfileConfig`.  A dict that's also a context manager."""
+
+    def __init__(self, *args, **kwargs):
+        super(FakeConfig, self).__init__(*args, **kwargs)
+        self.indexes = {}
+
+    def __setitem__(self, name, data):
+        super(FakeConfig, self).__setitem__(name, data)
+        self.indexes.pop(name, None)
+
+    def get_index(self, name):
+        return self.indexes.get(name)
+
+    def set_index(self, name, index):
+        self.indexes[name] = index
+
     def __enter__(self, *args, **kwargs):
         return self
 
@@ -23,7 +23,10 @@ from maascli.actions.sshkeys_import import SSHKeysImportAction
 from maascli.command import CommandError
 from maascli.config import ProfileConfig
 from maascli.parser import ArgumentParser
-from maascli.testing.config import make_configs
+from maascli.testing.config import (
+    make_configs,
+    make_profile,
+)
 from maascli.utils import (
     handler_command_name,
     safe_name,
@@ -79,6 +82,122 @@ class TestRegisterAPICommands(MAASTestCase):
                     (profile_name, handler_name, action_name))
                 self.assertIsInstance(options.execute, api.Action)
 
+    def test_registers_only_named_action_in_full(self):
+        profile = self.make_profile()
+        [profile_name] = profile
+        [resource, other_resource] = (
+            profile[profile_name]["description"]["resources"])
+        handler_name = handler_command_name(resource["name"])
+        action_name = safe_name(resource["auth"]["actions"][0]["name"])
+        argv = ["maas", profile_name, handler_name, action_name]
+        parser = ArgumentParser()
+        api.register_api_commands(parser, argv)
+        options = parser.parse_args(argv[1:])
+        self.assertIsInstance(options.execute, api.Action)
+        # The other actions and handlers are listed, but not populated.
+        profile_parser = parser.subparsers.choices[profile_name]
+        handler_parser = profile_parser.subparsers.choices[handler_name]
+        other_action_name = safe_name(resource["anon"]["actions"][0]["name"])
+        other_action_parser = (
+            handler_parser.subparsers.choices[other_action_name])
+        self.assertIsNone(other_action_parser.get_default("execute"))
+        other_handler_parser = profile_parser.subparsers.choices[
+            handler_command_name(other_resource["name"])]
+        self.assertIsNone(other_handler_parser._subparsers)
+
+    def test_does_not_register_resources_of_other_profiles(self):
+        profile = self.make_profile()
+        [profile_name] = profile
+        parser = ArgumentParser()
+        api.register_api_commands(parser, ["maas", "login"])
+        profile_parser = parser.subparsers.choices[profile_name]
+        self.assertThat(
+            list(profile_parser.subparsers.choices), Equals(["batch"]))
+
+    def test_stores_index_for_profile(self):
+        profile = self.make_profile()
+        [profile_name] = profile
+        api.register_api_commands(ArgumentParser(), ["maas", profile_name])
+        self.assertThat(
+            profile.get_index(profile_name),
+            Equals(api.index_description(profile[profile_name])))
+        self.assertNotIn("index", profile[profile_name])
+
+    def test_rebuilds_index_when_description_changes(self):
+        profile = self.make_profile()
+        [profile_name] = profile
+        profile.set_index(
+            profile_name, api.index_description(profile[profile_name]))
+        profile[profile_name]["description"]["hash"] = factory.make_name()
+        api.register_api_commands(ArgumentParser(), ["maas", profile_name])
+        self.assertThat(
+            profile.get_index(profile_name)["hash"],
+            Equals(profile[profile_name]["description"]["hash"]))
+
+    def test_lists_other_profiles_from_index_alone(self):
+        profile = self.make_profile()
+        [profile_name] = profile
+        profile.set_index(
+            profile_name, api.index_description(profile[profile_name]))
+        # The profile itself is not needed when it is not named.
+        del profile[profile_name]["description"]
+        parser = ArgumentParser()
+        api.register_api_commands(parser, ["maas", "login"])
+        self.assertIn(profile_name, parser.subparsers.choices)
+
+    def test_lists_handler_missing_from_description(self):
+        profile = self.make_profile()
+        [profile_name] = profile
+        index = api.index_description(profile[profile_name])
+        profile.set_index(profile_name, index)
+        # The index names a resource that the description lacks.
+        for resource in profile[profile_name]["description"]["resources"]:
+            resource["name"] = factory.make_name("resource")
+        handler_name = index["handlers"][0]["name"]
+        parser = ArgumentParser()
+        api.register_api_commands(
+            parser, ["maas", profile_name, handler_name])
+        profile_parser = parser.subparsers.choices[profile_name]
+        self.assertIn(handler_name, profile_parser.subparsers.choices)
+
+
+class TestIndexDescription(MAASTestCase):
+    """Tests for `index_description`."""
+
+    def test_lists_handlers_and_actions(self):
+        profile = make_profile()
+        resources = sorted(
+            profile["description"]["resources"], key=lambda r: r["name"])
+        self.assertThat(api.index_description(profile), Equals({
+            "name": profile["name"],
+            "url": profile["url"],
+            "hash": None,
+            "anonymous": False,
+            "handlers": [
+                {
+                    "name": handler_command_name(resource["name"]),
+                    "resource": resource["name"],
+                    "help": "Short",
+                    "actions": [
+                        [safe_name(action["name"]), "Doc"]
+                        for action in (
+                            resource["auth"]["actions"] +
+                            resource["anon"]["actions"])
+                    ],
+                }
+                for resource in resources
+            ],
+        }))
+
+    def test_omits_authenticated_actions_when_anonymous(self):
+        profile = make_profile()
+        profile["credentials"] = None
+        index = api.index_description(profile)
+        self.assertTrue(index["anonymous"])
+        self.assertThat(
+            [len(handler["actions"]) for handler in index["handlers"]],
+            Equals([1, 1]))
+
 
 class TestFunctions(MAASTestCase):
     """Test for miscellaneous functions in `maascli.api`."""
@@ -259,6 +378,114 @@ class TestAction(MAASTestCase):
         """)))
 
 
+class TestBatch(MAASTestCase):
+    """Tests for `Batch`."""
+
+    def make_batch(self, credentials=None):
+        profile = make_profile()
+        profile["credentials"] = credentials
+        [resource, _] = profile["description"]["resources"]
+        for handler in resource["auth"], resource["anon"]:
+            handler["uri"] = "http://example.com/api/2.0/things/{thing}/"
+            handler["params"] = ["thing"]
+        action = resource["anon"]["actions"][0]
+        action.update(method="POST", op="frob")
+        batch_class = type("batch", (api.Batch,), {"profile": profile})
+        parser = ArgumentParser()
+        batch = batch_class(parser)
+        operation = {
+            "handler": handler_command_name(resource["name"]),
+            "action": safe_name(action["name"]),
+            "params": {"thing": "foo"},
+        }
+        return batch, parser, operation
+
+    def patch_http_request(self, status=http.client.OK, content=b"{}"):
+        response = httplib2.Response({"content-type": "application/json"})
+        response.status = status
+        http_request = self.patch(api, "http_request")
+        http_request.return_value = response, content
+        return http_request
+
+    def run_batch(self, batch, parser, operations, *args):
+        options = parser.parse_args(args)
+        with CaptureStandardIO() as stdio:
+            stdio.addInput("".join(
+                json.dumps(operation) + "\n" for operation in operations))
+            try:
+                batch(options)
+            except CommandError as error:
+                code = error.code
+            else:
+                code = None
+        results = [json.loads(line) for line in stdio.getOutput().split("\n")
+                   if line != ""]
+        return code, results
+
+    def test_issues_request_for_operation(self):
+        batch, parser, operation = self.make_batch()
+        operation["data"] = {"a": "b", "c": [1, 2]}
+        http_request = self.patch_http_request()
+        self.run_batch(batch, parser, [operation])
+        [call] = http_request.call_args_list
+        [uri, method, body, _] = call[0]
+        self.assertThat(
+            uri, Equals("http://example.com/api/2.0/things/foo/?op=frob"))
+        self.assertThat(method, Equals("POST"))
+        self.assertThat(body, Not(Equals(None)))
+
+    def test_signs_requests(self):
+        batch, parser, operation = self.make_batch(
+            credentials=("consumer", "token", "secret"))
+        http_request = self.patch_http_request()
+        self.run_batch(batch, parser, [operation])
+        [call] = http_request.call_args_list
+        [_, _, _, headers] = call[0]
+        self.assertIn("Authorization", headers)
+
+    def test_writes_result_of_each_operation(self):
+        batch, parser, operation = self.make_batch()
+        self.patch_http_request(content=b'{"thing": "foo"}')
+        code, results = self.run_batch(
+            batch, parser, [dict(operation, id=1), dict(operation, id=2)])
+        self.assertIsNone(code)
+        self.assertThat(
+            sorted(results, key=lambda result: result["line"]), Equals([
+                {"line": 1, "id": 1, "status": 200,
+                 "content": {"thing": "foo"}},
+                {"line": 2, "id": 2, "status": 200,
+                 "content": {"thing": "foo"}},
+            ]))
+
+    def test_reports_errors_and_exits_2(self):
+        batch, parser, operation = self.make_batch()
+        self.patch_http_request()
+        unknown = dict(operation, action="unknown")
+        missing = dict(operation, params={})
+        code, results = self.run_batch(
+            batch, parser, [unknown, missing], "--concurrency", "1")
+        self.assertThat(code, Equals(2))
+        self.assertThat([result["line"] for result in results], Equals([1, 2]))
+        self.assertThat(results[1]["error"], Equals("Missing params: thing"))
+
+    def test_reports_unsuccessful_responses_and_exits_2(self):
+        batch, parser, operation = self.make_batch()
+        self.patch_http_request(status=http.client.NOT_FOUND)
+        code, results = self.run_batch(batch, parser, [operation])
+        self.assertThat(code, Equals(2))
+        self.assertThat(results[0]["status"], Equals(404))
+
+    def test_reports_invalid_json(self):
+        batch, parser, _ = self.make_batch()
+        options = parser.parse_args([])
+        with CaptureStandardIO() as stdio:
+            stdio.addInput("{\n")
+            self.assertRaises(CommandError, batch, options)
+        result = json.loads(stdio.getOutput())
+        self.assertThat(result["line"], Equals(1))
+        self.assertIn("error", result)
+
+
 class TestActionHelp(MAASTestCase):
 
     def make_help(self):
@@ -70,6 +70,41 @@ class TestProfileConfig(MAASTestCase):
             self.assertEqual({"abc": 123}, config["alice"])
             cursor.assert_not_called()
 
+    def test_loads_profiles_when_used(self):
+        database = sqlite3.connect(":memory:")
+        api.ProfileConfig(database)["alice"] = {"abc": 123}
+        config = api.ProfileConfig(database)
+        self.assertEqual({"alice"}, set(config))
+        self.assertEqual({}, config.cache)
+        self.assertEqual({"abc": 123}, config["alice"])
+        self.assertEqual({"alice": {"abc": 123}}, config.cache)
+
+    def test_index(self):
+        database = sqlite3.connect(":memory:")
+        config = api.ProfileConfig(database)
+        config["alice"] = {"abc": 123}
+        self.assertIsNone(config.get_index("alice"))
+        config.set_index("alice", {"def": 456})
+        self.assertEqual({"def": 456}, config.get_index("alice"))
+        # The index is stored apart from the profile.
+        self.assertEqual({"abc": 123}, config["alice"])
+
+    def test_replacing_profile_discards_index(self):
+        database = sqlite3.connect(":memory:")
+        config = api.ProfileConfig(database)
+        config["alice"] = {"abc": 123}
+        config.set_index("alice", {"def": 456})
+        config["alice"] = {"ghi": 789}
+        self.assertIsNone(config.get_index("alice"))
+
+    def test_removing_profile_discards_index(self):
+        database = sqlite3.connect(":memory:")
+        config = api.ProfileConfig(database)
+        config["alice"] = {"abc": 123}
+        config.set_index("alice", {"def": 456})
+        del config["alice"]
+        self.assertIsNone(config.get_index("alice"))
+
     def test_getting_profile(self):
         database = sqlite3.connect(":memory:")
         config = api.ProfileConfig(database)
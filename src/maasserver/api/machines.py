@@ -8,7 +8,14 @@ __all__ = [
     "get_storage_layout_params",
 ]
 
-from collections import namedtuple
+from collections import (
+    namedtuple,
+    OrderedDict,
+)
+from itertools import (
+    islice,
+    zip_longest,
+)
 import json
 import re
 
@@ -312,6 +319,60 @@ def get_allocated_composed_machine(
     return machine, storage, interfaces
 
 
+def pick_machines(machines, count, spread_zones=False):
+    """Pick `count` of `machines`, keeping them in order of preference.
+
+    :param spread_zones: When true, take machines from each zone in turn, so
+        that they are spread as evenly as the available machines allow.
+    :return: A list of at most `count` machines.
+    """
+    if not spread_zones:
+        return list(islice(machines, count))
+    machines_by_zone = OrderedDict()
+    for machine in machines:
+        machines_by_zone.setdefault(machine.zone_id, []).append(machine)
+    picked = []
+    for machines_in_turn in zip_longest(*machines_by_zone.values()):
+        picked.extend(
+            machine for machine in machines_in_turn if machine is not None)
+    return picked[:count]
+
+
+def set_constraints_by_type(machine, storage, interfaces, verbose=False):
+    """Record on `machine` which of its devices matched the constraints.
+
+    :param storage: The storage constraint map from `AcquireNodeForm`.
+    :param interfaces: The interface constraint map from `AcquireNodeForm`.
+    """
+    machine.constraint_map = storage.get(machine.id, {})
+    machine.constraints_by_type = {}
+    # Need to get the interface constraints map into the proper format
+    # to return it here.
+    # Backward compatibility: provide the storage constraints in both
+    # formats.
+    if len(machine.constraint_map) > 0:
+        machine.constraints_by_type['storage'] = {}
+        new_storage = machine.constraints_by_type['storage']
+        # Convert this to the "new style" constraints map format.
+        for storage_key in machine.constraint_map:
+            # Each key in the storage map is actually a value which
+            # contains the ID of the matching storage device.
+            # Convert this to a label: list-of-matches format, to
+            # match how the constraints will be done going forward.
+            new_key = machine.constraint_map[storage_key]
+            matches = new_storage.get(new_key, [])
+            matches.append(storage_key)
+            new_storage[new_key] = matches
+    if len(interfaces) > 0:
+        machine.constraints_by_type['interfaces'] = {
+            label: interfaces.get(label, {}).get(machine.id)
+            for label in interfaces
+        }
+    if verbose:
+        machine.constraints_by_type['verbose_storage'] = storage
+        machine.constraints_by_type['verbose_interfaces'] = interfaces
+
+
 class MachineHandler(NodeHandler, OwnerDataMixin, PowerMixin):
     """
     Manage an individual machine.
@@ -2227,35 +2288,102 @@ class MachinesHandler(NodesHandler, PowersMixin):
                     agent_name=options.agent_name, comment=options.comment,
                     bridge_all=options.bridge_all,
                     bridge_stp=options.bridge_stp, bridge_fd=options.bridge_fd)
-            machine.constraint_map = storage.get(machine.id, {})
-            machine.constraints_by_type = {}
-            # Need to get the interface constraints map into the proper format
-            # to return it here.
-            # Backward compatibility: provide the storage constraints in both
-            # formats.
-            if len(machine.constraint_map) > 0:
-                machine.constraints_by_type['storage'] = {}
-                new_storage = machine.constraints_by_type['storage']
-                # Convert this to the "new style" constraints map format.
-                for storage_key in machine.constraint_map:
-                    # Each key in the storage map is actually a value which
-                    # contains the ID of the matching storage device.
-                    # Convert this to a label: list-of-matches format, to
-                    # match how the constraints will be done going forward.
-                    new_key = machine.constraint_map[storage_key]
-                    matches = new_storage.get(new_key, [])
-                    matches.append(storage_key)
-                    new_storage[new_key] = matches
-            if len(interfaces) > 0:
-                machine.constraints_by_type['interfaces'] = {
-                    label: interfaces.get(label, {}).get(machine.id)
-                    for label in interfaces
-                }
-            if verbose:
-                machine.constraints_by_type['verbose_storage'] = storage
-                machine.constraints_by_type['verbose_interfaces'] = interfaces
+            set_constraints_by_type(machine, storage, interfaces, verbose)
             return machine
 
+    @operation(idempotent=False)
+    def allocate_many(self, request):
+        """@description-title Allocate several machines
+        @description Allocates a number of available machines that all match
+        the same constraints, in one request.
+
+        The constraints are matched once and all the machines are allocated
+        together, so this is much quicker than calling allocate repeatedly.
+        Either all of the machines are allocated or, if not enough of them
+        match, none are. Machines are not composed in pods to make up the
+        numbers.
+
+        Accepts the same constraints and options as allocate, plus:
+
+        @param (int) "count" [required=true] The number of machines to
+        allocate.
+
+        @param (boolean) "spread_zones" [required=false] Optional boolean to
+        indicate that the machines should be spread as evenly as possible
+        across the zones that the matching machines are in, instead of being
+        the best matches. Defaults to False.
+
+        @success (http-status-code) "200" 200
+        @success (json) "success-json" A JSON list containing the newly
+        allocated machine objects.
+        @success-example "success-json" [exkey=machines-allocate-many]
+        placeholder text
+
+        @error (http-status-code) "409" 409
+        @error (content) "no-match" Fewer than count machines matching the
+        given constraints could be found.
+        """
+        count = get_mandatory_param(
+            request.POST, 'count', validator=Int(min=1))
+        spread_zones = get_optional_param(
+            request.POST, 'spread_zones', default=False,
+            validator=StringBool)
+        data = request.data.copy()
+        for param in ('count', 'spread_zones'):
+            data.pop(param, None)
+        form = AcquireNodeForm(data=data)
+        input_constraints = [
+            param for param in data.lists() if param[0] != 'op']
+        maaslog.info(
+            "Request from user %s to acquire %d machines with "
+            "constraints: %s", request.user.username, count,
+            str(input_constraints))
+        options = get_allocation_options(request)
+        verbose = get_optional_param(
+            request.POST, 'verbose', default=False, validator=StringBool)
+        dry_run = get_optional_param(
+            request.POST, 'dry_run', default=False, validator=StringBool)
+
+        if not form.is_valid():
+            raise MAASAPIValidationError(form.errors)
+
+        # This lock prevents the machines we've picked as available from
+        # becoming unavailable before our transaction commits. It is held
+        # once for all of them.
+        with locks.node_acquire:
+            machines = (
+                self.base_model.objects.get_available_machines_for_acquisition(
+                    request.user)
+                )
+            machines, storage, interfaces = form.filter_nodes(machines)
+            machines = pick_machines(machines, count, spread_zones)
+            if len(machines) < count:
+                constraints = form.describe_constraints()
+                if constraints == '':
+                    message = (
+                        "%d machines requested but only %d available." % (
+                            count, len(machines)))
+                else:
+                    message = (
+                        '%d machines requested but only %d available match '
+                        'constraints: %s (resolved to "%s")' % (
+                            count, len(machines), str(input_constraints),
+                            constraints))
+                raise NodesNotAvailable(message)
+            token = get_oauth_token(request)
+            for machine in machines:
+                if not dry_run:
+                    machine.acquire(
+                        request.user, token,
+                        agent_name=options.agent_name,
+                        comment=options.comment,
+                        bridge_all=options.bridge_all,
+                        bridge_stp=options.bridge_stp,
+                        bridge_fd=options.bridge_fd)
+                set_constraints_by_type(
+                    machine, storage, interfaces, verbose)
+            return machines
+
     @admin_method
     @operation(idempotent=False)
     def add_chassis(self, request):
@@ -16,6 +16,7 @@ import bson
 from django.db.models import Prefetch
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
+from formencode.validators import Int
 from maasserver.api.support import (
     admin_method,
     AnonymousOperationsHandler,
@@ -55,6 +56,7 @@ from maasserver.models import (
 )
 from maasserver.models.nodeprobeddetails import get_single_probed_details
 from maasserver.permissions import NodePermission
+from maasserver.utils.django_urls import reverse
 from maasserver.utils.orm import prefetch_queryset
 from metadataserver.enum import (
     HARDWARE_TYPE,
@@ -63,6 +65,8 @@ from metadataserver.enum import (
     SCRIPT_STATUS_CHOICES,
 )
 from metadataserver.models.scriptset import get_status_from_qs
+from piston3.emitters import JSONEmitter
+from piston3.handler import typemapper
 from piston3.utils import rc
 from provisioningserver.drivers.power import UNKNOWN_POWER_TYPE
 
@@ -677,6 +681,19 @@ class NodesHandler(OperationsHandler):
         @param (string) "agent_name" [required=false] Only nodes relating to
         the nodes with matching agent names will be returned.
 
+        @param (int) "limit" [required=false] Return at most this many nodes.
+        Not supported when listing all nodes.
+
+        @param (string) "after" [required=false] Only nodes after the node with
+        this system_id will be returned. Use with ``limit`` to page through
+        the nodes, passing the system_id of the last node of each page. Not
+        supported when listing all nodes.
+
+        @param (string) "field" [required=false] Only return this field of each
+        node, along with its system_id and resource_uri. This can be specified
+        multiple times to return multiple fields. Not supported when listing
+        all nodes.
+
         @success (http-status-code) "200" 200
 
         @success (json) "success_json" A JSON object containing a list of node
@@ -693,27 +710,108 @@ class NodesHandler(OperationsHandler):
             from maasserver.api.regioncontrollers import (
                 RegionControllersHandler
             )
-            racks = RackControllersHandler().read(request).order_by("id")
+            racks = RackControllersHandler().read_nodes(request)
             nodes = list(chain(
-                DevicesHandler().read(request).order_by("id"),
-                MachinesHandler().read(request).order_by("id"),
+                DevicesHandler().read_nodes(request),
+                MachinesHandler().read_nodes(request),
                 racks,
-                RegionControllersHandler().read(request).exclude(
-                    id__in=racks).order_by("id"),
+                RegionControllersHandler().read_nodes(request).exclude(
+                    id__in=racks),
             ))
             return nodes
         else:
-            nodes = filtered_nodes_list_from_request(request, self.base_model)
-            nodes = nodes.select_related(*NODES_SELECT_RELATED)
-            nodes = prefetch_queryset(
-                nodes, NODES_PREFETCH).order_by('id')
+            fields = self._get_projected_fields(request)
+            nodes = self.read_nodes(request)
+            after = get_optional_param(request.GET, 'after')
+            if after is not None:
+                after_ids = list(Node.objects.filter(
+                    system_id=after).values_list('id', flat=True))
+                if len(after_ids) == 0:
+                    raise MAASAPIValidationError(
+                        "Unknown node in 'after': %s" % after)
+                nodes = nodes.filter(id__gt=after_ids[0])
+            limit = get_optional_param(
+                request.GET, 'limit', validator=Int(min=1))
+            if limit is not None:
+                nodes = nodes[:limit]
             # Set related node parents so no extra queries are needed.
             for node in nodes:
                 for interface in node.interface_set.all():
                     interface.node = node
                 for block_device in node.blockdevice_set.all():
                     block_device.node = node
-            return nodes
+            if fields is None:
+                return nodes
+            else:
+                emitter = JSONEmitter(
+                    self._project_nodes(nodes, fields), typemapper, None)
+                return HttpResponse(
+                    emitter.render(request),
+                    content_type='application/json; charset=utf-8')
+
+    def read_nodes(self, request):
+        """Return the nodes visible to the user, filtered by `request`.
+
+        :return: A `QuerySet` ordered by id, prefetching everything that is
+            needed to display the nodes.
+        """
+        nodes = filtered_nodes_list_from_request(request, self.base_model)
+        nodes = nodes.select_related(*NODES_SELECT_RELATED)
+        return prefetch_queryset(nodes, NODES_PREFETCH).order_by('id')
+
+    def _get_item_handler(self):
+        """Return the handler that piston displays each listed node with."""
+        for handler, (model, anonymous) in typemapper.items():
+            if model is self.base_model and not anonymous:
+                return handler
+        raise AssertionError(
+            "No handler displays %s." % self.base_model.__name__)
+
+    def _get_projected_fields(self, request):
+        """Return the fields to display for the `field` params in `request`.
+
+        :return: The names of a subset of the item handler's `fields`, always
+            including the system_id, or `None` if no fields were requested.
+        """
+        requested = get_optional_list(request.GET, 'field')
+        if requested is None:
+            return None
+        known = {
+            field if isinstance(field, str) else field[0]
+            for field in self._get_item_handler().fields
+        }
+        unknown = set(requested).difference(known)
+        if len(unknown) != 0:
+            raise MAASAPIValidationError(
+                "Unknown field(s): %s" % ", ".join(sorted(unknown)))
+        return ('system_id',) + tuple(
+            name for name in requested if name != 'system_id')
+
+    def _project_nodes(self, nodes, fields):
+        """Return a dict of only the named `fields` for each of `nodes`.
+
+        Piston always displays every field of the handler mapped to a model,
+        so the nodes are displayed as dicts instead, in the same way.
+        """
+        handler = self._get_item_handler()
+        projected = []
+        for node in nodes:
+            representation = {}
+            for name in fields:
+                method = getattr(handler, name, None)
+                if callable(method):
+                    value = method(node)
+                else:
+                    value = getattr(node, name)
+                    if hasattr(value, 'all'):
+                        value = value.all()
+                    elif callable(value):
+                        value = value()
+                representation[name] = value
+            url_name, args = handler.resource_uri(node)
+            representation['resource_uri'] = reverse(url_name, args=args)
+            projected.append(representation)
+        return projected
 
     @operation(idempotent=True)
     def is_registered(self, request):
@@ -265,6 +265,28 @@ class TestDevicesAPI(APITestCase.ForUser):
             list(parsed_result[0]))
 
 
+    def test_read_with_field_returns_only_those_fields(self):
+        device = factory.make_Device(owner=self.user)
+        response = self.client.get(reverse('devices_handler'), {
+            'field': ['hostname', 'parent'],
+        })
+        self.assertEqual(http.client.OK, response.status_code)
+        [parsed_device] = json_load_bytes(response.content)
+        self.assertEqual({
+            'system_id': device.system_id,
+            'hostname': device.hostname,
+            'parent': None,
+            'resource_uri': reverse(
+                'device_handler', args=[device.system_id]),
+        }, parsed_device)
+
+    def test_read_with_unknown_field_returns_error(self):
+        factory.make_Device(owner=self.user)
+        response = self.client.get(reverse('devices_handler'), {
+            'field': ['cpu_count'],
+        })
+        self.assertEqual(http.client.BAD_REQUEST, response.status_code)
+
 def get_device_uri(device):
     """Return a device's URI on the API."""
     return reverse('device_handler', args=[device.system_id])
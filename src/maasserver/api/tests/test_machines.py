@@ -8,6 +8,7 @@ __all__ = []
 import http.client
 import json
 import random
+from unittest.mock import Mock
 
 from django.conf import settings
 from django.test import RequestFactory
@@ -19,6 +20,7 @@ from maasserver.api import machines as machines_module
 from maasserver.api.machines import (
     AllocationOptions,
     get_allocation_options,
+    pick_machines,
 )
 from maasserver.enum import (
     INTERFACE_TYPE,
@@ -392,6 +394,64 @@ class TestMachinesAPI(APITestCase.ForUser):
             [machine.system_id for machine in machines],
             extract_system_ids(parsed_result))
 
+    def test_GET_with_limit_returns_first_machines(self):
+        machines = [factory.make_Node() for counter in range(3)]
+        response = self.client.get(reverse('machines_handler'), {
+            'limit': 2,
+        })
+        self.assertEqual(http.client.OK, response.status_code)
+        parsed_result = json.loads(
+            response.content.decode(settings.DEFAULT_CHARSET))
+        self.assertSequenceEqual(
+            [machine.system_id for machine in machines[:2]],
+            extract_system_ids(parsed_result))
+
+    def test_GET_with_after_returns_following_machines(self):
+        machines = [factory.make_Node() for counter in range(4)]
+        response = self.client.get(reverse('machines_handler'), {
+            'after': machines[1].system_id,
+            'limit': 1,
+        })
+        self.assertEqual(http.client.OK, response.status_code)
+        parsed_result = json.loads(
+            response.content.decode(settings.DEFAULT_CHARSET))
+        self.assertSequenceEqual(
+            [machines[2].system_id], extract_system_ids(parsed_result))
+
+    def test_GET_with_unknown_after_returns_error(self):
+        response = self.client.get(reverse('machines_handler'), {
+            'after': factory.make_name('system_id'),
+        })
+        self.assertEqual(http.client.BAD_REQUEST, response.status_code)
+
+    def test_GET_with_invalid_limit_returns_error(self):
+        response = self.client.get(reverse('machines_handler'), {
+            'limit': 0,
+        })
+        self.assertEqual(http.client.BAD_REQUEST, response.status_code)
+
+    def test_GET_with_field_returns_only_those_fields(self):
+        machine = factory.make_Node()
+        response = self.client.get(reverse('machines_handler'), {
+            'field': ['hostname', 'interface_set'],
+        })
+        self.assertEqual(http.client.OK, response.status_code)
+        [parsed_machine] = json.loads(
+            response.content.decode(settings.DEFAULT_CHARSET))
+        self.assertItemsEqual(
+            ['system_id', 'hostname', 'interface_set', 'resource_uri'],
+            parsed_machine)
+        self.assertEqual(machine.hostname, parsed_machine['hostname'])
+
+    def test_GET_with_unknown_field_returns_error(self):
+        response = self.client.get(reverse('machines_handler'), {
+            'field': ['hostname', 'unknown'],
+        })
+        self.assertEqual(http.client.BAD_REQUEST, response.status_code)
+        self.assertIn(
+            "Unknown field(s): unknown",
+            response.content.decode(settings.DEFAULT_CHARSET))
+
     def test_GET_with_id_returns_matching_machines(self):
         # The "read" operation takes optional "id" parameters.  Only
         # machines with matching ids will be returned.
@@ -1094,6 +1154,104 @@ class TestMachinesAPI(APITestCase.ForUser):
         self.assertThat(
             machine_acquire.__exit__, MockCalledOnceWith(None, None, None))
 
+    def test_POST_allocate_many_allocates_count_machines(self):
+        machines = [
+            factory.make_Node(
+                status=NODE_STATUS.READY, owner=None, with_boot_disk=True)
+            for _ in range(3)
+        ]
+        response = self.client.post(
+            reverse('machines_handler'), {'op': 'allocate_many', 'count': 2})
+        self.assertEqual(http.client.OK, response.status_code)
+        parsed_result = json.loads(
+            response.content.decode(settings.DEFAULT_CHARSET))
+        self.assertEqual(2, len(parsed_result))
+        allocated = {machine['system_id'] for machine in parsed_result}
+        self.assertEqual(allocated, {
+            machine.system_id for machine in machines
+            if reload_object(machine).owner == self.user
+        })
+
+    def test_POST_allocate_many_matches_constraints(self):
+        tagged = [
+            factory.make_Node(
+                status=NODE_STATUS.READY, owner=None, with_boot_disk=True)
+            for _ in range(2)
+        ]
+        factory.make_Node(
+            status=NODE_STATUS.READY, owner=None, with_boot_disk=True)
+        tag = factory.make_Tag()
+        for machine in tagged:
+            machine.tags.add(tag)
+        response = self.client.post(reverse('machines_handler'), {
+            'op': 'allocate_many',
+            'count': 2,
+            'tags': tag.name,
+        })
+        self.assertEqual(http.client.OK, response.status_code)
+        parsed_result = json.loads(
+            response.content.decode(settings.DEFAULT_CHARSET))
+        self.assertItemsEqual(
+            [machine.system_id for machine in tagged],
+            [machine['system_id'] for machine in parsed_result])
+
+    def test_POST_allocate_many_allocates_nothing_if_too_few_match(self):
+        machine = factory.make_Node(
+            status=NODE_STATUS.READY, owner=None, with_boot_disk=True)
+        response = self.client.post(
+            reverse('machines_handler'), {'op': 'allocate_many', 'count': 2})
+        self.assertEqual(http.client.CONFLICT, response.status_code)
+        self.assertEqual(
+            "2 machines requested but only 1 available.",
+            response.content.decode(settings.DEFAULT_CHARSET))
+        self.assertIsNone(reload_object(machine).owner)
+
+    def test_POST_allocate_many_requires_count(self):
+        response = self.client.post(
+            reverse('machines_handler'), {'op': 'allocate_many'})
+        self.assertEqual(http.client.BAD_REQUEST, response.status_code)
+
+    def test_POST_allocate_many_spreads_zones(self):
+        zones = [factory.make_Zone() for _ in range(2)]
+        for zone in zones:
+            for _ in range(2):
+                factory.make_Node(
+                    status=NODE_STATUS.READY, owner=None, zone=zone,
+                    with_boot_disk=True)
+        response = self.client.post(reverse('machines_handler'), {
+            'op': 'allocate_many',
+            'count': 2,
+            'spread_zones': True,
+        })
+        self.assertEqual(http.client.OK, response.status_code)
+        parsed_result = json.loads(
+            response.content.decode(settings.DEFAULT_CHARSET))
+        self.assertItemsEqual(
+            [zone.name for zone in zones],
+            [machine['zone']['name'] for machine in parsed_result])
+
+    def test_POST_allocate_many_dry_run_does_not_allocate(self):
+        machine = factory.make_Node(
+            status=NODE_STATUS.READY, owner=None, with_boot_disk=True)
+        response = self.client.post(reverse('machines_handler'), {
+            'op': 'allocate_many',
+            'count': 1,
+            'dry_run': True,
+        })
+        self.assertEqual(http.client.OK, response.status_code)
+        self.assertIsNone(reload_object(machine).owner)
+
+    def test_POST_allocate_many_uses_machine_acquire_lock_once(self):
+        for _ in range(2):
+            factory.make_Node(
+                status=NODE_STATUS.READY, owner=None, with_boot_disk=True)
+        machine_acquire = self.patch(machines_module.locks, 'node_acquire')
+        self.client.post(
+            reverse('machines_handler'), {'op': 'allocate_many', 'count': 2})
+        self.assertThat(machine_acquire.__enter__, MockCalledOnceWith())
+        self.assertThat(
+            machine_acquire.__exit__, MockCalledOnceWith(None, None, None))
+
     def test_POST_allocate_sets_agent_name(self):
         available_status = NODE_STATUS.READY
         machine = factory.make_Node(
@@ -2811,3 +2969,23 @@ class TestGetAllocationOptions(MAASTestCase):
             agent_name='maas', bridge_all=True, bridge_fd=42, bridge_stp=True,
             comment="don't panic", install_rackd=True, install_kvm=True)
         self.assertThat(options, Equals(expected_options))
+
+
+class TestPickMachines(MAASTestCase):
+
+    def make_machines(self, *zone_ids):
+        return [Mock(zone_id=zone_id) for zone_id in zone_ids]
+
+    def test_picks_first_machines_in_order(self):
+        machines = self.make_machines(1, 1, 2, 2)
+        self.assertEqual(machines[:3], pick_machines(machines, 3))
+
+    def test_returns_fewer_if_not_enough(self):
+        machines = self.make_machines(1, 2)
+        self.assertEqual(machines, pick_machines(machines, 3))
+
+    def test_spreads_zones_in_turn(self):
+        machines = self.make_machines(1, 1, 1, 2, 3, 3)
+        self.assertEqual(
+            [machines[0], machines[3], machines[4], machines[1]],
+            pick_machines(machines, 4, spread_zones=True))
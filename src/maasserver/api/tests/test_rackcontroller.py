@@ -53,6 +53,19 @@ class TestRackControllerAPI(APITransactionTestCase.ForUser):
         rack = factory.make_RackController(owner=self.user)
         response = self.client.put(self.get_rack_uri(rack), {})
         self.assertEqual(http.client.FORBIDDEN, response.status_code)
+    def test_read_with_field_returns_only_those_fields(self):
+        self.become_admin()
+        rack = factory.make_RackController(owner=self.user)
+        response = self.client.get(reverse('rackcontrollers_handler'), {
+            'field': ['hostname', 'version'],
+        })
+        self.assertEqual(http.client.OK, response.status_code)
+        [parsed_rack] = json_load_bytes(response.content)
+        self.assertItemsEqual(
+            ['system_id', 'hostname', 'version', 'resource_uri'],
+            parsed_rack)
+        self.assertEqual(rack.hostname, parsed_rack['hostname'])
+
 
     def test_POST_import_boot_images_import_to_rack_controllers(self):
         from maasserver.clusterrpc import boot_images
@@ -164,3 +164,16 @@ class TestRegionControllersAPI(APITestCase.ForUser):
                 'tag_names',
             ],
             list(parsed_result[0]))
+
+    def test_read_with_field_returns_only_those_fields(self):
+        self.become_admin()
+        region = factory.make_RegionController()
+        response = self.client.get(reverse('regioncontrollers_handler'), {
+            'field': ['hostname', 'version'],
+        })
+        self.assertEqual(http.client.OK, response.status_code)
+        [parsed_region] = json_load_bytes(response.content)
+        self.assertItemsEqual(
+            ['system_id', 'hostname', 'version', 'resource_uri'],
+            parsed_region)
+        self.assertEqual(region.hostname, parsed_region['hostname'])
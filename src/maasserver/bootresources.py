@@ -17,6 +17,7 @@ __all__ = [
 from datetime import timedelta
 from operator import itemgetter
 import os
+import re
 from subprocess import CalledProcessError
 from textwrap import dedent
 import threading
@@ -26,8 +27,13 @@ from django.db import (
     connection,
     connections,
 )
+from django.db.models import (
+    F,
+    Sum,
+)
 from django.db.utils import load_backend
 from django.http import (
+    FileResponse,
     Http404,
     HttpResponse,
     StreamingHttpResponse,
@@ -62,12 +68,17 @@ from maasserver.models import (
     Event,
     LargeFile,
 )
+from maasserver.models.largefile import (
+    cache_content_later,
+    get_largefile_cache_path,
+)
 from maasserver.rpc import getAllClients
 from maasserver.utils import (
     absolute_reverse,
     get_maas_user_agent,
     synchronised,
 )
+from maasserver.utils.converters import human_readable_bytes
 from maasserver.utils.dblocks import DatabaseLockNotHeld
 from maasserver.utils.orm import (
     get_one,
@@ -198,6 +209,101 @@ class ConnectionWrapper:
             self._connection = None
 
 
+class FileRangeWrapper:
+    """Iterates over the bytes of `stream` from `start` up to `stop`.
+
+    Like `ConnectionWrapper`, `stream` is closed upon close of the wrapper.
+    """
+
+    block_size = 1 << 16
+
+    def __init__(self, stream, start, stop):
+        self.stream = stream
+        self.remaining = stop - start
+        self.stream.seek(start)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.remaining <= 0:
+            raise StopIteration
+        data = self.stream.read(min(self.block_size, self.remaining))
+        if len(data) == 0:
+            raise StopIteration
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        """Close the stream."""
+        self.stream.close()
+
+
+def parse_byte_range(header, size):
+    """Parse the value of a HTTP `Range` header.
+
+    Only a single range of bytes is supported. Anything else, including a
+    malformed header, is ignored as RFC 7233 permits; the whole content
+    should be sent instead.
+
+    :param header: The value of the header, or `None`.
+    :param size: The size of the content.
+    :return: A ``(start, stop)`` tuple, where `stop` is exclusive, or `None`
+        if `header` is to be ignored. `start` is not less than `size` when
+        the range cannot be satisfied.
+    """
+    if header is None:
+        return None
+    match = re.match(r"^bytes=(\d*)-(\d*)$", header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if first == "":
+        if last == "":
+            return None
+        # A suffix range: the final `last` bytes. There are none to send
+        # when `last` is zero, so that cannot be satisfied.
+        length = int(last)
+        if length == 0:
+            return size, size
+        else:
+            return max(0, size - length), size
+    elif last == "":
+        return int(first), size
+    elif int(last) < int(first):
+        return None
+    else:
+        return int(first), min(int(last) + 1, size)
+
+
+def get_file_response(request, path, size):
+    """Return a response serving the file at `path`.
+
+    A single range of bytes can be requested with a `Range` header, so
+    interrupted downloads can be resumed. Otherwise the whole file is sent
+    with a `FileResponse`, which a server can send using `sendfile`.
+    """
+    byte_range = parse_byte_range(request.META.get('HTTP_RANGE'), size)
+    if byte_range is None:
+        response = FileResponse(
+            open(path, 'rb'), content_type='application/octet-stream')
+        response.block_size = FileRangeWrapper.block_size
+        response['Content-Length'] = size
+    else:
+        start, stop = byte_range
+        if start >= size:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */%d' % size
+            return response
+        response = StreamingHttpResponse(
+            FileRangeWrapper(open(path, 'rb'), start, stop),
+            content_type='application/octet-stream', status=206)
+        response['Content-Range'] = 'bytes %d-%d/%d' % (start, stop - 1, size)
+        response['Content-Length'] = stop - start
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
 class SimpleStreamsHandler:
     """Simplestreams endpoint, that the racks talk to.
 
@@ -365,10 +471,19 @@ class SimpleStreamsHandler:
             rfile = resource_set.files.get(filename=filename)
         except BootResourceFile.DoesNotExist:
             raise Http404()
+        largefile = rfile.largefile
+        # Serve the content from this region's on-disk copy, so that the
+        # transfer does not hold a database connection. Until the copy has
+        # been made, in the background, serve it from the database.
+        path = largefile.get_cached_content_path()
+        if path is not None:
+            return get_file_response(request, path, largefile.total_size)
+        if largefile.complete:
+            cache_content_later(largefile.sha256)
         response = StreamingHttpResponse(
-            ConnectionWrapper(rfile.largefile.content),
+            ConnectionWrapper(largefile.content),
             content_type='application/octet-stream')
-        response['Content-Length'] = rfile.largefile.total_size
+        response['Content-Length'] = largefile.total_size
         return response
 
 
@@ -423,6 +538,9 @@ class BootResourceStore(ObjectStore):
         """Initialize store."""
         self.cache_current_resources()
         self._content_to_finalize = {}
+        # The ids of the `LargeFile`s whose content will be written during
+        # finalization, so each is only written once.
+        self._largefiles_to_finalize = set()
         self._finalizing = False
         self._cancel_finalize = False
 
@@ -703,6 +821,15 @@ class BootResourceStore(ObjectStore):
             needs_saving = True
             log.debug(
                 "New large file created {lf}.", lf=largefile)
+        elif not largefile.complete:
+            # The content of this largefile was only partly written, most
+            # likely by an import that was interrupted. Writing will resume
+            # from where it stopped, unless another resource file with the
+            # same content is already going to write it.
+            needs_saving = largefile.id not in self._largefiles_to_finalize
+            if needs_saving:
+                # Mark it as part of this import; see `get_import_started`.
+                largefile.save(update_fields=['updated'])
 
         # A largefile now exists for this resource file. Its either a new
         # largefile or an existing one that already existed in the database.
@@ -734,6 +861,7 @@ class BootResourceStore(ObjectStore):
             # database. This method only performs the saving of metadata into
             # the database. This resource is marked to be saved later, which
             # will occur in the finalize method.
+            self._largefiles_to_finalize.add(largefile.id)
             self.save_content_later(rfile, reader)
         else:
             ident = self.get_resource_file_log_identifier(
@@ -756,9 +884,35 @@ class BootResourceStore(ObjectStore):
             {'sha256': rfile.largefile.sha256})
         log.debug("Finalizing boot image {ident}.", ident=ident)
 
-        # Ensure that the size of the largefile starts at zero.
-        rfile.largefile.size = 0
-        transactional(rfile.largefile.save)(update_fields=['size'])
+        @transactional
+        def resume_content():
+            """Keep the content already written into the largefile.
+
+            The content is committed a chunk at a time, so an interrupted
+            import leaves behind `size` bytes of valid content. These are
+            added to the checksum and anything written beyond them is
+            discarded, so only the remainder needs to be downloaded.
+            """
+            size = 0
+            with rfile.largefile.content.open('rwb') as stream:
+                while size < rfile.largefile.size:
+                    buf = stream.read(
+                        min(self.read_size, rfile.largefile.size - size))
+                    if len(buf) == 0:
+                        break
+                    cksummer.update(buf)
+                    size += len(buf)
+                stream.truncate(size)
+            rfile.largefile.size = size
+            rfile.largefile.save(update_fields=['size'])
+            return size
+
+        offset = resume_content()
+        if offset > 0:
+            log.debug(
+                "Resuming boot image {ident} from {offset} bytes.",
+                ident=ident, offset=offset)
+            self.skip_content(reader, offset)
 
         @transactional
         def write_chunk():
@@ -806,6 +960,20 @@ class BootResourceStore(ObjectStore):
         else:
             log.debug('Finalized boot image {ident}.', ident=ident)
 
+    def skip_content(self, reader, offset):
+        """Skip the first `offset` bytes of the content from `reader`."""
+        try:
+            # Simplestreams' `UrlContentSource` can ask the server to start
+            # part way through the content.
+            reader.set_start_pos(offset)
+        except (AttributeError, NotImplementedError):
+            # Otherwise the content before `offset` is read and discarded.
+            while offset > 0:
+                buf = reader.read(min(self.read_size, offset))
+                if len(buf) == 0:
+                    break
+                offset -= len(buf)
+
     def perform_write(self):
         """Performs all writing of content into the object storage.
 
@@ -1406,6 +1574,19 @@ def is_import_resources_running():
     return locks.import_images.is_locked()
 
 
+def get_import_started():
+    """Return when the most recent import started, or `None`.
+
+    Imports record an event as they start. Every `LargeFile` an import
+    creates or writes has been updated since then.
+    """
+    event = Event.objects.filter(
+        type__name=EVENT_TYPES.REGION_IMPORT_INFO,
+        description__startswith="Started importing of boot images")
+    event = event.order_by('-created', '-id').first()
+    return None if event is None else event.created
+
+
 @asynchronous
 @inlineCallbacks
 def stop_import_resources():
@@ -1479,6 +1660,9 @@ class ImportResourcesProgressService(TimerService, object):
     def __init__(self, interval=timedelta(minutes=3)):
         super(ImportResourcesProgressService, self).__init__(
             interval.total_seconds(), self.try_check_boot_images)
+        # When the last check was made, and how many bytes of boot resource
+        # content remained to be written at the time.
+        self.import_progress = None
 
     def try_check_boot_images(self):
         return self.check_boot_images().addErrback(
@@ -1486,6 +1670,9 @@ class ImportResourcesProgressService(TimerService, object):
 
     @inlineCallbacks
     def check_boot_images(self):
+        yield deferToDatabase(self.report_import_progress)
+        yield deferToDatabase(self.prune_largefile_cache)
+        yield deferToDatabase(self.fill_largefile_cache)
         if (yield deferToDatabase(
                 self.are_boot_images_available_in_the_region)):
             # The region has boot resources. The racks will too soon if
@@ -1514,6 +1701,102 @@ class ImportResourcesProgressService(TimerService, object):
     <a href="%(images_link)s">boot images</a> page to start the import.
     """)
 
+    @transactional
+    def report_import_progress(self):
+        """Log the progress of writing boot resource content.
+
+        Only the content of the running import is counted, so nothing is
+        logged when no import is running, nor for files left incomplete by
+        an earlier import. The throughput is measured since the previous
+        check, and is used to estimate the time remaining.
+        """
+        if is_import_resources_running():
+            largefiles = LargeFile.objects.filter(size__lt=F('total_size'))
+            started = get_import_started()
+            if started is not None:
+                largefiles = largefiles.filter(updated__gte=started)
+            remaining = largefiles.aggregate(
+                remaining=Sum(F('total_size') - F('size')))['remaining']
+        else:
+            remaining = None
+        now = time.monotonic()
+        previous, self.import_progress = self.import_progress, (
+            None if remaining is None else (now, remaining))
+        if remaining is None:
+            # No content is being written.
+            return
+
+        rate = 0
+        if previous is not None:
+            previous_time, previous_remaining = previous
+            rate = (previous_remaining - remaining) / (now - previous_time)
+        if rate > 0:
+            maaslog.info(
+                "Importing boot images; %s remaining at %s/s, "
+                "about %s left." % (
+                    human_readable_bytes(remaining),
+                    human_readable_bytes(rate),
+                    timedelta(seconds=int(remaining / rate))))
+        else:
+            maaslog.info(
+                "Importing boot images; %s remaining." % (
+                    human_readable_bytes(remaining)))
+
+    @transactional
+    def prune_largefile_cache(self):
+        """Remove this region's on-disk copies of deleted `LargeFile`s.
+
+        Copies are removed by the region that deletes a `LargeFile`; this
+        catches up the other regions. Temporary files left behind by an
+        interrupted copy are removed too, once they are an hour old.
+        """
+        cache_path = get_largefile_cache_path()
+        try:
+            filenames = os.listdir(cache_path)
+        except FileNotFoundError:
+            return
+        sha256s = set(LargeFile.objects.values_list('sha256', flat=True))
+        stale = time.time() - timedelta(hours=1).total_seconds()
+        for filename in filenames:
+            path = os.path.join(cache_path, filename)
+            try:
+                if filename.startswith('.'):
+                    if os.path.getmtime(path) < stale:
+                        os.unlink(path)
+                elif filename not in sha256s:
+                    os.unlink(path)
+            except FileNotFoundError:
+                pass  # Removed by another process.
+
+    def fill_largefile_cache(self):
+        """Copy complete `LargeFile`s into this region's on-disk cache.
+
+        Content is served from the database until it has been copied, so
+        this fills the cache once an import has finished, and on regions
+        other than the one that ran the import. Each file is copied in its
+        own transaction.
+        """
+        sha256s = transactional(self._get_complete_largefiles)()
+        for sha256 in sha256s:
+            try:
+                transactional(self._cache_largefile)(sha256)
+            except OSError as error:
+                maaslog.warning(
+                    "Unable to cache boot resource content: %s", error)
+                break
+
+    def _get_complete_largefiles(self):
+        return [
+            sha256 for sha256 in LargeFile.objects.filter(
+                size=F('total_size')).values_list('sha256', flat=True)
+            if not os.path.isfile(get_largefile_cache_path(sha256))
+        ]
+
+    def _cache_largefile(self, sha256):
+        largefile = LargeFile.objects.get_file(sha256)
+        if largefile is not None:
+            largefile.cache_content()
+
     @transactional
     def clear_import_warning(self):
         discard_persistent_error(COMPONENT.IMPORT_PXE_FILES)
@@ -0,0 +1,48 @@
+# Copyright 2018 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""RPC helpers relating to boot configurations."""
+
+__all__ = [
+    "invalidate_boot_configs",
+]
+
+from maasserver.rpc import getAllClients
+from provisioningserver.logger import LegacyLogger
+from provisioningserver.rpc.cluster import InvalidateBootConfigs
+from provisioningserver.utils.twisted import asynchronous
+from twisted.internet.defer import DeferredList
+from twisted.protocols.amp import UnhandledCommand
+
+
+log = LegacyLogger()
+
+
+@asynchronous
+def invalidate_boot_configs(system_ids=None):
+    """Tell every connected rack controller to discard its cached boot
+    configurations.
+
+    :param system_ids: The system IDs of nodes whose boot configuration has
+        changed, or `None` to discard all cached boot configurations.
+    :return: A `DeferredList` that fires once every rack controller has
+        been told. Failures are logged, not propagated.
+    """
+    def ignore_unhandled_command(failure, client):
+        if failure.check(UnhandledCommand):
+            # Rack controllers that do not support this method do not cache
+            # boot configurations.
+            return None
+        log.err(
+            failure, "Failed to invalidate boot configurations on %s." % (
+                client.ident,))
+
+    kwargs = {}
+    if system_ids is not None:
+        kwargs["system_ids"] = sorted(system_ids)
+    deferreds = []
+    for client in getAllClients():
+        d = client(InvalidateBootConfigs, **kwargs)
+        d.addErrback(ignore_unhandled_command, client)
+        deferreds.append(d)
+    return DeferredList(deferreds)
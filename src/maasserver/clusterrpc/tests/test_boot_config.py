@@ -0,0 +1,84 @@
+# Copyright 2018 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Tests for :py:mod:`maasserver.clusterrpc.boot_config`."""
+
+__all__ = []
+
+from unittest.mock import Mock
+
+from crochet import wait_for
+from maasserver.clusterrpc import boot_config as boot_config_module
+from maasserver.clusterrpc.boot_config import invalidate_boot_configs
+from maasserver.testing.factory import factory
+from maasserver.testing.testcase import MAASServerTestCase
+from maastesting.matchers import (
+    DocTestMatches,
+    MockCalledOnceWith,
+)
+from maastesting.twisted import TwistedLoggerFixture
+from provisioningserver.rpc.cluster import InvalidateBootConfigs
+from twisted.internet.defer import (
+    fail,
+    inlineCallbacks,
+    succeed,
+)
+from twisted.protocols.amp import UnhandledCommand
+
+
+wait_for_reactor = wait_for(30)  # 30 seconds.
+
+
+class TestInvalidateBootConfigs(MAASServerTestCase):
+    """Tests for `invalidate_boot_configs`."""
+
+    def make_client(self, result=None):
+        client = Mock()
+        client.ident = factory.make_name("system_id")
+        client.return_value = succeed({}) if result is None else result
+        return client
+
+    def patch_clients(self, clients):
+        self.patch(boot_config_module, "getAllClients").return_value = clients
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test__calls_InvalidateBootConfigs_on_all_clients(self):
+        clients = [self.make_client() for _ in range(3)]
+        self.patch_clients(clients)
+        yield invalidate_boot_configs()
+        for client in clients:
+            self.assertThat(client, MockCalledOnceWith(InvalidateBootConfigs))
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test__passes_system_ids(self):
+        client = self.make_client()
+        self.patch_clients([client])
+        system_ids = [factory.make_name("system_id") for _ in range(3)]
+        yield invalidate_boot_configs(set(system_ids))
+        self.assertThat(client, MockCalledOnceWith(
+            InvalidateBootConfigs, system_ids=sorted(system_ids)))
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test__ignores_clients_without_support(self):
+        client = self.make_client(fail(UnhandledCommand()))
+        other_client = self.make_client()
+        self.patch_clients([client, other_client])
+        with TwistedLoggerFixture() as logger:
+            yield invalidate_boot_configs()
+        self.assertEqual("", logger.output)
+        self.assertThat(other_client, MockCalledOnceWith(
+            InvalidateBootConfigs))
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test__logs_failures(self):
+        client = self.make_client(fail(factory.make_exception()))
+        self.patch_clients([client])
+        with TwistedLoggerFixture() as logger:
+            yield invalidate_boot_configs()
+        self.assertThat(logger.output, DocTestMatches(
+            "Failed to invalidate boot configurations on %s.\n..." % (
+                client.ident,)))
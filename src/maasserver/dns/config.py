@@ -30,6 +30,7 @@ from netaddr import IPAddress
 from provisioningserver.dns.actions import (
     bind_reload,
     bind_reload_with_retries,
+    bind_reload_zones,
     bind_write_configuration,
     bind_write_options,
     bind_write_zones,
@@ -51,10 +52,10 @@ def is_dns_enabled():
 
 def dns_force_reload():
     """Force the DNS to be regenerated."""
-    DNSPublication(source="Force reload").save()
+    DNSPublication(source="Force reload", force=True).save()
 
 
-def dns_update_all_zones(reload_retry=False):
+def dns_update_all_zones(reload_retry=False, published=None):
     """Update all zone files for all domains.
 
     Serving these zone files means updating BIND's configuration to include
@@ -63,6 +64,13 @@ def dns_update_all_zones(reload_retry=False):
     :param reload_retry: Should the DNS server reload be retried in case
         of failure? Defaults to `False`.
     :type reload_retry: bool
+    :param published: A dict kept by the caller between calls, recording
+        what was last published. When given, and neither the set of zones
+        nor BIND's configuration has changed since the last call, only the
+        zones whose contents have changed are written and reloaded. Every
+        zone is written and reloaded after a forced publication, e.g. from
+        `dns_force_reload`, so that BIND picks up the new serial.
+    :type published: dict
     """
     if not is_dns_enabled():
         return
@@ -74,6 +82,27 @@ def dns_update_all_zones(reload_retry=False):
     zones = ZoneGenerator(
         domains, subnets, default_ttl,
         serial, internal_domains=[get_internal_domain()]).as_list()
+    upstream_dns = get_upstream_dns()
+    dnssec_validation = get_dnssec_validation()
+    trusted_networks = get_trusted_networks()
+
+    if published is not None:
+        publication = DNSPublication.objects.get_most_recent()
+        forced = DNSPublication.objects.filter(
+            id__gt=published.get("publication", 0), force=True).exists()
+        fingerprints = {
+            tuple(zone.zone_names): zone.get_fingerprint()
+            for zone in zones
+        }
+        configuration = (
+            frozenset(fingerprints), tuple(upstream_dns), dnssec_validation,
+            frozenset(trusted_networks))
+        if published.get("configuration") == configuration and not forced:
+            published["publication"] = publication.id
+            return _dns_update_changed_zones(
+                serial, domains, zones, fingerprints, published)
+        published.clear()
+
     bind_write_zones(zones)
 
     # We should not be calling bind_write_options() here; call-sites should be
@@ -82,14 +111,13 @@ def dns_update_all_zones(reload_retry=False):
     # some that call it for this side-effect alone. At present all it does is
     # set the upstream DNS servers, nothing to do with serving zones at all!
     bind_write_options(
-        upstream_dns=get_upstream_dns(),
-        dnssec_validation=get_dnssec_validation())
+        upstream_dns=upstream_dns, dnssec_validation=dnssec_validation)
 
     # Nor should we be rewriting ACLs that are related only to allowing
     # recursive queries to the upstream DNS servers. Again, this is legacy,
     # where the "trusted" ACL ended up in the same configuration file as the
     # zone stanzas, and so both need to be rewritten at the same time.
-    bind_write_configuration(zones, trusted_networks=get_trusted_networks())
+    bind_write_configuration(zones, trusted_networks=trusted_networks)
 
     # Reloading with retries may be a legacy from Celery days, or it may be
     # necessary to recover from races during start-up. We're not sure if it is
@@ -100,6 +128,11 @@ def dns_update_all_zones(reload_retry=False):
     else:
         bind_reload()
 
+    if published is not None:
+        published["configuration"] = configuration
+        published["fingerprints"] = fingerprints
+        published["publication"] = publication.id
+
     # Return the current serial and list of domain names.
     return serial, [
         domain.name
@@ -107,6 +140,37 @@ def dns_update_all_zones(reload_retry=False):
     ]
 
 
+def _dns_update_changed_zones(serial, domains, zones, fingerprints, published):
+    """Write and reload only the zones whose contents are not the same as
+    when they were last published.
+
+    :return: The current serial and the names of the changed domains.
+    """
+    previous = published["fingerprints"]
+    changed = [
+        zone for zone in zones
+        if previous.get(tuple(zone.zone_names)) != fingerprints[
+            tuple(zone.zone_names)]
+    ]
+    zone_names = [
+        zone_name
+        for zone in changed
+        for zone_name in zone.zone_names
+    ]
+    if len(changed) > 0:
+        bind_write_zones(changed)
+        if not bind_reload_zones(zone_names):
+            # Some zones failed to reload; publish everything next time.
+            published.clear()
+    if len(published) > 0:
+        published["fingerprints"] = fingerprints
+    return serial, [
+        domain.name
+        for domain in domains
+        if domain.name in zone_names
+    ]
+
+
 def get_upstream_dns():
     """Return the IP addresses of configured upstream DNS servers.
 
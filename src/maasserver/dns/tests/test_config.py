@@ -33,11 +33,17 @@ from maasserver.models import (
     Config,
     Domain,
 )
-from maasserver.models.dnspublication import DNSPublication
+from maasserver.models.dnspublication import (
+    DNSPublication,
+    zone_serial,
+)
 from maasserver.testing.config import RegionConfigurationFixture
 from maasserver.testing.factory import factory
 from maasserver.testing.testcase import MAASServerTestCase
-from maastesting.matchers import MockCalledOnceWith
+from maastesting.matchers import (
+    MockCalledOnceWith,
+    MockNotCalled,
+)
 from netaddr import IPAddress
 from provisioningserver.dns.commands import (
     get_named_conf,
@@ -91,7 +97,7 @@ class TestDNSUtilities(MAASServerTestCase):
         dns_force_reload()
         self.assertThat(
             DNSPublication.objects.get_most_recent(),
-            MatchesStructure.byEquality(source="Force reload"))
+            MatchesStructure.byEquality(source="Force reload", force=True))
 
 
 class TestDNSServer(MAASServerTestCase):
@@ -384,6 +390,106 @@ class TestDNSConfigModifications(TestDNSServer):
             for domain in Domain.objects.filter(authoritative=True)
         ]))
 
+    def test_dns_update_all_zones_records_published_zones(self):
+        self.patch(settings, 'DNS_CONNECT', True)
+        bind_reload = self.patch_autospec(dns_config_module, "bind_reload")
+        published = {}
+        dns_update_all_zones(published=published)
+        self.assertThat(bind_reload, MockCalledOnceWith())
+        self.assertItemsEqual(
+            ["configuration", "fingerprints", "publication"],
+            published.keys())
+
+    def test_dns_update_all_zones_skips_unchanged_zones(self):
+        self.patch(settings, 'DNS_CONNECT', True)
+        domain = factory.make_Domain()
+        published = {}
+        dns_update_all_zones(published=published)
+        bind_reload = self.patch_autospec(dns_config_module, "bind_reload")
+        bind_reload_zones = self.patch_autospec(
+            dns_config_module, "bind_reload_zones")
+        bind_write_zones = self.patch_autospec(
+            dns_config_module, "bind_write_zones")
+        serial, domains = dns_update_all_zones(published=published)
+        self.assertEqual([], domains)
+        self.assertThat(bind_reload, MockNotCalled())
+        self.assertThat(bind_reload_zones, MockNotCalled())
+        self.assertThat(bind_write_zones, MockNotCalled())
+        self.assertIn(domain.name, [
+            zone_name
+            for zone_names in published["fingerprints"]
+            for zone_name in zone_names
+        ])
+
+    def test_dns_update_all_zones_reloads_only_changed_zones(self):
+        self.patch(settings, 'DNS_CONNECT', True)
+        domain = factory.make_Domain()
+        factory.make_Domain()
+        published = {}
+        dns_update_all_zones(published=published)
+        factory.make_DNSData(
+            dnsresource=factory.make_DNSResource(
+                domain=domain, no_ip_addresses=True),
+            rrtype="TXT", rrdata=factory.make_name("txt"))
+        bind_reload = self.patch_autospec(dns_config_module, "bind_reload")
+        bind_reload_zones = self.patch_autospec(
+            dns_config_module, "bind_reload_zones")
+        bind_reload_zones.return_value = True
+        serial, domains = dns_update_all_zones(published=published)
+        self.assertEqual([domain.name], domains)
+        self.assertThat(bind_reload, MockNotCalled())
+        [zone_names] = bind_reload_zones.call_args[0]
+        self.assertIn(domain.name, zone_names)
+
+    def test_dns_update_all_zones_reloads_all_when_zones_added(self):
+        self.patch(settings, 'DNS_CONNECT', True)
+        published = {}
+        dns_update_all_zones(published=published)
+        factory.make_Domain()
+        bind_reload = self.patch_autospec(dns_config_module, "bind_reload")
+        bind_reload_zones = self.patch_autospec(
+            dns_config_module, "bind_reload_zones")
+        dns_update_all_zones(published=published)
+        self.assertThat(bind_reload, MockCalledOnceWith())
+        self.assertThat(bind_reload_zones, MockNotCalled())
+
+    def test_dns_update_all_zones_rewrites_all_after_set_serial(self):
+        # This is what the set_serial API operation does.
+        self.patch(settings, 'DNS_CONNECT', True)
+        domain = factory.make_Domain()
+        published = {}
+        dns_update_all_zones(published=published)
+        serial = random.randint(1000, 100000)
+        zone_serial.set_value(serial)
+        dns_force_reload()
+        bind_reload = self.patch_autospec(dns_config_module, "bind_reload")
+        bind_reload_zones = self.patch_autospec(
+            dns_config_module, "bind_reload_zones")
+        bind_write_zones = self.patch_autospec(
+            dns_config_module, "bind_write_zones")
+        dns_update_all_zones(published=published)
+        self.assertThat(bind_reload, MockCalledOnceWith())
+        self.assertThat(bind_reload_zones, MockNotCalled())
+        [zones] = bind_write_zones.call_args[0]
+        self.assertIn(domain.name, [
+            zone_name for zone in zones for zone_name in zone.zone_names])
+        self.assertEqual(
+            {'%0.10d' % serial}, {zone.serial for zone in zones})
+
+    def test_dns_update_all_zones_rewrites_all_after_earlier_force(self):
+        self.patch(settings, 'DNS_CONNECT', True)
+        published = {}
+        dns_update_all_zones(published=published)
+        dns_force_reload()
+        DNSPublication(source=factory.make_name("source")).save()
+        bind_reload = self.patch_autospec(dns_config_module, "bind_reload")
+        dns_update_all_zones(published=published)
+        self.assertThat(bind_reload, MockCalledOnceWith())
+        # The forced publication has been seen; the next is incremental.
+        bind_reload.reset_mock()
+        dns_update_all_zones(published=published)
+        self.assertThat(bind_reload, MockNotCalled())
+
 
 class TestDNSDynamicIPAddresses(TestDNSServer):
     """Allocated nodes with IP addresses in the dynamic range get a DNS
@@ -16,6 +16,8 @@ __all__ = [
     'INTERFACE_TYPE_CHOICES',
     'INTERFACE_TYPE_CHOICES_DICT',
     'IPADDRESS_TYPE',
+    'NODE_DEVICE_BUS',
+    'NODE_DEVICE_BUS_CHOICES',
     'NODE_STATUS',
     'NODE_STATUS_CHOICES',
     'NODE_STATUS_CHOICES_DICT',
@@ -768,6 +770,21 @@ class NODE_METADATA:
     VENDOR_NAME = "vendor-name"
 
 
+class NODE_DEVICE_BUS:
+    """The buses that devices recorded in `NodeDevice` can be on."""
+    #: PCI or PCI Express.
+    PCI = "pci"
+
+    #: USB.
+    USB = "usb"
+
+
+NODE_DEVICE_BUS_CHOICES = (
+    (NODE_DEVICE_BUS.PCI, "PCI"),
+    (NODE_DEVICE_BUS.USB, "USB"),
+)
+
+
 class ENDPOINT:
 
     API = 0
@@ -160,6 +160,13 @@ def make_ReverseDNSService(postgresListener):
     return ReverseDNSService(postgresListener)
 
 
+def make_FreeIPIndexService(postgresListener):
+    from maasserver.regiondservices.free_ip_index import (
+        FreeIPIndexService
+    )
+    return FreeIPIndexService(postgresListener)
+
+
 def make_NetworkTimeProtocolService():
     from maasserver.regiondservices import ntp
     return ntp.RegionNetworkTimeProtocolService(reactor)
@@ -321,6 +328,11 @@ class RegionEventLoop:
             "factory": make_ReverseDNSService,
             "requires": ["postgres-listener-master"],
         },
+        "free-ip-index": {
+            "only_on_master": False,
+            "factory": make_FreeIPIndexService,
+            "requires": ["postgres-listener-worker"],
+        },
         "rack-controller": {
             "only_on_master": False,
             "factory": make_RackControllerService,
@@ -0,0 +1,244 @@
+# Copyright 2018 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Index of the free IP addresses in each subnet.
+
+Finding the free addresses in a subnet means loading every static address,
+reserved and dynamic range, and neighbour in it. Doing that for every
+allocation makes allocating many addresses from one subnet quadratic, and
+concurrent allocations all pick the same "next" address and then clash.
+
+The index keeps the free ranges of each subnet in memory, in this process,
+and hands each address out only once. It is a hint, not the source of
+truth: the unique constraint on `StaticIPAddress.ip` still decides which
+allocation wins when another process takes the same address. Entries are
+invalidated by the database triggers (see `FreeIPIndexService`) and rebuilt
+lazily; the index is not used at all unless something is invalidating it.
+"""
+
+__all__ = [
+    "FreeIPIndex",
+    "free_ip_index",
+]
+
+from heapq import (
+    heapify,
+    heappop,
+    heappush,
+)
+from threading import Lock
+from time import monotonic
+
+from netaddr import (
+    IPAddress,
+    IPNetwork,
+)
+
+
+def _get_definition(subnet):
+    """Return the fields of `subnet` that its free ranges depend on.
+
+    The other things that they depend on (addresses, ranges, static routes,
+    neighbours) live in other tables and are covered by the triggers.
+    """
+    return (
+        str(subnet.cidr), subnet.gateway_ip,
+        tuple(subnet.dns_servers or ()))
+
+
+class _SubnetEntry:
+    """The free ranges of one subnet, as a heap of `(size, first, last)`.
+
+    Keeping the heap ordered by size means addresses are taken from the
+    smallest free range first, as `Subnet.get_next_ip_for_allocation` does,
+    to keep large ranges intact for as long as possible.
+    """
+
+    def __init__(self, definition, network, free_ranges, built):
+        self.definition = definition
+        self.network = network
+        self.heap = [
+            (free_range.num_addresses, free_range.first, free_range.last)
+            for free_range in free_ranges
+        ]
+        heapify(self.heap)
+        self.built = built
+        self.stale = False
+
+    def take(self, excluded):
+        """Take the next free address that is not in `excluded`.
+
+        :param excluded: A set of addresses, as integers, to skip over. They
+            are left in the index for other allocations.
+        :return: The address as an integer, or `None`.
+        """
+        skipped = []
+        try:
+            while len(self.heap) > 0:
+                size, first, last = heappop(self.heap)
+                address = first
+                while address <= last and address in excluded:
+                    address += 1
+                if address > last:
+                    skipped.append((size, first, last))
+                    continue
+                if address > first:
+                    skipped.append((address - first, first, address - 1))
+                if address < last:
+                    heappush(self.heap, (last - address, address + 1, last))
+                return address
+            return None
+        finally:
+            for item in skipped:
+                heappush(self.heap, item)
+
+
+class FreeIPIndex:
+    """Index of the free IP addresses in each subnet.
+
+    Entries are marked stale by `invalidate` and `invalidate_addresses`,
+    which can be called from the reactor: they never wait for a rebuild.
+    A stale entry is rebuilt from the database when it is next used, but
+    not more often than once every `refresh_interval` seconds, so that the
+    notifications caused by our own allocations do not make every allocation
+    rebuild the index. Entries older than `max_age` seconds are rebuilt in
+    any case.
+
+    Addresses handed out in the last `hold_time` seconds are left out of
+    rebuilt entries, because the transactions that allocated them may not
+    have been committed when the rebuild reads the database.
+    """
+
+    refresh_interval = 5.0
+    max_age = 60.0
+    hold_time = 60.0
+
+    def __init__(self, clock=monotonic):
+        super().__init__()
+        self.clock = clock
+        self.enabled = False
+        # Held while reserving addresses, including any rebuild.
+        self._lock = Lock()
+        self._entries = {}
+        self._handed_out = {}
+        # Invalidations are queued under their own lock, which is never held
+        # for long, and applied by the next reservation.
+        self._invalidations_lock = Lock()
+        self._invalidations = []
+
+    def enable(self):
+        """Start using the index.
+
+        Only call this once something will call `invalidate` when the
+        database changes.
+        """
+        self.enabled = True
+
+    def disable(self):
+        """Stop using the index, and forget everything in it."""
+        self.enabled = False
+        with self._lock:
+            self._entries.clear()
+            self._handed_out.clear()
+        with self._invalidations_lock:
+            self._invalidations.clear()
+
+    def invalidate(self, subnet_ids=None, discard=False):
+        """Mark the entries for `subnet_ids` as stale.
+
+        :param subnet_ids: An iterable of subnet IDs, or `None` to invalidate
+            every subnet.
+        :param discard: When true, the entries are rebuilt when next used
+            without waiting for `refresh_interval`. Use this when addresses
+            that were free may no longer be, e.g. when a range is reserved.
+        """
+        if subnet_ids is not None:
+            subnet_ids = frozenset(subnet_ids)
+        with self._invalidations_lock:
+            self._invalidations.append((subnet_ids, None, discard))
+
+    def invalidate_addresses(self, addresses):
+        """Mark the entries for the subnets containing `addresses` as stale.
+
+        :param addresses: An iterable of `IPAddress`.
+        """
+        addresses = frozenset(addresses)
+        with self._invalidations_lock:
+            self._invalidations.append((None, addresses, False))
+
+    def _apply_invalidations(self):
+        with self._invalidations_lock:
+            invalidations, self._invalidations = self._invalidations, []
+        for subnet_ids, addresses, discard in invalidations:
+            for subnet_id, entry in list(self._entries.items()):
+                if subnet_ids is not None and subnet_id not in subnet_ids:
+                    continue
+                elif addresses is not None and not any(
+                        address in entry.network for address in addresses):
+                    continue
+                elif discard:
+                    del self._entries[subnet_id]
+                else:
+                    entry.stale = True
+
+    def _needs_rebuild(self, entry, definition, now):
+        if entry is None or entry.definition != definition:
+            return True
+        age = now - entry.built
+        if entry.stale:
+            return age >= self.refresh_interval
+        else:
+            return age >= self.max_age
+
+    def _rebuild(self, subnet, definition, now):
+        handed_out = self._handed_out.setdefault(subnet.id, {})
+        for address, when in list(handed_out.items()):
+            if now - when >= self.hold_time:
+                del handed_out[address]
+        free_ranges = subnet.get_ipranges_not_in_use(
+            exclude_addresses=list(handed_out), with_neighbours=True)
+        entry = self._entries[subnet.id] = _SubnetEntry(
+            definition, IPNetwork(subnet.cidr), free_ranges, now)
+        return entry
+
+    def reserve(self, subnet, count=1, exclude_addresses=None):
+        """Reserve up to `count` free addresses in `subnet`.
+
+        The addresses are not handed out again by this index, whether or not
+        the caller goes on to allocate them. Must be called in a transaction
+        because the entry for `subnet` may need to be rebuilt.
+
+        :param exclude_addresses: Addresses that must not be returned.
+        :return: A list of `IPAddress`. It is shorter than `count`, possibly
+            empty, if the subnet has fewer free addresses, or if the index
+            is not enabled.
+        """
+        if not self.enabled:
+            return []
+        definition = _get_definition(subnet)
+        with self._lock:
+            self._apply_invalidations()
+            now = self.clock()
+            entry = self._entries.get(subnet.id)
+            if self._needs_rebuild(entry, definition, now):
+                entry = self._rebuild(subnet, definition, now)
+            version = entry.network.version
+            excluded = set()
+            for address in exclude_addresses or ():
+                address = IPAddress(address)
+                if address.version == version:
+                    excluded.add(address.value)
+            handed_out = self._handed_out.setdefault(subnet.id, {})
+            reserved = []
+            while len(reserved) < count:
+                address = entry.take(excluded)
+                if address is None:
+                    break
+                address = IPAddress(address, version)
+                handed_out[str(address)] = now
+                reserved.append(address)
+            return reserved
+
+
+# The index used by `StaticIPAddressManager.allocate_new`.
+free_ip_index = FreeIPIndex()
@@ -88,6 +88,7 @@ class PostgresListenerService(Service, object):
     def __init__(self, alias="default"):
         self.alias = alias
         self.listeners = defaultdict(list)
+        self.batchedListeners = set()
         self.autoReconnect = False
         self.connection = None
         self.connectionFileno = None
@@ -206,14 +207,23 @@ class PostgresListenerService(Service, object):
         finally:
             self.connectionFileno = None
 
-    def register(self, channel, handler):
+    def register(self, channel, handler, batched=False):
         """Register listening for notifications from a channel.
 
         When a notification is received for that `channel` the `handler` will
         be called with the action and object id.
+
+        :param batched: When True, `handler` is instead called once for each
+            action with a list of all the object ids notified for that
+            action since the notifications were last handled. Batched
+            handlers cannot be registered on system channels.
         """
         handlers = self.listeners[channel]
-        if self.isSystemChannel(channel) and len(handlers) > 0:
+        if batched and self.isSystemChannel(channel):
+            raise PostgresListenerRegistrationError(
+                "System channel '%s' cannot be registered with a batched "
+                "handler." % channel)
+        elif self.isSystemChannel(channel) and len(handlers) > 0:
             # A system can only be registered once. This is because the
             # message is passed directly to the handler and the `doRead`
             # method does not wait for it to finish if its a defer. This is
@@ -223,6 +233,8 @@ class PostgresListenerService(Service, object):
                 "System channel '%s' has already been registered." % channel)
         else:
             handlers.append(handler)
+            if batched:
+                self.batchedListeners.add((channel, handler))
         if self.registeredChannels and self.connection:
             # Channels have already been registered. Register the
             # new channel on the already existing connection.
@@ -239,6 +251,7 @@ class PostgresListenerService(Service, object):
         handlers = self.listeners[channel]
         if handler in handlers:
             handlers.remove(handler)
+            self.batchedListeners.discard((channel, handler))
         else:
             raise PostgresListenerUnregistrationError(
                 "Handler is not registered on that channel '%s'." % channel)
@@ -407,14 +420,53 @@ class PostgresListenerService(Service, object):
         else:
             return succeed(None)
 
+    def isBatchedHandler(self, channel, handler):
+        """Return True if `handler` was registered on `channel` as batched."""
+        return (channel, handler) in self.batchedListeners
+
     def handleNotifies(self, clock=reactor):
-        """Process all notify message in the notifications set."""
+        """Process all notify message in the notifications set.
+
+        Notifications are drained from the set and grouped by channel, so
+        that batched handlers receive all of the object ids notified on a
+        channel in one call. Other handlers are called for each one in turn.
+        """
         def gen_notifications(notifications):
             while len(notifications) != 0:
-                yield notifications.pop()
-        return task.coiterate(
-            self.handleNotify(notification, clock=clock)
-            for notification in gen_notifications(self.notifications))
+                grouped = defaultdict(list)
+                while len(notifications) != 0:
+                    channel, payload = notifications.pop()
+                    grouped[channel].append(payload)
+                for channel, payloads in grouped.items():
+                    yield self.handleNotifyBatch(
+                        channel, payloads, clock=clock)
+                    for payload in payloads:
+                        yield self.handleNotify(
+                            (channel, payload), clock=clock)
+        return task.coiterate(gen_notifications(self.notifications))
+
+    def handleNotifyBatch(self, channel, payloads, clock=reactor):
+        """Pass all of the `payloads` notified on `channel` to each of the
+        batched handlers registered for that channel."""
+        try:
+            channel, action = self.convertChannel(channel)
+        except PostgresListenerNotifyError:
+            # Failing to convert the channel is logged by `handleNotify`.
+            return None
+        else:
+            defers = []
+            handlers = [
+                handler for handler in self.listeners[channel]
+                if self.isBatchedHandler(channel, handler)
+            ]
+            for handler in handlers:
+                d = defer.maybeDeferred(handler, action, payloads)
+                d.addErrback(lambda failure: self.log.failure(
+                    "Failure while handling notifications to {channel!r}: "
+                    "{payloads!r}", failure, channel=channel,
+                    payloads=payloads))
+                defers.append(d)
+            return defer.DeferredList(defers)
 
     def handleNotify(self, notification, clock=reactor):
         """Process a notify message in the notifications set."""
@@ -428,7 +480,10 @@ class PostgresListenerService(Service, object):
                 "Failed to convert channel {channel!r}.", channel=channel)
         else:
             defers = []
-            handlers = self.listeners[channel]
+            handlers = [
+                handler for handler in self.listeners[channel]
+                if not self.isBatchedHandler(channel, handler)
+            ]
             # XXX: There could be an arbitrary number of listeners. Should we
             # limit concurrency here? Perhaps even do one at a time.
             for handler in handlers:
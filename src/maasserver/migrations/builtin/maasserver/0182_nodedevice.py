@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import (
+    migrations,
+    models,
+)
+import maasserver.models.cleansave
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maasserver', '0181_packagerepository_disable_sources'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NodeDevice',
+            fields=[
+                ('id', models.AutoField(primary_key=True, auto_created=True, verbose_name='ID', serialize=False)),
+                ('created', models.DateTimeField(editable=False)),
+                ('updated', models.DateTimeField(editable=False)),
+                ('bus', models.CharField(choices=[('pci', 'PCI'), ('usb', 'USB')], max_length=8)),
+                ('bus_address', models.CharField(max_length=64)),
+                ('hardware_class', models.CharField(blank=True, max_length=64)),
+                ('vendor_name', models.CharField(blank=True, max_length=256)),
+                ('product_name', models.CharField(blank=True, max_length=256)),
+                ('commissioning_driver', models.CharField(blank=True, max_length=64)),
+                ('node', models.ForeignKey(to='maasserver.Node', editable=False, on_delete=models.CASCADE)),
+            ],
+            options={
+                'verbose_name': 'NodeDevice',
+                'verbose_name_plural': 'NodeDevices',
+            },
+            bases=(maasserver.models.cleansave.CleanSave, models.Model, object),
+        ),
+        migrations.AlterUniqueTogether(
+            name='nodedevice',
+            unique_together=set([('node', 'bus', 'bus_address')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='nodedevice',
+            index_together=set([('vendor_name', 'product_name')]),
+        ),
+    ]
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import (
+    migrations,
+    models,
+)
+import django.db.models.deletion
+import maasserver.fields
+import maasserver.models.cleansave
+
+
+# The discoveries used to be computed by the `maasserver_discovery` view.
+# Populate the new table with the same rows; from here on the rows are kept
+# up to date by the `sys_discovery_*` triggers.
+discovery_populate = """\
+    INSERT INTO maasserver_discovery (
+        id, discovery_id, neighbour_id, ip, mac_address, vid, first_seen,
+        last_seen, mdns_id, hostname, observer_id, observer_system_id,
+        observer_hostname, observer_interface_id, observer_interface_name,
+        fabric_id, fabric_name, vlan_id, is_external_dhcp, subnet_id,
+        subnet_cidr)
+    SELECT
+        DISTINCT ON (neigh.mac_address, neigh.ip)
+        neigh.id,
+        REPLACE(ENCODE(BYTEA(HOST(neigh.ip) || ',' ||
+            neigh.mac_address::text), 'base64'), CHR(10), ''),
+        neigh.id,
+        neigh.ip,
+        neigh.mac_address,
+        neigh.vid,
+        neigh.created,
+        GREATEST(neigh.updated, mdns.updated),
+        mdns.id,
+        COALESCE(rdns.hostname, mdns.hostname),
+        node.id,
+        node.system_id,
+        node.hostname,
+        iface.id,
+        iface.name,
+        fabric.id,
+        fabric.name,
+        vlan.id,
+        CASE
+            WHEN neigh.ip = vlan.external_dhcp THEN TRUE
+            ELSE FALSE
+        END,
+        subnet.id,
+        subnet.cidr
+    FROM maasserver_neighbour neigh
+    JOIN maasserver_interface iface ON neigh.interface_id = iface.id
+    JOIN maasserver_node node ON node.id = iface.node_id
+    JOIN maasserver_vlan vlan ON iface.vlan_id = vlan.id
+    JOIN maasserver_fabric fabric ON vlan.fabric_id = fabric.id
+    LEFT OUTER JOIN maasserver_mdns mdns ON mdns.ip = neigh.ip
+    LEFT OUTER JOIN maasserver_rdns rdns ON rdns.ip = neigh.ip
+    LEFT OUTER JOIN maasserver_subnet subnet ON (
+        vlan.id = subnet.vlan_id AND neigh.ip << subnet.cidr)
+    WHERE neigh.mac_address IS NOT NULL AND neigh.ip IS NOT NULL
+    ORDER BY
+        neigh.mac_address,
+        neigh.ip,
+        neigh.updated DESC,
+        rdns.updated DESC,
+        mdns.updated DESC,
+        MASKLEN(subnet.cidr) DESC
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maasserver', '0182_nodedevice'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "DROP VIEW IF EXISTS maasserver_discovery",
+            migrations.RunSQL.noop),
+        # The view-backed model is unmanaged, so this only changes the state.
+        migrations.DeleteModel(
+            name='Discovery',
+        ),
+        migrations.CreateModel(
+            name='Discovery',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', auto_created=True, primary_key=True, serialize=False)),
+                ('discovery_id', models.CharField(null=True, max_length=256, editable=False, unique=True)),
+                ('ip', maasserver.fields.MAASIPAddressField(verbose_name='IP', editable=False, blank=True, null=True, default=None, db_index=True)),
+                ('mac_address', maasserver.fields.MACAddressField(blank=True, null=True, editable=False, db_index=True)),
+                ('first_seen', models.DateTimeField(editable=False)),
+                ('last_seen', models.DateTimeField(editable=False, db_index=True)),
+                ('hostname', models.CharField(max_length=256, editable=False, null=True)),
+                ('observer_system_id', models.CharField(max_length=41, editable=False)),
+                ('observer_hostname', maasserver.fields.DomainNameField(max_length=256, editable=False, null=True)),
+                ('observer_interface_name', models.CharField(max_length=255, editable=False)),
+                ('fabric_name', models.CharField(blank=True, max_length=256, editable=False, null=True)),
+                ('vid', models.IntegerField(blank=True, null=True)),
+                ('subnet_cidr', maasserver.fields.CIDRField(blank=True, null=True, editable=False)),
+                ('is_external_dhcp', models.NullBooleanField(editable=False)),
+                ('fabric', models.ForeignKey(editable=False, on_delete=django.db.models.deletion.DO_NOTHING, db_constraint=False, to='maasserver.Fabric')),
+                ('mdns', models.ForeignKey(editable=False, on_delete=django.db.models.deletion.DO_NOTHING, db_constraint=False, blank=True, null=True, to='maasserver.MDNS')),
+                ('neighbour', models.ForeignKey(editable=False, on_delete=django.db.models.deletion.DO_NOTHING, db_constraint=False, to='maasserver.Neighbour')),
+                ('observer', models.ForeignKey(editable=False, on_delete=django.db.models.deletion.DO_NOTHING, db_constraint=False, to='maasserver.Node')),
+                ('observer_interface', models.ForeignKey(editable=False, on_delete=django.db.models.deletion.DO_NOTHING, db_constraint=False, to='maasserver.Interface')),
+                ('subnet', models.ForeignKey(editable=False, on_delete=django.db.models.deletion.DO_NOTHING, db_constraint=False, blank=True, null=True, to='maasserver.Subnet')),
+                ('vlan', models.ForeignKey(editable=False, on_delete=django.db.models.deletion.DO_NOTHING, db_constraint=False, to='maasserver.VLAN')),
+            ],
+            options={
+                'verbose_name': 'Discovery',
+                'verbose_name_plural': 'Discoveries',
+            },
+            bases=(maasserver.models.cleansave.CleanSave, models.Model),
+        ),
+        # The triggers look up neighbours by MAC and IP address, and mDNS
+        # entries by IP address. (Reverse-DNS entries are already unique on
+        # IP address and observer.)
+        migrations.RunSQL(
+            "CREATE INDEX maasserver_neighbour__mac_address__ip "
+            "ON maasserver_neighbour(mac_address, ip)",
+            "DROP INDEX maasserver_neighbour__mac_address__ip"
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX maasserver_mdns__ip ON maasserver_mdns(ip)",
+            "DROP INDEX maasserver_mdns__ip"
+        ),
+        migrations.RunSQL(discovery_populate, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import (
+    migrations,
+    models,
+)
+import django.contrib.postgres.fields
+import django.db.models.deletion
+import maasserver.models.cleansave
+
+
+# Populate the new table with a summary for every node; from here on the rows
+# are kept up to date by the `sys_allocation_*` triggers.
+nodeallocationsummary_populate = """\
+    INSERT INTO maasserver_nodeallocationsummary (
+      node_id, cost, root_size, root_tags, root_partition_size,
+      root_partition_tags, disk_count, disk_size, disk_tags,
+      partition_count, partition_size, partition_tags, fabric_ids,
+      vlan_ids, space_ids, subnet_ids)
+    SELECT
+      node.id,
+      -- This is loosely based on how EC2 computes the costs of machines.
+      node.cpu_count + node.memory / 1024.,
+      root.size,
+      root.tags,
+      root.partition_size,
+      root.partition_tags,
+      disk.count,
+      disk.size,
+      disk.tags,
+      part.count,
+      part.size,
+      part.tags,
+      net.fabric_ids,
+      net.vlan_ids,
+      net.space_ids,
+      addr.subnet_ids
+    FROM maasserver_node node,
+    LATERAL (
+      -- The block devices with root on them, directly or on a partition.
+      SELECT
+        MAX(bd.size) AS size,
+        ARRAY_REMOVE(ARRAY_AGG(DISTINCT bd_tag), NULL) AS tags,
+        MAX(p.size) AS partition_size,
+        ARRAY_REMOVE(ARRAY_AGG(DISTINCT p_tag), NULL) AS partition_tags
+      FROM maasserver_filesystem fs
+      LEFT JOIN maasserver_partition p ON p.id = fs.partition_id
+      LEFT JOIN maasserver_partitiontable pt
+        ON pt.id = p.partition_table_id
+      JOIN maasserver_blockdevice bd
+        ON bd.id = COALESCE(fs.block_device_id, pt.block_device_id)
+      LEFT JOIN LATERAL UNNEST(bd.tags) AS bd_tag ON TRUE
+      LEFT JOIN LATERAL UNNEST(p.tags) AS p_tag ON TRUE
+      WHERE bd.node_id = node.id
+        AND fs.mount_point = '/'
+        AND NOT fs.acquired
+    ) AS root,
+    LATERAL (
+      -- The block devices with neither a filesystem nor partitions.
+      SELECT
+        COUNT(DISTINCT bd.id) AS count,
+        MAX(bd.size) AS size,
+        ARRAY_REMOVE(ARRAY_AGG(DISTINCT tag), NULL) AS tags
+      FROM maasserver_blockdevice bd
+      LEFT JOIN LATERAL UNNEST(bd.tags) AS tag ON TRUE
+      WHERE bd.node_id = node.id
+        AND NOT EXISTS (
+          SELECT 1 FROM maasserver_filesystem fs
+          WHERE fs.block_device_id = bd.id)
+        AND NOT EXISTS (
+          SELECT 1 FROM maasserver_partitiontable pt
+          WHERE pt.block_device_id = bd.id)
+    ) AS disk,
+    LATERAL (
+      -- The partitions without a filesystem.
+      SELECT
+        COUNT(DISTINCT p.id) AS count,
+        MAX(p.size) AS size,
+        ARRAY_REMOVE(ARRAY_AGG(DISTINCT tag), NULL) AS tags
+      FROM maasserver_partition p
+      JOIN maasserver_partitiontable pt ON pt.id = p.partition_table_id
+      JOIN maasserver_blockdevice bd ON bd.id = pt.block_device_id
+      LEFT JOIN LATERAL UNNEST(p.tags) AS tag ON TRUE
+      WHERE bd.node_id = node.id
+        AND NOT EXISTS (
+          SELECT 1 FROM maasserver_filesystem fs
+          WHERE fs.partition_id = p.id)
+    ) AS part,
+    LATERAL (
+      SELECT
+        ARRAY_REMOVE(ARRAY_AGG(DISTINCT vlan.fabric_id), NULL)
+          AS fabric_ids,
+        ARRAY_REMOVE(ARRAY_AGG(DISTINCT vlan.id), NULL) AS vlan_ids,
+        ARRAY_REMOVE(ARRAY_AGG(DISTINCT vlan.space_id), NULL) AS space_ids
+      FROM maasserver_interface iface
+      JOIN maasserver_vlan vlan ON vlan.id = iface.vlan_id
+      WHERE iface.node_id = node.id
+    ) AS net,
+    LATERAL (
+      SELECT
+        ARRAY_REMOVE(ARRAY_AGG(DISTINCT ip.subnet_id), NULL) AS subnet_ids
+      FROM maasserver_interface iface
+      JOIN maasserver_interface_ip_addresses link
+        ON link.interface_id = iface.id
+      JOIN maasserver_staticipaddress ip
+        ON ip.id = link.staticipaddress_id
+      WHERE iface.node_id = node.id
+    ) AS addr
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maasserver', '0183_discovery_table'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NodeAllocationSummary',
+            fields=[
+                ('node', models.OneToOneField(editable=False, on_delete=django.db.models.deletion.DO_NOTHING, db_constraint=False, primary_key=True, related_name='allocation_summary', serialize=False, to='maasserver.Node')),
+                ('cost', models.FloatField(editable=False, db_index=True)),
+                ('root_size', models.BigIntegerField(editable=False, null=True, db_index=True)),
+                ('root_tags', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), editable=False, null=True, size=None)),
+                ('root_partition_size', models.BigIntegerField(editable=False, null=True)),
+                ('root_partition_tags', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), editable=False, null=True, size=None)),
+                ('disk_count', models.IntegerField(editable=False)),
+                ('disk_size', models.BigIntegerField(editable=False, null=True)),
+                ('disk_tags', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), editable=False, null=True, size=None)),
+                ('partition_count', models.IntegerField(editable=False)),
+                ('partition_size', models.BigIntegerField(editable=False, null=True)),
+                ('partition_tags', django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), editable=False, null=True, size=None)),
+                ('fabric_ids', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), editable=False, null=True, size=None)),
+                ('vlan_ids', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), editable=False, null=True, size=None)),
+                ('space_ids', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), editable=False, null=True, size=None)),
+                ('subnet_ids', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), editable=False, null=True, size=None)),
+            ],
+            options={
+                'verbose_name': 'NodeAllocationSummary',
+                'verbose_name_plural': 'NodeAllocationSummaries',
+            },
+            bases=(maasserver.models.cleansave.CleanSave, models.Model),
+        ),
+    ] + [
+        # The tag and network constraints are matched with the array
+        # containment and overlap operators, which GIN indexes support.
+        migrations.RunSQL(
+            "CREATE INDEX maasserver_nodeallocationsummary__%s "
+            "ON maasserver_nodeallocationsummary USING GIN (%s)" % (
+                column, column),
+            "DROP INDEX maasserver_nodeallocationsummary__%s" % column)
+        for column in (
+            'root_tags', 'root_partition_tags', 'disk_tags',
+            'partition_tags', 'fabric_ids', 'vlan_ids', 'space_ids',
+            'subnet_ids')
+    ] + [
+        migrations.RunSQL(
+            nodeallocationsummary_populate, migrations.RunSQL.noop),
+    ]
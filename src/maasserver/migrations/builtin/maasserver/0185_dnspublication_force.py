@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import (
+    migrations,
+    models,
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maasserver', '0184_nodeallocationsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dnspublication',
+            name='force',
+            field=models.BooleanField(
+                default=False, editable=False,
+                help_text=(
+                    'Rewrite and reload every zone, even those that have '
+                    'not changed.')),
+        ),
+    ]
@@ -46,6 +46,8 @@ __all__ = [
     'MDNS',
     'Neighbour',
     'Node',
+    'NodeAllocationSummary',
+    'NodeDevice',
     'NodeMetadata',
     'NodeGroupToRackController',
     'Notification',
@@ -158,6 +160,8 @@ from maasserver.models.node import (
     RackController,
     RegionController,
 )
+from maasserver.models.nodeallocationsummary import NodeAllocationSummary
+from maasserver.models.nodedevice import NodeDevice
 from maasserver.models.nodemetadata import NodeMetadata
 from maasserver.models.notification import Notification
 from maasserver.models.ownerdata import OwnerData
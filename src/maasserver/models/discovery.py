@@ -17,7 +17,7 @@ from django.db.models import (
     NullBooleanField,
 )
 from django.db.models.query import QuerySet
-from maasserver import DefaultViewMeta
+from maasserver import DefaultMeta
 from maasserver.fields import (
     CIDRField,
     DomainNameField,
@@ -144,14 +144,14 @@ class Discovery(CleanSave, ViewModel):
     """A `Discovery` object represents the combined data for a network entity
     that MAAS believes has been discovered.
 
-    Note that this class is backed by the `maasserver_discovery` view. Any
-    updates to this model must be reflected in `maasserver/dbviews.py` under
-    the `maasserver_discovery` view.
+    Note that this class is backed by the `maasserver_discovery` table, which
+    is kept up to date by the `sys_discovery_*` triggers: there is one row
+    for each MAC and IP address pair seen in the neighbour table. Any updates
+    to this model must be reflected in `sys_discovery_refresh()`, in
+    `maasserver/triggers/system.py`.
     """
 
-    class Meta(DefaultViewMeta):
-        # When managed is False, Django will not create a migration for this
-        # model class. This is required for model classes based on views.
+    class Meta(DefaultMeta):
         verbose_name = "Discovery"
         verbose_name_plural = "Discoveries"
 
@@ -164,23 +164,23 @@ class Discovery(CleanSave, ViewModel):
 
     neighbour = ForeignKey(
         'Neighbour', unique=False, blank=False, null=False, editable=False,
-        on_delete=DO_NOTHING)
+        on_delete=DO_NOTHING, db_constraint=False)
 
     # Observed IP address.
     ip = MAASIPAddressField(
         unique=False, null=True, editable=False, blank=True,
-        default=None, verbose_name='IP')
+        default=None, verbose_name='IP', db_index=True)
 
     mac_address = MACAddressField(
-        unique=False, null=True, blank=True, editable=False)
+        unique=False, null=True, blank=True, editable=False, db_index=True)
 
     first_seen = DateTimeField(editable=False)
 
-    last_seen = DateTimeField(editable=False)
+    last_seen = DateTimeField(editable=False, db_index=True)
 
     mdns = ForeignKey(
         'MDNS', unique=False, blank=True, null=True, editable=False,
-        on_delete=DO_NOTHING)
+        on_delete=DO_NOTHING, db_constraint=False)
 
     # Hostname observed from mDNS-browse.
     hostname = CharField(
@@ -188,7 +188,7 @@ class Discovery(CleanSave, ViewModel):
 
     observer = ForeignKey(
         'Node', unique=False, blank=False, null=False, editable=False,
-        on_delete=DO_NOTHING)
+        on_delete=DO_NOTHING, db_constraint=False)
 
     observer_system_id = CharField(
         max_length=41, unique=False, editable=False)
@@ -200,28 +200,28 @@ class Discovery(CleanSave, ViewModel):
     # Rack interface the discovery was observed on.
     observer_interface = ForeignKey(
         'Interface', unique=False, blank=False, null=False, editable=False,
-        on_delete=DO_NOTHING)
+        on_delete=DO_NOTHING, db_constraint=False)
 
     observer_interface_name = CharField(
         blank=False, editable=False, max_length=255)
 
     fabric = ForeignKey(
         'Fabric', unique=False, blank=False, null=False, editable=False,
-        on_delete=DO_NOTHING)
+        on_delete=DO_NOTHING, db_constraint=False)
 
     fabric_name = CharField(
         max_length=256, editable=False, null=True, blank=True, unique=False)
 
     vlan = ForeignKey(
         'VLAN', unique=False, blank=False, null=False, editable=False,
-        on_delete=DO_NOTHING)
+        on_delete=DO_NOTHING, db_constraint=False)
 
     vid = IntegerField(null=True, blank=True)
 
     # These will only be non-NULL if we found a related Subnet.
     subnet = ForeignKey(
         'Subnet', unique=False, blank=True, null=True, editable=False,
-        on_delete=DO_NOTHING)
+        on_delete=DO_NOTHING, db_constraint=False)
 
     subnet_cidr = CIDRField(
         blank=True, unique=False, editable=False, null=True)
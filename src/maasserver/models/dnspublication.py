@@ -19,6 +19,7 @@ from django.db.models import (
 )
 from django.db.models.fields import (
     BigIntegerField,
+    BooleanField,
     CharField,
     DateTimeField,
 )
@@ -101,3 +102,11 @@ class DNSPublication(Model):
     source = CharField(
         editable=False, max_length=255, null=False, blank=True,
         help_text="A brief explanation why DNS was published.")
+
+    # Publications are otherwise compared zone by zone, ignoring the serial,
+    # so that unchanged zones are neither rewritten nor reloaded.
+    force = BooleanField(
+        editable=False, null=False, default=False,
+        help_text=(
+            "Rewrite and reload every zone, even those that have "
+            "not changed."))
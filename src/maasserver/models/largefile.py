@@ -4,10 +4,13 @@
 """Large file storage."""
 
 __all__ = [
+    'cache_content_later',
     'LargeFile',
 ]
 
 import hashlib
+import os
+import tempfile
 
 from django.db.models import (
     BigIntegerField,
@@ -27,6 +30,8 @@ from maasserver.utils.orm import (
 )
 from maasserver.utils.threads import deferToDatabase
 from provisioningserver.logger import LegacyLogger
+from provisioningserver.path import get_data_path
+from provisioningserver.utils.fs import NamedLock
 from provisioningserver.utils.twisted import (
     asynchronous,
     FOREVER,
@@ -141,6 +146,61 @@ class LargeFile(CleanSave, TimestampedModel):
         hexdigest = sha256.hexdigest()
         return hexdigest == self.sha256
 
+    def get_cached_content_path(self):
+        """Return the path to this region's on-disk copy of `content`, or
+        `None` if it has not been copied yet; see `cache_content`."""
+        path = get_largefile_cache_path(self.sha256)
+        return path if os.path.isfile(path) else None
+
+    def cache_content(self):
+        """Copy `content` into this region's on-disk cache.
+
+        The copy is named after `sha256`, so it is shared by every file with
+        the same content. It is only put in place once its SHA256 value has
+        been checked, so readers never see a partial or corrupt copy. Only
+        one thread on this host copies the same content at a time.
+
+        Copying can take minutes for a large image, so do not call this
+        while serving a request; see `cache_content_later`.
+
+        :return: The path to the cached copy, or `None` if `content` has not
+            been completely saved, does not match `sha256`, or is being
+            copied by another thread.
+        """
+        if not self.complete:
+            return None
+        path = self.get_cached_content_path()
+        if path is not None:
+            return path
+        try:
+            with NamedLock("largefile-%s" % self.sha256):
+                # Another thread may have finished a copy since the check.
+                return self.get_cached_content_path() or self._copy_content()
+        except NamedLock.NotAvailable:
+            return None
+
+    def _copy_content(self):
+        """Copy and check `content`; see `cache_content`."""
+        path = get_largefile_cache_path(self.sha256)
+        sha256 = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), prefix=".%s." % self.sha256)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                with self.content.open('rb') as stream:
+                    for data in stream:
+                        sha256.update(data)
+                        tmp.write(data)
+            if sha256.hexdigest() != self.sha256:
+                os.unlink(tmp_path)
+                return None
+            os.rename(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return path
+
     def delete(self, *args, **kwargs):
         """Delete this object.
 
@@ -159,6 +219,48 @@ class LargeFile(CleanSave, TimestampedModel):
         super(LargeFile, self).delete(*args, **kwargs)
 
 
+def get_largefile_cache_path(sha256=None):
+    """Return the path of the on-disk copy of a `LargeFile`'s content.
+
+    :param sha256: The SHA256 value of the content, or `None` for the path
+        of the cache directory itself.
+    """
+    if sha256 is None:
+        return get_data_path("/var/lib/maas/largefiles", "")
+    else:
+        return get_data_path("/var/lib/maas/largefiles", sha256)
+
+
+def delete_cached_content(sha256):
+    """Delete the on-disk copy of a `LargeFile`'s content, if any."""
+    try:
+        os.unlink(get_largefile_cache_path(sha256))
+    except FileNotFoundError:
+        pass
+
+
+@asynchronous(timeout=FOREVER)
+def cache_content_later(sha256):
+    """Schedule the content with `sha256` to be copied into this region's
+    on-disk cache; see `LargeFile.cache_content`.
+
+    This lets a request be served from the database straight away, rather
+    than waiting for the copy.
+    """
+    @transactional
+    def cache_content(sha256):
+        largefile = LargeFile.objects.get_file(sha256)
+        if largefile is not None:
+            largefile.cache_content()
+
+    def cache(sha256):
+        d = deferToDatabase(cache_content, sha256)
+        d.addErrback(log.err, "Failure caching large file %s." % sha256)
+        return d
+
+    return reactor.callLater(0, cache, sha256)
+
+
 @asynchronous(timeout=FOREVER)
 def delete_large_object_content_later(content):
     """Schedule the content to be unlinked later.
@@ -7,7 +7,7 @@ __all__ = [
     'MDNS',
 ]
 
-
+from django.db import connection
 from django.db.models import (
     CASCADE,
     CharField,
@@ -18,7 +18,10 @@ from django.db.models import (
 from maasserver import DefaultMeta
 from maasserver.fields import MAASIPAddressField
 from maasserver.models.cleansave import CleanSave
-from maasserver.models.timestampedmodel import TimestampedModel
+from maasserver.models.timestampedmodel import (
+    now,
+    TimestampedModel,
+)
 from maasserver.utils.orm import (
     get_one,
     UniqueViolation,
@@ -84,6 +87,43 @@ class MDNSManager(Manager):
         # a UniqueViolation so this operation can be retried.
         return get_one(query, exception_class=UniqueViolation)
 
+    def update_current_entries(self, entries):
+        """Updates the current mDNS data for the specified entries.
+
+        This is equivalent to updating the entry returned by
+        `get_current_entry` for each entry in turn, but uses a single
+        statement for all of them.
+
+        :param entries: A list of `(interface_id, ip, hostname, count)`
+            tuples, one for each distinct entry, where `count` is the number
+            of times it was observed.
+        :return: The set of indexes into `entries` of the entries that were
+            updated. There is no mDNS data for the others yet.
+        """
+        if len(entries) == 0:
+            return set()
+        values = ", ".join(
+            ["(%s, %s, %s::inet, %s, %s)"] * len(entries))
+        params = [now()]
+        for index, entry in enumerate(entries):
+            params.append(index)
+            params.extend(entry)
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE maasserver_mdns AS mdns
+                SET
+                  count = mdns.count + entry.times,
+                  updated = %%s
+                FROM (VALUES %s) AS entry(
+                  idx, interface_id, ip, hostname, times)
+                WHERE
+                  mdns.interface_id = entry.interface_id AND
+                  mdns.ip = entry.ip AND
+                  mdns.hostname = entry.hostname
+                RETURNING entry.idx
+                """ % values, params)
+            return {index for index, in cursor.fetchall()}
+
 
 class MDNS(CleanSave, TimestampedModel):
     """Represents data gathered from mDNS-browse for a particular IP address.
@@ -7,6 +7,7 @@ __all__ = [
     'Neighbour',
 ]
 
+from django.db import connection
 from django.db.models import (
     CASCADE,
     ForeignKey,
@@ -21,7 +22,10 @@ from maasserver.fields import (
 )
 from maasserver.models.cleansave import CleanSave
 from maasserver.models.interface import Interface
-from maasserver.models.timestampedmodel import TimestampedModel
+from maasserver.models.timestampedmodel import (
+    now,
+    TimestampedModel,
+)
 from maasserver.utils.orm import (
     get_one,
     MAASQueriesMixin,
@@ -132,6 +136,47 @@ class NeighbourManager(Manager, NeighbourQueriesMixin):
         # a UniqueViolation so this operation can be retried.
         return get_one(query, exception_class=UniqueViolation)
 
+    def update_current_bindings(self, bindings):
+        """Updates the current neighbours for the specified bindings.
+
+        This is equivalent to updating the neighbour returned by
+        `get_current_binding` for each binding in turn, but uses a single
+        statement for all of them.
+
+        :param bindings: A list of `(interface_id, ip, mac, vid, time, count)`
+            tuples, one for each distinct binding, where `time` is when the
+            binding was last observed and `count` is the number of times it
+            was observed.
+        :return: The set of indexes into `bindings` of the bindings that were
+            updated. There are no neighbours for the others yet.
+        """
+        if len(bindings) == 0:
+            return set()
+        values = ", ".join(
+            ["(%s, %s, %s::inet, %s::macaddr, %s::integer, %s, %s)"] *
+            len(bindings))
+        params = [now()]
+        for index, binding in enumerate(bindings):
+            params.append(index)
+            params.extend(binding)
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE maasserver_neighbour AS neighbour
+                SET
+                  "time" = binding.observed,
+                  count = neighbour.count + binding.times,
+                  updated = %%s
+                FROM (VALUES %s) AS binding(
+                  idx, interface_id, ip, mac_address, vid, observed, times)
+                WHERE
+                  neighbour.interface_id = binding.interface_id AND
+                  neighbour.ip = binding.ip AND
+                  neighbour.mac_address = binding.mac_address AND
+                  neighbour.vid IS NOT DISTINCT FROM binding.vid
+                RETURNING binding.idx
+                """ % values, params)
+            return {index for index, in cursor.fetchall()}
+
     def get_by_updated_with_related_nodes(self):
         """Returns a `QuerySet` of neighbours, while also selecting related
         interfaces and nodes.
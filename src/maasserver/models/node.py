@@ -5055,36 +5055,100 @@ class Controller(Node):
     def report_neighbours(self, neighbours):
         """Update the neighbour table for this controller.
 
+        Neighbours that are already known are updated in bulk; only new
+        bindings, and IP addresses seen with more than one MAC address in
+        this report, are processed one at a time by `update_neighbour`.
+
         :param neighbours: A list of dictionaries containing neighbour data.
             Neighbour data is gathered directly from the ARP monitoring process
             running on each rack interface.
         """
+        # Circular imports.
+        from maasserver.models.neighbour import Neighbour
         # Determine which interfaces' neighbours need updating.
         interface_set = {neighbour['interface'] for neighbour in neighbours}
         interfaces = Interface.objects.get_interface_dict_for_node(
             self, names=interface_set, fetch_fabric_vlan=True)
+        reported = []
+        macs = defaultdict(set)
         for neighbour in neighbours:
             interface = interfaces.get(neighbour['interface'], None)
             if interface is not None:
+                key = (
+                    interface.id, neighbour['ip'], neighbour.get("vid", None))
+                reported.append((key, interface, neighbour))
+                macs[key].add(neighbour['mac'])
+        # Collapse repeated reports of each binding into the last time it was
+        # seen and the number of times it was seen.
+        bindings = OrderedDict()
+        for key, interface, neighbour in reported:
+            if interface.neighbour_discovery_state is False:
+                continue
+            if len(macs[key]) == 1:
+                binding = bindings.setdefault(key, [neighbour, 0])
+                binding[0] = neighbour
+                binding[1] += 1
+        updated = Neighbour.objects.update_current_bindings([
+            (interface_id, ip, neighbour['mac'], vid, neighbour['time'], count)
+            for (interface_id, ip, vid), (neighbour, count) in bindings.items()
+        ])
+        updated = {
+            key for index, key in enumerate(bindings) if index in updated}
+        reported_vids = set()
+        for key, interface, neighbour in reported:
+            if key not in updated:
                 interface.update_neighbour(neighbour)
-                vid = neighbour.get("vid", None)
-                if vid is not None:
-                    interface.report_vid(vid)
+            interface_id, _, vid = key
+            if vid is not None and (interface_id, vid) not in reported_vids:
+                reported_vids.add((interface_id, vid))
+                interface.report_vid(vid)
 
     def report_mdns_entries(self, entries):
         """Update the mDNS entries on this controller.
 
+        Entries that are already known are updated in bulk; only new entries,
+        and hostnames or IP addresses that changed within this report, are
+        processed one at a time by `update_mdns_entry`.
+
         :param entries: A list of dictionaries containing discovered mDNS
             entries. mDNS data is gathered from an `avahi-browse` process
             running on each rack interface.
         """
+        # Circular imports.
+        from maasserver.models.mdns import MDNS
         # Determine which interfaces' entries need updating.
         interface_set = {entry['interface'] for entry in entries}
         interfaces = Interface.objects.get_interface_dict_for_node(
             self, names=interface_set)
+        reported = []
+        hostnames = defaultdict(set)
+        addresses = defaultdict(set)
         for entry in entries:
             interface = interfaces.get(entry['interface'], None)
             if interface is not None:
+                key = (interface.id, entry['address'], entry['hostname'])
+                reported.append((key, interface, entry))
+                hostnames[interface.id, entry['address']].add(
+                    entry['hostname'])
+                addresses[interface.id, entry['hostname']].add(
+                    entry['address'])
+        # Collapse repeated reports of each entry into the number of times it
+        # was seen.
+        counts = OrderedDict()
+        for key, interface, entry in reported:
+            if interface.mdns_discovery_state is False:
+                continue
+            interface_id, ip, hostname = key
+            if (len(hostnames[interface_id, ip]) == 1 and
+                    len(addresses[interface_id, hostname]) == 1):
+                counts[key] = counts.get(key, 0) + 1
+        updated = MDNS.objects.update_current_entries([
+            (interface_id, ip, hostname, count)
+            for (interface_id, ip, hostname), count in counts.items()
+        ])
+        updated = {key for index, key in enumerate(counts) if index in updated}
+        for key, interface, entry in reported:
+            if key not in updated:
                 interface.update_mdns_entry(entry)
 
     def get_discovery_state(self):
@@ -0,0 +1,96 @@
+# Copyright 2018 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""NodeAllocationSummary objects."""
+
+__all__ = [
+    "NodeAllocationSummary",
+    ]
+
+from django.contrib.postgres.fields import ArrayField
+from django.db.models import (
+    BigIntegerField,
+    DO_NOTHING,
+    FloatField,
+    IntegerField,
+    Manager,
+    Model,
+    OneToOneField,
+    TextField,
+)
+from maasserver import DefaultMeta
+from maasserver.models.cleansave import CleanSave
+from maasserver.models.node import Node
+
+
+class NodeAllocationSummary(CleanSave, Model):
+    """A `NodeAllocationSummary` holds what allocating a `Node` by
+    constraints needs to know about its storage and networking.
+
+    There is one row for each node, kept up to date by the `sys_allocation_*`
+    triggers; any updates to this model must be reflected in
+    `sys_allocation_refresh()`, in `maasserver/triggers/system.py`. This lets
+    `AcquireNodeForm` rule out the nodes that cannot match a constraint in the
+    database, without joining their devices and interfaces.
+
+    :ivar node: The `Node` summarised.
+    :ivar cost: The node's cost, used to prefer cheaper nodes.
+    :ivar root_size: The size of the largest block device holding an
+        unacquired root filesystem, directly or on a partition.
+    :ivar root_tags: The tags of those block devices.
+    :ivar root_partition_size: The size of the largest partition holding an
+        unacquired root filesystem.
+    :ivar root_partition_tags: The tags of those partitions.
+    :ivar disk_count: The number of unused block devices.
+    :ivar disk_size: The size of the largest unused block device.
+    :ivar disk_tags: The tags of the unused block devices.
+    :ivar partition_count: The number of unused partitions.
+    :ivar partition_size: The size of the largest unused partition.
+    :ivar partition_tags: The tags of the unused partitions.
+    :ivar fabric_ids: The fabrics of the node's interfaces' VLANs.
+    :ivar vlan_ids: The VLANs of the node's interfaces.
+    :ivar space_ids: The spaces of the node's interfaces' VLANs.
+    :ivar subnet_ids: The subnets of the node's interfaces' IP addresses.
+    """
+
+    class Meta(DefaultMeta):
+        verbose_name = "NodeAllocationSummary"
+        verbose_name_plural = "NodeAllocationSummaries"
+
+    objects = Manager()
+
+    # Rows are derived data owned by the triggers, so there is no database
+    # constraint to get in the way of deleting nodes.
+    node = OneToOneField(
+        Node, primary_key=True, editable=False, on_delete=DO_NOTHING,
+        db_constraint=False, related_name="allocation_summary")
+
+    cost = FloatField(editable=False, db_index=True)
+
+    root_size = BigIntegerField(null=True, editable=False, db_index=True)
+
+    root_tags = ArrayField(TextField(), null=True, editable=False)
+
+    root_partition_size = BigIntegerField(null=True, editable=False)
+
+    root_partition_tags = ArrayField(TextField(), null=True, editable=False)
+
+    disk_count = IntegerField(editable=False)
+
+    disk_size = BigIntegerField(null=True, editable=False)
+
+    disk_tags = ArrayField(TextField(), null=True, editable=False)
+
+    partition_count = IntegerField(editable=False)
+
+    partition_size = BigIntegerField(null=True, editable=False)
+
+    partition_tags = ArrayField(TextField(), null=True, editable=False)
+
+    fabric_ids = ArrayField(IntegerField(), null=True, editable=False)
+
+    vlan_ids = ArrayField(IntegerField(), null=True, editable=False)
+
+    space_ids = ArrayField(IntegerField(), null=True, editable=False)
+
+    subnet_ids = ArrayField(IntegerField(), null=True, editable=False)
@@ -0,0 +1,72 @@
+# Copyright 2018 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""NodeDevice objects."""
+
+__all__ = [
+    "NodeDevice",
+    ]
+
+from django.db.models import (
+    CASCADE,
+    CharField,
+    ForeignKey,
+    Manager,
+)
+from maasserver import DefaultMeta
+from maasserver.enum import NODE_DEVICE_BUS_CHOICES
+from maasserver.models.cleansave import CleanSave
+from maasserver.models.node import Node
+from maasserver.models.timestampedmodel import TimestampedModel
+
+
+class NodeDevice(CleanSave, TimestampedModel):
+    """A `NodeDevice` represents a PCI or USB device found in a `Node`.
+
+    These are recorded from the ``lshw`` output when commissioning results
+    are processed, so that the hardware in nodes can be queried without
+    loading and parsing the XML again.
+
+    :ivar node: `Node` this device was found in.
+    :ivar bus: The bus the device is on, from `NODE_DEVICE_BUS`.
+    :ivar bus_address: The address of the device on its bus, e.g.
+        "0000:00:19.0" for PCI, or "1:2" for USB.
+    :ivar hardware_class: The ``lshw`` class of the device, e.g. "network",
+        "storage", or "display".
+    :ivar vendor_name: The name of the device's vendor, if known.
+    :ivar product_name: The name of the device, if known.
+    :ivar commissioning_driver: The kernel driver that was bound to the
+        device while commissioning, if any.
+    """
+
+    class Meta(DefaultMeta):
+        verbose_name = "NodeDevice"
+        verbose_name_plural = "NodeDevices"
+        unique_together = ('node', 'bus', 'bus_address')
+        index_together = (
+            ('vendor_name', 'product_name'),
+        )
+
+    objects = Manager()
+
+    node = ForeignKey(
+        Node, null=False, blank=False, editable=False, on_delete=CASCADE)
+
+    bus = CharField(
+        max_length=8, null=False, blank=False,
+        choices=NODE_DEVICE_BUS_CHOICES)
+
+    bus_address = CharField(max_length=64, null=False, blank=False)
+
+    hardware_class = CharField(max_length=64, null=False, blank=True)
+
+    vendor_name = CharField(max_length=256, null=False, blank=True)
+
+    product_name = CharField(max_length=256, null=False, blank=True)
+
+    commissioning_driver = CharField(max_length=64, null=False, blank=True)
+
+    def __str__(self):
+        return "%s (%s/%s@%s)" % (
+            self.__class__.__name__, self.node.hostname, self.bus,
+            self.bus_address)
@@ -9,6 +9,7 @@ topology information derived from LLDP.
 
 __all__ = [
     "get_probed_details",
+    "get_probed_details_digests",
     "get_single_probed_details",
     "script_output_nsmap",
 ]
@@ -20,6 +21,7 @@ from provisioningserver.refresh.node_info_scripts import (
     LLDP_OUTPUT_NAME,
     LSHW_OUTPUT_NAME,
 )
+from provisioningserver.tags import combine_detail_digests
 
 # A map of commissioning script output names to their detail
 # namespaces. These namespaces are used in the return values from
@@ -95,3 +97,51 @@ def get_probed_details(nodes):
             stdout_decoded = base64.b64decode(stdout)
             ret[system_id][namespace] = stdout_decoded
     return ret
+
+
+def get_probed_details_digests(nodes):
+    """Return digests of the details of the nodes in the given list.
+
+    The digests are calculated in the database, so the details themselves
+    are not loaded. They change whenever the details returned by
+    `get_probed_details` do.
+
+    :return: A ``{system_id: digest, ...}`` map, where each digest is as
+        returned by `combine_detail_digests`.
+    """
+    node_ids = {node.id: node for node in nodes}
+    digests = {
+        node.system_id: dict.fromkeys(script_output_nsmap.values())
+        for node in node_ids.values()
+    }
+    if len(node_ids) == 0:
+        return {}
+    with connection.cursor() as cursor:
+        # See `get_probed_details` for the details of this query.
+        sql_query = """
+            SELECT
+              script_set.node_id, script_result.script_name,
+              md5(script_result.stdout)
+            FROM
+              metadataserver_scriptresult AS script_result,
+              metadataserver_scriptset AS script_set,
+              maasserver_node AS node
+            WHERE
+              script_set.node_id IN %s AND
+              script_set.id = script_result.script_set_id AND
+              script_result.status = %s AND
+              script_result.script_name IN %s AND
+              script_set.id = node.current_commissioning_script_set_id;
+        """
+        cursor.execute(sql_query, [
+            tuple(node_ids), SCRIPT_STATUS.PASSED,
+            tuple(script_output_nsmap)
+        ])
+        for node_id, script_name, digest in cursor.fetchall():
+            system_id = node_ids[node_id].system_id
+            namespace = script_output_nsmap[script_name]
+            digests[system_id][namespace] = digest
+    return {
+        system_id: combine_detail_digests(node_digests)
+        for system_id, node_digests in digests.items()
+    }
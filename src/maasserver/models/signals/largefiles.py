@@ -9,6 +9,7 @@ __all__ = [
 
 from django.db.models.signals import post_delete
 from maasserver.models.largefile import (
+    delete_cached_content,
     delete_large_object_content_later,
     LargeFile,
 )
@@ -27,6 +28,8 @@ def delete_large_object(sender, instance, **kwargs):
     """
     if instance.content is not None:
         post_commit_do(delete_large_object_content_later, instance.content)
+    # Other regions prune their copies; see `prune_largefile_cache`.
+    post_commit_do(delete_cached_content, instance.sha256)
 
 
 signals.watch(post_delete, delete_large_object, LargeFile)
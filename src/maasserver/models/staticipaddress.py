@@ -49,6 +49,7 @@ from maasserver.exceptions import (
     StaticIPAddressUnavailable,
 )
 from maasserver.fields import MAASIPAddressField
+from maasserver.free_ip_index import free_ip_index
 from maasserver.models.cleansave import CleanSave
 from maasserver.models.config import Config
 from maasserver.models.domain import Domain
@@ -131,6 +132,10 @@ def convert_leases_to_dict(leases):
 class StaticIPAddressManager(Manager):
     """A utility to manage collections of IPAddresses."""
 
+    # The number of taken addresses that `_attempt_allocation_from_index`
+    # tries before giving up on the index.
+    MAX_INDEX_CLASHES = 10
+
     def _verify_alloc_type(self, alloc_type, user=None):
         """Check validity of an `alloc_type` parameter when allocating.
 
@@ -247,6 +252,45 @@ class StaticIPAddressManager(Manager):
             ipaddress.save()
             return ipaddress
 
+    def _attempt_allocation_from_index(
+            self, subnet, alloc_type, user=None, exclude_addresses=None):
+        """Attempt to allocate an address reserved from `free_ip_index`.
+
+        The index hands out each address once in this process, so these
+        addresses can only clash with allocations by other processes since
+        the index was last rebuilt. A clash is skipped over instead of being
+        retried under the `address_allocation` lock. After
+        `MAX_INDEX_CLASHES` clashes the subnet is discarded from the index
+        and the caller falls back to `Subnet.get_next_ip_for_allocation`.
+
+        This method shares a lot in common with
+        `_attempt_allocation_of_free_address` so check out its documentation
+        for more details.
+
+        :return: `StaticIPAddress` if successful, or `None` if the index has
+            no address to offer.
+        """
+        for _ in range(self.MAX_INDEX_CLASHES):
+            addresses = free_ip_index.reserve(
+                subnet, exclude_addresses=exclude_addresses)
+            if len(addresses) == 0:
+                return None
+            ipaddress = StaticIPAddress(alloc_type=alloc_type, subnet=subnet)
+            try:
+                with orm.savepoint():
+                    ipaddress.set_ip_address(addresses[0].format())
+                    ipaddress.save()
+            except IntegrityError as error:
+                if not orm.is_unique_violation(error):
+                    raise
+            else:
+                ipaddress.user = user
+                ipaddress.save()
+                return ipaddress
+        # The index is too far behind the database to be of use.
+        free_ip_index.invalidate([subnet.id], discard=True)
+        return None
+
     def allocate_new(
             self, subnet=None, alloc_type=IPADDRESS_TYPE.AUTO, user=None,
             requested_address=None, exclude_addresses=[]):
@@ -279,6 +323,11 @@ class StaticIPAddressManager(Manager):
                     "Could not find an appropriate subnet.")
 
         if requested_address is None:
+            ipaddress = self._attempt_allocation_from_index(
+                subnet, alloc_type, user=user,
+                exclude_addresses=exclude_addresses)
+            if ipaddress is not None:
+                return ipaddress
             requested_address = subnet.get_next_ip_for_allocation(
                 exclude_addresses=exclude_addresses)
             return self._attempt_allocation_of_free_address(
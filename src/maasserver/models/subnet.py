@@ -8,6 +8,7 @@ __all__ = [
     'Subnet',
 ]
 
+from collections import defaultdict
 from operator import attrgetter
 from typing import (
     Iterable,
@@ -172,6 +173,41 @@ class SubnetQueriesMixin(MAASQueriesMixin):
         else:
             return None
 
+    def get_best_subnets_for_ips(self, ips):
+        """Find the most-specific managed Subnet for each of `ips`.
+
+        Picks the same subnets as `get_best_subnet_for_ip`, but fetches the
+        subnets once rather than querying for every IP address.
+
+        :return: A dict mapping each of `ips` to its `Subnet`, or None.
+        """
+        # Index the subnets by their network address, grouped in the order
+        # that find_best_subnet_for_ip_query prefers them.
+        networks = defaultdict(dict)
+        for subnet in self.select_related("vlan"):
+            network = subnet.get_ipnetwork()
+            key = (subnet.vlan.dhcp_on, network.prefixlen, network.version)
+            networks[key].setdefault(network.first, subnet)
+        networks = sorted(networks.items(), reverse=True)
+
+        best = {}
+        for ip in ips:
+            address = IPAddress(ip)
+            if address.is_ipv4_mapped():
+                address = address.ipv4()
+            bits = 32 if address.version == 4 else 128
+            best[ip] = None
+            for (_, prefixlen, version), subnets in networks:
+                # The address must be strictly inside the subnet.
+                if version != address.version or prefixlen >= bits:
+                    continue
+                host_bits = bits - prefixlen
+                first = (int(address) >> host_bits) << host_bits
+                if first in subnets:
+                    best[ip] = subnets[first]
+                    break
+        return best
+
     def validate_filter_specifiers(self, specifiers):
         """Validate the given filter string."""
         try:
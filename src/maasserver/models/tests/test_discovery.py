@@ -143,6 +143,68 @@ class TestDiscoveryModel(MAASServerTestCase):
         discovery = Discovery.objects.first()
         self.assertThat(discovery.hostname, Equals(rdns_hostname))
 
+    def test__discovery_ids_are_distinct_for_similar_ips(self):
+        mac_address = factory.make_mac_address()
+        d1 = factory.make_Discovery(mac_address=mac_address, ip="10.0.0.2")
+        d2 = factory.make_Discovery(mac_address=mac_address, ip="10.0.0.23")
+        self.assertThat(Discovery.objects.count(), Equals(2))
+        self.assertNotEqual(d1.discovery_id, d2.discovery_id)
+
+    def test__is_removed_with_its_last_neighbour(self):
+        discovery = factory.make_Discovery()
+        discovery.neighbour.delete()
+        self.assertThat(Discovery.objects.count(), Equals(0))
+
+    def test__falls_back_to_remaining_neighbour(self):
+        rack = factory.make_RackController()
+        iface1 = factory.make_Interface(node=rack)
+        iface2 = factory.make_Interface(node=rack)
+        neighbour = factory.make_Neighbour(interface=iface1)
+        factory.make_Neighbour(
+            interface=iface2, mac_address=neighbour.mac_address,
+            ip=neighbour.ip).delete()
+        discovery = Discovery.objects.get()
+        self.assertThat(discovery.neighbour_id, Equals(neighbour.id))
+        self.assertThat(discovery.observer_interface, Equals(iface1))
+
+    def test__follows_mdns_changes(self):
+        rack = factory.make_RackController()
+        iface = factory.make_Interface(node=rack)
+        factory.make_Discovery(hostname="", interface=iface)
+        discovery = Discovery.objects.first()
+        self.assertThat(discovery.hostname, Is(None))
+        mdns = factory.make_MDNS(ip=discovery.ip, interface=iface)
+        discovery = Discovery.objects.first()
+        self.assertThat(discovery.hostname, Equals(mdns.hostname))
+        mdns.delete()
+        discovery = Discovery.objects.first()
+        self.assertThat(discovery.hostname, Is(None))
+
+    def test__follows_observer_changes(self):
+        rack = factory.make_RackController()
+        iface = factory.make_Interface(node=rack)
+        factory.make_Discovery(interface=iface)
+        rack.hostname = factory.make_name("rack")
+        rack.save()
+        iface.name = factory.make_name("eth")
+        iface.save()
+        iface.vlan.fabric.name = factory.make_name("fabric")
+        iface.vlan.fabric.save()
+        discovery = Discovery.objects.first()
+        self.assertThat(discovery.observer_hostname, Equals(rack.hostname))
+        self.assertThat(discovery.observer_interface_name, Equals(iface.name))
+        self.assertThat(
+            discovery.fabric_name, Equals(iface.vlan.fabric.name))
+
+    def test__follows_subnet_changes(self):
+        rack = factory.make_RackController()
+        iface = factory.make_Interface(node=rack)
+        factory.make_Discovery(interface=iface, ip="10.0.0.1")
+        subnet = factory.make_Subnet(cidr="10.0.0.0/24", vlan=iface.vlan)
+        self.assertThat(Discovery.objects.first().subnet, Equals(subnet))
+        subnet.delete()
+        self.assertThat(Discovery.objects.first().subnet, Is(None))
+
 
 class TestDiscoveryManagerClear(MAASServerTestCase):
     """Tests for `DiscoveryManager.clear` """
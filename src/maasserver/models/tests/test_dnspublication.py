@@ -61,6 +61,7 @@ class TestDNSPublication(MAASServerTestCase):
                 serial=IsInstance(int),
                 created=IsInstance(datetime),
                 source=Equals(""),
+                force=Equals(False),
             ))
 
     def test_create_with_values(self):
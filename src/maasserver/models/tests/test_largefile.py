@@ -6,6 +6,7 @@
 __all__ = []
 
 from io import BytesIO
+import os
 from random import randint
 from unittest.mock import (
     ANY,
@@ -14,12 +15,18 @@ from unittest.mock import (
 
 from crochet import wait_for
 from django.db import transaction
+from fixtures import EnvironmentVariableFixture
 from maasserver.fields import LargeObjectFile
 from maasserver.models import (
     largefile as largefile_module,
     signals,
 )
-from maasserver.models.largefile import LargeFile
+from maasserver.models.largefile import (
+    cache_content_later,
+    delete_cached_content,
+    get_largefile_cache_path,
+    LargeFile,
+)
 from maasserver.testing.factory import factory
 from maasserver.testing.testcase import (
     MAASServerTestCase,
@@ -33,10 +40,13 @@ from maastesting.matchers import (
 import psycopg2
 from testtools.matchers import (
     Equals,
+    FileContains,
+    FileExists,
     HasLength,
     Is,
     MatchesListwise,
     MatchesStructure,
+    Not,
 )
 from twisted.internet.task import Clock
 
@@ -131,6 +141,71 @@ class TestLargeFile(MAASServerTestCase):
         largefile = factory.make_LargeFile()
         self.assertTrue(largefile.valid)
 
+    def test_cache_content_writes_content_to_cache(self):
+        self.useFixture(EnvironmentVariableFixture(
+            "MAAS_ROOT", self.make_dir()))
+        content = factory.make_bytes(size=1024)
+        largefile = factory.make_LargeFile(content)
+        path = largefile.cache_content()
+        self.assertEqual(get_largefile_cache_path(largefile.sha256), path)
+        with open(path, "rb") as stream:
+            self.assertEqual(content, stream.read())
+        self.assertEqual(
+            [largefile.sha256], os.listdir(get_largefile_cache_path()))
+
+    def test_cache_content_uses_existing_copy(self):
+        self.useFixture(EnvironmentVariableFixture(
+            "MAAS_ROOT", self.make_dir()))
+        largefile = factory.make_LargeFile()
+        path = get_largefile_cache_path(largefile.sha256)
+        with open(path, "w") as stream:
+            stream.write("cached")
+        self.assertEqual(path, largefile.cache_content())
+        self.assertThat(path, FileContains("cached"))
+
+    def test_cache_content_returns_None_while_another_copy_is_made(self):
+        self.useFixture(EnvironmentVariableFixture(
+            "MAAS_ROOT", self.make_dir()))
+        largefile = factory.make_LargeFile()
+        with largefile_module.NamedLock("largefile-%s" % largefile.sha256):
+            self.assertIsNone(largefile.cache_content())
+        self.assertIsNone(largefile.get_cached_content_path())
+
+    def test_cache_content_removes_partial_copy_on_error(self):
+        self.useFixture(EnvironmentVariableFixture(
+            "MAAS_ROOT", self.make_dir()))
+        largefile = factory.make_LargeFile()
+        self.patch(largefile_module.os, "rename").side_effect = (
+            OSError("No space left on device"))
+        self.assertRaises(OSError, largefile.cache_content)
+        self.assertEqual([], os.listdir(get_largefile_cache_path()))
+
+    def test_get_cached_content_path_returns_None_when_not_cached(self):
+        self.useFixture(EnvironmentVariableFixture(
+            "MAAS_ROOT", self.make_dir()))
+        largefile = factory.make_LargeFile()
+        self.assertIsNone(largefile.get_cached_content_path())
+        path = largefile.cache_content()
+        self.assertEqual(path, largefile.get_cached_content_path())
+
+    def test_cache_content_returns_None_when_incomplete(self):
+        self.useFixture(EnvironmentVariableFixture(
+            "MAAS_ROOT", self.make_dir()))
+        largefile = factory.make_LargeFile(
+            factory.make_bytes(size=512), size=1024)
+        self.assertIsNone(largefile.cache_content())
+        self.assertFalse(
+            os.path.exists(get_largefile_cache_path(largefile.sha256)))
+
+    def test_cache_content_returns_None_when_checksum_mismatches(self):
+        self.useFixture(EnvironmentVariableFixture(
+            "MAAS_ROOT", self.make_dir()))
+        largefile = factory.make_LargeFile()
+        with largefile.content.open('wb') as stream:
+            stream.write(factory.make_bytes(size=largefile.total_size))
+        self.assertIsNone(largefile.cache_content())
+        self.assertEqual([], os.listdir(get_largefile_cache_path()))
+
     def test_delete_does_nothing_if_linked(self):
         largefile = factory.make_LargeFile()
         resource = factory.make_BootResource()
@@ -160,6 +235,58 @@ class TestLargeFile(MAASServerTestCase):
             signals.largefiles.delete_large_object_content_later,
             MockCallsMatch(call(ANY), call(ANY)))
 
+    def test_deletes_cached_content(self):
+        self.patch(signals.largefiles, "delete_large_object_content_later")
+        self.patch(signals.largefiles, "delete_cached_content")
+        largefile = factory.make_LargeFile()
+        self.addCleanup(largefile.content.unlink)
+        with post_commit_hooks:
+            largefile.delete()
+        self.assertThat(
+            signals.largefiles.delete_cached_content,
+            MockCalledOnceWith(largefile.sha256))
+
+
+class TestDeleteCachedContent(MAASServerTestCase):
+
+    def test__deletes_cached_copy(self):
+        self.useFixture(EnvironmentVariableFixture(
+            "MAAS_ROOT", self.make_dir()))
+        sha256 = factory.make_name("sha256")
+        path = get_largefile_cache_path(sha256)
+        open(path, "wb").close()
+        delete_cached_content(sha256)
+        self.assertThat(path, Not(FileExists()))
+
+    def test__ignores_missing_copy(self):
+        self.useFixture(EnvironmentVariableFixture(
+            "MAAS_ROOT", self.make_dir()))
+        delete_cached_content(factory.make_name("sha256"))
+
+
+class TestCacheContentLater(MAASTransactionServerTestCase):
+
+    def test__schedules_copy(self):
+        self.useFixture(EnvironmentVariableFixture(
+            "MAAS_ROOT", self.make_dir()))
+        clock = self.patch(largefile_module, "reactor", Clock())
+
+        with transaction.atomic():
+            largefile = factory.make_LargeFile()
+
+        cache_content_later(largefile.sha256)
+
+        [delayed_call] = clock.getDelayedCalls()
+        self.assertThat(delayed_call, MatchesStructure(
+            func=MatchesStructure.byEquality(__name__="cache"),
+            args=Equals((largefile.sha256,)), time=Equals(0),
+        ))
+        func = wait_for(30)(delayed_call.func)  # Wait 30 seconds.
+        func(*delayed_call.args, **delayed_call.kw)
+
+        self.assertTrue(
+            os.path.isfile(get_largefile_cache_path(largefile.sha256)))
+
 
 class TestDeleteLargeObjectContentLater(MAASTransactionServerTestCase):
 
@@ -5,8 +5,10 @@
 
 __all__ = []
 
+from maasserver.models.mdns import MDNS
 from maasserver.testing.factory import factory
 from maasserver.testing.testcase import MAASServerTestCase
+from maasserver.utils.orm import reload_object
 from testtools.matchers import Equals
 
 
@@ -16,3 +18,15 @@ class TestMDNSModel(MAASServerTestCase):
         mdns = factory.make_MDNS(hostname="Living room")
         # Expect no exception.
         self.assertThat(mdns.hostname, Equals("Living room"))
+
+
+class TestMDNSManager(MAASServerTestCase):
+
+    def test_update_current_entries_returns_indexes_of_updated(self):
+        mdns = factory.make_MDNS(ip=factory.make_ipv4_address())
+        updated = MDNS.objects.update_current_entries([
+            (mdns.interface.id, mdns.ip, factory.make_hostname(), 1),
+            (mdns.interface.id, mdns.ip, mdns.hostname, 2),
+        ])
+        self.assertThat(updated, Equals({1}))
+        self.assertThat(reload_object(mdns).count, Equals(mdns.count + 2))
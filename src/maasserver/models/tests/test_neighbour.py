@@ -5,9 +5,12 @@
 
 __all__ = []
 
+from maasserver.models.neighbour import Neighbour
 from maasserver.testing.factory import factory
 from maasserver.testing.testcase import MAASServerTestCase
+from maasserver.utils.orm import reload_object
 from maastesting.matchers import IsNonEmptyString
+from testtools.matchers import Equals
 
 
 class TestNeighbourModel(MAASServerTestCase):
@@ -15,3 +18,23 @@ class TestNeighbourModel(MAASServerTestCase):
     def test_mac_organization(self):
         neighbour = factory.make_Neighbour(mac_address="48:51:b7:00:00:00")
         self.assertThat(neighbour.mac_organization, IsNonEmptyString)
+
+
+class TestNeighbourManager(MAASServerTestCase):
+
+    def test_update_current_bindings_returns_indexes_of_updated(self):
+        neighbour = factory.make_Neighbour(vid=None, time=1, count=1)
+        updated = Neighbour.objects.update_current_bindings([
+            (neighbour.interface.id, factory.make_ipv4_address(),
+             neighbour.mac_address, None, 2, 1),
+            (neighbour.interface.id, neighbour.ip, neighbour.mac_address,
+             None, 3, 2),
+        ])
+        self.assertThat(updated, Equals({1}))
+        neighbour = reload_object(neighbour)
+        self.assertThat(neighbour.time, Equals(3))
+        self.assertThat(neighbour.count, Equals(3))
+
+    def test_update_current_bindings_does_nothing_without_bindings(self):
+        self.assertThat(
+            Neighbour.objects.update_current_bindings([]), Equals(set()))
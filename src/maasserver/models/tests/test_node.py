@@ -7475,8 +7475,44 @@ class TestReportNeighbours(MAASServerTestCase):
         update_neighbour = self.patch(
             interface_module.Interface, 'update_neighbour')
         neighbours = [
-            {'interface': 'eth0', 'mac': factory.make_mac_address()},
-            {'interface': 'eth1', 'mac': factory.make_mac_address()},
+            {'interface': 'eth0', 'ip': factory.make_ipv4_address(),
+             'mac': factory.make_mac_address(), 'time': 1},
+            {'interface': 'eth1', 'ip': factory.make_ipv4_address(),
+             'mac': factory.make_mac_address(), 'time': 2},
+        ]
+        rack.report_neighbours(neighbours)
+        self.assertThat(update_neighbour, MockCallsMatch(
+            *[call(neighbour) for neighbour in neighbours]
+        ))
+
+    def test__updates_known_neighbours_in_bulk(self):
+        rack = factory.make_RackController()
+        interface = factory.make_Interface(name='eth0', node=rack)
+        neighbour = factory.make_Neighbour(
+            interface=interface, vid=None, time=1, count=5)
+        update_neighbour = self.patch(
+            interface_module.Interface, 'update_neighbour')
+        rack.report_neighbours([
+            {'interface': 'eth0', 'ip': neighbour.ip,
+             'mac': neighbour.mac_address, 'time': time}
+            for time in (2, 3)
+        ])
+        self.assertThat(update_neighbour, MockNotCalled())
+        neighbour = reload_object(neighbour)
+        self.assertThat(neighbour.time, Equals(3))
+        self.assertThat(neighbour.count, Equals(7))
+
+    def test__calls_update_neighbour_for_ip_with_several_macs(self):
+        rack = factory.make_RackController()
+        interface = factory.make_Interface(name='eth0', node=rack)
+        neighbour = factory.make_Neighbour(interface=interface)
+        update_neighbour = self.patch(
+            interface_module.Interface, 'update_neighbour')
+        neighbours = [
+            {'interface': 'eth0', 'ip': neighbour.ip, 'vid': neighbour.vid,
+             'mac': factory.make_mac_address(), 'time': 1},
+            {'interface': 'eth0', 'ip': neighbour.ip, 'vid': neighbour.vid,
+             'mac': neighbour.mac_address, 'time': 2},
         ]
         rack.report_neighbours(neighbours)
         self.assertThat(update_neighbour, MockCallsMatch(
@@ -7492,8 +7528,12 @@ class TestReportNeighbours(MAASServerTestCase):
         report_vid = self.patch(
             interface_module.Interface, 'report_vid')
         neighbours = [
-            {'interface': 'eth0', 'mac': factory.make_mac_address(), 'vid': 3},
-            {'interface': 'eth1', 'mac': factory.make_mac_address(), 'vid': 7},
+            {'interface': 'eth0', 'ip': factory.make_ipv4_address(),
+             'mac': factory.make_mac_address(), 'vid': 3, 'time': 1},
+            {'interface': 'eth0', 'ip': factory.make_ipv4_address(),
+             'mac': factory.make_mac_address(), 'vid': 3, 'time': 2},
+            {'interface': 'eth1', 'ip': factory.make_ipv4_address(),
+             'mac': factory.make_mac_address(), 'vid': 7, 'time': 3},
         ]
         rack.report_neighbours(neighbours)
         self.assertThat(report_vid, MockCallsMatch(call(3), call(7)))
@@ -7509,8 +7549,43 @@ class TestReportMDNSEntries(MAASServerTestCase):
         update_mdns_entry = self.patch(
             interface_module.Interface, 'update_mdns_entry')
         entries = [
-            {'interface': 'eth0', 'hostname': factory.make_name('eth0')},
-            {'interface': 'eth1', 'hostname': factory.make_name('eth1')},
+            {'interface': 'eth0', 'hostname': factory.make_name('eth0'),
+             'address': factory.make_ipv4_address()},
+            {'interface': 'eth1', 'hostname': factory.make_name('eth1'),
+             'address': factory.make_ipv4_address()},
+        ]
+        rack.report_mdns_entries(entries)
+        self.assertThat(update_mdns_entry, MockCallsMatch(
+            *[call(entry) for entry in entries]
+        ))
+
+    def test__updates_known_entries_in_bulk(self):
+        rack = factory.make_RackController()
+        interface = factory.make_Interface(name='eth0', node=rack)
+        mdns = factory.make_MDNS(
+            interface=interface, ip=factory.make_ipv4_address())
+        update_mdns_entry = self.patch(
+            interface_module.Interface, 'update_mdns_entry')
+        rack.report_mdns_entries([
+            {'interface': 'eth0', 'hostname': mdns.hostname,
+             'address': mdns.ip}
+            for _ in range(3)
+        ])
+        self.assertThat(update_mdns_entry, MockNotCalled())
+        self.assertThat(reload_object(mdns).count, Equals(mdns.count + 3))
+
+    def test__calls_update_mdns_entry_for_changed_hostname(self):
+        rack = factory.make_RackController()
+        interface = factory.make_Interface(name='eth0', node=rack)
+        mdns = factory.make_MDNS(
+            interface=interface, ip=factory.make_ipv4_address())
+        update_mdns_entry = self.patch(
+            interface_module.Interface, 'update_mdns_entry')
+        entries = [
+            {'interface': 'eth0', 'hostname': factory.make_hostname(),
+             'address': mdns.ip},
+            {'interface': 'eth0', 'hostname': mdns.hostname,
+             'address': mdns.ip},
         ]
         rack.report_mdns_entries(entries)
         self.assertThat(update_mdns_entry, MockCallsMatch(
@@ -0,0 +1,116 @@
+# Copyright 2018 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Test maasserver NodeAllocationSummary model."""
+
+__all__ = []
+
+from maasserver.enum import INTERFACE_TYPE
+from maasserver.models import NodeAllocationSummary
+from maasserver.testing.factory import factory
+from maasserver.testing.testcase import MAASServerTestCase
+
+
+def get_summary(node):
+    return NodeAllocationSummary.objects.get(node=node)
+
+
+class TestNodeAllocationSummary(MAASServerTestCase):
+    """The summaries are kept up to date by the `sys_allocation_*`
+    triggers."""
+
+    def test_created_with_node(self):
+        node = factory.make_Node(
+            cpu_count=4, memory=2048, with_boot_disk=False)
+        summary = get_summary(node)
+        self.assertEqual(6, summary.cost)
+        self.assertIsNone(summary.root_size)
+        self.assertEqual(0, summary.disk_count)
+        self.assertEqual(0, summary.partition_count)
+
+    def test_follows_cost_changes(self):
+        node = factory.make_Node(
+            cpu_count=4, memory=2048, with_boot_disk=False)
+        node.cpu_count = 8
+        node.save()
+        self.assertEqual(10, get_summary(node).cost)
+
+    def test_deleted_with_node(self):
+        node = factory.make_Node()
+        node.delete()
+        self.assertItemsEqual([], NodeAllocationSummary.objects.all())
+
+    def test_summarises_root_device(self):
+        node = factory.make_Node(with_boot_disk=False)
+        device = factory.make_PhysicalBlockDevice(
+            node=node, formatted_root=True)
+        partition = device.get_partitiontable().partitions.get()
+        summary = get_summary(node)
+        self.assertEqual(device.size, summary.root_size)
+        self.assertItemsEqual(device.tags, summary.root_tags)
+        self.assertEqual(partition.size, summary.root_partition_size)
+        self.assertItemsEqual(partition.tags, summary.root_partition_tags)
+        # Neither the root device nor its partition are unused.
+        self.assertEqual(0, summary.disk_count)
+        self.assertEqual(0, summary.partition_count)
+
+    def test_ignores_acquired_root_device(self):
+        node = factory.make_Node(with_boot_disk=False)
+        device = factory.make_PhysicalBlockDevice(node=node)
+        factory.make_Filesystem(
+            block_device=device, mount_point='/', acquired=True)
+        self.assertIsNone(get_summary(node).root_size)
+
+    def test_summarises_unused_disks(self):
+        node = factory.make_Node(with_boot_disk=False)
+        devices = [
+            factory.make_PhysicalBlockDevice(node=node) for _ in range(3)]
+        summary = get_summary(node)
+        self.assertEqual(3, summary.disk_count)
+        self.assertEqual(
+            max(device.size for device in devices), summary.disk_size)
+        self.assertItemsEqual(
+            {tag for device in devices for tag in device.tags},
+            summary.disk_tags)
+        factory.make_Filesystem(block_device=devices[0])
+        factory.make_PartitionTable(block_device=devices[1])
+        summary = get_summary(node)
+        self.assertEqual(1, summary.disk_count)
+        self.assertItemsEqual(devices[2].tags, summary.disk_tags)
+
+    def test_summarises_unused_partitions(self):
+        node = factory.make_Node(with_boot_disk=False)
+        partition_table = factory.make_PartitionTable(node=node)
+        partition = factory.make_Partition(partition_table=partition_table)
+        summary = get_summary(node)
+        self.assertEqual(1, summary.partition_count)
+        self.assertEqual(partition.size, summary.partition_size)
+        self.assertItemsEqual(partition.tags, summary.partition_tags)
+        factory.make_Filesystem(partition=partition)
+        self.assertEqual(0, get_summary(node).partition_count)
+
+    def test_summarises_interfaces(self):
+        subnet = factory.make_Subnet(space=factory.make_Space())
+        node = factory.make_Node_with_Interface_on_Subnet(subnet=subnet)
+        summary = get_summary(node)
+        self.assertIn(subnet.vlan.fabric_id, summary.fabric_ids)
+        self.assertIn(subnet.vlan_id, summary.vlan_ids)
+        self.assertIn(subnet.vlan.space_id, summary.space_ids)
+        self.assertIn(subnet.id, summary.subnet_ids)
+
+    def test_follows_interface_changes(self):
+        node = factory.make_Node()
+        vlan = factory.make_VLAN()
+        interface = factory.make_Interface(
+            INTERFACE_TYPE.PHYSICAL, node=node, vlan=vlan)
+        self.assertIn(vlan.id, get_summary(node).vlan_ids)
+        interface.delete()
+        self.assertNotIn(vlan.id, get_summary(node).vlan_ids or [])
+
+    def test_follows_vlan_changes(self):
+        node = factory.make_Node()
+        vlan = factory.make_VLAN()
+        factory.make_Interface(INTERFACE_TYPE.PHYSICAL, node=node, vlan=vlan)
+        vlan.fabric = factory.make_Fabric()
+        vlan.save()
+        self.assertIn(vlan.fabric_id, get_summary(node).fabric_ids)
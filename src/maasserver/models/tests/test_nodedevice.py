@@ -0,0 +1,33 @@
+# Copyright 2018 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Test maasserver NodeDevice model."""
+
+__all__ = []
+
+from django.core.exceptions import ValidationError
+from maasserver.enum import NODE_DEVICE_BUS
+from maasserver.testing.factory import factory
+from maasserver.testing.testcase import MAASServerTestCase
+
+
+class TestNodeDevice(MAASServerTestCase):
+
+    def test_str(self):
+        # A NodeDevice object string representation references the parent
+        # node hostname and the device's bus address.
+        node = factory.make_Machine(hostname="foobar")
+        device = factory.make_NodeDevice(
+            node=node, bus=NODE_DEVICE_BUS.PCI, bus_address="0000:00:19.0")
+        self.assertEqual("NodeDevice (foobar/pci@0000:00:19.0)", str(device))
+
+    def test_unique_on_node_bus_and_address(self):
+        device = factory.make_NodeDevice()
+        self.assertRaises(
+            ValidationError, factory.make_NodeDevice, node=device.node,
+            bus=device.bus, bus_address=device.bus_address)
+
+    def test_deleted_with_node(self):
+        device = factory.make_NodeDevice()
+        device.node.delete()
+        self.assertItemsEqual([], device.__class__.objects.all())
@@ -7,6 +7,7 @@ __all__ = []
 
 from maasserver.models.nodeprobeddetails import (
     get_probed_details,
+    get_probed_details_digests,
     get_single_probed_details,
     script_output_nsmap,
 )
@@ -20,6 +21,8 @@ from provisioningserver.refresh.node_info_scripts import (
     LLDP_OUTPUT_NAME,
     LSHW_OUTPUT_NAME,
 )
+from provisioningserver.tags import combine_detail_digests
+from testtools.matchers import HasLength
 
 
 class TestNodeDetail(MAASServerTestCase):
@@ -89,3 +92,33 @@ class TestNodeDetail(MAASServerTestCase):
             # returned by get_probed_details.
             self.make_script_set_and_results(node, "new")
         self.assertDictEqual(expected, get_probed_details(nodes))
+
+    def test_get_probed_details_digests_match_details(self):
+        nodes = [factory.make_Node() for _ in range(2)]
+        for node, suffix in zip(nodes, ("one", "two")):
+            script_set, _ = self.make_script_set_and_results(node, suffix)
+            node.current_commissioning_script_set = script_set
+            node.save()
+        node_without_details = factory.make_Node()
+        digests = get_probed_details_digests(nodes + [node_without_details])
+        self.assertThat(digests, HasLength(3))
+        self.assertThat(set(digests.values()), HasLength(3))
+        self.assertEqual(
+            combine_detail_digests({"lshw": None, "lldp": None}),
+            digests[node_without_details.system_id])
+
+    def test_get_probed_details_digests_of_no_nodes(self):
+        self.assertEqual({}, get_probed_details_digests([]))
+
+    def test_get_probed_details_digests_change_with_details(self):
+        node = factory.make_Node()
+        script_set, _ = self.make_script_set_and_results(node, "old")
+        node.current_commissioning_script_set = script_set
+        node.save()
+        [old_digest] = get_probed_details_digests([node]).values()
+        script_set, _ = self.make_script_set_and_results(node, "new")
+        node.current_commissioning_script_set = script_set
+        node.save()
+        [new_digest] = get_probed_details_digests([node]).values()
+        self.assertNotEqual(old_digest, new_digest)
+
@@ -28,6 +28,8 @@ from maasserver.exceptions import (
     StaticIPAddressOutOfRange,
     StaticIPAddressUnavailable,
 )
+from maasserver.free_ip_index import FreeIPIndex
+from maasserver.models import staticipaddress as staticipaddress_module
 from maasserver.models.config import Config
 from maasserver.models.domain import Domain
 from maasserver.models.staticipaddress import (
@@ -312,6 +314,53 @@ class TestStaticIPAddressManager(MAASServerTestCase):
                 orm.retry_context.stack._cm_pending,
                 HasLength(0))
 
+    def patch_free_ip_index(self):
+        index = FreeIPIndex()
+        index.enable()
+        self.patch(staticipaddress_module, "free_ip_index", index)
+        return index
+
+    def test_allocate_new_reserves_from_free_ip_index(self):
+        index = self.patch_free_ip_index()
+        subnet = factory.make_managed_Subnet()
+        expected = subnet.get_next_ip_for_allocation()
+        ipaddress = StaticIPAddress.objects.allocate_new(subnet)
+        self.assertEqual(expected, ipaddress.ip)
+        self.assertIn(subnet.id, index._entries)
+
+    def test_allocate_new_skips_address_taken_since_index_was_built(self):
+        self.patch_free_ip_index()
+        subnet = factory.make_Subnet(
+            cidr='10.0.0.0/24', gateway_ip='10.0.0.1', dns_servers=[])
+        factory.make_IPRange(subnet, '10.0.0.10', '10.0.0.250')
+        self.assertEqual(
+            "10.0.0.251", StaticIPAddress.objects.allocate_new(subnet).ip)
+        # The index does not know about this address.
+        factory.make_StaticIPAddress(ip="10.0.0.252", subnet=subnet)
+        with orm.retry_context:
+            ipaddress = StaticIPAddress.objects.allocate_new(subnet)
+            # No retry with the `address_allocation` lock was needed.
+            self.assertThat(
+                orm.retry_context.stack._cm_pending, HasLength(0))
+        self.assertEqual("10.0.0.253", ipaddress.ip)
+
+    def test_allocate_new_falls_back_when_index_keeps_clashing(self):
+        index = self.patch_free_ip_index()
+        reserve = self.patch(index, "reserve")
+        reserve.side_effect = lambda subnet, exclude_addresses: [
+            IPAddress(subnet.get_next_ip_for_allocation())]
+        set_ip_address = self.patch(StaticIPAddress, "set_ip_address")
+        set_ip_address.side_effect = orm.make_unique_violation()
+        with orm.retry_context:
+            self.assertRaises(
+                orm.RetryTransaction, StaticIPAddress.objects.allocate_new,
+                subnet=factory.make_managed_Subnet())
+            self.assertThat(
+                list(orm.retry_context.stack._cm_pending),
+                Equals([locks.address_allocation]))
+        self.assertEqual(
+            StaticIPAddress.objects.MAX_INDEX_CLASHES, reserve.call_count)
+
 
 class TestStaticIPAddressManagerTransactional(MAASTransactionServerTestCase):
     """Transactional tests for `StaticIPAddressManager."""
@@ -714,6 +714,45 @@ class TestGetBestSubnetForIP(MAASServerTestCase):
         self.expectThat(subnet, Is(None))
 
 
+class TestSubnetManagerGetBestSubnetsForIPs(MAASServerTestCase):
+
+    def test__returns_most_specific_subnet_for_each_ip(self):
+        factory.make_Subnet(cidr="10.0.0.0/8")
+        ipv4_subnet = factory.make_Subnet(cidr="10.1.1.0/24")
+        factory.make_Subnet(cidr="10.1.0.0/16")
+        factory.make_Subnet(cidr="2001::/16")
+        ipv6_subnet = factory.make_Subnet(cidr="2001:db8:1:2::/64")
+        ips = ["10.1.1.1", "::ffff:10.1.1.2", "2001:db8:1:2::1", "::"]
+        subnets = Subnet.objects.get_best_subnets_for_ips(ips)
+        self.assertThat(subnets, Equals({
+            "10.1.1.1": ipv4_subnet,
+            "::ffff:10.1.1.2": ipv4_subnet,
+            "2001:db8:1:2::1": ipv6_subnet,
+            "::": None,
+        }))
+
+    def test__prefers_managed_subnets(self):
+        managed = factory.make_ipv4_Subnet_with_IPRanges(cidr="10.0.0.0/16")
+        factory.make_ipv4_Subnet_with_IPRanges(
+            cidr="10.0.1.0/24", unmanaged=True)
+        subnets = Subnet.objects.get_best_subnets_for_ips(["10.0.1.1"])
+        self.assertThat(subnets, Equals({"10.0.1.1": managed}))
+
+    def test__matches_get_best_subnet_for_ip(self):
+        for _ in range(3):
+            factory.make_Subnet()
+        ips = [
+            factory.pick_ip_in_network(subnet.get_ipnetwork())
+            for subnet in Subnet.objects.all()
+        ]
+        self.assertThat(
+            Subnet.objects.get_best_subnets_for_ips(ips),
+            Equals({
+                ip: Subnet.objects.get_best_subnet_for_ip(ip)
+                for ip in ips
+            }))
+
+
 class SubnetLabelTest(MAASServerTestCase):
 
     def test__returns_cidr_for_null_name(self):
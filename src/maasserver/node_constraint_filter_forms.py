@@ -31,6 +31,7 @@ from maasserver.forms import (
 import maasserver.forms as maasserver_forms
 from maasserver.models import (
     BlockDevice,
+    Fabric,
     Filesystem,
     Interface,
     Partition,
@@ -326,6 +327,14 @@ def get_storage_constraints_from_string(storage):
     return head + tail
 
 
+def get_fabric_ids(**filters):
+    """Return the IDs of the fabrics matching `filters`.
+
+    These are matched against the fabrics in nodes' allocation summaries.
+    """
+    return list(Fabric.objects.filter(**filters).values_list('id', flat=True))
+
+
 def format_device_key(device_info):
     """Format the `device_info` into a key for the storage constraint output.
     """
@@ -338,6 +347,53 @@ def format_device_key(device_info):
         raise ValueError("Unknown device_type: %s" % device_type)
 
 
+def filter_nodes_by_storage_summary(nodes, storage):
+    """Exclude the `nodes` that cannot possibly match `storage`.
+
+    This is decided in the database from each node's `NodeAllocationSummary`:
+    a node is kept only if its root device, unused block devices and unused
+    partitions are big enough, numerous enough and tagged well enough for the
+    constraints. `nodes_by_storage` still needs to match the devices of the
+    nodes that are kept.
+    """
+    constraints = get_storage_constraints_from_string(storage)
+    if constraints is None:
+        return nodes
+    (_, root_size, root_tags), others = constraints[0], constraints[1:]
+    conditions = {}
+    if root_tags is not None and 'partition' in root_tags:
+        conditions['root_partition_size__gte'] = root_size
+        part_tags = [tag for tag in root_tags if tag != 'partition']
+        if part_tags:
+            conditions['root_partition_tags__contains'] = part_tags
+    else:
+        conditions['root_size__gte'] = root_size
+        if root_tags:
+            conditions['root_tags__contains'] = root_tags
+    disks = [
+        (size, tags) for _, size, tags in others
+        if tags is None or 'partition' not in tags
+    ]
+    partitions = [
+        (size, [tag for tag in tags if tag != 'partition'])
+        for _, size, tags in others
+        if tags is not None and 'partition' in tags
+    ]
+    for kind, wanted in ('disk', disks), ('partition', partitions):
+        if len(wanted) > 0:
+            conditions[kind + '_count__gte'] = len(wanted)
+            conditions[kind + '_size__gte'] = max(
+                size for size, _ in wanted)
+            tags = set(chain.from_iterable(
+                tags for _, tags in wanted if tags))
+            if tags:
+                conditions[kind + '_tags__contains'] = sorted(tags)
+    return nodes.filter(**{
+        'allocation_summary__' + key: value
+        for key, value in conditions.items()
+    })
+
+
 def nodes_by_storage(storage, node_ids=None):
     """Return list of dicts describing matching nodes and matched block devices
 
@@ -921,22 +977,22 @@ class AcquireNodeForm(RenamableFieldsForm):
         return filtered_nodes, compatible_nodes, compatible_interfaces
 
     def reorder_nodes_by_cost(self, filtered_nodes):
-        # This uses a very simple procedure to compute a machine's
-        # cost. This procedure is loosely based on how ec2 computes
-        # the costs of machines. This is here to give a hint to let
-        # the call to acquire() decide which machine to return based
-        # on the machine's cost when multiple machines match the
-        # constraints.
-        filtered_nodes = filtered_nodes.distinct().extra(
-            select={'cost': "cpu_count + memory / 1024."})
-        return filtered_nodes.order_by("cost")
+        # The cost of each machine is kept in its allocation summary. This
+        # is here to give a hint to let the call to acquire() decide which
+        # machine to return based on the machine's cost when multiple
+        # machines match the constraints.
+        return filtered_nodes.distinct().order_by("allocation_summary__cost")
 
     def filter_by_interfaces(self, filtered_nodes):
         compatible_interfaces = {}
         interfaces_label_map = self.cleaned_data.get(
             self.get_field_name('interfaces'))
         if interfaces_label_map is not None:
-            result = nodes_by_interface(interfaces_label_map)
+            # Only match the interfaces of nodes that are still candidates,
+            # in the database, rather than those of every node.
+            result = nodes_by_interface(
+                interfaces_label_map, include_filter={
+                    'node_id__in': filtered_nodes.values('id')})
             if result.node_ids is not None:
                 filtered_nodes = filtered_nodes.filter(id__in=result.node_ids)
                 compatible_interfaces = result.label_map
@@ -947,7 +1003,13 @@ class AcquireNodeForm(RenamableFieldsForm):
         storage = self.cleaned_data.get(
             self.get_field_name('storage'))
         if storage:
-            compatible_nodes = nodes_by_storage(storage)
+            # Only match the devices of nodes that are still candidates, and
+            # whose allocation summary shows that they could match, rather
+            # than those of every node.
+            filtered_nodes = filter_nodes_by_storage_summary(
+                filtered_nodes, storage)
+            compatible_nodes = nodes_by_storage(
+                storage, node_ids=filtered_nodes.values('id'))
             node_ids = list(compatible_nodes)
             if node_ids is not None:
                 filtered_nodes = filtered_nodes.filter(id__in=node_ids)
@@ -958,12 +1020,14 @@ class AcquireNodeForm(RenamableFieldsForm):
             'fabric_classes'))
         if fabric_classes is not None and len(fabric_classes) > 0:
             filtered_nodes = filtered_nodes.filter(
-                interface__vlan__fabric__class_type__in=fabric_classes)
+                allocation_summary__fabric_ids__overlap=get_fabric_ids(
+                    class_type__in=fabric_classes))
         not_fabric_classes = self.cleaned_data.get(self.get_field_name(
             'not_fabric_classes'))
         if not_fabric_classes is not None and len(not_fabric_classes) > 0:
             filtered_nodes = filtered_nodes.exclude(
-                interface__vlan__fabric__class_type__in=not_fabric_classes)
+                allocation_summary__fabric_ids__overlap=get_fabric_ids(
+                    class_type__in=not_fabric_classes))
         return filtered_nodes
 
     def filter_by_fabrics(self, filtered_nodes):
@@ -972,40 +1036,42 @@ class AcquireNodeForm(RenamableFieldsForm):
             # XXX mpontillo 2015-10-30 need to also handle fabrics whose name
             # is null (fabric-<id>).
             filtered_nodes = filtered_nodes.filter(
-                interface__vlan__fabric__name__in=fabrics)
+                allocation_summary__fabric_ids__overlap=get_fabric_ids(
+                    name__in=fabrics))
         not_fabrics = self.cleaned_data.get(self.get_field_name('not_fabrics'))
         if not_fabrics is not None and len(not_fabrics) > 0:
             # XXX mpontillo 2015-10-30 need to also handle fabrics whose name
             # is null (fabric-<id>).
             filtered_nodes = filtered_nodes.exclude(
-                interface__vlan__fabric__name__in=not_fabrics)
+                allocation_summary__fabric_ids__overlap=get_fabric_ids(
+                    name__in=not_fabrics))
         return filtered_nodes
 
     def filter_by_vlans(self, filtered_nodes):
         vlans = self.cleaned_data.get(self.get_field_name('vlans'))
         if vlans is not None and len(vlans) > 0:
-            for vlan in set(vlans):
-                filtered_nodes = filtered_nodes.filter(
-                    interface__vlan=vlan)
+            filtered_nodes = filtered_nodes.filter(
+                allocation_summary__vlan_ids__contains=sorted(
+                    vlan.id for vlan in vlans))
         not_vlans = self.cleaned_data.get(self.get_field_name('not_vlans'))
         if not_vlans is not None and len(not_vlans) > 0:
-            for not_vlan in set(not_vlans):
-                filtered_nodes = filtered_nodes.exclude(
-                    interface__vlan=not_vlan)
+            filtered_nodes = filtered_nodes.exclude(
+                allocation_summary__vlan_ids__overlap=sorted(
+                    vlan.id for vlan in not_vlans))
         return filtered_nodes
 
     def filter_by_subnets(self, filtered_nodes):
         subnets = self.cleaned_data.get(self.get_field_name('subnets'))
         if subnets is not None and len(subnets) > 0:
-            for subnet in set(subnets):
-                filtered_nodes = filtered_nodes.filter(
-                    interface__ip_addresses__subnet=subnet)
+            filtered_nodes = filtered_nodes.filter(
+                allocation_summary__subnet_ids__contains=sorted(
+                    subnet.id for subnet in subnets))
         not_subnets = self.cleaned_data.get(
             self.get_field_name('not_subnets'))
         if not_subnets is not None and len(not_subnets) > 0:
-            for not_subnet in set(not_subnets):
-                filtered_nodes = filtered_nodes.exclude(
-                    interface__ip_addresses__subnet=not_subnet)
+            filtered_nodes = filtered_nodes.exclude(
+                allocation_summary__subnet_ids__overlap=sorted(
+                    subnet.id for subnet in not_subnets))
         return filtered_nodes
 
     def filter_by_zone(self, filtered_nodes):
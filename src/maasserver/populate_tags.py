@@ -22,6 +22,7 @@ from maasserver.models.node import (
 )
 from maasserver.models.nodeprobeddetails import (
     get_probed_details,
+    get_probed_details_digests,
     get_single_probed_details,
     script_output_nsmap,
 )
@@ -42,8 +43,10 @@ from provisioningserver.logger import (
 from provisioningserver.rpc.cluster import EvaluateTag
 from provisioningserver.tags import (
     DEFAULT_BATCH_SIZE,
+    DetailsDocumentCache,
     gen_batches,
     merge_details,
+    merge_details_cached,
 )
 from provisioningserver.utils import classify
 from provisioningserver.utils.twisted import (
@@ -66,6 +69,9 @@ tag_nsmap = {
     for namespace in script_output_nsmap.values()
 }
 
+# Merged details documents in the region; see `DetailsDocumentCache`.
+details_documents = DetailsDocumentCache()
+
 
 def chunk_list(items, num_chunks):
     """Split `items` into (at most) `num_chunks` lists.
@@ -116,8 +122,12 @@ def populate_tags(tag):
         # Split the work between the connected rack controllers.
         @transactional
         def _generate_work():
-            node_ids = Node.objects.all().values_list("system_id", flat=True)
-            node_ids = [{"system_id": node_id} for node_id in node_ids]
+            nodes = Node.objects.all().only("id", "system_id")
+            digests = get_probed_details_digests(nodes)
+            node_ids = [
+                {"system_id": system_id, "digest": digest}
+                for system_id, digest in digests.items()
+            ]
             chunked_node_ids = list(chunk_list(node_ids, len(clients)))
             connected_racks = []
             for idx, client in enumerate(clients):
@@ -236,13 +246,23 @@ def populate_tag_for_multiple_nodes(tag, nodes, batch_size=DEFAULT_BATCH_SIZE):
     xpath = etree.XPath(tag.definition, namespaces=tag_nsmap)
     # The XML details documents can be large so work in batches.
     for batch in gen_batches(nodes, batch_size):
-        probed_details = get_probed_details(batch)
-        probed_details_docs_by_node = {
-            node: merge_details(probed_details[node.system_id])
+        # Only fetch and merge the details of nodes that have changed since
+        # they were last merged, whatever they were evaluated against.
+        digests = get_probed_details_digests(batch)
+        documents = {
+            node: details_documents.get(digests[node.system_id])
             for node in batch
         }
-        nodes_matching, nodes_nonmatching = classify(
-            partial(try_match_xpath, xpath, logger=maaslog),
-            probed_details_docs_by_node.items())
+        nodes_to_fetch = [
+            node for node, document in documents.items() if document is None]
+        if len(nodes_to_fetch) > 0:
+            probed_details = get_probed_details(nodes_to_fetch)
+            for node in nodes_to_fetch:
+                _, documents[node] = merge_details_cached(
+                    probed_details[node.system_id], details_documents)
+        results = (
+            (node, try_match_xpath(xpath, document, logger=maaslog))
+            for node, document in documents.items())
+        nodes_matching, nodes_nonmatching = classify(bool, results)
         tag.node_set.remove(*nodes_nonmatching)
         tag.node_set.add(*nodes_matching)
@@ -17,9 +17,13 @@ __all__ = [
     ]
 
 from collections import namedtuple
+import copy
+from itertools import product
 import json
 import os.path
 from pipes import quote
+from threading import Lock
+from time import monotonic
 from urllib.parse import (
     urlencode,
     urlparse,
@@ -659,27 +663,6 @@ def compose_filename(elements):
     return '_'.join(elements)
 
 
-def get_preseed_template(filenames):
-    """Get the path and content for the first template found.
-
-    :param filenames: An iterable of relative filenames.
-    """
-    assert not isinstance(filenames, (bytes, str))
-    assert all(isinstance(filename, str) for filename in filenames)
-    for location in settings.PRESEED_TEMPLATE_LOCATIONS:
-        for filename in filenames:
-            filepath = os.path.join(location, filename)
-            try:
-                with open(filepath, "r", encoding="utf-8") as stream:
-                    content = stream.read()
-            except IOError:
-                pass  # Ignore.
-            else:
-                return filepath, content
-    else:
-        return None, None
-
-
 def get_escape_singleton():
     """Return a singleton containing methods to escape various formats used in
     the preseed templates.
@@ -710,6 +693,95 @@ class TemplateNotFoundError(Exception):
         self.name = name
 
 
+class PreseedTemplateCache:
+    """Cache of parsed preseed templates.
+
+    Finding a template means trying each of its possible filenames (see
+    `get_preseed_filenames`) in each of `PRESEED_TEMPLATE_LOCATIONS`, and
+    every node and release has its own list of filenames. Both the result
+    of each search and the parsed templates are cached here, so that
+    rendering the same templates again does not touch the filesystem.
+
+    Templates are parsed again when their files change. Searches and files
+    are checked again at most every `check_interval` seconds, so that new or
+    modified templates are picked up without restarting the region.
+    """
+
+    check_interval = 10.0
+
+    def __init__(self, clock=monotonic):
+        super(PreseedTemplateCache, self).__init__()
+        self.clock = clock
+        self._lock = Lock()
+        # Maps (locations, filenames) to (filepath, checked).
+        self._lookups = {}
+        # Maps filepath to (stat key, template, checked).
+        self._templates = {}
+
+    def _find(self, key, now):
+        lookup = self._lookups.get(key)
+        if lookup is not None and now - lookup[1] < self.check_interval:
+            return lookup[0]
+        locations, filenames = key
+        for location, filename in product(locations, filenames):
+            filepath = os.path.join(location, filename)
+            if os.path.isfile(filepath):
+                break
+        else:
+            filepath = None
+        self._lookups[key] = filepath, now
+        return filepath
+
+    def _load(self, filepath, now):
+        cached = self._templates.get(filepath)
+        if cached is not None and now - cached[2] < self.check_interval:
+            return cached[1]
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            self._templates.pop(filepath, None)
+            return None
+        stat_key = stat.st_mtime_ns, stat.st_size
+        if cached is not None and cached[0] == stat_key:
+            template = cached[1]
+        else:
+            try:
+                with open(filepath, "r", encoding="utf-8") as stream:
+                    content = stream.read()
+            except IOError:
+                self._templates.pop(filepath, None)
+                return None
+            template = PreseedTemplate(content, name=filepath)
+        self._templates[filepath] = stat_key, template, now
+        return template
+
+    def get(self, filenames):
+        """Return the template for the first of `filenames` found.
+
+        The template is shared, so it must not be rendered directly: it has
+        no `get_template` hook. Use `copy.copy` to get one to render.
+
+        :param filenames: An iterable of relative filenames.
+        :return: A `PreseedTemplate`, or `None` if none of the templates
+            were found.
+        """
+        key = tuple(settings.PRESEED_TEMPLATE_LOCATIONS), tuple(filenames)
+        with self._lock:
+            now = self.clock()
+            filepath = self._find(key, now)
+            if filepath is None:
+                return None
+            template = self._load(filepath, now)
+            if template is None:
+                # The file has gone away since it was found.
+                del self._lookups[key]
+            return template
+
+
+# The templates used by `load_preseed_template`.
+preseed_templates = PreseedTemplateCache()
+
+
 def load_preseed_template(node, prefix, osystem='', release=''):
     """Find and load a `PreseedTemplate` for the given node.
 
@@ -727,13 +799,14 @@ def load_preseed_template(node, prefix, osystem='', release=''):
         """
         filenames = list(get_preseed_filenames(
             node, name, osystem, release, default))
-        filepath, content = get_preseed_template(filenames)
-        if filepath is None:
+        template = preseed_templates.get(filenames)
+        if template is None:
             raise TemplateNotFoundError(name)
-        # This is where the closure happens: pass `get_template` when
-        # instanciating PreseedTemplate.
-        return PreseedTemplate(
-            content, name=filepath, get_template=get_template)
+        # This is where the closure happens: the parsed template is shared,
+        # so give a shallow copy of it `get_template`.
+        template = copy.copy(template)
+        template.get_template = get_template
+        return template
 
     return get_template(prefix, None, default=True)
 
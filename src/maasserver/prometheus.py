@@ -50,11 +50,29 @@ def prometheus_handler(request):
         content_type="text/plain")
 
 
+def get_status_worker_stats():
+    """Return statistics for the status messages queued in this process.
+
+    :return: A dict of statistics, or `None` if this process is not running
+        the status worker.
+    """
+    from maasserver.eventloop import services
+    try:
+        worker = services.getServiceNamed("status-worker")
+    except KeyError:
+        return None
+    return {
+        "queued": worker.queueDepth,
+        "lag_seconds": worker.queueLag,
+    }
+
+
 def get_stats_for_prometheus():
     registry = CollectorRegistry()
     stats = json.loads(get_maas_stats())
     architectures = get_machines_by_architecture()
     pods = get_kvm_pods_stats()
+    status_worker = get_status_worker_stats()
 
     # Gather counter for machines per status
     counter = Gauge(
@@ -105,6 +123,17 @@ def get_stats_for_prometheus():
         for arch, machines in architectures.items():
             counter.labels(arch).set(machines)
 
+    # Gather statistics for the status messages queued in this process.
+    # Every region process has its own queue, so each is labelled with the
+    # process that it is in.
+    if status_worker is not None:
+        from maasserver.eventloop import loop
+        counter = Gauge(
+            "status_messages", "Node status messages waiting to be recorded",
+            ["type", "process"], registry=registry)
+        for stat, value in status_worker.items():
+            counter.labels(stat, loop.name).set(value)
+
     return registry
 
 
@@ -23,6 +23,14 @@ RBAC:
     'sys_rbac'. Any time a message is recieved on that channel the RBAC
     micro-service is marked as required a sync. Once marked for sync the
     RBAC micro-service will be pushed the changed information.
+
+Boot configuration:
+    The regiond process listens for messages from Postgres on channel
+    'sys_boot_config'. Any time a message is recieved on that channel the
+    boot configurations cached by the rack controllers are marked as
+    requiring invalidation; the message is the system ID of the node whose
+    boot configuration changed, or empty when all have changed. Once marked
+    every rack controller is told to discard those boot configurations.
 """
 
 __all__ = [
@@ -32,6 +40,7 @@ __all__ = [
 from operator import attrgetter
 
 from maasserver import locks
+from maasserver.clusterrpc.boot_config import invalidate_boot_configs
 from maasserver.dns.config import dns_update_all_zones
 from maasserver.macaroon_auth import get_auth_info
 from maasserver.models.config import Config
@@ -104,11 +113,18 @@ class RegionControllerService(Service):
         self.needsDNSUpdate = False
         self.needsProxyUpdate = False
         self.needsRBACUpdate = False
+        self.needsBootConfigInvalidation = False
+        # The system IDs of the nodes whose cached boot configurations need
+        # invalidating, or `None` when all of them do.
+        self.bootConfigInvalidations = set()
         self.postgresListener = postgresListener
         self.dnsResolver = Resolver(
             resolv=None, servers=[('127.0.0.1', 53)],
             timeout=(1,), reactor=clock)
         self.previousSerial = None
+        # What was last published to BIND, so that only the zones that have
+        # changed are written and reloaded. See `dns_update_all_zones`.
+        self.dnsPublished = {}
         self.rbacClient = None
         self.rbacInit = False
 
@@ -119,6 +135,8 @@ class RegionControllerService(Service):
         self.postgresListener.register("sys_dns", self.markDNSForUpdate)
         self.postgresListener.register("sys_proxy", self.markProxyForUpdate)
         self.postgresListener.register("sys_rbac", self.markRBACForUpdate)
+        self.postgresListener.register(
+            "sys_boot_config", self.markBootConfigForInvalidation)
 
         # Update DNS and proxy on first start.
         self.markDNSForUpdate(None, None)
@@ -132,6 +150,8 @@ class RegionControllerService(Service):
         self.postgresListener.unregister("sys_dns", self.markDNSForUpdate)
         self.postgresListener.unregister("sys_proxy", self.markProxyForUpdate)
         self.postgresListener.unregister("sys_rbac", self.markRBACForUpdate)
+        self.postgresListener.unregister(
+            "sys_boot_config", self.markBootConfigForInvalidation)
         if self.processingDefer is not None:
             self.processingDefer, d = None, self.processingDefer
             self.processing.stop()
@@ -152,6 +172,15 @@ class RegionControllerService(Service):
         self.needsRBACUpdate = True
         self.startProcessing()
 
+    def markBootConfigForInvalidation(self, channel, message):
+        """Called when the `sys_boot_config` message is received."""
+        if not message:
+            self.bootConfigInvalidations = None
+        elif self.bootConfigInvalidations is not None:
+            self.bootConfigInvalidations.add(message)
+        self.needsBootConfigInvalidation = True
+        self.startProcessing()
+
     def startProcessing(self):
         """Start the process looping call."""
         if not self.processing.running:
@@ -184,7 +213,9 @@ class RegionControllerService(Service):
         defers = []
         if self.needsDNSUpdate:
             self.needsDNSUpdate = False
-            d = deferToDatabase(transactional(dns_update_all_zones))
+            d = deferToDatabase(
+                transactional(dns_update_all_zones),
+                published=self.dnsPublished)
             d.addCallback(self._checkSerial)
             d.addCallback(self._logDNSReload)
             d.addErrback(_onFailureRetry, 'needsDNSUpdate')
@@ -213,6 +244,15 @@ class RegionControllerService(Service):
                 _rbacFailure,
                 self.rbacRetryOnFailureDelay if self.retryOnFailure else None)
             defers.append(d)
+        if self.needsBootConfigInvalidation:
+            self.needsBootConfigInvalidation = False
+            system_ids, self.bootConfigInvalidations = (
+                self.bootConfigInvalidations, set())
+            d = invalidate_boot_configs(system_ids)
+            d.addErrback(
+                log.err,
+                "Failed invalidating boot configurations.")
+            defers.append(d)
         if len(defers) == 0:
             # Nothing more to do.
             self.processing.stop()
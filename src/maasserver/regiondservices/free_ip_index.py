@@ -0,0 +1,75 @@
+# Copyright 2018 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Free IP index service."""
+
+__all__ = [
+    "FreeIPIndexService",
+]
+
+from maasserver.free_ip_index import free_ip_index
+from maasserver.listener import PostgresListenerService
+from netaddr import IPNetwork
+from twisted.application.service import Service
+
+
+class FreeIPIndexService(Service):
+    """Service to keep the free IP index in step with the database.
+
+    The index is only enabled while this service is running, so that it is
+    never used when nothing is invalidating it.
+    """
+
+    def __init__(
+            self, postgresListener: PostgresListenerService=None,
+            index=free_ip_index):
+        super().__init__()
+        self.listener = postgresListener
+        self.index = index
+        self.handlers = {
+            "subnet": self.consumeSubnetEvent,
+            "iprange": self.consumeRangeEvent,
+            "staticroute": self.consumeRangeEvent,
+            "neighbour": self.consumeNeighbourEvent,
+        }
+
+    def startService(self):
+        super().startService()
+        if self.listener is not None:
+            for channel, handler in self.handlers.items():
+                self.listener.register(channel, handler, batched=True)
+            self.index.enable()
+
+    def stopService(self):
+        if self.listener is not None:
+            self.index.disable()
+            for channel, handler in self.handlers.items():
+                self.listener.unregister(channel, handler)
+        return super().stopService()
+
+    def consumeSubnetEvent(self, action, ids):
+        """Invalidate the subnets in `ids`.
+
+        These notifications are also sent when the addresses in a subnet
+        change, so the entries are only marked stale; addresses taken by
+        other processes are caught when they are allocated anyway.
+        """
+        self.index.invalidate(
+            (int(subnet_id) for subnet_id in ids),
+            discard=(action == "delete"))
+
+    def consumeRangeEvent(self, action, ids):
+        """Discard every subnet when IP ranges or static routes change.
+
+        The notifications only carry the range or route ID, not the subnet,
+        and addresses that were free may no longer be.
+        """
+        self.index.invalidate(discard=True)
+
+    def consumeNeighbourEvent(self, action, cidrs):
+        """Invalidate the subnets containing the neighbours in `cidrs`.
+
+        :param cidrs: The 'ip' field in the neighbour table, after PostgreSQL
+            casts it to a string, e.g. "x.x.x.x/32".
+        """
+        self.index.invalidate_addresses(IPNetwork(cidr).ip for cidr in cidrs)
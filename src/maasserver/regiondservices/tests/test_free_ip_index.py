@@ -0,0 +1,85 @@
+# Copyright 2018 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Tests for the free IP index service."""
+
+__all__ = []
+
+from unittest.mock import (
+    call,
+    Mock,
+)
+
+from maasserver.regiondservices.free_ip_index import FreeIPIndexService
+from maastesting.matchers import (
+    MockCalledOnceWith,
+    MockCallsMatch,
+    MockNotCalled,
+)
+from maastesting.testcase import MAASTestCase
+from netaddr import IPAddress
+
+
+class TestFreeIPIndexService(MAASTestCase):
+
+    def make_service(self):
+        listener = Mock()
+        index = Mock()
+        return FreeIPIndexService(listener, index), listener, index
+
+    def test_startService_registers_batched_handlers_and_enables(self):
+        service, listener, index = self.make_service()
+        service.startService()
+        self.assertThat(listener.register, MockCallsMatch(
+            call("subnet", service.consumeSubnetEvent, batched=True),
+            call("iprange", service.consumeRangeEvent, batched=True),
+            call("staticroute", service.consumeRangeEvent, batched=True),
+            call("neighbour", service.consumeNeighbourEvent, batched=True),
+        ))
+        self.assertThat(index.enable, MockCalledOnceWith())
+
+    def test_startService_without_listener_does_not_enable(self):
+        index = Mock()
+        service = FreeIPIndexService(None, index)
+        service.startService()
+        self.assertThat(index.enable, MockNotCalled())
+
+    def test_stopService_unregisters_handlers_and_disables(self):
+        service, listener, index = self.make_service()
+        service.startService()
+        service.stopService()
+        self.assertThat(listener.unregister, MockCallsMatch(
+            call("subnet", service.consumeSubnetEvent),
+            call("iprange", service.consumeRangeEvent),
+            call("staticroute", service.consumeRangeEvent),
+            call("neighbour", service.consumeNeighbourEvent),
+        ))
+        self.assertThat(index.disable, MockCalledOnceWith())
+
+    def test_consumeSubnetEvent_marks_subnets_stale(self):
+        service, _, index = self.make_service()
+        service.consumeSubnetEvent("update", ["1", "2"])
+        [subnet_ids], kwargs = index.invalidate.call_args
+        self.assertEqual([1, 2], list(subnet_ids))
+        self.assertEqual({"discard": False}, kwargs)
+
+    def test_consumeSubnetEvent_discards_deleted_subnets(self):
+        service, _, index = self.make_service()
+        service.consumeSubnetEvent("delete", ["3"])
+        [subnet_ids], kwargs = index.invalidate.call_args
+        self.assertEqual([3], list(subnet_ids))
+        self.assertEqual({"discard": True}, kwargs)
+
+    def test_consumeRangeEvent_discards_all_subnets(self):
+        service, _, index = self.make_service()
+        service.consumeRangeEvent("create", ["4"])
+        self.assertThat(index.invalidate, MockCalledOnceWith(discard=True))
+
+    def test_consumeNeighbourEvent_invalidates_addresses(self):
+        service, _, index = self.make_service()
+        service.consumeNeighbourEvent(
+            "create", ["10.0.0.1/32", "2001:db8::1/128"])
+        [addresses], _ = index.invalidate_addresses.call_args
+        self.assertEqual(
+            [IPAddress("10.0.0.1"), IPAddress("2001:db8::1")],
+            list(addresses))
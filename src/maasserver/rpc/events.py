@@ -7,6 +7,7 @@ __all__ = [
     "register_event_type",
     "send_event",
     "send_event_mac_address",
+    "send_events",
 ]
 
 from maasserver.enum import INTERFACE_TYPE
@@ -65,6 +66,46 @@ def send_event(system_id, type_name, description, timestamp):
             created=timestamp)
 
 
+@synchronous
+@transactional
+def send_events(node_events, timestamp):
+    """Send many node events.
+
+    for :py:class:`~provisioningserver.rpc.region.SendEvents`.
+
+    :param node_events: An iterable of ``(system_id, type_name,
+        description)`` tuples.
+    """
+    node_events = list(node_events)
+    event_types = {
+        event_type.name: event_type
+        for event_type in EventType.objects.filter(
+            name__in={type_name for _, type_name, _ in node_events})
+    }
+    nodes = {
+        node.system_id: node
+        for node in Node.objects.filter(
+            system_id__in={system_id for system_id, _, _ in node_events})
+    }
+    for system_id, type_name, description in node_events:
+        if type_name not in event_types:
+            # Unlike `send_event`, do not fail the other events.
+            log.debug(
+                "Event '{type}: {description}' sent with unknown type.",
+                type=type_name, description=description)
+        elif system_id not in nodes:
+            # See `send_event`; the node may not have enlisted yet.
+            log.debug(
+                "Event '{type}: {description}' sent for non-existent "
+                "node '{node_id}'.",
+                type=type_name, description=description,
+                node_id=system_id)
+        else:
+            Event.objects.create(
+                node=nodes[system_id], type=event_types[type_name],
+                description=description, created=timestamp)
+
+
 @synchronous
 @transactional
 def send_event_mac_address(mac_address, type_name, description, timestamp):
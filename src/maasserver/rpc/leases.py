@@ -5,17 +5,21 @@
 
 __all__ = [
     "update_lease",
+    "update_leases",
 ]
 
+from collections import defaultdict
 from datetime import datetime
 
 from maasserver.enum import (
     IPADDRESS_FAMILY,
     IPADDRESS_TYPE,
+    IPRANGE_TYPE,
 )
 from maasserver.models import (
     DNSResource,
     Interface,
+    IPRange,
     Node,
     StaticIPAddress,
     Subnet,
@@ -79,13 +83,66 @@ def update_lease(
     :raises NoSuchCluster: If the cluster identified by `cluster_uuid` does not
         exist.
     """
+    # Get the subnet for this IP address.
+    subnet = Subnet.objects.get_best_subnet_for_ip(ip)
+    _update_lease(
+        subnet, None if subnet is None else subnet.get_dynamic_ranges(),
+        action, mac, ip_family, ip, timestamp, lease_time, hostname)
+    return {}
+
+
+@synchronous
+@transactional
+def update_leases(updates):
+    """Update many DHCP leases from a cluster in one transaction.
+
+    The subnets and dynamic ranges for all of the leases are fetched up
+    front, rather than for each lease as `update_lease` does. A lease that
+    cannot be updated is logged and skipped.
+
+    :param updates: A list of dicts, each with the arguments to
+        `update_lease`, as found in
+        :py:class`~provisioningserver.rpc.region.UpdateLeases`.
+    """
+    subnets = Subnet.objects.get_best_subnets_for_ips(
+        update["ip"] for update in updates)
+    dynamic_ranges = defaultdict(list)
+    for iprange in IPRange.objects.filter(
+            type=IPRANGE_TYPE.DYNAMIC, subnet__in=[
+                subnet for subnet in subnets.values() if subnet is not None]):
+        dynamic_ranges[iprange.subnet_id].append(iprange)
+
+    for update in updates:
+        subnet = subnets[update["ip"]]
+        try:
+            _update_lease(
+                subnet, None if subnet is None else dynamic_ranges[subnet.id],
+                update["action"], update["mac"], update["ip_family"],
+                update["ip"], update["timestamp"], update.get("lease_time"),
+                update.get("hostname"))
+        except LeaseUpdateError as error:
+            # Nothing has been written for this lease yet, so the other
+            # leases in the batch can still be updated.
+            log.msg("Lease update failed: %s" % error)
+    return {}
+
+
+def _update_lease(
+        subnet, dynamic_ranges, action, mac, ip_family, ip, timestamp,
+        lease_time, hostname):
+    """Update one DHCP lease for `update_lease` or `update_leases`.
+
+    :param subnet: The best `Subnet` for `ip`, or None.
+    :param dynamic_ranges: The dynamic `IPRange`s of `subnet`.
+    :raises LeaseUpdateError: Before anything is written, if the lease
+        cannot be updated.
+    """
     # Check for a valid action.
     if action not in ["commit", "expiry", "release"]:
         raise LeaseUpdateError("Unknown lease action: %s" % action)
 
-    # Get the subnet for this IP address. If no subnet exists then something
-    # is wrong as we should not be recieving message about unknown subnets.
-    subnet = Subnet.objects.get_best_subnet_for_ip(ip)
+    # If no subnet exists for the IP address then something is wrong as we
+    # should not be recieving message about unknown subnets.
     if subnet is None:
         raise LeaseUpdateError("No subnet exists for: %s" % ip)
 
@@ -107,10 +164,11 @@ def update_lease(
 
     # We will recieve actions on all addresses in the subnet. We only want
     # to update the addresses in the dynamic range.
-    dynamic_range = subnet.get_dynamic_range_for_ip(IPAddress(ip))
-    if dynamic_range is None:
+    if not any(
+            IPAddress(ip) in dynamic_range.netaddr_iprange
+            for dynamic_range in dynamic_ranges):
         # Do nothing.
-        return {}
+        return
 
     interfaces = list(Interface.objects.filter(mac_address=mac))
     if len(interfaces) == 0 and action == "commit":
@@ -122,7 +180,7 @@ def update_lease(
         interfaces = [unknown_interface]
     elif len(interfaces) == 0:
         # No interfaces and not commit action so nothing needs to be done.
-        return {}
+        return
 
     sip = None
     # Delete all discovered IP addresses attached to all interfaces of the same
@@ -187,4 +245,3 @@ def update_lease(
             sip.save()
         for interface in interfaces:
             interface.ip_addresses.add(sip)
-    return {}
@@ -6,6 +6,7 @@
 __all__ = [
     "mark_node_failed",
     "update_node_power_state",
+    "update_node_power_states",
     "commission_node",
     "create_node",
 ]
@@ -138,7 +139,7 @@ def _gen_up_to_json_limit(things, limit):
 
 @synchronous
 @transactional
-def list_cluster_nodes_power_parameters(system_id, limit=10):
+def list_cluster_nodes_power_parameters(system_id, limit=100):
     """Return power parameters that a rack controller should power check,
     in priority order.
 
@@ -187,6 +188,23 @@ def update_node_power_state(system_id, power_state):
     node.update_power_state(power_state)
 
 
+@synchronous
+@transactional
+def update_node_power_states(power_states):
+    """Update the power states of many nodes.
+
+    for :py:class:`~provisioningserver.rpc.region.UpdateNodePowerStates.
+
+    :param power_states: An iterable of ``(system_id, power_state)`` tuples.
+    :return: A list of the system IDs that do not match a node.
+    """
+    power_states = dict(power_states)
+    nodes = Node.objects.filter(system_id__in=power_states)
+    for node in nodes:
+        node.update_power_state(power_states.pop(node.system_id))
+    return sorted(power_states)
+
+
 @synchronous
 @transactional
 def create_node(
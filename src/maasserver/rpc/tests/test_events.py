@@ -62,6 +62,35 @@ class TestSendEvent(MAASServerTestCase):
             created=timestamp)
 
 
+class TestSendEvents(MAASServerTestCase):
+
+    def test__creates_events_for_nodes(self):
+        event_type = factory.make_EventType()
+        nodes = [factory.make_Node() for _ in range(3)]
+        timestamp = datetime.datetime.utcnow()
+        events.send_events(
+            [(node.system_id, event_type.name, node.hostname)
+             for node in nodes], timestamp)
+        for node in nodes:
+            # Doesn't raise a DoesNotExist error.
+            Event.objects.get(
+                node=node, type=event_type, description=node.hostname,
+                created=timestamp)
+
+    def test__skips_unknown_types_and_nodes(self):
+        event_type = factory.make_EventType()
+        node = factory.make_Node()
+        timestamp = datetime.datetime.utcnow()
+        events.send_events([
+            (node.system_id, factory.make_name('type'), ''),
+            (factory.make_name('system_id'), event_type.name, ''),
+            (node.system_id, event_type.name, 'ok'),
+        ], timestamp)
+        self.assertItemsEqual(
+            ['ok'], Event.objects.filter(node=node).values_list(
+                'description', flat=True))
+
+
 class TestSendEventMACAddress(MAASServerTestCase):
 
     def test__errors_when_no_event_type(self):
@@ -20,6 +20,7 @@ from maasserver.models.staticipaddress import StaticIPAddress
 from maasserver.rpc.leases import (
     LeaseUpdateError,
     update_lease,
+    update_leases,
 )
 from maasserver.testing.factory import factory
 from maasserver.testing.testcase import MAASServerTestCase
@@ -36,39 +37,43 @@ from testtools.matchers import (
 )
 
 
+def make_lease_kwargs(
+        action=None, mac=None, ip=None, timestamp=None,
+        lease_time=None, hostname=None, subnet=None):
+    if action is None:
+        action = random.choice(["commit", "expiry", "release"])
+    if mac is None:
+        mac = factory.make_mac_address()
+    if ip is None:
+        if subnet is not None:
+            ip = factory.pick_ip_in_network(subnet.get_ipnetwork())
+        else:
+            ip = factory.make_ip_address()
+    if timestamp is None:
+        timestamp = int(time.time())
+    if action == "commit":
+        if lease_time is None:
+            lease_time = random.randint(30, 1000)
+        if hostname is None:
+            hostname = factory.make_name("host")
+    ip_family = "ipv4"
+    if IPAddress(ip).version == IPADDRESS_FAMILY.IPv6:
+        ip_family = "ipv6"
+    return {
+        "action": action,
+        "mac": mac,
+        "ip": ip,
+        "ip_family": ip_family,
+        "timestamp": timestamp,
+        "lease_time": lease_time,
+        "hostname": hostname,
+    }
+
+
 class TestUpdateLease(MAASServerTestCase):
 
-    def make_kwargs(
-            self, action=None, mac=None, ip=None, timestamp=None,
-            lease_time=None, hostname=None, subnet=None):
-        if action is None:
-            action = random.choice(["commit", "expiry", "release"])
-        if mac is None:
-            mac = factory.make_mac_address()
-        if ip is None:
-            if subnet is not None:
-                ip = factory.pick_ip_in_network(subnet.get_ipnetwork())
-            else:
-                ip = factory.make_ip_address()
-        if timestamp is None:
-            timestamp = int(time.time())
-        if action == "commit":
-            if lease_time is None:
-                lease_time = random.randint(30, 1000)
-            if hostname is None:
-                hostname = factory.make_name("host")
-        ip_family = "ipv4"
-        if IPAddress(ip).version == IPADDRESS_FAMILY.IPv6:
-            ip_family = "ipv6"
-        return {
-            "action": action,
-            "mac": mac,
-            "ip": ip,
-            "ip_family": ip_family,
-            "timestamp": timestamp,
-            "lease_time": lease_time,
-            "hostname": hostname,
-        }
+    def make_kwargs(self, **kwargs):
+        return make_lease_kwargs(**kwargs)
 
     def make_managed_subnet(self):
         return factory.make_ipv4_Subnet_with_IPRanges(
@@ -381,3 +386,52 @@ class TestUpdateLease(MAASServerTestCase):
         self.assertItemsEqual(
             [boot_interface.id],
             sip.interface_set.values_list("id", flat=True))
+
+
+class TestUpdateLeases(MAASServerTestCase):
+
+    def make_managed_subnet(self):
+        return factory.make_ipv4_Subnet_with_IPRanges(
+            with_static_range=False, dhcp_on=True)
+
+    def test_creates_leases_in_dynamic_ranges(self):
+        subnets = [self.make_managed_subnet() for _ in range(2)]
+        macs_ips = [
+            (factory.make_mac_address(),
+             factory.pick_ip_in_IPRange(subnet.get_dynamic_ranges()[0]))
+            for subnet in subnets
+        ]
+        update_leases([
+            make_lease_kwargs(action="commit", mac=mac, ip=ip)
+            for mac, ip in macs_ips
+        ])
+        for mac, ip in macs_ips:
+            unknown_interface = UnknownInterface.objects.get(mac_address=mac)
+            self.assertThat(
+                list(unknown_interface.ip_addresses.values_list(
+                    "ip", flat=True)),
+                Equals([ip]))
+
+    def test_skips_leases_that_cannot_be_updated(self):
+        subnet = self.make_managed_subnet()
+        mac = factory.make_mac_address()
+        ip = factory.pick_ip_in_IPRange(subnet.get_dynamic_ranges()[0])
+        update_leases([
+            make_lease_kwargs(action=factory.make_name("action")),
+            make_lease_kwargs(action="commit", ip="::"),
+            make_lease_kwargs(action="commit", mac=mac, ip=ip),
+        ])
+        unknown_interface = UnknownInterface.objects.get(mac_address=mac)
+        self.assertThat(
+            list(unknown_interface.ip_addresses.values_list("ip", flat=True)),
+            Equals([ip]))
+
+    def test_ignores_ips_outside_dynamic_ranges(self):
+        subnet = self.make_managed_subnet()
+        node = factory.make_Node_with_Interface_on_Subnet(subnet=subnet)
+        boot_interface = node.get_boot_interface()
+        ip = str(IPAddress(subnet.get_ipnetwork().last - 1))
+        update_leases([make_lease_kwargs(
+            action="commit", mac=boot_interface.mac_address, ip=ip)])
+        self.assertIsNone(get_one(StaticIPAddress.objects.filter(
+            alloc_type=IPADDRESS_TYPE.DISCOVERED, ip=ip)))
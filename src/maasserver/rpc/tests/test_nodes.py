@@ -31,6 +31,7 @@ from maasserver.rpc.nodes import (
     mark_node_failed,
     request_node_info_by_mac_address,
     update_node_power_state,
+    update_node_power_states,
 )
 from maasserver.rpc.testing.fixtures import MockLiveRegionToClusterRPCFixture
 from maasserver.testing.architecture import make_usable_architecture
@@ -502,7 +503,7 @@ class TestListClusterNodesPowerParameters(MAASServerTestCase):
         expected_minimum = 50 * (2 ** 10)  # 50kiB
         self.expectThat(nodes_json_length, GreaterThan(expected_minimum - 1))
 
-    def test__limited_to_10_nodes_at_a_time_by_default(self):
+    def test__limited_to_100_nodes_at_a_time_by_default(self):
         # Configure the rack controller subnet to be large enough.
         rack = factory.make_RackController(power_type='')
         rack_interface = rack.get_boot_interface()
@@ -512,14 +513,14 @@ class TestListClusterNodesPowerParameters(MAASServerTestCase):
             ip=factory.pick_ip_in_Subnet(subnet), subnet=subnet,
             interface=rack_interface)
 
-        # Create at least 11 nodes connected to the rack.
-        for _ in range(11):
+        # Create at least 101 nodes connected to the rack.
+        for _ in range(101):
             self.make_Node(bmc_connected_to=rack)
 
-        # Only 10 nodes' power parameters are returned.
+        # Only 100 nodes' power parameters are returned.
         self.assertThat(
             list_cluster_nodes_power_parameters(rack.system_id),
-            HasLength(10))
+            HasLength(100))
 
 
 class TestUpdateNodePowerState(MAASServerTestCase):
@@ -535,6 +536,26 @@ class TestUpdateNodePowerState(MAASServerTestCase):
         self.assertEqual(reload_object(node).power_state, POWER_STATE.ON)
 
 
+class TestUpdateNodePowerStates(MAASServerTestCase):
+
+    def test__returns_system_ids_of_missing_nodes(self):
+        system_id = factory.make_name('system_id')
+        self.assertEqual(
+            [system_id],
+            update_node_power_states([(system_id, POWER_STATE.ON)]))
+
+    def test__updates_node_power_states(self):
+        node1 = factory.make_Node(power_state=POWER_STATE.OFF)
+        node2 = factory.make_Node(power_state=POWER_STATE.ON)
+        missing = update_node_power_states([
+            (node1.system_id, POWER_STATE.ON),
+            (node2.system_id, POWER_STATE.OFF),
+        ])
+        self.assertEqual([], missing)
+        self.assertEqual(POWER_STATE.ON, reload_object(node1).power_state)
+        self.assertEqual(POWER_STATE.OFF, reload_object(node2).power_state)
+
+
 class TestGetControllerType(MAASServerTestCase):
     """Tests for `get_controller_type`."""
 
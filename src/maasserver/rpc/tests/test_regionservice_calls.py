@@ -97,9 +97,12 @@ from provisioningserver.rpc.region import (
     RequestRackRefresh,
     SendEvent,
     SendEventMACAddress,
+    SendEvents,
     UpdateInterfaces,
     UpdateLease,
+    UpdateLeases,
     UpdateNodePowerState,
+    UpdateNodePowerStates,
     UpdateServices,
 )
 from provisioningserver.rpc.testing import (
@@ -302,6 +305,67 @@ class TestRegionProtocol_UpdateLease(MAASTransactionServerTestCase):
         # works as expected.
 
 
+class TestRegionProtocol_UpdateLeases(MAASTransactionServerTestCase):
+
+    def setUp(self):
+        super(TestRegionProtocol_UpdateLeases, self).setUp()
+        self.useFixture(RegionEventLoopFixture("database-tasks"))
+
+    def make_update(self):
+        return {
+            "action": "expiry",
+            "mac": factory.make_mac_address(),
+            "ip_family": "ipv4",
+            "ip": factory.make_ipv4_address(),
+            "timestamp": int(time.time()),
+        }
+
+    def test_update_leases_is_registered(self):
+        protocol = Region()
+        responder = protocol.locateResponder(UpdateLeases.commandName)
+        self.assertIsNotNone(responder)
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test__calls_update_leases(self):
+        update_leases = self.patch(leases_module, "update_leases")
+        update_leases.return_value = {}
+        updates = [self.make_update() for _ in range(3)]
+
+        yield eventloop.start()
+        try:
+            response = yield call_responder(
+                Region(), UpdateLeases, {
+                    "cluster_uuid": factory.make_name("uuid"),
+                    "updates": updates,
+                })
+        finally:
+            yield eventloop.reset()
+
+        self.assertEqual({}, response)
+        self.assertThat(update_leases, MockCalledOnceWith([
+            dict(update, lease_time=None, hostname=None)
+            for update in updates
+        ]))
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test__doesnt_raises_other_errors(self):
+        # Cause a random exception
+        self.patch(leases_module, "update_leases").side_effect = (
+            factory.make_exception())
+
+        yield eventloop.start()
+        try:
+            yield call_responder(
+                Region(), UpdateLeases, {
+                    "cluster_uuid": factory.make_name("uuid"),
+                    "updates": [self.make_update()],
+                })
+        finally:
+            yield eventloop.reset()
+
+
 class TestRegionProtocol_GetBootConfig(MAASTransactionServerTestCase):
 
     def test_get_boot_config_is_registered(self):
@@ -657,6 +721,45 @@ class TestRegionProtocol_UpdateNodePowerState(MAASTransactionServerTestCase):
         return d.addErrback(check)
 
 
+class TestRegionProtocol_UpdateNodePowerStates(
+        MAASTransactionServerTestCase):
+
+    @transactional
+    def create_node(self, power_state):
+        node = factory.make_Node(power_state=power_state)
+        return node
+
+    @transactional
+    def get_node_power_state(self, system_id):
+        node = Node.objects.get(system_id=system_id)
+        return node.power_state
+
+    def test__is_registered(self):
+        protocol = Region()
+        responder = protocol.locateResponder(
+            UpdateNodePowerStates.commandName)
+        self.assertIsNotNone(responder)
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test__changes_power_states(self):
+        power_state = factory.pick_enum(POWER_STATE)
+        node = yield deferToDatabase(self.create_node, power_state)
+        missing_system_id = factory.make_name('unknown-system-id')
+
+        new_state = factory.pick_enum(POWER_STATE, but_not=power_state)
+        response = yield call_responder(
+            Region(), UpdateNodePowerStates, {'power_states': [
+                {'system_id': node.system_id, 'power_state': new_state},
+                {'system_id': missing_system_id, 'power_state': new_state},
+            ]})
+
+        self.assertEqual({'missing': [missing_system_id]}, response)
+        db_state = yield deferToDatabase(
+            self.get_node_power_state, node.system_id)
+        self.assertEqual(new_state, db_state)
+
+
 class TestRegionProtocol_RegisterEventType(MAASTransactionServerTestCase):
 
     def test_register_event_type_is_registered(self):
@@ -854,6 +957,66 @@ class TestRegionProtocol_SendEvent(MAASTransactionServerTestCase):
                 type=name, description=event_description, node_id=system_id))
 
 
+class TestRegionProtocol_SendEvents(MAASTransactionServerTestCase):
+
+    def setUp(self):
+        super(TestRegionProtocol_SendEvents, self).setUp()
+        self.useFixture(RegionEventLoopFixture("database-tasks"))
+
+    def test_send_events_is_registered(self):
+        protocol = Region()
+        responder = protocol.locateResponder(SendEvents.commandName)
+        self.assertIsNotNone(responder)
+
+    @transactional
+    def get_descriptions(self, type_name):
+        return {
+            event.node.system_id: event.description
+            for event in Event.objects.filter(
+                type__name=type_name).select_related('node')
+        }
+
+    @transactional
+    def create_event_type(self, name):
+        EventType.objects.create(
+            name=name, description=name, level=random.randint(0, 100))
+
+    @transactional
+    def create_nodes(self, count):
+        return [factory.make_Node().system_id for _ in range(count)]
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_send_events_stores_events(self):
+        name = factory.make_name('type_name')
+        yield deferToDatabase(self.create_event_type, name)
+        system_ids = yield deferToDatabase(self.create_nodes, 3)
+        expected = {
+            system_id: factory.make_name('description')
+            for system_id in system_ids
+        }
+
+        yield eventloop.start()
+        try:
+            response = yield call_responder(
+                Region(), SendEvents, {
+                    'node_events': [
+                        {
+                            'system_id': system_id,
+                            'type_name': name,
+                            'description': description,
+                        }
+                        for system_id, description in expected.items()
+                    ],
+                })
+        finally:
+            yield eventloop.reset()
+
+        self.assertEqual({}, response)
+        descriptions = yield deferToDatabase(self.get_descriptions, name)
+        self.assertEqual(expected, descriptions)
+
+
 class TestRegionProtocol_SendEventMACAddress(MAASTransactionServerTestCase):
 
     def setUp(self):
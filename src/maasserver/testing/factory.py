@@ -42,6 +42,7 @@ from maasserver.enum import (
     IPADDRESS_TYPE,
     IPRANGE_TYPE,
     KEYS_PROTOCOL_TYPE,
+    NODE_DEVICE_BUS_CHOICES,
     NODE_STATUS,
     NODE_TYPE,
     PARTITION_TABLE_TYPE,
@@ -83,6 +84,7 @@ from maasserver.models import (
     MDNS,
     Neighbour,
     Node,
+    NodeDevice,
     NodeMetadata,
     Notification,
     OwnerData,
@@ -595,6 +597,20 @@ class Factory(maastesting.factory.Factory):
         bmc.save()
         return bmc
 
+    def make_NodeDevice(
+            self, node=None, bus=None, bus_address=None, **kwargs):
+        if node is None:
+            node = self.make_Node()
+        if bus is None:
+            bus = self.pick_choice(NODE_DEVICE_BUS_CHOICES)
+        if bus_address is None:
+            bus_address = "0000:00:%02x.%d" % (
+                random.randint(0, 0x1f), random.randint(0, 7))
+        device = NodeDevice(
+            node=node, bus=bus, bus_address=bus_address, **kwargs)
+        device.save()
+        return device
+
     def make_NodeMetadata(
             self, node=None, key=None, value=None, **kwargs):
         if node is None:
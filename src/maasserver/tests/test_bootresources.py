@@ -5,7 +5,10 @@
 
 __all__ = []
 
-from datetime import datetime
+from datetime import (
+    datetime,
+    timedelta,
+)
 from email.utils import format_datetime
 import http.client
 from io import BytesIO
@@ -16,6 +19,7 @@ from os import environ
 import random
 from random import randint
 from subprocess import CalledProcessError
+import time
 from unittest import skip
 from unittest.mock import (
     ANY,
@@ -32,8 +36,12 @@ from django.db import (
     connections,
     transaction,
 )
-from django.http import StreamingHttpResponse
+from django.http import (
+    FileResponse,
+    StreamingHttpResponse,
+)
 from fixtures import (
+    EnvironmentVariableFixture,
     FakeLogger,
     Fixture,
 )
@@ -47,6 +55,7 @@ from maasserver.bootresources import (
     download_all_boot_resources,
     download_boot_resources,
     get_simplestream_endpoint,
+    parse_byte_range,
     set_global_default_releases,
     SimpleStreamsHandler,
 )
@@ -71,6 +80,7 @@ from maasserver.models import (
     LargeFile,
     signals,
 )
+from maasserver.models.largefile import get_largefile_cache_path
 from maasserver.models.signals.testing import SignalsDisabled
 from maasserver.rpc.testing.fixtures import MockLiveRegionToClusterRPCFixture
 from maasserver.testing.config import RegionConfigurationFixture
@@ -109,6 +119,7 @@ from maastesting.twisted import (
     TwistedLoggerFixture,
 )
 from provisioningserver.auth import get_maas_user_gpghome
+from provisioningserver.events import EVENT_TYPES
 from provisioningserver.import_images.product_mapping import ProductMapping
 from provisioningserver.rpc.cluster import (
     ListBootImages,
@@ -507,6 +518,118 @@ class TestSimpleStreamsHandler(MAASServerTestCase):
         self.assertIsInstance(response, StreamingHttpResponse)
 
 
+class TestSimpleStreamsHandlerCachedContent(MAASServerTestCase):
+    """Tests for serving content from the region's on-disk cache."""
+
+    def setUp(self):
+        super(TestSimpleStreamsHandlerCachedContent, self).setUp()
+        self.useFixture(EnvironmentVariableFixture(
+            "MAAS_ROOT", self.make_dir()))
+
+    def make_file(self):
+        resource, resource_set, rfile = make_boot_resource_group(
+            rtype=BOOT_RESOURCE_TYPE.SYNCED)
+        os, series = resource.name.split('/')
+        arch, subarch = resource.architecture.split('/')
+        url = reverse(
+            'simplestreams_file_handler', kwargs={
+                'os': os,
+                'arch': arch,
+                'subarch': subarch,
+                'series': series,
+                'version': resource_set.version,
+                'filename': rfile.filename,
+                })
+        with rfile.largefile.content.open('rb') as stream:
+            content = stream.read()
+        rfile.largefile.cache_content()
+        return content, url, rfile.largefile
+
+    def get(self, url, **extra):
+        response = self.client.get(url, **extra)
+        self.addCleanup(response.close)
+        return response
+
+    def read_response(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_download_serves_cached_copy(self):
+        content, url, largefile = self.make_file()
+        wrapper = self.patch(bootresources, 'ConnectionWrapper')
+        response = self.get(url)
+        self.assertEqual(http.client.OK, response.status_code)
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(content, self.read_response(response))
+        self.assertEqual(str(len(content)), response['Content-Length'])
+        self.assertEqual('bytes', response['Accept-Ranges'])
+        self.assertTrue(
+            os.path.isfile(get_largefile_cache_path(largefile.sha256)))
+        self.assertThat(wrapper, MockNotCalled())
+
+    def test_download_serves_requested_range(self):
+        content, url, _ = self.make_file()
+        response = self.get(url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(http.client.PARTIAL_CONTENT, response.status_code)
+        self.assertEqual(content[10:20], self.read_response(response))
+        self.assertEqual('10', response['Content-Length'])
+        self.assertEqual(
+            'bytes 10-19/%d' % len(content), response['Content-Range'])
+
+    def test_download_serves_remainder_from_offset(self):
+        content, url, _ = self.make_file()
+        response = self.get(url, HTTP_RANGE='bytes=100-')
+        self.assertEqual(http.client.PARTIAL_CONTENT, response.status_code)
+        self.assertEqual(content[100:], self.read_response(response))
+
+    def test_download_rejects_unsatisfiable_range(self):
+        content, url, _ = self.make_file()
+        response = self.get(url, HTTP_RANGE='bytes=%d-' % len(content))
+        self.assertEqual(
+            http.client.REQUESTED_RANGE_NOT_SATISFIABLE, response.status_code)
+        self.assertEqual(
+            'bytes */%d' % len(content), response['Content-Range'])
+
+    def test_download_streams_from_database_until_cached(self):
+        content, url, largefile = self.make_file()
+        os.unlink(get_largefile_cache_path(largefile.sha256))
+        cache_content_later = self.patch(
+            bootresources, 'cache_content_later')
+        wrapper = self.patch(bootresources, 'ConnectionWrapper')
+        wrapper.return_value = iter([content])
+        response = self.get(url)
+        self.assertEqual(http.client.OK, response.status_code)
+        self.assertNotIsInstance(response, FileResponse)
+        self.assertEqual(content, self.read_response(response))
+        self.assertThat(wrapper, MockCalledOnceWith(largefile.content))
+        # The copy is made in the background, not by the request.
+        self.assertThat(
+            cache_content_later, MockCalledOnceWith(largefile.sha256))
+        self.assertFalse(
+            os.path.exists(get_largefile_cache_path(largefile.sha256)))
+
+
+class TestParseByteRange(MAASTestCase):
+    """Tests for `parse_byte_range`."""
+
+    scenarios = (
+        ("none", dict(header=None, expected=None)),
+        ("range", dict(header="bytes=10-19", expected=(10, 20))),
+        ("open-ended", dict(header="bytes=10-", expected=(10, 100))),
+        ("beyond-end", dict(header="bytes=10-1000", expected=(10, 100))),
+        ("suffix", dict(header="bytes=-10", expected=(90, 100))),
+        ("long-suffix", dict(header="bytes=-1000", expected=(0, 100))),
+        ("empty-suffix", dict(header="bytes=-0", expected=(100, 100))),
+        ("unsatisfiable", dict(header="bytes=100-", expected=(100, 100))),
+        ("reversed", dict(header="bytes=19-10", expected=None)),
+        ("multiple", dict(header="bytes=0-9,20-29", expected=None)),
+        ("other-unit", dict(header="items=0-9", expected=None)),
+        ("malformed", dict(header="bytes=-", expected=None)),
+    )
+
+    def test__parses_header(self):
+        self.assertEqual(self.expected, parse_byte_range(self.header, 100))
+
+
 class TestConnectionWrapper(MAASTransactionServerTestCase):
     """Tests the use of StreamingHttpResponse(ConnectionWrapper(stream)).
 
@@ -515,6 +638,13 @@ class TestConnectionWrapper(MAASTransactionServerTestCase):
     the actual content, the transaction to create the data needs be committed.
     """
 
+    def setUp(self):
+        super(TestConnectionWrapper, self).setUp()
+        # Content is only streamed from the database when it cannot be
+        # served from the region's on-disk cache.
+        self.patch(LargeFile, 'get_cached_content_path').return_value = None
+        self.patch(bootresources, 'cache_content_later')
+
     def make_file_for_client(self):
         # Set up the database information inside of a transaction. This is
         # done so the information is committed. As the new connection needs
@@ -981,6 +1111,40 @@ class TestBootResourceStore(MAASServerTestCase):
         rfile.largefile = reload_object(rfile.largefile)
         self.assertEqual(rfile.largefile.size, 0)
 
+    def test_write_content_thread_resumes_partial_content(self):
+        store = BootResourceStore()
+        size = int(2.5 * store.read_size)
+        rfile, reader, content = make_boot_resource_file_with_stream(size=size)
+        # An earlier import wrote the first chunk, and part of the next but
+        # without committing its size.
+        with rfile.largefile.content.open('wb') as stream:
+            stream.write(content[:store.read_size + 100])
+        rfile.largefile.size = store.read_size
+        rfile.largefile.save()
+        store.write_content_thread(rfile.id, reader)
+        self.assertTrue(BootResourceFile.objects.filter(id=rfile.id).exists())
+        with rfile.largefile.content.open('rb') as stream:
+            written_data = stream.read()
+        self.assertEqual(content, written_data)
+        rfile.largefile = reload_object(rfile.largefile)
+        self.assertEqual(rfile.largefile.size, rfile.largefile.total_size)
+
+    def test_skip_content_sets_start_position(self):
+        store = BootResourceStore()
+        reader = Mock()
+        offset = random.randint(1, 1000)
+        store.skip_content(reader, offset)
+        self.assertThat(reader.set_start_pos, MockCalledOnceWith(offset))
+        self.assertThat(reader.read, MockNotCalled())
+
+    def test_skip_content_reads_when_start_position_cannot_be_set(self):
+        store = BootResourceStore()
+        store.read_size = 10
+        content = factory.make_bytes(size=100)
+        reader = BytesIO(content)
+        store.skip_content(reader, 55)
+        self.assertEqual(content[55:], reader.read())
+
     @skip(
         "XXX blake_r: Skipped because it causes the test that runs after this "
         "to fail. Because this test is not isolated and places a task in the "
@@ -1115,6 +1279,42 @@ class TestBootResourceTransactional(MAASTransactionServerTestCase):
             get_one(reload_object(resource_set).files.all()).largefile)
         self.assertThat(mock_save_later, MockNotCalled())
 
+    def test_insert_resumes_incomplete_largefile(self):
+        name, architecture, product = make_product()
+        with transaction.atomic():
+            product, resource = make_boot_resource_group_from_product(product)
+            resource_set = resource.sets.first()
+            with post_commit_hooks:
+                resource_set.files.all().delete()
+            largefile = factory.make_LargeFile(
+                content=factory.make_bytes(size=100), size=512)
+        product['sha256'] = largefile.sha256
+        product['size'] = largefile.total_size
+        store = BootResourceStore()
+        mock_save_later = self.patch(store, 'save_content_later')
+        store.insert(product, sentinel.reader)
+        rfile = get_one(reload_object(resource_set).files.all())
+        self.assertEqual(largefile, rfile.largefile)
+        self.assertThat(
+            mock_save_later, MockCalledOnceWith(rfile, sentinel.reader))
+
+    def test_insert_writes_incomplete_largefile_once(self):
+        name, architecture, product = make_product()
+        with transaction.atomic():
+            product, resource = make_boot_resource_group_from_product(product)
+            resource_set = resource.sets.first()
+            with post_commit_hooks:
+                resource_set.files.all().delete()
+            largefile = factory.make_LargeFile(
+                content=factory.make_bytes(size=100), size=512)
+        product['sha256'] = largefile.sha256
+        product['size'] = largefile.total_size
+        store = BootResourceStore()
+        store._largefiles_to_finalize.add(largefile.id)
+        mock_save_later = self.patch(store, 'save_content_later')
+        store.insert(product, sentinel.reader)
+        self.assertThat(mock_save_later, MockNotCalled())
+
     def test_insert_deletes_mismatch_largefile(self):
         self.patch(bootresources.Event.objects, 'create_region_event')
         self.useFixture(SignalsDisabled("largefiles"))
@@ -2154,6 +2354,121 @@ class TestImportResourcesProgressServiceAsync(MAASTransactionServerTestCase):
             """,
             logger.output)
 
+    def patch_import_running(self, running=True, started=None):
+        self.patch(
+            bootresources, "is_import_resources_running").return_value = (
+                running)
+        self.patch(bootresources, "get_import_started").return_value = (
+            started)
+
+    def test__report_import_progress_does_nothing_when_not_importing(self):
+        self.patch_import_running(False)
+        factory.make_LargeFile(content=b"", size=2000)
+        service = bootresources.ImportResourcesProgressService()
+        service.import_progress = (time.monotonic() - 10, 102000)
+        mock_info = self.patch(bootresources.maaslog, "info")
+        service.report_import_progress()
+        self.assertIsNone(service.import_progress)
+        self.assertThat(mock_info, MockNotCalled())
+
+    def test__get_import_started_returns_time_of_latest_start(self):
+        event_type = factory.make_EventType(
+            name=EVENT_TYPES.REGION_IMPORT_INFO)
+        factory.make_Event(
+            type=event_type, description="Finished importing of boot images")
+        started = factory.make_Event(
+            type=event_type,
+            description="Started importing of boot images from 1 source(s).")
+        self.assertEqual(started.created, bootresources.get_import_started())
+
+    def test__get_import_started_returns_None_before_first_import(self):
+        self.assertIsNone(bootresources.get_import_started())
+
+    def test__report_import_progress_ignores_files_of_earlier_imports(self):
+        started = datetime.now()
+        self.patch_import_running(started=started)
+        largefile = factory.make_LargeFile(content=b"", size=1000)
+        LargeFile.objects.filter(id=largefile.id).update(
+            updated=started - timedelta(days=1))
+        factory.make_LargeFile(content=b"", size=2000)
+        service = bootresources.ImportResourcesProgressService()
+        mock_info = self.patch(bootresources.maaslog, "info")
+        service.report_import_progress()
+        self.assertThat(mock_info, MockCalledOnceWith(
+            "Importing boot images; 2.0 kB remaining."))
+
+    def test__report_import_progress_logs_remaining(self):
+        self.patch_import_running()
+        factory.make_LargeFile(content=b"", size=2000)
+        service = bootresources.ImportResourcesProgressService()
+        mock_info = self.patch(bootresources.maaslog, "info")
+        service.report_import_progress()
+        self.assertThat(mock_info, MockCalledOnceWith(
+            "Importing boot images; 2.0 kB remaining."))
+        self.assertEqual(2000, service.import_progress[1])
+
+    def test__report_import_progress_logs_rate_and_time_left(self):
+        self.patch_import_running()
+        factory.make_LargeFile(content=b"", size=2000)
+        service = bootresources.ImportResourcesProgressService()
+        service.import_progress = (time.monotonic() - 10, 102000)
+        mock_info = self.patch(bootresources.maaslog, "info")
+        service.report_import_progress()
+        self.assertThat(mock_info, MockCalledOnce())
+        [message], _ = mock_info.call_args
+        self.assertDocTestMatches(
+            "Importing boot images; 2.0 kB remaining at ... kB/s, "
+            "about 0:00:00 left.", message)
+
+    def test__prune_largefile_cache_removes_deleted_largefiles(self):
+        self.useFixture(EnvironmentVariableFixture(
+            "MAAS_ROOT", self.make_dir()))
+        largefile = factory.make_LargeFile()
+        kept = largefile.cache_content()
+        deleted = get_largefile_cache_path(factory.make_name("sha256"))
+        open(deleted, "wb").close()
+        service = bootresources.ImportResourcesProgressService()
+        service.prune_largefile_cache()
+        self.assertTrue(os.path.exists(kept))
+        self.assertFalse(os.path.exists(deleted))
+
+    def test__prune_largefile_cache_removes_stale_temporary_files(self):
+        self.useFixture(EnvironmentVariableFixture(
+            "MAAS_ROOT", self.make_dir()))
+        cache_path = get_largefile_cache_path()
+        os.makedirs(cache_path)
+        fresh = os.path.join(cache_path, ".fresh")
+        stale = os.path.join(cache_path, ".stale")
+        open(fresh, "wb").close()
+        open(stale, "wb").close()
+        two_hours_ago = time.time() - (2 * 60 * 60)
+        os.utime(stale, (two_hours_ago, two_hours_ago))
+        service = bootresources.ImportResourcesProgressService()
+        service.prune_largefile_cache()
+        self.assertTrue(os.path.exists(fresh))
+        self.assertFalse(os.path.exists(stale))
+
+    def test__fill_largefile_cache_copies_complete_largefiles(self):
+        self.useFixture(EnvironmentVariableFixture(
+            "MAAS_ROOT", self.make_dir()))
+        with transaction.atomic():
+            complete = factory.make_LargeFile()
+            incomplete = factory.make_LargeFile(
+                factory.make_bytes(size=512), size=1024)
+        service = bootresources.ImportResourcesProgressService()
+        service.fill_largefile_cache()
+        self.assertTrue(
+            os.path.isfile(get_largefile_cache_path(complete.sha256)))
+        self.assertFalse(
+            os.path.exists(get_largefile_cache_path(incomplete.sha256)))
+
+    def test__prune_largefile_cache_ignores_missing_cache(self):
+        self.useFixture(EnvironmentVariableFixture(
+            "MAAS_ROOT", self.make_dir()))
+        service = bootresources.ImportResourcesProgressService()
+        service.prune_largefile_cache()
+        self.assertFalse(os.path.exists(get_largefile_cache_path()))
+
     def test__are_boot_images_available_in_the_region(self):
         service = bootresources.ImportResourcesProgressService()
         self.assertFalse(service.are_boot_images_available_in_the_region())
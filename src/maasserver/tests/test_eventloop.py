@@ -31,6 +31,7 @@ from maasserver.eventloop import (
     MAASServices,
 )
 from maasserver.regiondservices import (
+    free_ip_index,
     ntp,
     service_monitor_service,
     syslog,
@@ -433,6 +434,22 @@ class TestFactories(MAASTestCase):
         self.assertFalse(
             eventloop.loop.factories["web"]["only_on_master"])
 
+    def test_make_FreeIPIndexService(self):
+        service = eventloop.make_FreeIPIndexService(
+            FakePostgresListenerService())
+        self.assertThat(service, IsInstance(
+            free_ip_index.FreeIPIndexService))
+        # It is registered as a factory in RegionEventLoop.
+        self.assertIs(
+            eventloop.make_FreeIPIndexService,
+            eventloop.loop.factories["free-ip-index"]["factory"])
+        # Has a dependency of postgres-listener.
+        self.assertEquals(
+            ["postgres-listener-worker"],
+            eventloop.loop.factories["free-ip-index"]["requires"])
+        self.assertFalse(
+            eventloop.loop.factories["free-ip-index"]["only_on_master"])
+
     def test_make_RackControllerService(self):
         service = eventloop.make_RackControllerService(
             FakePostgresListenerService(), sentinel.rpc_advertise)
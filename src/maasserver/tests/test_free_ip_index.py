@@ -0,0 +1,153 @@
+# Copyright 2018 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Tests for the free IP index."""
+
+__all__ = []
+
+from maasserver.enum import IPRANGE_TYPE
+from maasserver.free_ip_index import FreeIPIndex
+from maasserver.testing.factory import factory
+from maasserver.testing.testcase import MAASServerTestCase
+from maasserver.utils.orm import reload_object
+from netaddr import IPAddress
+from testtools.matchers import (
+    Equals,
+    HasLength,
+)
+from twisted.internet.task import Clock
+
+
+class TestFreeIPIndex(MAASServerTestCase):
+
+    def make_index(self):
+        clock = Clock()
+        index = FreeIPIndex(clock=clock.seconds)
+        index.enable()
+        return clock, index
+
+    def make_Subnet(self):
+        return factory.make_Subnet(
+            cidr='10.0.0.0/24', gateway_ip='10.0.0.1', dns_servers=[])
+
+    def test_reserve_returns_nothing_when_disabled(self):
+        subnet = self.make_Subnet()
+        self.assertEqual([], FreeIPIndex().reserve(subnet))
+
+    def test_reserve_returns_next_ip_for_allocation(self):
+        subnet = self.make_Subnet()
+        factory.make_IPRange(subnet, '10.0.0.100', '10.0.0.200')
+        _, index = self.make_index()
+        self.assertEqual(
+            [IPAddress(subnet.get_next_ip_for_allocation())],
+            index.reserve(subnet))
+
+    def test_reserve_hands_out_each_address_once(self):
+        subnet = self.make_Subnet()
+        _, index = self.make_index()
+        reserved = index.reserve(subnet, count=5) + index.reserve(subnet)
+        self.assertThat(reserved, HasLength(6))
+        self.assertThat(set(reserved), HasLength(6))
+
+    def test_reserve_takes_from_smallest_free_range_first(self):
+        subnet = self.make_Subnet()
+        factory.make_IPRange(subnet, '10.0.0.10', '10.0.0.250')
+        _, index = self.make_index()
+        self.assertEqual(
+            [IPAddress('10.0.0.251'), IPAddress('10.0.0.252')],
+            index.reserve(subnet, count=2))
+
+    def test_reserve_returns_fewer_when_subnet_is_full(self):
+        subnet = self.make_Subnet()
+        factory.make_IPRange(
+            subnet, '10.0.0.2', '10.0.0.252',
+            alloc_type=IPRANGE_TYPE.RESERVED)
+        _, index = self.make_index()
+        self.assertEqual(
+            [IPAddress('10.0.0.253'), IPAddress('10.0.0.254')],
+            index.reserve(subnet, count=3))
+        self.assertEqual([], index.reserve(subnet))
+
+    def test_reserve_skips_but_keeps_excluded_addresses(self):
+        subnet = self.make_Subnet()
+        factory.make_IPRange(subnet, '10.0.0.10', '10.0.0.250')
+        _, index = self.make_index()
+        self.assertEqual(
+            [IPAddress('10.0.0.252')],
+            index.reserve(subnet, exclude_addresses=['10.0.0.251']))
+        self.assertEqual([IPAddress('10.0.0.251')], index.reserve(subnet))
+
+    def test_reserve_does_not_rebuild_stale_entry_before_interval(self):
+        subnet = self.make_Subnet()
+        clock, index = self.make_index()
+        index.reserve(subnet)
+        index.invalidate([subnet.id])
+        clock.advance(index.refresh_interval - 1)
+        rebuild = self.patch(index, "_rebuild")
+        index.reserve(subnet)
+        self.assertThat(rebuild.call_count, Equals(0))
+
+    def test_reserve_rebuilds_stale_entry_after_interval(self):
+        subnet = self.make_Subnet()
+        factory.make_IPRange(subnet, '10.0.0.10', '10.0.0.250')
+        clock, index = self.make_index()
+        handed_out = index.reserve(subnet)
+        factory.make_StaticIPAddress(ip='10.0.0.252', subnet=subnet)
+        index.invalidate([subnet.id])
+        clock.advance(index.refresh_interval)
+        # Addresses already handed out, and the address allocated elsewhere,
+        # are not offered again after the rebuild.
+        self.assertEqual(
+            [IPAddress('10.0.0.253')], index.reserve(subnet))
+        self.assertEqual([IPAddress('10.0.0.251')], handed_out)
+
+    def test_reserve_rebuilds_entry_after_max_age(self):
+        subnet = self.make_Subnet()
+        clock, index = self.make_index()
+        index.reserve(subnet)
+        clock.advance(index.max_age)
+        rebuild = self.patch(index, "_rebuild")
+        rebuild.side_effect = lambda subnet, definition, now: (
+            index._entries[subnet.id])
+        index.reserve(subnet)
+        self.assertThat(rebuild.call_count, Equals(1))
+
+    def test_reserve_rebuilds_discarded_entry_immediately(self):
+        subnet = self.make_Subnet()
+        factory.make_IPRange(subnet, '10.0.0.10', '10.0.0.250')
+        _, index = self.make_index()
+        index.reserve(subnet)
+        factory.make_IPRange(
+            subnet, '10.0.0.251', '10.0.0.253',
+            alloc_type=IPRANGE_TYPE.RESERVED)
+        index.invalidate(discard=True)
+        self.assertEqual([IPAddress('10.0.0.254')], index.reserve(subnet))
+
+    def test_reserve_rebuilds_entry_when_subnet_changes(self):
+        subnet = self.make_Subnet()
+        factory.make_IPRange(subnet, '10.0.0.10', '10.0.0.250')
+        _, index = self.make_index()
+        index.reserve(subnet)
+        subnet.gateway_ip = '10.0.0.252'
+        subnet.save()
+        self.assertEqual(
+            [IPAddress('10.0.0.253')], index.reserve(reload_object(subnet)))
+
+    def test_invalidate_addresses_marks_containing_subnets_stale(self):
+        subnet = self.make_Subnet()
+        other_subnet = factory.make_Subnet(cidr='10.1.0.0/24')
+        _, index = self.make_index()
+        index.reserve(subnet)
+        index.reserve(other_subnet)
+        index.invalidate_addresses([IPAddress('10.0.0.7')])
+        index.reserve(subnet, count=0)
+        self.assertTrue(index._entries[subnet.id].stale)
+        self.assertFalse(index._entries[other_subnet.id].stale)
+
+    def test_disable_forgets_everything(self):
+        subnet = self.make_Subnet()
+        _, index = self.make_index()
+        index.reserve(subnet)
+        index.disable()
+        self.assertFalse(index.enabled)
+        self.assertEqual({}, index._entries)
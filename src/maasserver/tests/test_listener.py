@@ -416,6 +416,49 @@ class TestPostgresListenerService(MAASServerTestCase):
         self.assertEqual(
             [sentinel.handler], listener.listeners[channel])
 
+    def test_register_records_batched_handler(self):
+        listener = PostgresListenerService()
+        channel = factory.make_name("channel")
+        listener.register(channel, sentinel.handler, batched=True)
+        self.assertEqual(
+            [sentinel.handler], listener.listeners[channel])
+        self.assertTrue(listener.isBatchedHandler(channel, sentinel.handler))
+
+    def test_register_raises_error_if_batched_system_handler(self):
+        listener = PostgresListenerService()
+        with ExpectedException(PostgresListenerRegistrationError):
+            listener.register("sys_test", sentinel.handler, batched=True)
+
+    def test_unregister_removes_batched_handler(self):
+        listener = PostgresListenerService()
+        channel = factory.make_name("channel")
+        listener.register(channel, sentinel.handler, batched=True)
+        listener.unregister(channel, sentinel.handler)
+        self.assertFalse(listener.isBatchedHandler(channel, sentinel.handler))
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test__handleNotifies_calls_batched_handler_once_per_channel(self):
+        listener = PostgresListenerService()
+        batched_calls = []
+        single_calls = []
+        listener.register(
+            "machine", lambda *args: batched_calls.append(args),
+            batched=True)
+        listener.register("machine", lambda *args: single_calls.append(args))
+        listener.notifications.update({
+            ("machine_update", "1"),
+            ("machine_update", "2"),
+            ("machine_create", "3"),
+        })
+        yield listener.handleNotifies()
+        self.assertItemsEqual(
+            [("update", ["1", "2"]), ("create", ["3"])],
+            [(action, sorted(pks)) for action, pks in batched_calls])
+        self.assertItemsEqual(
+            [("update", "1"), ("update", "2"), ("create", "3")],
+            single_calls)
+
     def test__convertChannel_raises_exception_if_not_valid_channel(self):
         listener = PostgresListenerService()
         self.assertRaises(
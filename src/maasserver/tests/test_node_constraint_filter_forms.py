@@ -24,6 +24,7 @@ from maasserver.models import (
 from maasserver.node_constraint_filter_forms import (
     AcquireNodeForm,
     detect_nonexistent_names,
+    filter_nodes_by_storage_summary,
     generate_architecture_wildcards,
     get_architecture_wildcards,
     get_storage_constraints_from_string,
@@ -174,6 +175,44 @@ class TestUtils(MAASServerTestCase):
     def test_nodes_by_storage_returns_None_when_storage_string_is_empty(self):
         self.assertEqual(None, nodes_by_storage(""))
 
+    def test_filter_nodes_by_storage_summary_keeps_all_when_empty(self):
+        node = factory.make_Node(with_boot_disk=False)
+        self.assertItemsEqual(
+            [node], filter_nodes_by_storage_summary(
+                Machine.objects.filter(id=node.id), ""))
+
+    def test_filter_nodes_by_storage_summary_checks_root_device(self):
+        node1 = factory.make_Node(with_boot_disk=False)
+        factory.make_PhysicalBlockDevice(
+            node=node1, size=20 * (1000 ** 3), tags=['ssd'],
+            formatted_root=True)
+        node2 = factory.make_Node(with_boot_disk=False)
+        factory.make_PhysicalBlockDevice(
+            node=node2, size=20 * (1000 ** 3), tags=['rotary'],
+            formatted_root=True)
+        nodes = Machine.objects.filter(id__in=[node1.id, node2.id])
+        self.assertItemsEqual(
+            [node1], filter_nodes_by_storage_summary(nodes, "10(ssd)"))
+        self.assertItemsEqual(
+            [], filter_nodes_by_storage_summary(nodes, "30"))
+
+    def test_filter_nodes_by_storage_summary_checks_unused_disks(self):
+        node1 = factory.make_Node(with_boot_disk=False)
+        factory.make_PhysicalBlockDevice(node=node1, formatted_root=True)
+        factory.make_PhysicalBlockDevice(node=node1, tags=['ssd'])
+        factory.make_PhysicalBlockDevice(node=node1, tags=['ssd'])
+        node2 = factory.make_Node(with_boot_disk=False)
+        factory.make_PhysicalBlockDevice(node=node2, formatted_root=True)
+        factory.make_PhysicalBlockDevice(node=node2, tags=['ssd'])
+        nodes = Machine.objects.filter(id__in=[node1.id, node2.id])
+        self.assertItemsEqual(
+            [node1, node2],
+            filter_nodes_by_storage_summary(nodes, "0,0(ssd)"))
+        self.assertItemsEqual(
+            [node1], filter_nodes_by_storage_summary(nodes, "0,0(ssd),0"))
+        self.assertItemsEqual(
+            [], filter_nodes_by_storage_summary(nodes, "0,0(partition)"))
+
 
 class TestRenamableForm(RenamableFieldsForm):
     field1 = forms.CharField(label="A field which is forced to contain 'foo'.")
@@ -980,6 +1019,17 @@ class TestAcquireNodeForm(MAASServerTestCase):
             }
         }, storage)
 
+    def test_storage_only_matches_devices_of_candidate_nodes(self):
+        node1 = factory.make_Node(with_boot_disk=False)
+        factory.make_PhysicalBlockDevice(node=node1, formatted_root=True)
+        node2 = factory.make_Node(with_boot_disk=False)
+        factory.make_PhysicalBlockDevice(node=node2, formatted_root=True)
+        form = AcquireNodeForm({'storage': '0'})
+        self.assertTrue(form.is_valid(), dict(form.errors))
+        _, storage, _ = form.filter_nodes(
+            Machine.objects.filter(id=node1.id))
+        self.assertItemsEqual([node1.id], storage)
+
     def test_storage_single_contraint_matches_all_sizes_larger(self):
         node1 = factory.make_Node(with_boot_disk=False)
         # 1gb block device
@@ -1402,6 +1452,19 @@ class TestAcquireNodeForm(MAASServerTestCase):
                 'eth0:subnet=%s' % subnet.cidr)})
         self.assertTrue(form.is_valid(), dict(form.errors))
 
+    def test_interfaces_only_matches_interfaces_of_candidate_nodes(self):
+        subnet = factory.make_Subnet()
+        node1 = factory.make_Node_with_Interface_on_Subnet(subnet=subnet)
+        factory.make_Node_with_Interface_on_Subnet(subnet=subnet)
+        form = AcquireNodeForm({
+            'interfaces': LabeledConstraintMap(
+                'eth0:subnet=%s' % subnet.cidr)})
+        self.assertTrue(form.is_valid(), dict(form.errors))
+        filtered_nodes, _, interfaces = form.filter_nodes(
+            Machine.objects.filter(id=node1.id))
+        self.assertItemsEqual([node1], filtered_nodes)
+        self.assertItemsEqual([node1.id], interfaces['eth0'])
+
     def test_interfaces_constraint_works_for_ip_address(self):
         subnet = factory.make_Subnet()
         node = factory.make_Node_with_Interface_on_Subnet(subnet=subnet)
@@ -117,6 +117,7 @@ class TestRegionWorkerServiceMaker(TestServiceMaker):
         self.assertIsInstance(service, MultiService)
         expected_services = [
             "database-tasks",
+            "free-ip-index",
             "postgres-listener-worker",
             "rack-controller",
             "rpc",
@@ -147,6 +148,7 @@ class TestRegionWorkerServiceMaker(TestServiceMaker):
         self.assertIsInstance(service, MultiService)
         expected_services = [
             "database-tasks",
+            "free-ip-index",
             "postgres-listener-worker",
             "rack-controller",
             "rpc",
@@ -310,6 +312,7 @@ class TestRegionAllInOneServiceMaker(TestServiceMaker):
         expected_services = [
             # Worker services.
             "database-tasks",
+            "free-ip-index",
             "postgres-listener-worker",
             "rack-controller",
             "rpc",
@@ -65,6 +65,10 @@ from provisioningserver.refresh.node_info_scripts import (
 )
 from provisioningserver.rpc.cluster import EvaluateTag
 from provisioningserver.rpc.common import Client
+from provisioningserver.tags import (
+    DetailsDocumentCache,
+    digest_details,
+)
 from provisioningserver.utils.twisted import asynchronous
 from testtools.matchers import (
     HasLength,
@@ -282,6 +286,25 @@ class TestPopulateTagsEndToNearlyEnd(MAASTransactionServerTestCase):
                 system_id=rack.system_id,
                 tag_nsmap=ANY, credentials=creds, nodes=ANY))
 
+    def test__sends_digests_of_node_details(self):
+        rpc_fixture = self.prepare_live_rpc()
+        rack = factory.make_RackController()
+        protocol = rpc_fixture.makeCluster(rack, EvaluateTag)
+        protocol.EvaluateTag.side_effect = always_succeed_with({})
+        node = factory.make_Node()
+        make_lldp_result(node, b"<foo/>")
+        tag = factory.make_Tag(populate=False)
+
+        [d] = populate_tags(tag)
+        wait_for_populate = asynchronous(lambda: d)
+        wait_for_populate().wait(10)
+
+        nodes = protocol.EvaluateTag.call_args[1]["nodes"]
+        self.assertIn({
+            "system_id": node.system_id,
+            "digest": digest_details({"lldp": b"<foo/>", "lshw": None}),
+        }, nodes)
+
 
 class TestPopulateTagsInRegion(MAASTransactionServerTestCase):
     """Tests for populating tags in the region.
@@ -384,3 +407,26 @@ class TestPopulateTagForMultipleNodes(MAASServerTestCase):
         self.assertItemsEqual(
             [node.hostname for node in nodes[0:2]],
             [node.hostname for node in Node.objects.filter(tags__name='bar')])
+
+    def test_only_fetches_nodes_with_new_details(self):
+        self.patch(
+            populate_tags_module, "details_documents",
+            DetailsDocumentCache())
+        nodes = [factory.make_Node() for _ in range(3)]
+        results = [make_lldp_result(node, b"<foo/>") for node in nodes]
+        tag = factory.make_Tag("bar", "//lldp:bar", populate=False)
+        populate_tag_for_multiple_nodes(tag, nodes)
+        self.assertItemsEqual([], Node.objects.filter(tags__name='bar'))
+        results[0].stdout = b"<bar/>"
+        results[0].save()
+        get_probed_details = self.patch(
+            populate_tags_module, "get_probed_details")
+        get_probed_details.side_effect = (
+            populate_tags_module.get_probed_details)
+        # The cached documents are evaluated against a new definition too.
+        tag.definition = "//lldp:bar or //lldp:foo"
+        populate_tag_for_multiple_nodes(tag, Node.objects.all())
+        self.assertItemsEqual(
+            nodes, Node.objects.filter(tags__name='bar'))
+        # Only the node whose details changed was fetched again.
+        self.assertThat(get_probed_details, MockCalledOnceWith([nodes[0]]))
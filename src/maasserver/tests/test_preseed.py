@@ -64,10 +64,10 @@ from maasserver.preseed import (
     get_preseed,
     get_preseed_context,
     get_preseed_filenames,
-    get_preseed_template,
     get_preseed_type_for,
     load_preseed_template,
     PreseedTemplate,
+    PreseedTemplateCache,
     render_enlistment_preseed,
     render_preseed,
     split_subarch,
@@ -109,6 +109,7 @@ from testtools.matchers import (
     Not,
     StartsWith,
 )
+from twisted.internet.task import Clock
 import yaml
 
 
@@ -293,50 +294,6 @@ class TestConfiguration(MAASServerTestCase):
             AllMatch(IsInstance(str)))
 
 
-class TestGetPreseedTemplate(MAASServerTestCase):
-    """Tests for `get_preseed_template`."""
-
-    def test_get_preseed_template_returns_None_if_no_template_locations(self):
-        # get_preseed_template() returns None when no template locations are
-        # defined.
-        self.patch(settings, "PRESEED_TEMPLATE_LOCATIONS", [])
-        self.assertEqual(
-            (None, None),
-            get_preseed_template(
-                (factory.make_string(), factory.make_string())))
-
-    def test_get_preseed_template_returns_None_when_no_filenames(self):
-        # get_preseed_template() returns None when no filenames are passed in.
-        self.patch(settings, "PRESEED_TEMPLATE_LOCATIONS", [self.make_dir()])
-        self.assertEqual((None, None), get_preseed_template(()))
-
-    def test_get_preseed_template_find_template_in_first_location(self):
-        template_content = factory.make_string()
-        template_path = self.make_file(contents=template_content)
-        template_filename = os.path.basename(template_path)
-        locations = [
-            os.path.dirname(template_path),
-            self.make_dir(),
-            ]
-        self.patch(settings, "PRESEED_TEMPLATE_LOCATIONS", locations)
-        self.assertEqual(
-            (template_path, template_content),
-            get_preseed_template([template_filename]))
-
-    def test_get_preseed_template_find_template_in_last_location(self):
-        template_content = factory.make_string()
-        template_path = self.make_file(contents=template_content)
-        template_filename = os.path.basename(template_path)
-        locations = [
-            self.make_dir(),
-            os.path.dirname(template_path),
-            ]
-        self.patch(settings, "PRESEED_TEMPLATE_LOCATIONS", locations)
-        self.assertEqual(
-            (template_path, template_content),
-            get_preseed_template([template_filename]))
-
-
 class TestLoadPreseedTemplate(MAASServerTestCase):
     """Tests for `load_preseed_template`."""
 
@@ -443,6 +400,103 @@ class TestLoadPreseedTemplate(MAASServerTestCase):
             TemplateNotFoundError, template.substitute)
 
 
+class TestPreseedTemplateCache(MAASServerTestCase):
+    """Tests for `PreseedTemplateCache`."""
+
+    def setUp(self):
+        super(TestPreseedTemplateCache, self).setUp()
+        self.location = self.make_dir()
+        self.patch(
+            settings, "PRESEED_TEMPLATE_LOCATIONS", [self.location])
+        self.clock = Clock()
+        self.cache = PreseedTemplateCache(clock=self.clock.seconds)
+
+    def write_template(self, name, content):
+        path = os.path.join(self.location, name)
+        with open(path, "w", encoding="utf-8") as outf:
+            outf.write(content)
+        return path
+
+    def test_get_returns_None_if_no_template(self):
+        self.assertIsNone(self.cache.get([factory.make_name("template")]))
+
+    def test_get_returns_None_if_no_template_locations(self):
+        self.patch(settings, "PRESEED_TEMPLATE_LOCATIONS", [])
+        self.assertIsNone(self.cache.get([factory.make_name("template")]))
+
+    def test_get_returns_None_when_no_filenames(self):
+        self.assertIsNone(self.cache.get([]))
+
+    def test_get_finds_template_in_last_location(self):
+        name = factory.make_name("template")
+        path = self.write_template(name, "content")
+        self.patch(
+            settings, "PRESEED_TEMPLATE_LOCATIONS",
+            [self.make_dir(), self.location])
+        self.assertEqual(path, self.cache.get([name]).name)
+
+    def test_get_returns_first_template_found(self):
+        names = [factory.make_name("template") for _ in range(3)]
+        self.write_template(names[2], "last")
+        path = self.write_template(names[1], "middle")
+        template = self.cache.get(names)
+        self.assertThat(template, IsInstance(PreseedTemplate))
+        self.assertEqual(path, template.name)
+        self.assertEqual("middle", template.substitute())
+
+    def test_get_does_not_parse_template_again(self):
+        name = factory.make_name("template")
+        self.write_template(name, "content")
+        template = self.cache.get([name])
+        self.clock.advance(self.cache.check_interval)
+        self.assertIs(template, self.cache.get([name]))
+        self.assertIs(template, self.cache.get(["other", name]))
+
+    def test_get_does_not_check_files_within_interval(self):
+        name = factory.make_name("template")
+        path = self.write_template(name, "content")
+        template = self.cache.get([name])
+        os.unlink(path)
+        self.clock.advance(self.cache.check_interval - 1)
+        self.assertIs(template, self.cache.get([name]))
+
+    def test_get_parses_changed_template_after_interval(self):
+        name = factory.make_name("template")
+        self.write_template(name, "old")
+        self.cache.get([name])
+        self.write_template(name, "new content")
+        self.clock.advance(self.cache.check_interval)
+        self.assertEqual("new content", self.cache.get([name]).substitute())
+
+    def test_get_finds_new_template_after_interval(self):
+        names = [factory.make_name("template") for _ in range(2)]
+        self.write_template(names[1], "generic")
+        self.cache.get(names)
+        self.write_template(names[0], "specific")
+        self.assertEqual("generic", self.cache.get(names).substitute())
+        self.clock.advance(self.cache.check_interval)
+        self.assertEqual("specific", self.cache.get(names).substitute())
+
+    def test_get_returns_None_if_template_removed_after_interval(self):
+        name = factory.make_name("template")
+        path = self.write_template(name, "content")
+        self.cache.get([name])
+        os.unlink(path)
+        self.clock.advance(self.cache.check_interval)
+        self.assertIsNone(self.cache.get([name]))
+
+    def test_load_preseed_template_does_not_share_hooks(self):
+        self.patch(preseed_module, "preseed_templates", self.cache)
+        name = factory.make_name("template")
+        self.write_template(name, "content")
+        template1 = load_preseed_template(factory.make_Node(), name)
+        template2 = load_preseed_template(factory.make_Node(), name)
+        self.assertIsNot(template1, template2)
+        self.assertIsNot(template1.get_template, template2.get_template)
+        self.assertIs(template1._parsed, template2._parsed)
+        self.assertIsNone(self.cache.get([name]).get_template)
+
+
 class TestPreseedContext(MAASServerTestCase):
     """Tests for `get_preseed_context`."""
 
@@ -1121,8 +1175,9 @@ class TestCurtinUtilities(
         power_state:
           mode: reboot
         """)
-        self.patch(preseed_module, "get_preseed_template").return_value = (
-            factory.make_name("filename"), power_state_template)
+        get = self.patch(preseed_module.preseed_templates, "get")
+        get.return_value = PreseedTemplate(
+            power_state_template, name=factory.make_name("filename"))
         config = get_curtin_config(make_HttpRequest(), node)
         self.assertThat(config, Not(Contains('mode: reboot')))
 
@@ -1135,8 +1190,9 @@ class TestCurtinUtilities(
           ubuntu_archive:
           ubuntu_security:
         """)
-        self.patch(preseed_module, "get_preseed_template").return_value = (
-            factory.make_name("filename"), apt_mirrors_template)
+        get = self.patch(preseed_module.preseed_templates, "get")
+        get.return_value = PreseedTemplate(
+            apt_mirrors_template, name=factory.make_name("filename"))
         config = get_curtin_config(make_HttpRequest(), node)
         self.assertThat(config, Not(Contains('ubuntu_archive')))
         self.assertThat(config, Not(Contains('ubuntu_security')))
@@ -1148,8 +1204,9 @@ class TestCurtinUtilities(
         apt_proxy_template = dedent("""\
         apt_proxy: http://127.0.0.1:8000/
         """)
-        self.patch(preseed_module, "get_preseed_template").return_value = (
-            factory.make_name("filename"), apt_proxy_template)
+        get = self.patch(preseed_module.preseed_templates, "get")
+        get.return_value = PreseedTemplate(
+            apt_proxy_template, name=factory.make_name("filename"))
         config = get_curtin_config(make_HttpRequest(), node)
         self.assertThat(config, Not(Contains('127.0.0.1')))
 
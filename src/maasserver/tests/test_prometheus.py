@@ -7,12 +7,17 @@ __all__ = []
 
 import http.client
 import json
+from unittest.mock import sentinel
 
 from django.db import transaction
-from maasserver import prometheus
+from maasserver import (
+    eventloop,
+    prometheus,
+)
 from maasserver.models import Config
 from maasserver.prometheus import (
     get_stats_for_prometheus,
+    get_status_worker_stats,
     push_stats_to_prometheus,
 )
 from maasserver.testing.factory import factory
@@ -22,15 +27,18 @@ from maasserver.testing.testcase import (
 )
 from maasserver.utils.django_urls import reverse
 from maastesting.matchers import (
+    MockAnyCall,
     MockCalledOnce,
     MockCalledOnceWith,
     MockNotCalled,
 )
 from maastesting.testcase import MAASTestCase
 from maastesting.twisted import extract_result
+from metadataserver.api_twisted import StatusWorkerService
 from provisioningserver.utils.twisted import asynchronous
 from twisted.application.internet import TimerService
 from twisted.internet.defer import fail
+from twisted.internet.task import Clock
 
 
 class TestPrometheusHandler(MAASServerTestCase):
@@ -110,6 +118,55 @@ class TestPrometheus(MAASServerTestCase):
         self.assertThat(
             mock_pods, MockCalledOnce())
 
+    def test_get_stats_for_prometheus_includes_status_worker(self):
+        self.patch(prometheus, "CollectorRegistry")
+        gauge = self.patch(prometheus, "Gauge")
+        self.patch(prometheus, "get_maas_stats").return_value = json.dumps({
+            "machine_status": {},
+            "controllers": {},
+            "nodes": {},
+            "network_stats": {},
+            "machine_stats": {},
+        })
+        mock_arches = self.patch(prometheus, "get_machines_by_architecture")
+        mock_arches.return_value = {}
+        mock_pods = self.patch(prometheus, "get_kvm_pods_stats")
+        mock_pods.return_value = {}
+        self.patch(prometheus, "get_status_worker_stats").return_value = {
+            "queued": 3,
+            "lag_seconds": 1.5,
+        }
+        get_stats_for_prometheus()
+        self.assertIn(
+            "status_messages",
+            [call_args[0][0] for call_args in gauge.call_args_list])
+        labels = gauge.return_value.labels
+        self.assertThat(labels, MockAnyCall("queued", eventloop.loop.name))
+        self.assertThat(
+            labels, MockAnyCall("lag_seconds", eventloop.loop.name))
+
+
+class TestGetStatusWorkerStats(MAASTestCase):
+
+    def test_returns_None_without_status_worker(self):
+        self.patch(eventloop.services, "getServiceNamed").side_effect = (
+            KeyError("status-worker"))
+        self.assertIsNone(get_status_worker_stats())
+
+    def test_returns_queue_depth_and_lag(self):
+        worker = StatusWorkerService(sentinel.dbtasks, clock=Clock())
+        worker.queueMessage(factory.make_name("key"), {
+            "event_type": "progress",
+            "origin": factory.make_name("origin"),
+            "name": factory.make_name("name"),
+            "description": factory.make_name("description"),
+        })
+        worker.clock.advance(2)
+        self.patch(eventloop.services, "getServiceNamed").return_value = (
+            worker)
+        self.assertEqual(
+            {"queued": 1, "lag_seconds": 2}, get_status_worker_stats())
+
     def test_push_stats_to_prometheus(self):
         factory.make_RegionRackController()
         maas_name = 'random.maas'
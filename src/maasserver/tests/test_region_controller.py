@@ -90,7 +90,10 @@ class TestRegionControllerService(MAASServerTestCase):
             MockCallsMatch(
                 call("sys_dns", service.markDNSForUpdate),
                 call("sys_proxy", service.markProxyForUpdate),
-                call("sys_rbac", service.markRBACForUpdate)))
+                call("sys_rbac", service.markRBACForUpdate),
+                call(
+                    "sys_boot_config",
+                    service.markBootConfigForInvalidation)))
 
     @wait_for_reactor
     @inlineCallbacks
@@ -133,7 +136,10 @@ class TestRegionControllerService(MAASServerTestCase):
             MockCallsMatch(
                 call("sys_dns", service.markDNSForUpdate),
                 call("sys_proxy", service.markProxyForUpdate),
-                call("sys_rbac", service.markRBACForUpdate)))
+                call("sys_rbac", service.markRBACForUpdate),
+                call(
+                    "sys_boot_config",
+                    service.markBootConfigForInvalidation)))
 
     @wait_for_reactor
     @inlineCallbacks
@@ -168,6 +174,28 @@ class TestRegionControllerService(MAASServerTestCase):
         self.assertTrue(service.needsRBACUpdate)
         self.assertThat(mock_startProcessing, MockCalledOnceWith())
 
+    def test_markBootConfigForInvalidation_adds_system_id(self):
+        listener = MagicMock()
+        service = self.make_service(listener)
+        mock_startProcessing = self.patch(service, "startProcessing")
+        system_id = factory.make_name("system_id")
+        service.markBootConfigForInvalidation("sys_boot_config", system_id)
+        self.assertTrue(service.needsBootConfigInvalidation)
+        self.assertEqual({system_id}, service.bootConfigInvalidations)
+        self.assertThat(mock_startProcessing, MockCalledOnceWith())
+
+    def test_markBootConfigForInvalidation_marks_all_for_empty_message(self):
+        listener = MagicMock()
+        service = self.make_service(listener)
+        self.patch(service, "startProcessing")
+        service.markBootConfigForInvalidation(
+            "sys_boot_config", factory.make_name("system_id"))
+        service.markBootConfigForInvalidation("sys_boot_config", "")
+        service.markBootConfigForInvalidation(
+            "sys_boot_config", factory.make_name("system_id"))
+        self.assertTrue(service.needsBootConfigInvalidation)
+        self.assertIsNone(service.bootConfigInvalidations)
+
     def test_startProcessing_doesnt_call_start_when_looping_call_running(self):
         service = self.make_service(sentinel.listener)
         mock_start = self.patch(service.processing, "start")
@@ -243,7 +271,9 @@ class TestRegionControllerService(MAASServerTestCase):
             region_controller.log, "msg")
         service.startProcessing()
         yield service.processingDefer
-        self.assertThat(mock_dns_update_all_zones, MockCalledOnceWith())
+        self.assertThat(
+            mock_dns_update_all_zones,
+            MockCalledOnceWith(published=service.dnsPublished))
         self.assertThat(mock_check_serial, MockCalledOnceWith(dns_result))
         self.assertThat(
             mock_msg,
@@ -285,6 +315,44 @@ class TestRegionControllerService(MAASServerTestCase):
             mock_msg,
             MockCalledOnceWith("Synced RBAC service; regiond started."))
 
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_process_invalidates_boot_configs(self):
+        service = self.make_service(sentinel.listener)
+        system_ids = {factory.make_name("system_id") for _ in range(3)}
+        service.needsBootConfigInvalidation = True
+        service.bootConfigInvalidations = set(system_ids)
+        mock_invalidate_boot_configs = self.patch(
+            region_controller, "invalidate_boot_configs")
+        mock_invalidate_boot_configs.return_value = succeed(None)
+        service.startProcessing()
+        yield service.processingDefer
+        self.assertThat(
+            mock_invalidate_boot_configs, MockCalledOnceWith(system_ids))
+        self.assertFalse(service.needsBootConfigInvalidation)
+        self.assertEqual(set(), service.bootConfigInvalidations)
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_process_invalidates_boot_configs_logs_failure(self):
+        service = self.make_service(sentinel.listener)
+        service.needsBootConfigInvalidation = True
+        service.bootConfigInvalidations = None
+        mock_invalidate_boot_configs = self.patch(
+            region_controller, "invalidate_boot_configs")
+        mock_invalidate_boot_configs.return_value = fail(
+            factory.make_exception())
+        mock_err = self.patch(
+            region_controller.log, "err")
+        service.startProcessing()
+        yield service.processingDefer
+        self.assertThat(
+            mock_invalidate_boot_configs, MockCalledOnceWith(None))
+        self.assertThat(
+            mock_err,
+            MockCalledOnceWith(
+                ANY, "Failed invalidating boot configurations."))
+
     @wait_for_reactor
     @inlineCallbacks
     def test_process_updates_zones_logs_failure(self):
@@ -297,7 +365,9 @@ class TestRegionControllerService(MAASServerTestCase):
             region_controller.log, "err")
         service.startProcessing()
         yield service.processingDefer
-        self.assertThat(mock_dns_update_all_zones, MockCalledOnceWith())
+        self.assertThat(
+            mock_dns_update_all_zones,
+            MockCalledOnceWith(published=service.dnsPublished))
         self.assertThat(
             mock_err,
             MockCalledOnceWith(ANY, "Failed configuring DNS."))
@@ -383,7 +453,8 @@ class TestRegionControllerService(MAASServerTestCase):
         service.startProcessing()
         yield service.processingDefer
         self.assertThat(
-            mock_dns_update_all_zones, MockCalledOnceWith())
+            mock_dns_update_all_zones,
+            MockCalledOnceWith(published=service.dnsPublished))
         self.assertThat(mock_check_serial, MockCalledOnceWith(dns_result))
         self.assertThat(
             mock_proxy_update_config, MockCalledOnceWith(reload_proxy=True))
@@ -596,7 +667,9 @@ class TestRegionControllerServiceTransactional(MAASTransactionServerTestCase):
             region_controller.log, "msg")
         service.startProcessing()
         yield service.processingDefer
-        self.assertThat(mock_dns_update_all_zones, MockCalledOnceWith())
+        self.assertThat(
+            mock_dns_update_all_zones,
+            MockCalledOnceWith(published=service.dnsPublished))
         self.assertThat(mock_check_serial, MockCalledOnceWith(dns_result))
         self.assertThat(
             mock_msg,
@@ -638,7 +711,9 @@ class TestRegionControllerServiceTransactional(MAASTransactionServerTestCase):
             ' * %s' % publication.source
             for publication in reversed(publications[1:])
         )
-        self.assertThat(mock_dns_update_all_zones, MockCalledOnceWith())
+        self.assertThat(
+            mock_dns_update_all_zones,
+            MockCalledOnceWith(published=service.dnsPublished))
         self.assertThat(mock_check_serial, MockCalledOnceWith(dns_result))
         self.assertThat(
             mock_msg,
@@ -1654,6 +1654,44 @@ PEER_PROXY_CONFIG_UPDATE = dedent("""\
     """)
 
 
+# Triggered when a node is updated. Notifies that the cached boot
+# configuration of the node on the rack controllers needs to be invalidated.
+# Only watches the fields that are used to compose the boot configuration.
+BOOT_CONFIG_NODE_UPDATE = dedent("""\
+    CREATE OR REPLACE FUNCTION sys_boot_config_node_update()
+    RETURNS trigger as $$
+    BEGIN
+      IF (OLD.status IS DISTINCT FROM NEW.status OR
+          OLD.netboot IS DISTINCT FROM NEW.netboot OR
+          OLD.osystem IS DISTINCT FROM NEW.osystem OR
+          OLD.distro_series IS DISTINCT FROM NEW.distro_series OR
+          OLD.architecture IS DISTINCT FROM NEW.architecture OR
+          OLD.hwe_kernel IS DISTINCT FROM NEW.hwe_kernel OR
+          OLD.min_hwe_kernel IS DISTINCT FROM NEW.min_hwe_kernel) THEN
+        PERFORM pg_notify('sys_boot_config', NEW.system_id);
+      END IF;
+      RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+
+# Triggered when a tag is updated. Notifies that all cached boot
+# configurations on the rack controllers need to be invalidated when the
+# kernel options of the tag change.
+BOOT_CONFIG_TAG_UPDATE = dedent("""\
+    CREATE OR REPLACE FUNCTION sys_boot_config_tag_update()
+    RETURNS trigger as $$
+    BEGIN
+      IF OLD.kernel_opts IS DISTINCT FROM NEW.kernel_opts THEN
+        PERFORM pg_notify('sys_boot_config', '');
+      END IF;
+      RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+
 # Triggered when RBAC need to be synced. In essense this means on
 # insert into maasserver_rbacsync.
 RBAC_SYNC = dedent("""\
@@ -1778,6 +1816,440 @@ RBAC_CONFIG_UPDATE = dedent("""\
     """)
 
 
+# Recomputes the discovery for a MAC and IP address pair: the most recently
+# seen neighbour with that pair, along with the most recently seen reverse-DNS
+# and mDNS entries for the IP address and the best matching subnet. Removes
+# the discovery when no neighbour has that pair any more. The `Discovery`
+# model is backed by the table this maintains.
+DISCOVERY_REFRESH = dedent("""\
+    CREATE OR REPLACE FUNCTION sys_discovery_refresh(
+      mac macaddr, address inet)
+    RETURNS void as $$
+    BEGIN
+      IF mac IS NULL OR address IS NULL THEN
+        RETURN;
+      END IF;
+      INSERT INTO maasserver_discovery (
+        id, discovery_id, neighbour_id, ip, mac_address, vid, first_seen,
+        last_seen, mdns_id, hostname, observer_id, observer_system_id,
+        observer_hostname, observer_interface_id, observer_interface_name,
+        fabric_id, fabric_name, vlan_id, is_external_dhcp, subnet_id,
+        subnet_cidr)
+      SELECT
+        neigh.id,
+        -- A string like "<ip>,<mac>" in base64, without embedded linefeeds.
+        REPLACE(ENCODE(BYTEA(HOST(neigh.ip) || ',' ||
+          neigh.mac_address::text), 'base64'), CHR(10), ''),
+        neigh.id,
+        neigh.ip,
+        neigh.mac_address,
+        neigh.vid,
+        neigh.created,
+        GREATEST(neigh.updated, mdns.updated),
+        mdns.id,
+        -- Trust reverse-DNS more than multicast DNS.
+        COALESCE(rdns.hostname, mdns.hostname),
+        node.id,
+        node.system_id,
+        node.hostname,
+        iface.id,
+        iface.name,
+        fabric.id,
+        fabric.name,
+        -- Note: This VLAN is associated with the physical interface, so the
+        -- actual observed VLAN is actually the 'vid' value on the 'fabric'.
+        vlan.id,
+        CASE
+          WHEN neigh.ip = vlan.external_dhcp THEN TRUE
+          ELSE FALSE
+        END,
+        subnet.id,
+        subnet.cidr
+      FROM maasserver_neighbour neigh
+      JOIN maasserver_interface iface ON neigh.interface_id = iface.id
+      JOIN maasserver_node node ON node.id = iface.node_id
+      JOIN maasserver_vlan vlan ON iface.vlan_id = vlan.id
+      JOIN maasserver_fabric fabric ON vlan.fabric_id = fabric.id
+      LEFT OUTER JOIN maasserver_mdns mdns ON mdns.ip = neigh.ip
+      LEFT OUTER JOIN maasserver_rdns rdns ON rdns.ip = neigh.ip
+      LEFT OUTER JOIN maasserver_subnet subnet ON (
+        vlan.id = subnet.vlan_id AND neigh.ip << subnet.cidr)
+      WHERE neigh.mac_address = mac AND neigh.ip = address
+      ORDER BY
+        neigh.updated DESC,
+        rdns.updated DESC,
+        mdns.updated DESC,
+        MASKLEN(subnet.cidr) DESC
+      LIMIT 1
+      ON CONFLICT (discovery_id) DO UPDATE SET
+        id = EXCLUDED.id,
+        neighbour_id = EXCLUDED.neighbour_id,
+        vid = EXCLUDED.vid,
+        first_seen = EXCLUDED.first_seen,
+        last_seen = EXCLUDED.last_seen,
+        mdns_id = EXCLUDED.mdns_id,
+        hostname = EXCLUDED.hostname,
+        observer_id = EXCLUDED.observer_id,
+        observer_system_id = EXCLUDED.observer_system_id,
+        observer_hostname = EXCLUDED.observer_hostname,
+        observer_interface_id = EXCLUDED.observer_interface_id,
+        observer_interface_name = EXCLUDED.observer_interface_name,
+        fabric_id = EXCLUDED.fabric_id,
+        fabric_name = EXCLUDED.fabric_name,
+        vlan_id = EXCLUDED.vlan_id,
+        is_external_dhcp = EXCLUDED.is_external_dhcp,
+        subnet_id = EXCLUDED.subnet_id,
+        subnet_cidr = EXCLUDED.subnet_cidr;
+      IF NOT FOUND THEN
+        DELETE FROM maasserver_discovery
+        WHERE
+          maasserver_discovery.mac_address = mac AND
+          maasserver_discovery.ip = address;
+      END IF;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+
+# Triggered when a neighbour is inserted, updated, or deleted. Refreshes the
+# discoveries for its old and new MAC and IP address pairs. The old pair is
+# refreshed first so that the neighbour is only ever in one discovery.
+DISCOVERY_NEIGHBOUR_INSERT = dedent("""\
+    CREATE OR REPLACE FUNCTION sys_discovery_neighbour_insert()
+    RETURNS trigger as $$
+    BEGIN
+      PERFORM sys_discovery_refresh(NEW.mac_address, NEW.ip);
+      RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+DISCOVERY_NEIGHBOUR_UPDATE = dedent("""\
+    CREATE OR REPLACE FUNCTION sys_discovery_neighbour_update()
+    RETURNS trigger as $$
+    BEGIN
+      IF (OLD.mac_address IS DISTINCT FROM NEW.mac_address OR
+          OLD.ip IS DISTINCT FROM NEW.ip) THEN
+        PERFORM sys_discovery_refresh(OLD.mac_address, OLD.ip);
+      END IF;
+      PERFORM sys_discovery_refresh(NEW.mac_address, NEW.ip);
+      RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+DISCOVERY_NEIGHBOUR_DELETE = dedent("""\
+    CREATE OR REPLACE FUNCTION sys_discovery_neighbour_delete()
+    RETURNS trigger as $$
+    BEGIN
+      PERFORM sys_discovery_refresh(OLD.mac_address, OLD.ip);
+      RETURN OLD;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+
+def render_sys_discovery_ip_procedure(proc_name, event):
+    """Render a database procedure with name `proc_name` that refreshes the
+    discoveries with the IP address of the mDNS or reverse-DNS entry that
+    changed.
+
+    :param proc_name: Name of the procedure.
+    :param event: The event the procedure will be used as a trigger for:
+        "insert", "update", or "delete".
+    """
+    if event == "insert":
+        refresh = "PERFORM sys_discovery_refresh_ip(NEW.ip);"
+    elif event == "update":
+        refresh = (
+            "IF OLD.ip IS DISTINCT FROM NEW.ip THEN\n"
+            "    PERFORM sys_discovery_refresh_ip(OLD.ip);\n"
+            "  END IF;\n"
+            "  PERFORM sys_discovery_refresh_ip(NEW.ip);")
+    else:
+        refresh = "PERFORM sys_discovery_refresh_ip(OLD.ip);"
+    return dedent("""\
+        CREATE OR REPLACE FUNCTION %s()
+        RETURNS trigger as $$
+        BEGIN
+          %s
+          RETURN %s;
+        END;
+        $$ LANGUAGE plpgsql;
+        """) % (proc_name, refresh, 'OLD' if event == "delete" else 'NEW')
+
+
+# Helper that refreshes every discovery of the given IP address.
+DISCOVERY_REFRESH_IP = dedent("""\
+    CREATE OR REPLACE FUNCTION sys_discovery_refresh_ip(address inet)
+    RETURNS void as $$
+    BEGIN
+      PERFORM sys_discovery_refresh(neigh.mac_address, neigh.ip)
+      FROM (
+        SELECT DISTINCT mac_address, ip
+        FROM maasserver_neighbour
+        WHERE maasserver_neighbour.ip = address) AS neigh;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+
+def render_sys_discovery_observer_procedure(proc_name, column, key):
+    """Render a database procedure with name `proc_name` that refreshes the
+    discoveries whose `column` is the `key` of the row that changed.
+
+    These are used for the rack controllers, interfaces, VLANs and fabrics
+    that observed the discoveries, whose names and such are copied into them.
+
+    :param proc_name: Name of the procedure.
+    :param column: The column in the `maasserver_discovery` table.
+    :param key: The column in the changed row, e.g. "id".
+    """
+    return dedent("""\
+        CREATE OR REPLACE FUNCTION %s()
+        RETURNS trigger as $$
+        BEGIN
+          PERFORM sys_discovery_refresh(mac_address, ip)
+          FROM maasserver_discovery
+          WHERE maasserver_discovery.%s = NEW.%s;
+          RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+        """) % (proc_name, column, key)
+
+
+# Triggered when a subnet is inserted, updated, or deleted. Refreshes the
+# discoveries on its old and new VLAN, since the best matching subnet for
+# them may have changed.
+DISCOVERY_SUBNET_INSERT = dedent("""\
+    CREATE OR REPLACE FUNCTION sys_discovery_subnet_insert()
+    RETURNS trigger as $$
+    BEGIN
+      PERFORM sys_discovery_refresh(mac_address, ip)
+      FROM maasserver_discovery
+      WHERE maasserver_discovery.vlan_id = NEW.vlan_id;
+      RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+DISCOVERY_SUBNET_UPDATE = dedent("""\
+    CREATE OR REPLACE FUNCTION sys_discovery_subnet_update()
+    RETURNS trigger as $$
+    BEGIN
+      PERFORM sys_discovery_refresh(mac_address, ip)
+      FROM maasserver_discovery
+      WHERE maasserver_discovery.vlan_id IN (OLD.vlan_id, NEW.vlan_id);
+      RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+DISCOVERY_SUBNET_DELETE = dedent("""\
+    CREATE OR REPLACE FUNCTION sys_discovery_subnet_delete()
+    RETURNS trigger as $$
+    BEGIN
+      PERFORM sys_discovery_refresh(mac_address, ip)
+      FROM maasserver_discovery
+      WHERE maasserver_discovery.vlan_id = OLD.vlan_id;
+      RETURN OLD;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+
+# Recomputes the allocation summary of a node: its cost, the devices holding
+# its root filesystem, its unused block devices and partitions, and the
+# fabrics, VLANs, spaces and subnets of its interfaces. Removes the summary
+# when the node no longer exists. The `NodeAllocationSummary` model is backed
+# by the table this maintains.
+ALLOCATION_REFRESH = dedent("""\
+    CREATE OR REPLACE FUNCTION sys_allocation_refresh(nid integer)
+    RETURNS void as $$
+    BEGIN
+      IF nid IS NULL THEN
+        RETURN;
+      END IF;
+      DELETE FROM maasserver_nodeallocationsummary
+      WHERE maasserver_nodeallocationsummary.node_id = nid;
+      INSERT INTO maasserver_nodeallocationsummary (
+        node_id, cost, root_size, root_tags, root_partition_size,
+        root_partition_tags, disk_count, disk_size, disk_tags,
+        partition_count, partition_size, partition_tags, fabric_ids,
+        vlan_ids, space_ids, subnet_ids)
+      SELECT
+        node.id,
+        -- This is loosely based on how EC2 computes the costs of machines.
+        node.cpu_count + node.memory / 1024.,
+        root.size,
+        root.tags,
+        root.partition_size,
+        root.partition_tags,
+        disk.count,
+        disk.size,
+        disk.tags,
+        part.count,
+        part.size,
+        part.tags,
+        net.fabric_ids,
+        net.vlan_ids,
+        net.space_ids,
+        addr.subnet_ids
+      FROM maasserver_node node,
+      LATERAL (
+        -- The block devices with root on them, directly or on a partition.
+        SELECT
+          MAX(bd.size) AS size,
+          ARRAY_REMOVE(ARRAY_AGG(DISTINCT bd_tag), NULL) AS tags,
+          MAX(p.size) AS partition_size,
+          ARRAY_REMOVE(ARRAY_AGG(DISTINCT p_tag), NULL) AS partition_tags
+        FROM maasserver_filesystem fs
+        LEFT JOIN maasserver_partition p ON p.id = fs.partition_id
+        LEFT JOIN maasserver_partitiontable pt
+          ON pt.id = p.partition_table_id
+        JOIN maasserver_blockdevice bd
+          ON bd.id = COALESCE(fs.block_device_id, pt.block_device_id)
+        LEFT JOIN LATERAL UNNEST(bd.tags) AS bd_tag ON TRUE
+        LEFT JOIN LATERAL UNNEST(p.tags) AS p_tag ON TRUE
+        WHERE bd.node_id = node.id
+          AND fs.mount_point = '/'
+          AND NOT fs.acquired
+      ) AS root,
+      LATERAL (
+        -- The block devices with neither a filesystem nor partitions.
+        SELECT
+          COUNT(DISTINCT bd.id) AS count,
+          MAX(bd.size) AS size,
+          ARRAY_REMOVE(ARRAY_AGG(DISTINCT tag), NULL) AS tags
+        FROM maasserver_blockdevice bd
+        LEFT JOIN LATERAL UNNEST(bd.tags) AS tag ON TRUE
+        WHERE bd.node_id = node.id
+          AND NOT EXISTS (
+            SELECT 1 FROM maasserver_filesystem fs
+            WHERE fs.block_device_id = bd.id)
+          AND NOT EXISTS (
+            SELECT 1 FROM maasserver_partitiontable pt
+            WHERE pt.block_device_id = bd.id)
+      ) AS disk,
+      LATERAL (
+        -- The partitions without a filesystem.
+        SELECT
+          COUNT(DISTINCT p.id) AS count,
+          MAX(p.size) AS size,
+          ARRAY_REMOVE(ARRAY_AGG(DISTINCT tag), NULL) AS tags
+        FROM maasserver_partition p
+        JOIN maasserver_partitiontable pt ON pt.id = p.partition_table_id
+        JOIN maasserver_blockdevice bd ON bd.id = pt.block_device_id
+        LEFT JOIN LATERAL UNNEST(p.tags) AS tag ON TRUE
+        WHERE bd.node_id = node.id
+          AND NOT EXISTS (
+            SELECT 1 FROM maasserver_filesystem fs
+            WHERE fs.partition_id = p.id)
+      ) AS part,
+      LATERAL (
+        SELECT
+          ARRAY_REMOVE(ARRAY_AGG(DISTINCT vlan.fabric_id), NULL)
+            AS fabric_ids,
+          ARRAY_REMOVE(ARRAY_AGG(DISTINCT vlan.id), NULL) AS vlan_ids,
+          ARRAY_REMOVE(ARRAY_AGG(DISTINCT vlan.space_id), NULL) AS space_ids
+        FROM maasserver_interface iface
+        JOIN maasserver_vlan vlan ON vlan.id = iface.vlan_id
+        WHERE iface.node_id = node.id
+      ) AS net,
+      LATERAL (
+        SELECT
+          ARRAY_REMOVE(ARRAY_AGG(DISTINCT ip.subnet_id), NULL) AS subnet_ids
+        FROM maasserver_interface iface
+        JOIN maasserver_interface_ip_addresses link
+          ON link.interface_id = iface.id
+        JOIN maasserver_staticipaddress ip
+          ON ip.id = link.staticipaddress_id
+        WHERE iface.node_id = node.id
+      ) AS addr
+      WHERE node.id = nid;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+
+def render_sys_allocation_procedure(proc_name, event, node_ids):
+    """Render a database procedure with name `proc_name` that refreshes the
+    allocation summaries of the nodes that the row that changed belongs to.
+
+    For updates, the nodes of both the old and the new row are refreshed.
+
+    :param proc_name: Name of the procedure.
+    :param event: The event the procedure will be used as a trigger for:
+        "insert", "update", or "delete".
+    :param node_ids: A query for the IDs of the nodes, as `node_id`, with
+        `{row}` in place of the row that changed.
+    """
+    if event == "insert":
+        rows = ["NEW"]
+    elif event == "update":
+        rows = ["OLD", "NEW"]
+    else:
+        rows = ["OLD"]
+    query = " UNION ".join(
+        "(%s)" % node_ids.format(row=row) for row in rows)
+    return dedent("""\
+        CREATE OR REPLACE FUNCTION %s()
+        RETURNS trigger as $$
+        BEGIN
+          PERFORM sys_allocation_refresh(nodes.node_id)
+          FROM (%s) AS nodes;
+          RETURN %s;
+        END;
+        $$ LANGUAGE plpgsql;
+        """) % (proc_name, query, 'OLD' if event == "delete" else 'NEW')
+
+
+# Queries for the IDs of the nodes a changed row belongs to, for each table
+# the allocation summaries are derived from, along with the events and the
+# fields that matter for updates.
+ALLOCATION_NODE_IDS = [
+    ("maasserver_node", "node", ("insert", "update", "delete"),
+     ["cpu_count", "memory"],
+     "SELECT {row}.id AS node_id"),
+    ("maasserver_blockdevice", "blockdevice", ("insert", "update", "delete"),
+     ["node_id", "size", "tags"],
+     "SELECT {row}.node_id AS node_id"),
+    ("maasserver_partitiontable", "partitiontable", ("insert", "delete"),
+     None,
+     "SELECT bd.node_id FROM maasserver_blockdevice bd"
+     " WHERE bd.id = {row}.block_device_id"),
+    ("maasserver_partition", "partition", ("insert", "update", "delete"),
+     ["partition_table_id", "size", "tags"],
+     "SELECT bd.node_id FROM maasserver_partitiontable pt"
+     " JOIN maasserver_blockdevice bd ON bd.id = pt.block_device_id"
+     " WHERE pt.id = {row}.partition_table_id"),
+    ("maasserver_filesystem", "filesystem", ("insert", "update", "delete"),
+     ["block_device_id", "partition_id", "mount_point", "acquired"],
+     "SELECT bd.node_id FROM maasserver_blockdevice bd"
+     " WHERE bd.id = {row}.block_device_id"
+     " UNION SELECT bd.node_id FROM maasserver_partition p"
+     " JOIN maasserver_partitiontable pt ON pt.id = p.partition_table_id"
+     " JOIN maasserver_blockdevice bd ON bd.id = pt.block_device_id"
+     " WHERE p.id = {row}.partition_id"),
+    ("maasserver_interface", "interface", ("insert", "update", "delete"),
+     ["node_id", "vlan_id"],
+     "SELECT {row}.node_id AS node_id"),
+    ("maasserver_interface_ip_addresses", "ipaddresses", ("insert", "delete"),
+     None,
+     "SELECT iface.node_id FROM maasserver_interface iface"
+     " WHERE iface.id = {row}.interface_id"),
+    ("maasserver_staticipaddress", "staticipaddress", ("update",),
+     ["subnet_id"],
+     "SELECT iface.node_id FROM maasserver_interface_ip_addresses link"
+     " JOIN maasserver_interface iface ON iface.id = link.interface_id"
+     " WHERE link.staticipaddress_id = {row}.id"),
+    ("maasserver_vlan", "vlan", ("update",),
+     ["fabric_id", "space_id"],
+     "SELECT iface.node_id FROM maasserver_interface iface"
+     " WHERE iface.vlan_id = {row}.id"),
+]
+
+
 def render_sys_proxy_procedure(proc_name, on_delete=False):
     """Render a database procedure with name `proc_name` that notifies that a
     proxy update is needed.
@@ -1795,6 +2267,36 @@ def render_sys_proxy_procedure(proc_name, on_delete=False):
         """ % (proc_name, 'NEW' if not on_delete else 'OLD'))
 
 
+def render_sys_boot_config_config_procedure(proc_name):
+    """Render a database procedure with name `proc_name` that notifies that
+    the cached boot configurations need invalidating when a setting used to
+    compose them is changed.
+
+    :param proc_name: Name of the procedure.
+    """
+    return dedent("""\
+        CREATE OR REPLACE FUNCTION %s()
+        RETURNS trigger as $$
+        BEGIN
+          IF (NEW.name = 'kernel_opts' OR
+              NEW.name = 'default_osystem' OR
+              NEW.name = 'default_distro_series' OR
+              NEW.name = 'commissioning_osystem' OR
+              NEW.name = 'commissioning_distro_series' OR
+              NEW.name = 'default_min_hwe_kernel' OR
+              NEW.name = 'enable_third_party_drivers' OR
+              NEW.name = 'use_rack_proxy' OR
+              NEW.name = 'maas_internal_domain' OR
+              NEW.name = 'remote_syslog' OR
+              NEW.name = 'maas_syslog_port') THEN
+            PERFORM pg_notify('sys_boot_config', '');
+          END IF;
+          RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+        """ % proc_name)
+
+
 @transactional
 def register_system_triggers():
     """Register all system triggers into the database."""
@@ -2039,6 +2541,32 @@ def register_system_triggers():
         "maasserver_config", "sys_proxy_config_use_peer_proxy_update",
         "update")
 
+    # Boot configuration
+
+    # - Node
+    register_procedure(BOOT_CONFIG_NODE_UPDATE)
+    register_trigger(
+        "maasserver_node",
+        "sys_boot_config_node_update", "update")
+
+    # - Config
+    register_procedure(
+        render_sys_boot_config_config_procedure(
+            "sys_boot_config_config_insert"))
+    register_trigger(
+        "maasserver_config", "sys_boot_config_config_insert", "insert")
+    register_procedure(
+        render_sys_boot_config_config_procedure(
+            "sys_boot_config_config_update"))
+    register_trigger(
+        "maasserver_config", "sys_boot_config_config_update", "update")
+
+    # - Tag
+    register_procedure(BOOT_CONFIG_TAG_UPDATE)
+    register_trigger(
+        "maasserver_tag",
+        "sys_boot_config_tag_update", "update")
+
     # - RBACSync
     register_procedure(RBAC_SYNC)
     register_trigger(
@@ -2066,3 +2594,77 @@ def register_system_triggers():
     register_trigger(
         "maasserver_config", "sys_rbac_config_update",
         "update")
+
+    # Discovery
+    register_procedure(DISCOVERY_REFRESH)
+    register_procedure(DISCOVERY_REFRESH_IP)
+
+    # - Neighbour
+    register_procedure(DISCOVERY_NEIGHBOUR_INSERT)
+    register_trigger(
+        "maasserver_neighbour", "sys_discovery_neighbour_insert", "insert")
+    register_procedure(DISCOVERY_NEIGHBOUR_UPDATE)
+    register_trigger(
+        "maasserver_neighbour", "sys_discovery_neighbour_update", "update")
+    register_procedure(DISCOVERY_NEIGHBOUR_DELETE)
+    register_trigger(
+        "maasserver_neighbour", "sys_discovery_neighbour_delete", "delete")
+
+    # - mDNS and reverse-DNS
+    for table in "mdns", "rdns":
+        for event in "insert", "update", "delete":
+            proc_name = "sys_discovery_%s_%s" % (table, event)
+            register_procedure(
+                render_sys_discovery_ip_procedure(proc_name, event))
+            # The fields are only checked for updates.
+            register_trigger(
+                "maasserver_%s" % table, proc_name, event,
+                fields=["ip", "hostname", "updated"])
+
+    # - Node, Interface, VLAN, Fabric
+    register_procedure(
+        render_sys_discovery_observer_procedure(
+            "sys_discovery_node_update", "observer_id", "id"))
+    register_trigger(
+        "maasserver_node", "sys_discovery_node_update", "update",
+        fields=["hostname", "system_id"])
+    register_procedure(
+        render_sys_discovery_observer_procedure(
+            "sys_discovery_interface_update", "observer_interface_id", "id"))
+    register_trigger(
+        "maasserver_interface", "sys_discovery_interface_update", "update",
+        fields=["name", "node_id", "vlan_id"])
+    register_procedure(
+        render_sys_discovery_observer_procedure(
+            "sys_discovery_vlan_update", "vlan_id", "id"))
+    register_trigger(
+        "maasserver_vlan", "sys_discovery_vlan_update", "update",
+        fields=["fabric_id", "external_dhcp"])
+    register_procedure(
+        render_sys_discovery_observer_procedure(
+            "sys_discovery_fabric_update", "fabric_id", "id"))
+    register_trigger(
+        "maasserver_fabric", "sys_discovery_fabric_update", "update",
+        fields=["name"])
+
+    # - Subnet
+    register_procedure(DISCOVERY_SUBNET_INSERT)
+    register_trigger(
+        "maasserver_subnet", "sys_discovery_subnet_insert", "insert")
+    register_procedure(DISCOVERY_SUBNET_UPDATE)
+    register_trigger(
+        "maasserver_subnet", "sys_discovery_subnet_update", "update",
+        fields=["cidr", "vlan_id"])
+    register_procedure(DISCOVERY_SUBNET_DELETE)
+    register_trigger(
+        "maasserver_subnet", "sys_discovery_subnet_delete", "delete")
+
+    # Allocation summary
+    register_procedure(ALLOCATION_REFRESH)
+    for table, name, events, fields, node_ids in ALLOCATION_NODE_IDS:
+        for event in events:
+            proc_name = "sys_allocation_%s_%s" % (name, event)
+            register_procedure(
+                render_sys_allocation_procedure(proc_name, event, node_ids))
+            # The fields are only checked for updates.
+            register_trigger(table, proc_name, event, fields=fields)
@@ -61,11 +61,52 @@ class TestTriggers(MAASServerTestCase):
             "subnet_sys_proxy_subnet_insert",
             "subnet_sys_proxy_subnet_update",
             "subnet_sys_proxy_subnet_delete",
+            "node_sys_boot_config_node_update",
+            "config_sys_boot_config_config_insert",
+            "config_sys_boot_config_config_update",
+            "tag_sys_boot_config_tag_update",
             "resourcepool_sys_rbac_rpool_insert",
             "resourcepool_sys_rbac_rpool_update",
             "resourcepool_sys_rbac_rpool_delete",
             "config_sys_rbac_config_insert",
             "config_sys_rbac_config_update",
+            "neighbour_sys_discovery_neighbour_insert",
+            "neighbour_sys_discovery_neighbour_update",
+            "neighbour_sys_discovery_neighbour_delete",
+            "mdns_sys_discovery_mdns_insert",
+            "mdns_sys_discovery_mdns_update",
+            "mdns_sys_discovery_mdns_delete",
+            "rdns_sys_discovery_rdns_insert",
+            "rdns_sys_discovery_rdns_update",
+            "rdns_sys_discovery_rdns_delete",
+            "node_sys_discovery_node_update",
+            "interface_sys_discovery_interface_update",
+            "vlan_sys_discovery_vlan_update",
+            "fabric_sys_discovery_fabric_update",
+            "subnet_sys_discovery_subnet_insert",
+            "subnet_sys_discovery_subnet_update",
+            "subnet_sys_discovery_subnet_delete",
+            "node_sys_allocation_node_insert",
+            "node_sys_allocation_node_update",
+            "node_sys_allocation_node_delete",
+            "blockdevice_sys_allocation_blockdevice_insert",
+            "blockdevice_sys_allocation_blockdevice_update",
+            "blockdevice_sys_allocation_blockdevice_delete",
+            "partitiontable_sys_allocation_partitiontable_insert",
+            "partitiontable_sys_allocation_partitiontable_delete",
+            "partition_sys_allocation_partition_insert",
+            "partition_sys_allocation_partition_update",
+            "partition_sys_allocation_partition_delete",
+            "filesystem_sys_allocation_filesystem_insert",
+            "filesystem_sys_allocation_filesystem_update",
+            "filesystem_sys_allocation_filesystem_delete",
+            "interface_sys_allocation_interface_insert",
+            "interface_sys_allocation_interface_update",
+            "interface_sys_allocation_interface_delete",
+            "interface_ip_addresses_sys_allocation_ipaddresses_insert",
+            "interface_ip_addresses_sys_allocation_ipaddresses_delete",
+            "staticipaddress_sys_allocation_staticipaddress_update",
+            "vlan_sys_allocation_vlan_update",
             ]
         sql, args = psql_array(triggers, sql_type="text")
         with closing(connection.cursor()) as cursor:
@@ -19,6 +19,7 @@ from maasserver.enum import (
     INTERFACE_TYPE,
     IPADDRESS_TYPE,
     IPRANGE_TYPE,
+    NODE_STATUS,
     RDNS_MODE,
 )
 from maasserver.models.config import Config
@@ -4691,6 +4692,108 @@ class TestProxyListener(
             yield listener.stopService()
 
 
+class TestBootConfigListener(
+        MAASTransactionServerTestCase, TransactionalHelpersMixin):
+    """End-to-end test for the boot configuration triggers code."""
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_sends_message_for_node_status_update(self):
+        yield deferToDatabase(register_system_triggers)
+        node = yield deferToDatabase(
+            self.create_node, {"status": NODE_STATUS.NEW})
+        dv = DeferredValue()
+        listener = self.make_listener_without_delay()
+        listener.register(
+            "sys_boot_config", lambda *args: dv.set(args))
+        yield listener.startService()
+        try:
+            yield deferToDatabase(
+                self.update_node, node.system_id,
+                {"status": NODE_STATUS.COMMISSIONING})
+            yield dv.get(timeout=2)
+        finally:
+            yield listener.stopService()
+        self.assertEqual(("sys_boot_config", node.system_id), dv.value)
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_sends_message_for_node_osystem_update(self):
+        yield deferToDatabase(register_system_triggers)
+        node = yield deferToDatabase(self.create_node)
+        dv = DeferredValue()
+        listener = self.make_listener_without_delay()
+        listener.register(
+            "sys_boot_config", lambda *args: dv.set(args))
+        yield listener.startService()
+        try:
+            yield deferToDatabase(
+                self.update_node, node.system_id,
+                {"osystem": factory.make_name("osystem")})
+            yield dv.get(timeout=2)
+        finally:
+            yield listener.stopService()
+        self.assertEqual(("sys_boot_config", node.system_id), dv.value)
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_sends_message_for_config_insert(self):
+        yield deferToDatabase(register_system_triggers)
+        dv = DeferredValue()
+        listener = self.make_listener_without_delay()
+        listener.register(
+            "sys_boot_config", lambda *args: dv.set(args))
+        yield listener.startService()
+        try:
+            yield deferToDatabase(
+                self.create_config, "kernel_opts",
+                factory.make_name("kernel_opts"))
+            yield dv.get(timeout=2)
+        finally:
+            yield listener.stopService()
+        self.assertEqual(("sys_boot_config", ""), dv.value)
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_sends_message_for_config_update(self):
+        yield deferToDatabase(register_system_triggers)
+        yield deferToDatabase(
+            self.create_config, "default_distro_series",
+            factory.make_name("series"))
+        dv = DeferredValue()
+        listener = self.make_listener_without_delay()
+        listener.register(
+            "sys_boot_config", lambda *args: dv.set(args))
+        yield listener.startService()
+        try:
+            yield deferToDatabase(
+                self.set_config, "default_distro_series",
+                factory.make_name("series"))
+            yield dv.get(timeout=2)
+        finally:
+            yield listener.stopService()
+        self.assertEqual(("sys_boot_config", ""), dv.value)
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_sends_message_for_tag_kernel_opts_update(self):
+        yield deferToDatabase(register_system_triggers)
+        tag = yield deferToDatabase(self.create_tag)
+        dv = DeferredValue()
+        listener = self.make_listener_without_delay()
+        listener.register(
+            "sys_boot_config", lambda *args: dv.set(args))
+        yield listener.startService()
+        try:
+            yield deferToDatabase(
+                self.update_tag, tag.id,
+                {"kernel_opts": factory.make_name("kernel_opts")})
+            yield dv.get(timeout=2)
+        finally:
+            yield listener.stopService()
+        self.assertEqual(("sys_boot_config", ""), dv.value)
+
+
 class TestRBACResourcePoolListener(
         MAASTransactionServerTestCase, TransactionalHelpersMixin,
         RBACHelpersMixin):
@@ -26,10 +26,18 @@ from provisioningserver.utils.twisted import (
     asynchronous,
     IAsynchronous,
 )
+from twisted.internet.defer import (
+    inlineCallbacks,
+    returnValue,
+)
 
 
 DATETIME_FORMAT = "%a, %d %b. %Y %H:%M:%S"
 
+# Number of objects loaded, dehydrated and sent to the client at a time when
+# a listing is streamed with `Handler.stream_list`.
+STREAM_BATCH_SIZE = 100
+
 
 def dehydrate_datetime(datetime):
     """Convert the `datetime` to string with `DATETIME_FORMAT`."""
@@ -97,6 +105,7 @@ class HandlerOptions(object):
     view_permission = None
     edit_permission = None
     delete_permission = None
+    cache_dehydrated = False
 
     def __new__(cls, meta=None):
         overrides = {}
@@ -170,13 +179,50 @@ class Handler(metaclass=HandlerMetaclass):
         # correct notifications based on what items the client has.
         if "loaded_pks" not in self.cache:
             self.cache["loaded_pks"] = set()
+        # Dehydrated objects shared with the handlers of other connections
+        # while a notification is processed. See `Meta.cache_dehydrated`.
+        self.dehydrated_cache = None
 
     def full_dehydrate(self, obj, for_list=False):
         """Convert the given object into a dictionary.
 
+        When `Meta.cache_dehydrated` is set and a `dehydrated_cache` has been
+        given to the handler, the object is only dehydrated once for all the
+        handlers sharing that cache. Only the parts that depend on the user,
+        added by `_add_permissions` and `_add_user_fields`, are computed for
+        each handler.
+
         :param for_list: True when the object is being converted to belong
             in a list.
         """
+        if self._meta.cache_dehydrated and self.dehydrated_cache is not None:
+            key = (
+                self._meta.handler_name,
+                getattr(obj, self._meta.pk),
+                getattr(obj, "updated", None),
+                for_list,
+            )
+            data = self.dehydrated_cache.get(key)
+            if data is None:
+                data = self.dehydrate(
+                    obj, self._dehydrate_fields(obj, for_list),
+                    for_list=for_list)
+                self.dehydrated_cache[key] = data
+            # Copy so that the user's fields never leak into the cache.
+            data = self._add_permissions(obj, dict(data))
+            return self._add_user_fields(obj, data, for_list=for_list)
+        else:
+            data = self._dehydrate_fields(obj, for_list)
+
+            # Add permissions that can be performed on this object.
+            data = self._add_permissions(obj, data)
+            data = self._add_user_fields(obj, data, for_list=for_list)
+
+            # Return the data after the final dehydrate.
+            return self.dehydrate(obj, data, for_list=for_list)
+
+    def _dehydrate_fields(self, obj, for_list=False):
+        """Convert the model fields of `obj` into a dictionary."""
         if for_list:
             allowed_fields = self._meta.list_fields
             exclude_fields = self._meta.list_exclude
@@ -210,12 +256,7 @@ class Handler(metaclass=HandlerMetaclass):
                     data[field_name] = field.to_python(value)
                 else:
                     data[field_name] = field.value_to_string(obj)
-
-        # Add permissions that can be performed on this object.
-        data = self._add_permissions(obj, data)
-
-        # Return the data after the final dehydrate.
-        return self.dehydrate(obj, data, for_list=for_list)
+        return data
 
     def dehydrate(self, obj, data, for_list=False):
         """Add any extra info to the `data` before finalizing the final object.
@@ -257,6 +298,14 @@ class Handler(metaclass=HandlerMetaclass):
         data['permissions'] = permissions
         return data
 
+    def _add_user_fields(self, obj, data, for_list=False):
+        """Add any extra info to `data` that depends on the current user.
+
+        Handlers setting `Meta.cache_dehydrated` must add such info here
+        rather than in `dehydrate`, which is shared between users.
+        """
+        return data
+
     def full_hydrate(self, obj, data):
         """Convert the given dictionary to a object."""
         allowed_fields = self._meta.fields
@@ -359,39 +408,45 @@ class Handler(metaclass=HandlerMetaclass):
             except AttributeError:
                 raise HandlerNoSuchMethodError(method_name)
             else:
-                # Handler methods are predominantly transactional and thus
-                # blocking/synchronous. Genuinely non-blocking/asynchronous
-                # methods must out themselves explicitly.
-                if IAsynchronous.providedBy(method):
-                    # Running in the io thread so clear RBAC now.
-                    rbac.clear()
-
-                    # Reload the user from the database.
-                    d = concurrency.webapp.run(
-                        deferToDatabase,
-                        transactional(self.user.refresh_from_db))
-                    d.addCallback(lambda _: method(params))
-                    return d
-                else:
-
-                    @transactional
-                    def prep_user_execute(params):
-                        # Clear RBAC and reload the user to ensure that
-                        # its up to date. `rbac.clear` must be done inside
-                        # the thread because it uses thread locals internally.
-                        rbac.clear()
-                        self.user.refresh_from_db()
-
-                        # Perform the work in the database.
-                        return method(params)
-
-                    # This is going to block and hold a database connection so
-                    # we limit its concurrency.
-                    return concurrency.webapp.run(
-                        deferToDatabase, prep_user_execute, params)
+                return self._execute(method, params)
         else:
             raise HandlerNoSuchMethodError(method_name)
 
+    def _execute(self, method, params):
+        """Call `method` with `params` in the right context.
+
+        Handler methods are predominantly transactional and thus
+        blocking/synchronous. Genuinely non-blocking/asynchronous methods
+        must out themselves explicitly.
+        """
+        if IAsynchronous.providedBy(method):
+            # Running in the io thread so clear RBAC now.
+            rbac.clear()
+
+            # Reload the user from the database.
+            d = concurrency.webapp.run(
+                deferToDatabase,
+                transactional(self.user.refresh_from_db))
+            d.addCallback(lambda _: method(params))
+            return d
+        else:
+
+            @transactional
+            def prep_user_execute(params):
+                # Clear RBAC and reload the user to ensure that its up to
+                # date. `rbac.clear` must be done inside the thread because it
+                # uses thread locals internally.
+                rbac.clear()
+                self.user.refresh_from_db()
+
+                # Perform the work in the database.
+                return method(params)
+
+            # This is going to block and hold a database connection so we
+            # limit its concurrency.
+            return concurrency.webapp.run(
+                deferToDatabase, prep_user_execute, params)
+
     def _cache_pks(self, objs):
         """Cache all loaded object pks."""
         getpk = attrgetter(self._meta.pk)
@@ -405,6 +460,9 @@ class Handler(metaclass=HandlerMetaclass):
             also understands this distinction.
         :param offset: Offset into the queryset to return.
         :param limit: Maximum number of objects to return.
+        :param since: A sync token previously returned by `stream_list`.
+            Only objects that have changed since that token was issued are
+            returned.
         """
         queryset = self.get_queryset(for_list=True)
         queryset = queryset.order_by(self._meta.batch_key)
@@ -412,6 +470,8 @@ class Handler(metaclass=HandlerMetaclass):
             queryset = queryset.filter(**{
                 "%s__gt" % self._meta.batch_key: params["start"]
                 })
+        if params.get("since") is not None:
+            queryset = self.filter_since(queryset, params["since"])
         if "limit" in params:
             queryset = queryset[:params["limit"]]
         objs = list(queryset)
@@ -421,6 +481,86 @@ class Handler(metaclass=HandlerMetaclass):
             for obj in objs
             ]
 
+    def get_sync_token(self):
+        """Return a token marking the current point in time.
+
+        The token can be passed back as the `since` parameter to `list` to
+        only receive the objects that have changed after this point. Returns
+        `None` when the handler does not support delta listings.
+        """
+        return None
+
+    def filter_since(self, queryset, since):
+        """Filter `queryset` to the objects changed since the sync token
+        `since`, as returned from `get_sync_token`.
+
+        Override in handlers that can track changes to their objects.
+        """
+        raise HandlerValidationError({
+            "since": ["Listing changes is not supported by this handler."],
+        })
+
+    def removed_pks(self, pks):
+        """Return which of `pks` the user can no longer see.
+
+        The remaining `pks` are added to the loaded pks, so that the client
+        receives notifications for the objects it already holds.
+        """
+        queryset = self.get_queryset(for_list=True).filter(**{
+            "%s__in" % self._meta.pk: pks,
+            })
+        visible = set(queryset.values_list(self._meta.pk, flat=True))
+        self.cache["loaded_pks"].update(visible)
+        return [pk for pk in pks if pk not in visible]
+
+    @asynchronous
+    @inlineCallbacks
+    def stream_list(self, params, send_batch):
+        """List objects, sending each batch to the client as it is ready.
+
+        Every batch is loaded and dehydrated in its own transaction using
+        `start` as a cursor on the `batch_key`, so a large listing neither
+        holds a database thread for its whole duration nor is sent as a
+        single message.
+
+        :param params: The same parameters as `list`. The `limit`, if given,
+            caps the total number of objects streamed. When `since` is given
+            the client can also pass the `pks` that it already holds to be
+            told which of those have since been removed.
+        :param send_batch: Called with each list of dehydrated objects.
+        :return: A dict with the number of objects sent in `count`, the
+            `since` token to use on the next listing and the `removed` pks.
+            Listings since a token may repeat objects from this listing.
+        """
+        params = dict(params)
+        remaining = params.pop("limit", None)
+        known_pks = params.pop("pks", None)
+        # Issue the token before loading anything so that objects changing
+        # while the listing is in progress are included in the next one.
+        token = self.get_sync_token()
+        count = 0
+        while remaining is None or remaining > 0:
+            limit = STREAM_BATCH_SIZE
+            if remaining is not None:
+                limit = min(limit, remaining)
+                remaining -= limit
+            batch = yield self.execute("list", dict(params, limit=limit))
+            if len(batch) > 0:
+                count += len(batch)
+                send_batch(batch)
+            if len(batch) < limit:
+                break
+            params["start"] = batch[-1][self._meta.batch_key]
+
+        removed = []
+        if params.get("since") is not None and known_pks:
+            removed = yield self._execute(self.removed_pks, known_pks)
+        returnValue({
+            "count": count,
+            "since": token,
+            "removed": removed,
+        })
+
     def get(self, params):
         """Get object.
 
@@ -540,18 +680,62 @@ class Handler(metaclass=HandlerMetaclass):
         """
         pk = self._meta.pk_type(pk)
         if action == "delete":
-            if pk in self.cache['loaded_pks']:
-                self.cache['loaded_pks'].remove(pk)
-                return (self._meta.handler_name, action, pk)
-            else:
-                return None
+            return self._on_listen_object(action, pk, None)
 
         self.user.refresh_from_db()
         try:
             obj = self.listen(channel, action, pk)
         except HandlerDoesNotExistError:
             obj = None
-        if action == "create" and obj is not None:
+        return self._on_listen_object(action, pk, obj)
+
+    def on_listen_batch(self, channel, action, pks):
+        """Called by the protocol when notifications for many objects on a
+        channel are delivered together.
+
+        The objects are loaded with a single query. Handlers that customise
+        `on_listen` or `listen`, or that customise `get_object` without also
+        customising `listen_batch` to match, have each pk passed to
+        `on_listen` instead.
+
+        :return: A list of the messages to send to the client.
+        """
+        handler_class = type(self)
+        if (handler_class.on_listen is not Handler.on_listen or
+                handler_class.listen is not Handler.listen or (
+                    handler_class.get_object is not Handler.get_object and
+                    handler_class.listen_batch is Handler.listen_batch)):
+            messages = (
+                self.on_listen(channel, action, pk)
+                for pk in pks
+            )
+            return [message for message in messages if message is not None]
+
+        pks = [self._meta.pk_type(pk) for pk in pks]
+        if action == "delete":
+            objs = {}
+        else:
+            self.user.refresh_from_db()
+            objs = self.listen_batch(channel, action, pks)
+        messages = (
+            self._on_listen_object(action, pk, objs.get(pk))
+            for pk in pks
+        )
+        return [message for message in messages if message is not None]
+
+    def _on_listen_object(self, action, pk, obj):
+        """Return the message to send for `action` on `obj`, or `None`.
+
+        :param obj: The object with `pk` or `None` if it no longer exists or
+            the user can no longer see it.
+        """
+        if action == "delete":
+            if pk in self.cache['loaded_pks']:
+                self.cache['loaded_pks'].remove(pk)
+                return (self._meta.handler_name, action, pk)
+            else:
+                return None
+        elif action == "create" and obj is not None:
             if pk in self.cache['loaded_pks']:
                 # The user already knows about this node, so its not a create
                 # to the user but an update.
@@ -614,6 +798,25 @@ class Handler(metaclass=HandlerMetaclass):
             self._meta.pk: pk
             })
 
+    def listen_batch(self, channel, action, pks):
+        """Load all the objects for `pks` notified together on `channel`.
+
+        Objects that do not exist or that the user does not have permission
+        to view are left out.
+
+        :return: A dict mapping each pk to its object.
+        """
+        queryset = self.get_queryset(for_list=False).filter(**{
+            "%s__in" % self._meta.pk: pks,
+            })
+        getpk = attrgetter(self._meta.pk)
+        permission = self._meta.view_permission
+        return {
+            getpk(obj): obj
+            for obj in queryset
+            if permission is None or self.user.has_perm(permission, obj)
+        }
+
 
 class AdminOnlyMixin(Handler):
 
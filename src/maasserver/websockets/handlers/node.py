@@ -92,6 +92,7 @@ class NodeHandler(TimestampedModelHandler):
         abstract = True
         pk = 'system_id'
         pk_type = str
+        cache_dehydrated = True
 
     def __init__(self, user, cache, request):
         super().__init__(user, cache, request)
@@ -180,10 +181,14 @@ class NodeHandler(TimestampedModelHandler):
 
         return tooltip
 
+    def _add_user_fields(self, obj, data, for_list=False):
+        """Add the actions the user can perform on the node to `data`."""
+        data["actions"] = list(compile_node_actions(obj, self.user).keys())
+        return data
+
     def dehydrate(self, obj, data, for_list=False):
         """Add extra fields to `data`."""
         data["fqdn"] = obj.fqdn
-        data["actions"] = list(compile_node_actions(obj, self.user).keys())
         data["node_type_display"] = obj.get_node_type_display()
         data["link_type"] = NODE_TYPE_TO_LINK_TYPE[obj.node_type]
 
@@ -282,6 +287,13 @@ class NodeHandler(TimestampedModelHandler):
                     for metadata in obj.nodemetadata_set.all()
                 }
 
+                # PCI and USB devices found while commissioning.
+                data["node_devices"] = [
+                    self.dehydrate_node_device(device)
+                    for device in obj.nodedevice_set.order_by(
+                        "bus", "bus_address")
+                ]
+
                 # Network
                 data["interfaces"] = [
                     self.dehydrate_interface(interface, obj)
@@ -704,6 +716,17 @@ class NodeHandler(TimestampedModelHandler):
         else:
             return obj.status
 
+    def dehydrate_node_device(self, device):
+        """Dehydrate a `NodeDevice`."""
+        return {
+            "bus": device.bus,
+            "bus_address": device.bus_address,
+            "hardware_class": device.hardware_class,
+            "vendor_name": device.vendor_name,
+            "product_name": device.product_name,
+            "commissioning_driver": device.commissioning_driver,
+        }
+
     def dehydrate_events(self, obj):
         """Dehydrate the node events.
 
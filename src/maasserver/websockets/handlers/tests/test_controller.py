@@ -56,6 +56,16 @@ class TestControllerHandler(MAASServerTestCase):
         data = handler.get({"system_id": node.system_id})
         self.assertIsNone(data.get("last_image_sync"))
 
+    def test_get_includes_node_devices(self):
+        owner = factory.make_admin()
+        handler = ControllerHandler(owner, {}, None)
+        node = factory.make_RackController(owner=owner)
+        device = factory.make_NodeDevice(node=node)
+        data = handler.get({"system_id": node.system_id})
+        self.assertEqual(
+            [handler.dehydrate_node_device(device)], data["node_devices"])
+        self.assertNotIn("devices", data)
+
     def test_list_ignores_devices_and_nodes(self):
         owner = factory.make_admin()
         handler = ControllerHandler(owner, {}, None)
@@ -133,7 +143,7 @@ class TestControllerHandler(MAASServerTestCase):
         # number means regiond has to do more work slowing down its process
         # and slowing down the client waiting for the response.
         self.assertEqual(
-            queries, 31,
+            queries, 32,
             "Number of queries has changed; make sure this is expected.")
 
     def test_get_form_class_for_create(self):
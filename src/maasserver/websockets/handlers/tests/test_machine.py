@@ -363,6 +363,11 @@ class TestMachineHandler(MAASServerTestCase):
             data.update({
                 "dhcp_on": node.interface_set.filter(
                     vlan__dhcp_on=True).exists(),
+                "node_devices": [
+                    handler.dehydrate_node_device(device)
+                    for device in node.nodedevice_set.order_by(
+                        "bus", "bus_address")
+                ],
                 "grouped_storages": handler.get_grouped_storages(blockdevices),
                 "metadata": {},
             })
@@ -604,7 +609,7 @@ class TestMachineHandler(MAASServerTestCase):
         # number means regiond has to do more work slowing down its process
         # and slowing down the client waiting for the response.
         self.assertEqual(
-            queries, 50,
+            queries, 51,
             "Number of queries has changed; make sure this is expected.")
 
     def test_trigger_update_updates_script_result_cache(self):
@@ -1580,6 +1585,34 @@ class TestMachineHandler(MAASServerTestCase):
                 probed_details, encoding=str, pretty_print=True)).convert(),
             observed)
 
+    def test_get_includes_node_devices(self):
+        owner = factory.make_User()
+        node = factory.make_Node(owner=owner)
+        child = factory.make_Node(node_type=NODE_TYPE.DEVICE, parent=node)
+        devices = [
+            factory.make_NodeDevice(
+                node=node, bus_address=bus_address, vendor_name="Intel",
+                product_name=factory.make_name("product"))
+            for bus_address in ("0000:00:19.0", "0000:00:02.0")
+        ]
+        factory.make_NodeDevice()
+        handler = MachineHandler(owner, {}, None)
+        observed = handler.get({"system_id": node.system_id})
+        self.assertItemsEqual(
+            [handler.dehydrate_node_device(device) for device in devices],
+            observed["node_devices"])
+        # Child devices are still listed separately.
+        self.assertEqual(
+            [handler.dehydrate_device(child)], observed["devices"])
+        self.assertEqual({
+            "bus": devices[0].bus,
+            "bus_address": "0000:00:19.0",
+            "hardware_class": devices[0].hardware_class,
+            "vendor_name": "Intel",
+            "product_name": devices[0].product_name,
+            "commissioning_driver": devices[0].commissioning_driver,
+        }, handler.dehydrate_node_device(devices[0]))
+
     def test_dehydrate_events_only_includes_lastest_50(self):
         owner = factory.make_User()
         node = factory.make_Node(owner=owner)
@@ -55,6 +55,16 @@ class TestSSHKeyHandler(MAASServerTestCase):
             self.dehydrate_sshkey(sshkey),
             handler.get({"id": sshkey.id}))
 
+    def test_on_listen_batch_ignores_keys_not_owned(self):
+        user = factory.make_User()
+        handler = SSHKeyHandler(user, {}, None)
+        sshkey = factory.make_SSHKey(user)
+        not_owned_sshkey = factory.make_SSHKey(factory.make_User())
+        self.assertEqual(
+            [("sshkey", "create", self.dehydrate_sshkey(sshkey))],
+            handler.on_listen_batch(
+                "sshkey", "create", [sshkey.id, not_owned_sshkey.id]))
+
     def test_get_doesnt_work_if_not_owned(self):
         user = factory.make_User()
         handler = SSHKeyHandler(user, {}, None)
@@ -5,9 +5,19 @@
 
 __all__ = []
 
-from datetime import datetime
+from datetime import (
+    datetime,
+    timedelta,
+)
 
+from django.utils import timezone
+from maasserver.models import Zone
+from maasserver.testing.factory import factory
+from maasserver.testing.testcase import MAASServerTestCase
+from maasserver.websockets.base import HandlerValidationError
+from maasserver.models.timestampedmodel import now
 from maasserver.websockets.handlers.timestampedmodel import (
+    SYNC_TOKEN_OVERLAP,
     TimestampedModelHandler,
 )
 from maastesting.testcase import MAASTestCase
@@ -48,3 +58,51 @@ class TestTimeStampedModelHandler(MAASTestCase):
         self.assertEqual(
             now.strftime('%a, %d %b. %Y %H:%M:%S'),
             handler.dehydrate_updated(now))
+
+
+class TestTimeStampedModelHandlerSince(MAASServerTestCase):
+
+    def test_filter_since_returns_objects_updated_after_token(self):
+        handler = TimestampedModelHandler(None, {}, None)
+        old_zone = factory.make_Zone()
+        old_zone.save(_updated=datetime(2000, 1, 1))
+        token = handler.get_sync_token()
+        new_zone = factory.make_Zone()
+        new_zone.save(_updated=datetime.now().replace(year=2100))
+        self.assertItemsEqual(
+            [new_zone],
+            handler.filter_since(
+                Zone.objects.filter(id__in=[old_zone.id, new_zone.id]),
+                token))
+
+    def test_filter_since_includes_objects_updated_just_before_token(self):
+        # An object saved before the token was issued may only have been
+        # committed after the listing, so it is listed again.
+        handler = TimestampedModelHandler(None, {}, None)
+        zone = factory.make_Zone()
+        zone.save(_updated=now() - (SYNC_TOKEN_OVERLAP / 2))
+        token = handler.get_sync_token()
+        self.assertItemsEqual(
+            [zone],
+            handler.filter_since(Zone.objects.filter(id=zone.id), token))
+
+    def test_filter_since_excludes_objects_updated_before_overlap(self):
+        handler = TimestampedModelHandler(None, {}, None)
+        zone = factory.make_Zone()
+        zone.save(_updated=now() - SYNC_TOKEN_OVERLAP - timedelta(minutes=1))
+        token = handler.get_sync_token()
+        self.assertItemsEqual(
+            [], handler.filter_since(Zone.objects.filter(id=zone.id), token))
+
+    def test_get_sync_token_is_utc_timestamp(self):
+        handler = TimestampedModelHandler(None, {}, None)
+        token = handler.get_sync_token()
+        expected = timezone.now() - SYNC_TOKEN_OVERLAP
+        self.assertAlmostEqual(
+            expected.timestamp(), float(token), delta=60)
+
+    def test_filter_since_rejects_invalid_token(self):
+        handler = TimestampedModelHandler(None, {}, None)
+        self.assertRaises(
+            HandlerValidationError, handler.filter_since,
+            Zone.objects.all(), factory.make_name("token"))
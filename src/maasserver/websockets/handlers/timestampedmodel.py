@@ -7,11 +7,26 @@ __all__ = [
     "TimestampedModelHandler",
     ]
 
+from datetime import (
+    datetime,
+    timedelta,
+)
+
+from django.conf import settings
+from django.utils import timezone
+from maasserver.models.timestampedmodel import now
 from maasserver.websockets.base import (
     dehydrate_datetime,
     Handler,
+    HandlerValidationError,
 )
 
+# How far before the time it is issued a sync token reaches back. An object's
+# `updated` time is set when it is saved, not when its transaction commits, so
+# changes committed after a listing may be older than the token issued before
+# it. This must be longer than transactions are open for.
+SYNC_TOKEN_OVERLAP = timedelta(minutes=5)
+
 
 class TimestampedModelHandler(Handler):
 
@@ -32,3 +47,27 @@ class TimestampedModelHandler(Handler):
 
     def dehydrate_updated(self, datetime):
         return dehydrate_datetime(datetime)
+
+    def get_sync_token(self):
+        """Return a sync token for `SYNC_TOKEN_OVERLAP` before now.
+
+        The token is a POSIX timestamp, rendered all the way to microseconds.
+        Listings since the token overlap the previous listing, so the client
+        may receive again objects that it already holds.
+        """
+        since = now() - SYNC_TOKEN_OVERLAP
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return str(since.timestamp())
+
+    def filter_since(self, queryset, since):
+        """Filter `queryset` to objects updated after the `since` token."""
+        try:
+            since = datetime.fromtimestamp(float(since), timezone.utc)
+        except (OverflowError, TypeError, ValueError):
+            raise HandlerValidationError({
+                "since": ["Invalid sync token: %r" % (since,)],
+            })
+        if not settings.USE_TZ:
+            since = timezone.make_naive(since)
+        return queryset.filter(updated__gt=since)
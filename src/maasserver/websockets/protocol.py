@@ -76,6 +76,9 @@ class RESPONSE_TYPE:
     #:
     ERROR = 1
 
+    #: One batch of a streamed result; more follow before the final response.
+    PARTIAL = 2
+
 
 @typed
 def get_cookie(cookies: Optional[str], cookie_name: str) -> Optional[str]:
@@ -330,7 +333,17 @@ class WebSocketProtocol(Protocol):
             return None
 
         handler = self.buildHandler(handler_class)
-        d = handler.execute(method, message.get("params", {}))
+        params = message.get("params", {})
+        if method == "list" and message.get("stream", False):
+            # The client asked for the listing to be streamed; each batch is
+            # sent as a partial response followed by the final response
+            # holding the sync token for the next listing.
+            d = handler.stream_list(
+                params, partial(
+                    self.sendResult, request_id,
+                    rtype=RESPONSE_TYPE.PARTIAL))
+        else:
+            d = handler.execute(method, params)
         d.addCallbacks(
             partial(self.sendResult, request_id),
             partial(self.sendError, request_id, handler, method))
@@ -345,12 +358,14 @@ class WebSocketProtocol(Protocol):
         else:
             raise TypeError("Could not convert object to JSON: %r" % obj)
 
-    def sendResult(self, request_id, result, msg_type=MSG_TYPE.RESPONSE):
+    def sendResult(
+            self, request_id, result, msg_type=MSG_TYPE.RESPONSE,
+            rtype=RESPONSE_TYPE.SUCCESS):
         """Send final result to client."""
         result_msg = {
             "type": msg_type,
             "request_id": request_id,
-            "rtype": RESPONSE_TYPE.SUCCESS,
+            "rtype": rtype,
             "result": result,
             }
         self.transport.write(json.dumps(
@@ -458,22 +473,44 @@ class WebSocketFactory(Factory):
         for handler in self.handlers.values():
             for channel in handler._meta.listen_channels:
                 self.listener.register(
-                    channel, partial(self.onNotify, handler, channel))
+                    channel, partial(self.onNotifyBatch, handler, channel),
+                    batched=True)
 
     @inlineCallbacks
     def onNotify(self, handler_class, channel, action, obj_id):
+        # Objects are dehydrated once for all the clients, rather than once
+        # for each client. See `Handler.full_dehydrate`.
+        dehydrated = {}
         for client in self.clients:
             handler = client.buildHandler(handler_class)
+            handler.dehydrated_cache = dehydrated
             data = yield deferToDatabase(
                 self.processNotify, handler, channel, action, obj_id)
             if data is not None:
                 (name, client_action, data) = data
                 client.sendNotify(name, client_action, data)
 
+    @inlineCallbacks
+    def onNotifyBatch(self, handler_class, channel, action, obj_ids):
+        # Objects are dehydrated once for all the clients, rather than once
+        # for each client. See `Handler.full_dehydrate`.
+        dehydrated = {}
+        for client in self.clients:
+            handler = client.buildHandler(handler_class)
+            handler.dehydrated_cache = dehydrated
+            messages = yield deferToDatabase(
+                self.processNotifyBatch, handler, channel, action, obj_ids)
+            for name, client_action, data in messages:
+                client.sendNotify(name, client_action, data)
+
     @transactional
     def processNotify(self, handler, channel, action, obj_id):
         return handler.on_listen(channel, action, obj_id)
 
+    @transactional
+    def processNotifyBatch(self, handler, channel, action, obj_ids):
+        return handler.on_listen_batch(channel, action, obj_ids)
+
     def registerRPCEvents(self):
         """Register for connected and disconnected events from the RPC
         service."""
@@ -178,6 +178,39 @@ class TestHandler(MAASServerTestCase, FakeNodesHandlerMixin):
             "permissions": ["edit", "delete"],
             }, handler.full_dehydrate(node))
 
+    def test_full_dehydrate_shares_dehydrated_cache(self):
+        dehydrated = {}
+        node = factory.make_Node()
+        admin_handler = self.make_nodes_handler(
+            fields=["hostname"], cache_dehydrated=True,
+            edit_permission=NodePermission.admin)
+        admin_handler.user = factory.make_admin()
+        admin_handler.dehydrated_cache = dehydrated
+        user_handler = self.make_nodes_handler(
+            fields=["hostname"], cache_dehydrated=True,
+            edit_permission=NodePermission.admin)
+        user_handler.dehydrated_cache = dehydrated
+        self.assertEqual({
+            "hostname": node.hostname,
+            "permissions": ["edit"],
+            }, admin_handler.full_dehydrate(node))
+        mock_dehydrate = self.patch(user_handler, "dehydrate")
+        self.assertEqual({
+            "hostname": node.hostname,
+            "permissions": [],
+            }, user_handler.full_dehydrate(node))
+        self.assertThat(mock_dehydrate, MockNotCalled())
+        self.assertEqual([{"hostname": node.hostname}], list(
+            dehydrated.values()))
+
+    def test_full_dehydrate_ignores_dehydrated_cache_if_not_enabled(self):
+        node = factory.make_Node()
+        handler = self.make_nodes_handler(fields=["hostname"])
+        handler.dehydrated_cache = {}
+        self.assertEqual(
+            {"hostname": node.hostname}, handler.full_dehydrate(node))
+        self.assertEqual({}, handler.dehydrated_cache)
+
     def test_full_dehydrate_only_includes_list_fields_when_for_list(self):
         handler = self.make_nodes_handler(
             list_fields=["cpu_count", "power_state"])
@@ -457,6 +490,35 @@ class TestHandler(MAASServerTestCase, FakeNodesHandlerMixin):
         handler.list({"start": nodes[0].id})
         self.assertItemsEqual(pks, handler.cache['loaded_pks'])
 
+    def test_list_since_uses_filter_since(self):
+        handler = self.make_nodes_handler(fields=['hostname'])
+        nodes = [factory.make_Node() for _ in range(3)]
+        since = factory.make_name("since")
+        filter_since = self.patch(handler, "filter_since")
+        filter_since.side_effect = (
+            lambda queryset, since: queryset.filter(id=nodes[1].id))
+        self.assertEqual(
+            [{"hostname": nodes[1].hostname}],
+            handler.list({"since": since}))
+        self.assertThat(filter_since, MockCalledOnceWith(ANY, since))
+
+    def test_list_since_raises_HandlerValidationError_if_unsupported(self):
+        handler = self.make_nodes_handler(fields=['hostname'])
+        self.assertRaises(
+            HandlerValidationError, handler.list, {"since": "1.0"})
+
+    def test_get_sync_token_returns_None(self):
+        handler = self.make_nodes_handler()
+        self.assertIsNone(handler.get_sync_token())
+
+    def test_removed_pks_returns_pks_no_longer_visible(self):
+        node = factory.make_Node()
+        missing = factory.make_name("system_id")
+        handler = self.make_nodes_handler()
+        self.assertEqual(
+            [missing], handler.removed_pks([node.system_id, missing]))
+        self.assertEqual({node.system_id}, handler.cache["loaded_pks"])
+
     def test_get(self):
         node = factory.make_Node()
         handler = self.make_nodes_handler(fields=['hostname'])
@@ -696,6 +758,87 @@ class TestHandler(MAASServerTestCase, FakeNodesHandlerMixin):
             handler.on_listen(
                 sentinel.channel, factory.make_name("action"), sentinel.pk))
 
+    def test_on_listen_batch_loads_objects_together(self):
+        handler = self.make_nodes_handler(fields=['hostname'])
+        nodes = [factory.make_Node(owner=handler.user) for _ in range(3)]
+        handler.cache["loaded_pks"].add(nodes[0].system_id)
+        mock_listen_batch = self.patch(handler, "listen_batch")
+        mock_listen_batch.side_effect = (
+            lambda channel, action, pks: Handler.listen_batch(
+                handler, channel, action, pks))
+        self.assertItemsEqual(
+            [
+                (handler._meta.handler_name, "update",
+                 {"hostname": nodes[0].hostname}),
+                (handler._meta.handler_name, "create",
+                 {"hostname": nodes[1].hostname}),
+                (handler._meta.handler_name, "create",
+                 {"hostname": nodes[2].hostname}),
+            ],
+            handler.on_listen_batch(
+                sentinel.channel, "update",
+                [node.system_id for node in nodes]))
+        self.assertThat(mock_listen_batch, MockCalledOnceWith(
+            sentinel.channel, "update", [node.system_id for node in nodes]))
+        self.assertItemsEqual(
+            [node.system_id for node in nodes], handler.cache["loaded_pks"])
+
+    def test_on_listen_batch_update_deletes_missing_loaded_pks(self):
+        handler = self.make_nodes_handler(fields=['hostname'])
+        pk = factory.make_name("system_id")
+        handler.cache["loaded_pks"].add(pk)
+        self.assertEqual(
+            [(handler._meta.handler_name, "delete", pk)],
+            handler.on_listen_batch(sentinel.channel, "update", [pk]))
+
+    def test_on_listen_batch_delete_removes_pks_from_loaded(self):
+        handler = self.make_nodes_handler()
+        pks = [factory.make_name("system_id") for _ in range(2)]
+        handler.cache["loaded_pks"].add(pks[0])
+        mock_listen_batch = self.patch(handler, "listen_batch")
+        self.assertEqual(
+            [(handler._meta.handler_name, "delete", pks[0])],
+            handler.on_listen_batch(sentinel.channel, "delete", pks))
+        self.assertThat(mock_listen_batch, MockNotCalled())
+        self.assertEqual(set(), handler.cache["loaded_pks"])
+
+    def test_on_listen_batch_uses_on_listen_when_listen_overridden(self):
+        handler = self.make_nodes_handler()
+        handler_class = type(handler)
+        handler_class.listen = lambda self, channel, action, pk: None
+        mock_on_listen = self.patch(handler, "on_listen")
+        mock_on_listen.return_value = sentinel.message
+        self.assertEqual(
+            [sentinel.message, sentinel.message],
+            handler.on_listen_batch(
+                sentinel.channel, "update", [sentinel.pk1, sentinel.pk2]))
+
+    def test_on_listen_batch_uses_on_listen_when_get_object_overridden(self):
+        handler = self.make_nodes_handler()
+        handler_class = type(handler)
+        handler_class.get_object = lambda self, params, permission=None: None
+        mock_listen_batch = self.patch(handler, "listen_batch")
+        mock_on_listen = self.patch(handler, "on_listen")
+        mock_on_listen.return_value = sentinel.message
+        self.assertEqual(
+            [sentinel.message, sentinel.message],
+            handler.on_listen_batch(
+                sentinel.channel, "update", [sentinel.pk1, sentinel.pk2]))
+        self.assertThat(mock_listen_batch, MockNotCalled())
+
+    def test_on_listen_batch_uses_listen_batch_overridden_with_get_object(
+            self):
+        handler = self.make_nodes_handler()
+        handler_class = type(handler)
+        handler_class.get_object = lambda self, params, permission=None: None
+        handler_class.listen_batch = (
+            lambda self, channel, action, pks: {})
+        mock_on_listen = self.patch(handler, "on_listen")
+        self.assertEqual(
+            [], handler.on_listen_batch(
+                sentinel.channel, "update", [factory.make_name("pk")]))
+        self.assertThat(mock_on_listen, MockNotCalled())
+
     def test_on_listen_delete_removes_pk_from_loaded(self):
         handler = self.make_nodes_handler()
         node = factory.make_Node()
@@ -838,3 +981,38 @@ class TestHandlerTransaction(
         params = {"system_id": factory.make_name("system_id")}
         result = handler.execute("get", params).wait(30)
         self.assertThat(result, Is(sentinel.thing))
+
+    def test_stream_list_sends_batches(self):
+        self.patch(base, "STREAM_BATCH_SIZE", 2)
+        nodes = [factory.make_Node() for _ in range(5)]
+        handler = self.make_nodes_handler(fields=['id', 'hostname'])
+        batches = []
+        result = handler.stream_list({}, batches.append).wait(30)
+        self.assertEqual([2, 2, 1], [len(batch) for batch in batches])
+        self.assertEqual(
+            [node.hostname for node in nodes],
+            [obj["hostname"] for batch in batches for obj in batch])
+        self.assertEqual(
+            {"count": 5, "since": None, "removed": []}, result)
+
+    def test_stream_list_honours_limit(self):
+        self.patch(base, "STREAM_BATCH_SIZE", 2)
+        for _ in range(5):
+            factory.make_Node()
+        handler = self.make_nodes_handler(fields=['id', 'hostname'])
+        batches = []
+        result = handler.stream_list({"limit": 3}, batches.append).wait(30)
+        self.assertEqual([2, 1], [len(batch) for batch in batches])
+        self.assertEqual(3, result["count"])
+
+    def test_stream_list_returns_removed_pks_with_since(self):
+        node = factory.make_Node()
+        missing = factory.make_name("system_id")
+        handler = self.make_nodes_handler(fields=['id', 'hostname'])
+        self.patch(handler, "filter_since").side_effect = (
+            lambda queryset, since: queryset.none())
+        result = handler.stream_list({
+            "since": "1.0",
+            "pks": [node.system_id, missing],
+        }, lambda batch: None).wait(30)
+        self.assertEqual([missing], result["removed"])
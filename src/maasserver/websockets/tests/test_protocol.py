@@ -8,6 +8,7 @@ from collections import deque
 import json
 import random
 from unittest.mock import (
+    call,
     MagicMock,
     sentinel,
 )
@@ -40,6 +41,8 @@ from maastesting.matchers import (
     IsFiredDeferred,
     MockCalledOnceWith,
     MockCalledWith,
+    MockCallsMatch,
+    MockNotCalled,
 )
 from maastesting.testcase import MAASTestCase
 from maastesting.twisted import TwistedLoggerFixture
@@ -48,6 +51,7 @@ from provisioningserver.utils.twisted import synchronous
 from provisioningserver.utils.url import splithost
 from testtools.matchers import (
     Equals,
+    HasLength,
     Is,
 )
 from twisted.internet import defer
@@ -717,6 +721,42 @@ class TestWebSocketProtocol(MAASTransactionServerTestCase):
         self.expectThat(sent_obj["request_id"], Equals(request_id))
         self.expectThat(sent_obj["result"], Equals(seq + 1))
 
+    def test_handleRequest_streams_list(self):
+        protocol, factory = self.make_protocol()
+        protocol.user = sentinel.user
+
+        handler_class = MagicMock()
+        handler_name = maas_factory.make_name("handler")
+        handler_class._meta.handler_name = handler_name
+        handler = handler_class.return_value
+        batch = [{"id": 1}]
+        summary = {"count": 1, "since": "1.0", "removed": []}
+
+        def stream_list(params, send_batch):
+            send_batch(batch)
+            return succeed(summary)
+
+        handler.stream_list.side_effect = stream_list
+
+        # Inject mock handler into the factory.
+        factory.handlers[handler_name] = handler_class
+
+        d = protocol.handleRequest({
+            "type": MSG_TYPE.REQUEST,
+            "request_id": 1,
+            "method": "%s.list" % handler_name,
+            "stream": True,
+        })
+
+        self.assertThat(d, IsFiredDeferred())
+        self.assertThat(handler.execute, MockNotCalled())
+        final = self.get_written_transport_message(protocol)
+        partial = self.get_written_transport_message(protocol)
+        self.expectThat(partial["rtype"], Equals(RESPONSE_TYPE.PARTIAL))
+        self.expectThat(partial["result"], Equals(batch))
+        self.expectThat(final["rtype"], Equals(RESPONSE_TYPE.SUCCESS))
+        self.expectThat(final["result"], Equals(summary))
+
     def test_sendNotify_sends_correct_json(self):
         protocol, factory = self.make_protocol()
         name = maas_factory.make_name("name")
@@ -959,6 +999,54 @@ class TestWebSocketFactoryTransactional(
         self.assertThat(
             mock_sendNotify, MockCalledWith(name, action, data))
 
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_onNotifyBatch_calls_sendNotify_for_each_message(self):
+        user = yield deferToDatabase(self.make_user)
+        protocol, factory = self.make_protocol_with_factory(user=user)
+        name = maas_factory.make_name("name")
+        action = maas_factory.make_name("action")
+        mock_class = MagicMock()
+        mock_class.return_value.on_listen_batch.return_value = [
+            (name, action, sentinel.data1),
+            (name, action, sentinel.data2),
+        ]
+        mock_sendNotify = self.patch(protocol, "sendNotify")
+        yield factory.onNotifyBatch(
+            mock_class, sentinel.channel, action, [sentinel.id1, sentinel.id2])
+        self.assertThat(
+            mock_class.return_value.on_listen_batch,
+            MockCalledOnceWith(
+                sentinel.channel, action, [sentinel.id1, sentinel.id2]))
+        self.assertThat(
+            mock_sendNotify, MockCallsMatch(
+                call(name, action, sentinel.data1),
+                call(name, action, sentinel.data2)))
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test_onNotifyBatch_shares_dehydrated_cache_between_clients(self):
+        user = yield deferToDatabase(self.make_user)
+        protocol, factory = self.make_protocol_with_factory(user=user)
+        other_protocol, _ = self.make_protocol_with_factory(user=user)
+        factory.clients.append(other_protocol)
+        handlers = []
+
+        def build_handler(user, cache, request):
+            handler = MagicMock()
+            handler.on_listen_batch.return_value = []
+            handlers.append(handler)
+            return handler
+
+        handler_class = MagicMock(side_effect=build_handler)
+        handler_class._meta.handler_name = maas_factory.make_name("handler")
+        yield factory.onNotifyBatch(
+            handler_class, sentinel.channel, sentinel.action, [sentinel.id])
+        self.assertThat(handlers, HasLength(2))
+        self.assertEqual({}, handlers[0].dehydrated_cache)
+        self.assertIs(
+            handlers[0].dehydrated_cache, handlers[1].dehydrated_cache)
+
     @wait_for_reactor
     @inlineCallbacks
     def test_updateRackController_calls_onNotify_for_controller_update(self):
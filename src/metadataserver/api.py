@@ -63,6 +63,7 @@ from maasserver.models import (
     SSLKey,
 )
 from maasserver.models.event import Event
+from maasserver.models.eventtype import EventType
 from maasserver.models.tag import Tag
 from maasserver.models.timestampedmodel import now
 from maasserver.node_status import NODE_TESTING_RESET_READY_TRANSITIONS
@@ -189,33 +190,37 @@ def check_version(version):
         raise UnknownMetadataVersion("Unknown metadata version: %s" % version)
 
 
-def add_event_to_node_event_log(
-        node, origin, action, description, result=None, created=None):
-    """Add an entry to the node's event log."""
+def get_node_event_log_type(node, result=None):
+    """Return the type of event to log for `node` with the given `result`."""
     if node.status == NODE_STATUS.COMMISSIONING:
         if result in ['SUCCESS', None]:
-            type_name = EVENT_TYPES.NODE_COMMISSIONING_EVENT
+            return EVENT_TYPES.NODE_COMMISSIONING_EVENT
         else:
-            type_name = EVENT_TYPES.NODE_COMMISSIONING_EVENT_FAILED
+            return EVENT_TYPES.NODE_COMMISSIONING_EVENT_FAILED
     elif node.status == NODE_STATUS.DEPLOYING:
         if result in ['SUCCESS', None]:
-            type_name = EVENT_TYPES.NODE_INSTALL_EVENT
+            return EVENT_TYPES.NODE_INSTALL_EVENT
         else:
-            type_name = EVENT_TYPES.NODE_INSTALL_EVENT_FAILED
+            return EVENT_TYPES.NODE_INSTALL_EVENT_FAILED
     elif node.status == NODE_STATUS.DEPLOYED and result in ['FAIL']:
-        type_name = EVENT_TYPES.NODE_POST_INSTALL_EVENT_FAILED
+        return EVENT_TYPES.NODE_POST_INSTALL_EVENT_FAILED
     elif node.status == NODE_STATUS.ENTERING_RESCUE_MODE:
         if result in ['SUCCESS', None]:
-            type_name = EVENT_TYPES.NODE_ENTERING_RESCUE_MODE_EVENT
+            return EVENT_TYPES.NODE_ENTERING_RESCUE_MODE_EVENT
         else:
-            type_name = EVENT_TYPES.NODE_ENTERING_RESCUE_MODE_EVENT_FAILED
+            return EVENT_TYPES.NODE_ENTERING_RESCUE_MODE_EVENT_FAILED
     elif node.node_type in [
             NODE_TYPE.RACK_CONTROLLER,
             NODE_TYPE.REGION_AND_RACK_CONTROLLER]:
-        type_name = EVENT_TYPES.REQUEST_CONTROLLER_REFRESH
+        return EVENT_TYPES.REQUEST_CONTROLLER_REFRESH
     else:
-        type_name = EVENT_TYPES.NODE_STATUS_EVENT
+        return EVENT_TYPES.NODE_STATUS_EVENT
 
+
+def add_event_to_node_event_log(
+        node, origin, action, description, result=None, created=None):
+    """Add an entry to the node's event log."""
+    type_name = get_node_event_log_type(node, result)
     event_details = EVENT_DETAILS[type_name]
     return Event.objects.register_event_and_event_type(
         type_name, type_level=event_details.level,
@@ -225,6 +230,31 @@ def add_event_to_node_event_log(
         system_id=node.system_id, created=created)
 
 
+def add_events_to_node_event_log(node, events):
+    """Add several entries to the node's event log with a single query.
+
+    :param events: An iterable of ``(origin, action, description, result,
+        created)`` tuples, as would be passed to
+        `add_event_to_node_event_log`.
+    """
+    event_types = {}
+    entries = []
+    for origin, action, description, result, created in events:
+        type_name = get_node_event_log_type(node, result)
+        if type_name not in event_types:
+            event_details = EVENT_DETAILS[type_name]
+            event_types[type_name] = EventType.objects.register(
+                type_name, event_details.description, event_details.level)
+        if created is None:
+            created = now()
+        entries.append(Event(
+            type=event_types[type_name], node=node,
+            node_system_id=node.system_id, node_hostname=node.hostname,
+            action=action, description="'%s' %s" % (origin, description),
+            created=created, updated=created))
+    return Event.objects.bulk_create(entries)
+
+
 def process_file(
         results, script_set, script_name, content, request,
         default_exit_status=None):
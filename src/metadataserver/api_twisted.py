@@ -7,6 +7,7 @@ import base64
 import bz2
 from collections import defaultdict
 from datetime import datetime
+from itertools import groupby
 import json
 
 from maasserver.api.utils import extract_oauth_key_from_auth_header
@@ -29,6 +30,7 @@ from maasserver.utils.threads import deferToDatabase
 from metadataserver import logger
 from metadataserver.api import (
     add_event_to_node_event_log,
+    add_events_to_node_event_log,
     process_file,
 )
 from metadataserver.enum import SCRIPT_STATUS
@@ -221,9 +223,14 @@ def _create_pod_for_deployment(node):
 
 
 class StatusWorkerService(TimerService, object):
-    """Service to update nodes from recieved status messages."""
+    """Service to update nodes from recieved status messages.
 
-    check_interval = 60  # Every second.
+    Messages that change the state of a node are processed as they arrive;
+    the rest only need recording in the node's event log, so they are queued
+    and recorded in batches, one per node, every `check_interval` seconds.
+    """
+
+    check_interval = 5  # Every 5 seconds.
 
     def __init__(self, dbtasks, clock=reactor):
         # Call self._tryUpdateNodes() every self.check_interval.
@@ -232,10 +239,27 @@ class StatusWorkerService(TimerService, object):
         self.dbtasks = dbtasks
         self.clock = clock
         self.queue = defaultdict(list)
+        # The number of messages waiting in the queue. This is counted as
+        # messages are queued, in the reactor, so that it can be read from
+        # other threads without walking the queue as it changes.
+        self.queueDepth = 0
+        # When the oldest message in the queue was queued.
+        self.queueStarted = None
+
+    @property
+    def queueLag(self):
+        """The number of seconds the oldest queued message has waited."""
+        started = self.queueStarted
+        if started is None:
+            return 0
+        else:
+            return self.clock.seconds() - started
 
     def _tryUpdateNodes(self):
         if len(self.queue) != 0:
             queue, self.queue = self.queue, defaultdict(list)
+            self.queueDepth = 0
+            self.queueStarted = None
             d = deferToDatabase(self._preProcessQueue, queue)
             d.addCallback(self._processMessagesLater)
             d.addErrback(log.err, "Failed to process node status messages.")
@@ -273,18 +297,65 @@ class StatusWorkerService(TimerService, object):
                 "outside of a transaction.")
         else:
             # Here we're in a database thread, with a database connection.
-            for idx, message in enumerate(messages):
-                try:
-                    exists = self._processMessage(node, message)
-                    if not exists:
-                        # Node has been deleted no reason to continue saving
-                        # the events for this node.
-                        break
-                except:
-                    log.err(
-                        None,
-                        "Failed to process message "
-                        "for node: %s" % node.hostname)
+            # Consecutive messages that only need recording in the node's
+            # event log are recorded together; the rest are processed one
+            # at a time, in order.
+            for event_only, group in groupby(messages, self._isEventOnly):
+                if event_only:
+                    tasks = [(self._processEventMessages, list(group))]
+                else:
+                    tasks = [
+                        (self._processMessage, message)
+                        for message in group
+                    ]
+                for process, arg in tasks:
+                    try:
+                        exists = process(node, arg)
+                    except:
+                        log.err(
+                            None,
+                            "Failed to process message "
+                            "for node: %s" % node.hostname)
+                    else:
+                        if not exists:
+                            # Node has been deleted no reason to continue
+                            # saving the events for this node.
+                            return
+
+    def _isEventOnly(self, message):
+        """Whether `message` only needs recording in the node's event log.
+
+        Messages with files, the start or finish of top-level events, and
+        the start or finish of Curtin's early and late stages also change
+        the node and are processed with `_processMessage`.
+        """
+        if len(message.get('files', [])) > 0:
+            return False
+        elif message['event_type'] not in ['start', 'finish']:
+            return True
+        elif self._is_top_level(message['name']):
+            return False
+        else:
+            return not (
+                message['origin'] == 'curtin' and message['name'] in [
+                    'cmd-install/stage-early',
+                    'cmd-install/stage-late',
+                ])
+
+    @transactional
+    def _processEventMessages(self, node, messages):
+        # Validate that the node still exists since this is a new transaction.
+        try:
+            node = Node.objects.get(id=node.id)
+        except Node.DoesNotExist:
+            return False
+
+        add_events_to_node_event_log(node, (
+            (message['origin'], message['name'], message['description'],
+             message.get('result', None), message['timestamp'])
+            for message in messages
+        ))
+        return True
 
     @transactional
     def _processMessage(self, node, message):
@@ -502,4 +573,7 @@ class StatusWorkerService(TimerService, object):
                 log.err, "Failed to process status message instantly.")
             return d
         else:
+            if self.queueStarted is None:
+                self.queueStarted = self.clock.seconds()
             self.queue[authorization].append(message)
+            self.queueDepth += 1
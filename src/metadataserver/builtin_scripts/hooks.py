@@ -23,10 +23,12 @@ from maasserver.models.interface import (
     Interface,
     PhysicalInterface,
 )
+from maasserver.models.nodedevice import NodeDevice
 from maasserver.models.nodemetadata import NodeMetadata
 from maasserver.models.physicalblockdevice import PhysicalBlockDevice
 from maasserver.models.switch import Switch
 from maasserver.models.tag import Tag
+from maasserver.models.timestampedmodel import now
 from maasserver.utils.orm import get_one
 from metadataserver.enum import SCRIPT_STATUS
 from provisioningserver.refresh.node_info_scripts import (
@@ -262,12 +264,53 @@ def get_xml_field_value(evaluator, expression):
         return None
 
 
+def update_node_devices(node, evaluator):
+    """Record the PCI and USB devices found by ``lshw`` in `node`.
+
+    Any devices previously recorded for `node` are replaced.
+
+    :param evaluator: An `etree.XPathEvaluator` for the ``lshw`` XML.
+    """
+    # bulk_create() does not validate, so values that are too long for
+    # their columns are truncated here rather than failing the insert.
+    def truncate(field_name, value):
+        return value[:NodeDevice._meta.get_field(field_name).max_length]
+
+    devices = {}
+    created = now()
+    for device in evaluator(
+            "//node[starts-with(businfo, 'pci@') or "
+            "starts-with(businfo, 'usb@')]"):
+        bus, bus_address = device.findtext("businfo").split("@", 1)
+        bus_address = truncate("bus_address", bus_address)
+        if (bus, bus_address) in devices:
+            # Logical devices can share the bus address of their parent.
+            continue
+        driver = device.find("configuration/setting[@id='driver']")
+        devices[bus, bus_address] = NodeDevice(
+            node=node, bus=bus, bus_address=bus_address,
+            hardware_class=truncate(
+                "hardware_class", device.get("class", "")),
+            vendor_name=truncate(
+                "vendor_name", device.findtext("vendor", "")),
+            product_name=truncate(
+                "product_name", device.findtext("product", "")),
+            commissioning_driver=truncate(
+                "commissioning_driver",
+                "" if driver is None else driver.get("value", "")),
+            created=created, updated=created)
+    NodeDevice.objects.filter(node=node).delete()
+    if len(devices) > 0:
+        # Insert all the devices in one query.
+        NodeDevice.objects.bulk_create(devices.values())
+
+
 def update_hardware_details(node, output, exit_status):
     """Process the results of `LSHW_SCRIPT`.
 
     Updates `node.cpu_count`, `node.memory`, and `node.storage`
-    fields, and also evaluates all tag expressions against the given
-    ``lshw`` XML.
+    fields, records the node's PCI and USB devices, and also evaluates
+    all tag expressions against the given ``lshw`` XML.
 
     If `exit_status` is non-zero, this function returns without doing
     anything.
@@ -330,6 +373,8 @@ def update_hardware_details(node, output, exit_status):
                     node=node, key="mainboard_firmware_%s" % key,
                     defaults={'value': value})
 
+        update_node_devices(node, evaluator)
+
 
 def parse_cpuinfo(node, output, exit_status):
     """Parse the output of /proc/cpuinfo."""
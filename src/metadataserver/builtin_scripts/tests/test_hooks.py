@@ -15,11 +15,13 @@ from fixtures import FakeLogger
 from maasserver.enum import (
     INTERFACE_TYPE,
     IPADDRESS_TYPE,
+    NODE_DEVICE_BUS,
     NODE_METADATA,
 )
 from maasserver.fields import MAC
 from maasserver.models.blockdevice import MIN_BLOCK_DEVICE_SIZE
 from maasserver.models.interface import Interface
+from maasserver.models.nodedevice import NodeDevice
 from maasserver.models.nodemetadata import NodeMetadata
 from maasserver.models.physicalblockdevice import PhysicalBlockDevice
 from maasserver.models.switch import Switch
@@ -804,6 +806,84 @@ class TestUpdateHardwareDetails(MAASServerTestCase):
                 'mainboard_firmware_version', 'mainboard_firmware_date']:
             self.assertIsNone(NodeMetadata.objects.get(node=node, key=key))
 
+    def test_hardware_records_pci_and_usb_devices(self):
+        node = factory.make_Node()
+        xmlbytes = dedent("""\
+        <node>
+          <node id="pci" class="bridge">
+            <businfo>pci@0000:00:00.0</businfo>
+            <vendor>Intel Corporation</vendor>
+            <node id="network" class="network">
+              <product>82579LM Gigabit Network Connection</product>
+              <vendor>Intel Corporation</vendor>
+              <businfo>pci@0000:00:19.0</businfo>
+              <configuration>
+                <setting id="driver" value="e1000e" />
+              </configuration>
+            </node>
+            <node id="usb" class="bus">
+              <businfo>usb@1</businfo>
+              <node id="usb" class="input">
+                <product>Keyboard</product>
+                <businfo>usb@1:2</businfo>
+              </node>
+            </node>
+            <node id="scsi" class="storage">
+              <businfo>scsi@0:0.0.0</businfo>
+            </node>
+          </node>
+        </node>
+        """).encode()
+        update_hardware_details(node, xmlbytes, 0)
+        self.assertItemsEqual([
+            (NODE_DEVICE_BUS.PCI, "0000:00:00.0", "bridge",
+             "Intel Corporation", "", ""),
+            (NODE_DEVICE_BUS.PCI, "0000:00:19.0", "network",
+             "Intel Corporation", "82579LM Gigabit Network Connection",
+             "e1000e"),
+            (NODE_DEVICE_BUS.USB, "1", "bus", "", "", ""),
+            (NODE_DEVICE_BUS.USB, "1:2", "input", "", "Keyboard", ""),
+        ], NodeDevice.objects.filter(node=node).values_list(
+            "bus", "bus_address", "hardware_class", "vendor_name",
+            "product_name", "commissioning_driver"))
+
+    def test_hardware_truncates_long_device_details(self):
+        node = factory.make_Node()
+        vendor = factory.make_string(size=300)
+        product = factory.make_string(size=300)
+        xmlbytes = dedent("""\
+        <node>
+          <node id="network" class="network">
+            <businfo>pci@0000:00:19.0</businfo>
+            <vendor>%s</vendor>
+            <product>%s</product>
+          </node>
+        </node>
+        """ % (vendor, product)).encode()
+        update_hardware_details(node, xmlbytes, 0)
+        self.assertItemsEqual(
+            [(vendor[:256], product[:256])],
+            NodeDevice.objects.filter(node=node).values_list(
+                "vendor_name", "product_name"))
+
+    def test_hardware_replaces_devices(self):
+        node = factory.make_Node()
+        factory.make_NodeDevice(node=node, bus_address="0000:00:01.0")
+        other_device = factory.make_NodeDevice()
+        xmlbytes = dedent("""\
+        <node>
+          <node id="display" class="display">
+            <businfo>pci@0000:00:02.0</businfo>
+          </node>
+        </node>
+        """).encode()
+        update_hardware_details(node, xmlbytes, 0)
+        self.assertItemsEqual(
+            ["0000:00:02.0"],
+            NodeDevice.objects.filter(node=node).values_list(
+                "bus_address", flat=True))
+        self.assertIsNotNone(reload_object(other_device))
+
 
 class TestParseCPUInfo(MAASServerTestCase):
 
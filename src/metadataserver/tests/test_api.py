@@ -74,6 +74,7 @@ from maastesting.utils import sample_binary_data
 from metadataserver import api
 from metadataserver.api import (
     add_event_to_node_event_log,
+    add_events_to_node_event_log,
     check_version,
     get_node_for_mac,
     get_node_for_request,
@@ -252,6 +253,31 @@ class TestHelpers(MAASServerTestCase):
         self.assertEqual(
             EVENT_TYPES.REQUEST_CONTROLLER_REFRESH, event.type.name)
 
+    def test_add_events_to_node_event_log(self):
+        node = factory.make_Node(status=NODE_STATUS.DEPLOYING)
+        created = datetime(2018, 1, 1)
+        events = [
+            (factory.make_name('origin'), factory.make_name('action'),
+             factory.make_name('description'), result, created)
+            for result in [None, 'SUCCESS', 'FAILURE']
+        ]
+        add_events_to_node_event_log(node, events)
+        logged = Event.objects.filter(node=node).order_by('id')
+
+        self.assertEqual(
+            [(action, "'%s' %s" % (origin, description))
+             for origin, action, description, _, _ in events],
+            [(event.action, event.description) for event in logged])
+        self.assertEqual(
+            [EVENT_TYPES.NODE_INSTALL_EVENT,
+             EVENT_TYPES.NODE_INSTALL_EVENT,
+             EVENT_TYPES.NODE_INSTALL_EVENT_FAILED],
+            [event.type.name for event in logged])
+        self.assertEqual(
+            [(node.system_id, node.hostname, created)] * 3,
+            [(event.node_system_id, event.node_hostname, event.created)
+             for event in logged])
+
     def test_process_file_creates_new_entry_for_output(self):
         results = {}
         script_result = factory.make_ScriptResult(status=SCRIPT_STATUS.RUNNING)
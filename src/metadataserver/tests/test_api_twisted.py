@@ -49,6 +49,7 @@ from maastesting.matchers import (
     MockNotCalled,
 )
 from maastesting.testcase import MAASTestCase
+from maastesting.twisted import TwistedLoggerFixture
 from metadataserver import (
     api,
     api_twisted as api_twisted_module,
@@ -72,9 +73,11 @@ from testtools.matchers import (
     MatchesSetwise,
 )
 from twisted.internet.defer import (
+    Deferred,
     inlineCallbacks,
     succeed,
 )
+from twisted.internet.task import Clock
 from twisted.web.server import NOT_DONE_YET
 from twisted.web.test.requesthelper import DummyRequest
 
@@ -204,7 +207,7 @@ class TestStatusWorkerServiceTransactional(MAASTransactionServerTestCase):
         worker = StatusWorkerService(sentinel.dbtasks, clock=sentinel.reactor)
         self.assertEqual(sentinel.dbtasks, worker.dbtasks)
         self.assertEqual(sentinel.reactor, worker.clock)
-        self.assertEqual(60, worker.step)
+        self.assertEqual(5, worker.step)
         self.assertEqual((worker._tryUpdateNodes, tuple(), {}), worker.call)
 
     def test__tryUpdateNodes_returns_None_when_empty_queue(self):
@@ -256,32 +259,171 @@ class TestStatusWorkerServiceTransactional(MAASTransactionServerTestCase):
                 transactional(worker._processMessageNow),
                 sentinel.node, sentinel.message)
 
+    def make_finish_message(self):
+        message = self.make_message()
+        message['event_type'] = 'finish'
+        return message
+
+    def make_progress_message(self):
+        message = self.make_message()
+        message['event_type'] = 'progress'
+        return message
+
     @wait_for_reactor
     @inlineCallbacks
     def test__processMessages_doesnt_call_when_node_deleted(self):
         worker = StatusWorkerService(sentinel.dbtasks)
         mock_processMessage = self.patch(worker, "_processMessage")
         mock_processMessage.return_value = False
+        mock_processEventMessages = self.patch(
+            worker, "_processEventMessages")
+        message1 = self.make_finish_message()
+        message2 = self.make_progress_message()
         yield deferToDatabase(
-            worker._processMessages, sentinel.node,
-            [sentinel.message1, sentinel.message2])
+            worker._processMessages, sentinel.node, [message1, message2])
         self.assertThat(
             mock_processMessage,
-            MockCalledOnceWith(sentinel.node, sentinel.message1))
+            MockCalledOnceWith(sentinel.node, message1))
+        self.assertThat(mock_processEventMessages, MockNotCalled())
 
     @wait_for_reactor
     @inlineCallbacks
     def test__processMessages_calls_processMessage(self):
         worker = StatusWorkerService(sentinel.dbtasks)
         mock_processMessage = self.patch(worker, "_processMessage")
+        message1 = self.make_finish_message()
+        message2 = self.make_finish_message()
         yield deferToDatabase(
-            worker._processMessages, sentinel.node,
-            [sentinel.message1, sentinel.message2])
+            worker._processMessages, sentinel.node, [message1, message2])
         self.assertThat(
             mock_processMessage,
             MockCallsMatch(
-                call(sentinel.node, sentinel.message1),
-                call(sentinel.node, sentinel.message2)))
+                call(sentinel.node, message1),
+                call(sentinel.node, message2)))
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test__processMessages_batches_event_only_messages(self):
+        worker = StatusWorkerService(sentinel.dbtasks)
+        calls = []
+        self.patch(worker, "_processMessage").side_effect = (
+            lambda node, message: calls.append(message) or True)
+        self.patch(worker, "_processEventMessages").side_effect = (
+            lambda node, messages: calls.append(messages) or True)
+        progress1 = self.make_progress_message()
+        progress2 = self.make_progress_message()
+        finish = self.make_finish_message()
+        progress3 = self.make_progress_message()
+        yield deferToDatabase(
+            worker._processMessages, sentinel.node,
+            [progress1, progress2, finish, progress3])
+        self.assertEqual(
+            [[progress1, progress2], finish, [progress3]], calls)
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test__processMessages_continues_after_failure(self):
+        worker = StatusWorkerService(sentinel.dbtasks)
+        self.patch(worker, "_processMessage").side_effect = (
+            factory.make_exception())
+        mock_processEventMessages = self.patch(
+            worker, "_processEventMessages")
+        message1 = self.make_finish_message()
+        message2 = self.make_progress_message()
+        with TwistedLoggerFixture() as logger:
+            yield deferToDatabase(
+                worker._processMessages, sentinel.node, [message1, message2])
+        self.assertThat(
+            mock_processEventMessages,
+            MockCalledOnceWith(sentinel.node, [message2]))
+        self.assertThat(logger.output, DocTestMatches(
+            "Failed to process message for node: ..."))
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test__processEventMessages_records_events(self):
+        nodes_with_tokens = yield deferToDatabase(self.make_nodes_with_tokens)
+        node, _ = nodes_with_tokens[0]
+        worker = StatusWorkerService(sentinel.dbtasks)
+        messages = [self.make_progress_message() for _ in range(3)]
+        for message in messages:
+            message['timestamp'] = datetime.utcfromtimestamp(
+                message['timestamp'])
+        exists = yield deferToDatabase(
+            worker._processEventMessages, node, messages)
+        self.assertTrue(exists)
+        descriptions = yield deferToDatabase(
+            transactional(lambda: list(
+                Event.objects.filter(node=node).order_by('id').values_list(
+                    'description', flat=True))))
+        self.assertEqual([
+            "'%s' %s" % (message['origin'], message['description'])
+            for message in messages
+        ], descriptions)
+
+    @wait_for_reactor
+    @inlineCallbacks
+    def test__processEventMessages_returns_false_when_node_deleted(self):
+        nodes_with_tokens = yield deferToDatabase(self.make_nodes_with_tokens)
+        node, _ = nodes_with_tokens[0]
+        yield deferToDatabase(transactional(node.delete))
+        worker = StatusWorkerService(sentinel.dbtasks)
+        exists = yield deferToDatabase(
+            worker._processEventMessages, node,
+            [self.make_progress_message()])
+        self.assertFalse(exists)
+
+    def test__isEventOnly(self):
+        worker = StatusWorkerService(sentinel.dbtasks)
+        message = self.make_progress_message()
+        self.assertTrue(worker._isEventOnly(message))
+        message['name'] = 'cmd-install/stage-partitioning'
+        message['event_type'] = 'finish'
+        self.assertTrue(worker._isEventOnly(message))
+
+    def test__isEventOnly_false_for_top_level_start_or_finish(self):
+        worker = StatusWorkerService(sentinel.dbtasks)
+        message = self.make_message()
+        message['event_type'] = random.choice(['start', 'finish'])
+        self.assertFalse(worker._isEventOnly(message))
+
+    def test__isEventOnly_false_for_curtin_stages(self):
+        worker = StatusWorkerService(sentinel.dbtasks)
+        message = self.make_message()
+        message['origin'] = 'curtin'
+        message['name'] = random.choice([
+            'cmd-install/stage-early', 'cmd-install/stage-late'])
+        message['event_type'] = random.choice(['start', 'finish'])
+        self.assertFalse(worker._isEventOnly(message))
+
+    def test__isEventOnly_false_with_files(self):
+        worker = StatusWorkerService(sentinel.dbtasks)
+        message = self.make_progress_message()
+        message['files'] = [{"path": "sample.txt"}]
+        self.assertFalse(worker._isEventOnly(message))
+
+    def test__queueDepth_and_queueLag(self):
+        clock = Clock()
+        worker = StatusWorkerService(sentinel.dbtasks, clock=clock)
+        self.assertEqual((0, 0), (worker.queueDepth, worker.queueLag))
+        worker.queueMessage(
+            factory.make_name("key"), self.make_progress_message())
+        clock.advance(3)
+        worker.queueMessage(
+            factory.make_name("key"), self.make_progress_message())
+        clock.advance(2)
+        self.assertEqual((2, 5), (worker.queueDepth, worker.queueLag))
+
+    def test__queueDepth_and_queueLag_reset_when_queue_taken(self):
+        clock = Clock()
+        worker = StatusWorkerService(sentinel.dbtasks, clock=clock)
+        self.patch(api_twisted_module, "deferToDatabase").return_value = (
+            Deferred())
+        worker.queueMessage(
+            factory.make_name("key"), self.make_progress_message())
+        clock.advance(3)
+        worker._tryUpdateNodes()
+        self.assertEqual((0, 0), (worker.queueDepth, worker.queueLag))
 
     @wait_for_reactor
     @inlineCallbacks
@@ -792,6 +792,12 @@ class ClusterConfiguration(Configuration, metaclass=ClusterConfigurationMeta):
         "cluster_uuid", "The UUID for this cluster controller",
         UUIDString(if_missing=UUID_NOT_SET))
 
+    # Power monitoring options.
+    power_query_concurrency = ConfigurationOption(
+        "power_query_concurrency",
+        "The number of nodes of each power type to query at the same time.",
+        Number(min=1, if_missing=5))
+
     # Debug options.
     debug = ConfigurationOption(
         "debug", "Enable debug mode for detailed error and log reporting.",
@@ -0,0 +1,406 @@
+# Copyright 2018 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Native client for the ISC DHCP server's OMAPI protocol.
+
+`omshell` needs a new process for every host map that is changed. This
+speaks the OMAPI wire protocol directly over a single authenticated
+connection, so that a whole set of host map changes can be sent to the
+DHCP server as a pipelined batch.
+"""
+
+__all__ = [
+    "OmapiClient",
+    "OmapiError",
+    "OmapiResult",
+]
+
+import base64
+from collections import namedtuple
+import hmac
+import socket
+import struct
+
+from netaddr import (
+    EUI,
+    IPAddress,
+)
+from provisioningserver.logger import LegacyLogger
+
+
+log = LegacyLogger()
+
+
+OMAPI_PROTOCOL_VERSION = 100
+OMAPI_HEADER_SIZE = 24
+
+OMAPI_OP_OPEN = 1
+OMAPI_OP_UPDATE = 3
+OMAPI_OP_STATUS = 5
+OMAPI_OP_DELETE = 6
+
+# Result codes from ISC's libisc that the host map operations care about.
+ISC_R_SUCCESS = 0
+ISC_R_EXISTS = 18
+ISC_R_NOTFOUND = 23
+
+
+class OmapiError(Exception):
+    """The DHCP server sent something that could not be understood."""
+
+
+# The outcome of one host map operation in a batch. `action` is one of
+# "remove", "create" or "modify"; `error` is None when it succeeded.
+OmapiResult = namedtuple("OmapiResult", ("action", "mac", "ip", "error"))
+
+
+def _pack_uint32(value):
+    return struct.pack("!I", value)
+
+
+def _host_name(mac):
+    """Return the OMAPI host object name used by MAAS for `mac`.
+
+    The name is not a host name; it is an identifier used within the DHCP
+    server. MAAS uses the MAC address so that all the NICs of a bond can be
+    given the same IP address.
+    """
+    return mac.replace(":", "-").encode("ascii")
+
+
+class OmapiMessage:
+    """A single OMAPI message.
+
+    `message` and `obj` are lists of ``(name, value)`` pairs, both `bytes`,
+    in the order in which they are put on the wire.
+    """
+
+    def __init__(self, opcode, handle=0, message=(), obj=()):
+        self.authid = 0
+        self.signature = b""
+        self.opcode = opcode
+        self.handle = handle
+        self.tid = 0
+        self.rid = 0
+        self.message = list(message)
+        self.obj = list(obj)
+
+    @staticmethod
+    def _pack_values(values):
+        parts = []
+        for name, value in values:
+            parts.append(struct.pack("!H", len(name)))
+            parts.append(name)
+            parts.append(_pack_uint32(len(value)))
+            parts.append(value)
+        parts.append(struct.pack("!H", 0))
+        return b"".join(parts)
+
+    def _pack(self, forsigning=False):
+        # The signature covers everything except the authid and the
+        # signature itself.
+        header = struct.pack(
+            "!IIIII", len(self.signature), self.opcode, self.handle,
+            self.tid, self.rid)
+        body = self._pack_values(self.message) + self._pack_values(self.obj)
+        if forsigning:
+            return header + body
+        else:
+            return _pack_uint32(self.authid) + header + body + self.signature
+
+    def sign(self, authenticator):
+        """Sign this message with `authenticator`."""
+        self.authid = authenticator.authid
+        self.signature = b"\0" * authenticator.authlen
+        self.signature = authenticator.sign(self._pack(forsigning=True))
+
+    def verify(self, authenticator):
+        """Return whether this message was signed by `authenticator`."""
+        signature = authenticator.sign(self._pack(forsigning=True))
+        return hmac.compare_digest(signature, self.signature)
+
+    def to_bytes(self):
+        return self._pack()
+
+    def get_message(self, name, default=None):
+        return dict(self.message).get(name, default)
+
+    @property
+    def result(self):
+        """The ISC result code carried by a status message."""
+        if self.opcode != OMAPI_OP_STATUS:
+            return ISC_R_SUCCESS
+        result = self.get_message(b"result")
+        if result is None or len(result) != 4:
+            return ISC_R_SUCCESS
+        return struct.unpack("!I", result)[0]
+
+    @property
+    def error(self):
+        """A description of why this message reports a failure, or None."""
+        if self.opcode == OMAPI_OP_UPDATE:
+            return None
+        elif self.opcode == OMAPI_OP_STATUS:
+            result = self.result
+            if result == ISC_R_SUCCESS:
+                return None
+            text = self.get_message(b"message")
+            if text:
+                return text.decode("utf-8", "replace")
+            else:
+                return "result code %d" % result
+        else:
+            return "unexpected opcode %d" % self.opcode
+
+    @classmethod
+    def open_host(cls, obj, create=False):
+        message = [(b"type", b"host")]
+        if create:
+            message.append((b"create", _pack_uint32(1)))
+            message.append((b"exclusive", _pack_uint32(1)))
+        return cls(OMAPI_OP_OPEN, message=message, obj=obj)
+
+
+class HMACMD5Authenticator:
+    """Sign OMAPI messages with the key shared with the DHCP server."""
+
+    algorithm = b"hmac-md5.SIG-ALG.REG.INT."
+    authlen = 16
+
+    def __init__(self, name, secret):
+        self.name = name.encode("ascii")
+        self.key = base64.b64decode(secret)
+        self.authid = 0
+
+    def sign(self, data):
+        return hmac.new(self.key, data, "md5").digest()
+
+
+class OmapiClient:
+    """A persistent, authenticated OMAPI connection to a DHCP server.
+
+    :param server_address: The address for the DHCP server.
+    :param shared_key: The HMAC-MD5 key configured as ``omapi-key`` in the
+        DHCP server's configuration.
+    :param ipv6: Whether to talk to the DHCPv6 server.
+    :param batch_size: The most messages that are sent before waiting for
+        their responses.
+    """
+
+    def __init__(
+            self, server_address, shared_key, ipv6=False,
+            key_name="omapi_key", timeout=30, batch_size=500):
+        self.server_address = server_address
+        self.shared_key = shared_key
+        self.ipv6 = ipv6
+        if ipv6 is True:
+            self.server_port = 7912
+        else:
+            self.server_port = 7911
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self._authenticator = HMACMD5Authenticator(key_name, shared_key)
+        self._socket = None
+        self._stream = None
+        self._next_tid = 1
+
+    @property
+    def connected(self):
+        return self._socket is not None
+
+    def connect(self):
+        """Connect to the DHCP server and authenticate."""
+        self.close()
+        sock = socket.create_connection(
+            (self.server_address, self.server_port), timeout=self.timeout)
+        self._socket = sock
+        self._stream = sock.makefile("rb")
+        try:
+            sock.sendall(struct.pack(
+                "!II", OMAPI_PROTOCOL_VERSION, OMAPI_HEADER_SIZE))
+            version, header_size = struct.unpack("!II", self._read(8))
+            if version != OMAPI_PROTOCOL_VERSION:
+                raise OmapiError(
+                    "Unsupported OMAPI protocol version %d." % version)
+            if header_size < OMAPI_HEADER_SIZE:
+                raise OmapiError(
+                    "Unsupported OMAPI header size %d." % header_size)
+            self._authenticator.authid = 0
+            [response] = self._exchange([OmapiMessage(
+                OMAPI_OP_OPEN, message=[(b"type", b"authenticator")],
+                obj=[
+                    (b"name", self._authenticator.name),
+                    (b"algorithm", self._authenticator.algorithm),
+                ])], sign=False)
+            if response.opcode != OMAPI_OP_UPDATE:
+                raise OmapiError(
+                    "OMAPI authentication failed: %s" % response.error)
+            self._authenticator.authid = response.handle
+        except:
+            self.close()
+            raise
+
+    def close(self):
+        """Close the connection to the DHCP server, if open."""
+        if self._socket is not None:
+            self._stream.close()
+            self._socket.close()
+            self._socket = None
+            self._stream = None
+
+    def _read(self, size):
+        data = self._stream.read(size)
+        if len(data) != size:
+            raise ConnectionError("OMAPI connection closed by server.")
+        return data
+
+    def _read_values(self):
+        values = []
+        while True:
+            [name_length] = struct.unpack("!H", self._read(2))
+            if name_length == 0:
+                return values
+            name = self._read(name_length)
+            [value_length] = struct.unpack("!I", self._read(4))
+            values.append((name, self._read(value_length)))
+
+    def _receive(self):
+        message = OmapiMessage(0)
+        (message.authid, authlen, message.opcode, message.handle,
+         message.tid, message.rid) = struct.unpack(
+            "!IIIIII", self._read(OMAPI_HEADER_SIZE))
+        message.message = self._read_values()
+        message.obj = self._read_values()
+        message.signature = self._read(authlen)
+        if message.authid != 0:
+            if message.authid != self._authenticator.authid:
+                raise OmapiError(
+                    "OMAPI response signed with unknown key %d." % (
+                        message.authid))
+            if not message.verify(self._authenticator):
+                raise OmapiError("OMAPI response has a bad signature.")
+        return message
+
+    def _exchange(self, messages, sign=True):
+        """Send `messages` and return their responses, in the same order.
+
+        The messages are written to the server without waiting for each
+        response, at most `batch_size` at a time. The DHCP server handles
+        the messages on a connection in the order they were sent.
+        """
+        responses = []
+        for start in range(0, len(messages), self.batch_size):
+            batch = messages[start:start + self.batch_size]
+            for message in batch:
+                message.tid = self._next_tid
+                self._next_tid = (self._next_tid % 0xFFFFFFFF) + 1
+                if sign:
+                    message.sign(self._authenticator)
+            self._socket.sendall(
+                b"".join(message.to_bytes() for message in batch))
+            received = {}
+            for _ in batch:
+                response = self._receive()
+                received[response.rid] = response
+            try:
+                responses.extend(received[message.tid] for message in batch)
+            except KeyError as error:
+                raise OmapiError(
+                    "No OMAPI response for transaction %d." % error.args[0])
+        return responses
+
+    def update_hosts(self, remove=(), add=(), modify=()):
+        """Apply a set of host map changes to the DHCP server.
+
+        Every change is attempted; a failure of one host does not stop the
+        rest of the batch. The removals are applied first, then the
+        additions and lastly the modifications.
+
+        A connection that was left open by an earlier call is re-opened
+        and the batch applied again if it turns out to have been closed by
+        the server, e.g. because the DHCP server was restarted. Applying a
+        batch again is harmless.
+
+        :param remove: MAC addresses of the host maps to remove.
+        :param add: ``(mac, ip)`` pairs of host maps to create.
+        :param modify: ``(mac, ip)`` pairs of host maps to modify.
+        :return: A list of `OmapiResult`, one for every change.
+        :raise OSError: When the DHCP server cannot be reached.
+        """
+        remove, add, modify = list(remove), list(add), list(modify)
+        if self.connected:
+            try:
+                return self._update_hosts(remove, add, modify)
+            except OSError as error:
+                log.debug(
+                    "OMAPI connection lost ({error}); reconnecting.",
+                    error=error)
+            except:
+                self.close()
+                raise
+        self.connect()
+        try:
+            return self._update_hosts(remove, add, modify)
+        except:
+            self.close()
+            raise
+
+    def _host_obj(self, mac, ip):
+        return [
+            (b"ip-address", IPAddress(ip).packed),
+            (b"hardware-address", EUI(mac).packed),
+            (b"hardware-type", _pack_uint32(1)),
+        ]
+
+    def _update_hosts(self, remove, add, modify):
+        # Removing or modifying a host map needs a handle to it, so first
+        # open all of them in one go.
+        opened = self._exchange([
+            OmapiMessage.open_host([(b"name", _host_name(mac))])
+            for mac in remove
+        ] + [
+            OmapiMessage.open_host([(b"name", _host_name(mac))])
+            for mac, _ in modify
+        ])
+        opened_remove = opened[:len(remove)]
+        opened_modify = opened[len(remove):]
+
+        # Then send the deletes, creates, and updates as a single pipeline.
+        results = [None] * (len(remove) + len(add) + len(modify))
+        pending, messages = [], []
+        for index, (mac, response) in enumerate(zip(remove, opened_remove)):
+            if response.opcode == OMAPI_OP_UPDATE:
+                pending.append((index, "remove", mac, None))
+                messages.append(OmapiMessage(
+                    OMAPI_OP_DELETE, handle=response.handle))
+            elif response.result == ISC_R_NOTFOUND:
+                # It was already removed. Consider success.
+                results[index] = OmapiResult("remove", mac, None, None)
+            else:
+                results[index] = OmapiResult(
+                    "remove", mac, None, response.error)
+        for index, (mac, ip) in enumerate(add, len(remove)):
+            pending.append((index, "create", mac, ip))
+            messages.append(OmapiMessage.open_host(
+                [(b"name", _host_name(mac))] + self._host_obj(mac, ip),
+                create=True))
+        modify_start = len(remove) + len(add)
+        for index, ((mac, ip), response) in enumerate(
+                zip(modify, opened_modify), modify_start):
+            if response.opcode == OMAPI_OP_UPDATE:
+                pending.append((index, "modify", mac, ip))
+                messages.append(OmapiMessage(
+                    OMAPI_OP_UPDATE, handle=response.handle,
+                    obj=self._host_obj(mac, ip)))
+            else:
+                results[index] = OmapiResult(
+                    "modify", mac, ip, response.error)
+
+        for (index, action, mac, ip), response in zip(
+                pending, self._exchange(messages)):
+            error = response.error
+            if action == "create" and response.result == ISC_R_EXISTS:
+                # Host map already existed. Treat as success.
+                error = None
+            results[index] = OmapiResult(action, mac, ip, error)
+        return results
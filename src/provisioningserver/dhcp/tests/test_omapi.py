@@ -0,0 +1,238 @@
+# Copyright 2018 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Tests for the omapi.py file."""
+
+__all__ = []
+
+import base64
+import socket
+import struct
+import threading
+
+from maastesting.factory import factory
+from maastesting.testcase import MAASTestCase
+from provisioningserver.dhcp import omapi
+from provisioningserver.dhcp.omapi import (
+    HMACMD5Authenticator,
+    OMAPI_OP_DELETE,
+    OMAPI_OP_OPEN,
+    OMAPI_OP_STATUS,
+    OMAPI_OP_UPDATE,
+    OmapiClient,
+    OmapiError,
+    OmapiMessage,
+    OmapiResult,
+)
+from testtools.matchers import MatchesStructure
+
+
+def make_shared_key():
+    return base64.b64encode(factory.make_bytes()).decode("ascii")
+
+
+def make_status(result, text=None):
+    message = [(b"result", struct.pack("!I", result))]
+    if text is not None:
+        message.append((b"message", text.encode("ascii")))
+    return OmapiMessage(OMAPI_OP_STATUS, message=message)
+
+
+class FakeOmapiServer:
+    """A DHCP server that understands just enough OMAPI for host maps.
+
+    It handles one connection at a time, in a thread, and records every
+    message it receives in `received`.
+    """
+
+    def __init__(self, shared_key, hosts=()):
+        self.authenticator = HMACMD5Authenticator("omapi_key", shared_key)
+        self.authenticator.authid = 1
+        self.hosts = {name: handle for handle, name in enumerate(hosts, 2)}
+        self.received = []
+        self.listener = socket.socket()
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen(1)
+        self.port = self.listener.getsockname()[1]
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.listener.fileno() != -1:
+            self.listener.shutdown(socket.SHUT_RDWR)
+            self.listener.close()
+
+    def serve(self):
+        while True:
+            try:
+                connection, _ = self.listener.accept()
+            except OSError:
+                return
+            with connection:
+                self.serve_connection(connection)
+
+    def serve_connection(self, connection):
+        # Reuse the client's parsing code for the server side.
+        reader = OmapiClient.__new__(OmapiClient)
+        reader._stream = connection.makefile("rb")
+        reader._authenticator = self.authenticator
+        try:
+            connection.sendall(reader._read(8))
+            while True:
+                request = reader._receive()
+                self.received.append(request)
+                response = self.respond(request)
+                response.rid = request.tid
+                if request.authid != 0:
+                    response.sign(self.authenticator)
+                connection.sendall(response.to_bytes())
+        except (OSError, OmapiError):
+            pass
+        finally:
+            reader._stream.close()
+
+    def respond(self, request):
+        message, obj = dict(request.message), dict(request.obj)
+        if request.opcode == OMAPI_OP_OPEN:
+            if message[b"type"] == b"authenticator":
+                return OmapiMessage(OMAPI_OP_UPDATE, handle=1)
+            name = obj[b"name"]
+            if b"create" in message:
+                if name in self.hosts:
+                    return make_status(omapi.ISC_R_EXISTS)
+                self.hosts[name] = max(self.hosts.values(), default=1) + 1
+            elif name not in self.hosts:
+                return make_status(omapi.ISC_R_NOTFOUND, "not found")
+            return OmapiMessage(OMAPI_OP_UPDATE, handle=self.hosts[name])
+        elif request.opcode == OMAPI_OP_DELETE:
+            for name, handle in list(self.hosts.items()):
+                if handle == request.handle:
+                    del self.hosts[name]
+            return make_status(omapi.ISC_R_SUCCESS)
+        else:
+            return OmapiMessage(OMAPI_OP_UPDATE, handle=request.handle)
+
+
+class TestOmapiMessage(MAASTestCase):
+
+    def test_sign_and_verify(self):
+        authenticator = HMACMD5Authenticator("omapi_key", make_shared_key())
+        authenticator.authid = 1
+        message = OmapiMessage.open_host([(b"name", b"aa-bb")])
+        message.sign(authenticator)
+        self.assertEqual(16, len(message.signature))
+        self.assertTrue(message.verify(authenticator))
+        message.obj.append((b"ip-address", b"\x0a\x00\x00\x01"))
+        self.assertFalse(message.verify(authenticator))
+
+    def test_error_for_status(self):
+        self.assertIsNone(make_status(omapi.ISC_R_SUCCESS).error)
+        self.assertEqual(
+            "not found", make_status(omapi.ISC_R_NOTFOUND, "not found").error)
+        self.assertEqual(
+            "result code 18", make_status(omapi.ISC_R_EXISTS).error)
+
+    def test_error_for_update(self):
+        self.assertIsNone(OmapiMessage(OMAPI_OP_UPDATE).error)
+
+
+class TestOmapiClient(MAASTestCase):
+
+    scenarios = (
+        ("IPv4", {
+            "ipv6": False,
+            "port": 7911,
+        }),
+        ("IPv6", {
+            "ipv6": True,
+            "port": 7912,
+        }),
+    )
+
+    def make_client(self, hosts=()):
+        shared_key = make_shared_key()
+        server = FakeOmapiServer(shared_key, hosts)
+        self.addCleanup(server.stop)
+        client = OmapiClient("127.0.0.1", shared_key, ipv6=self.ipv6)
+        client.server_port = server.port
+        self.addCleanup(client.close)
+        return server, client
+
+    def test_initialisation(self):
+        shared_key = make_shared_key()
+        client = OmapiClient("127.0.0.1", shared_key, ipv6=self.ipv6)
+        self.assertThat(client, MatchesStructure.byEquality(
+            server_address="127.0.0.1", shared_key=shared_key,
+            server_port=self.port, connected=False))
+
+    def test_update_hosts_applies_batch(self):
+        removed_mac = factory.make_mac_address()
+        modified_mac = factory.make_mac_address()
+        server, client = self.make_client(hosts=[
+            removed_mac.replace(":", "-").encode("ascii"),
+            modified_mac.replace(":", "-").encode("ascii"),
+        ])
+        added_mac = factory.make_mac_address()
+        ip = factory.make_ip_address(ipv6=self.ipv6)
+        results = client.update_hosts(
+            remove=[removed_mac], add=[(added_mac, ip)],
+            modify=[(modified_mac, ip)])
+        self.assertEqual([
+            OmapiResult("remove", removed_mac, None, None),
+            OmapiResult("create", added_mac, ip, None),
+            OmapiResult("modify", modified_mac, ip, None),
+        ], results)
+        self.assertEqual({
+            added_mac.replace(":", "-").encode("ascii"),
+            modified_mac.replace(":", "-").encode("ascii"),
+        }, set(server.hosts))
+        # All but the authentication message were signed.
+        self.assertEqual(
+            [0] + [1] * (len(server.received) - 1),
+            [message.authid for message in server.received])
+
+    def test_update_hosts_treats_missing_and_existing_as_success(self):
+        existing_mac = factory.make_mac_address()
+        _, client = self.make_client(hosts=[
+            existing_mac.replace(":", "-").encode("ascii"),
+        ])
+        missing_mac = factory.make_mac_address()
+        ip = factory.make_ip_address(ipv6=self.ipv6)
+        results = client.update_hosts(
+            remove=[missing_mac], add=[(existing_mac, ip)])
+        self.assertEqual([
+            OmapiResult("remove", missing_mac, None, None),
+            OmapiResult("create", existing_mac, ip, None),
+        ], results)
+
+    def test_update_hosts_reports_failures_per_host(self):
+        _, client = self.make_client()
+        missing_mac = factory.make_mac_address()
+        ip = factory.make_ip_address(ipv6=self.ipv6)
+        results = client.update_hosts(modify=[(missing_mac, ip)])
+        self.assertEqual(
+            [OmapiResult("modify", missing_mac, ip, "not found")], results)
+
+    def test_update_hosts_reuses_connection(self):
+        _, client = self.make_client()
+        client.update_hosts()
+        connection = client._socket
+        client.update_hosts()
+        self.assertIs(connection, client._socket)
+
+    def test_update_hosts_reconnects_when_connection_lost(self):
+        server, client = self.make_client()
+        client.update_hosts()
+        # Closing the connection from the client side makes the next batch
+        # fail on the old socket.
+        client._socket.shutdown(socket.SHUT_RDWR)
+        mac = factory.make_mac_address()
+        ip = factory.make_ip_address(ipv6=self.ipv6)
+        results = client.update_hosts(add=[(mac, ip)])
+        self.assertEqual([OmapiResult("create", mac, ip, None)], results)
+
+    def test_update_hosts_raises_when_server_unreachable(self):
+        server, client = self.make_client()
+        server.stop()
+        self.assertRaises(OSError, client.update_hosts)
+        self.assertFalse(client.connected)
@@ -17,6 +17,7 @@ from netaddr import (
     IPNetwork,
     IPRange,
 )
+from provisioningserver.dns import zoneconfig
 from provisioningserver.dns.config import get_dns_config_dir
 from provisioningserver.dns.testing import patch_dns_config_path
 from provisioningserver.dns.zoneconfig import (
@@ -289,6 +290,53 @@ class TestDNSForwardZoneConfig(MAASTestCase):
         filepath = FilePath(dns_zone_config.zone_info[0].target_path)
         self.assertTrue(filepath.getPermissions().other.read)
 
+    def test_get_fingerprint_ignores_serial(self):
+        domain = factory.make_string()
+        mapping = {
+            factory.make_name('host'): HostnameIPMapping(
+                None, 30, {factory.make_ipv4_address()}),
+        }
+        self.assertEqual(
+            DNSForwardZoneConfig(
+                domain, serial=1, mapping=mapping).get_fingerprint(),
+            DNSForwardZoneConfig(
+                domain, serial=2, mapping=mapping).get_fingerprint())
+
+    def test_get_fingerprint_changes_with_mapping(self):
+        domain = factory.make_string()
+        hostname = factory.make_name('host')
+        self.assertNotEqual(
+            DNSForwardZoneConfig(domain, serial=1, mapping={
+                hostname: HostnameIPMapping(
+                    None, 30, {factory.make_ipv4_address()}),
+            }).get_fingerprint(),
+            DNSForwardZoneConfig(domain, serial=1, mapping={
+                hostname: HostnameIPMapping(
+                    None, 30, {factory.make_ipv6_address()}),
+            }).get_fingerprint())
+
+    def test_get_fingerprint_ignores_order_of_addresses(self):
+        domain = factory.make_string()
+        hostname = factory.make_name('host')
+        ips = [factory.make_ipv4_address() for _ in range(10)]
+        self.assertEqual(
+            DNSForwardZoneConfig(domain, serial=1, mapping={
+                hostname: HostnameIPMapping(None, 30, set(ips)),
+            }).get_fingerprint(),
+            DNSForwardZoneConfig(domain, serial=1, mapping={
+                hostname: HostnameIPMapping(None, 30, set(reversed(ips))),
+            }).get_fingerprint())
+
+    def test_get_fingerprint_does_not_render_zone(self):
+        render_dns_template = self.patch(
+            zoneconfig, "render_dns_template")
+        DNSForwardZoneConfig(
+            factory.make_string(), serial=1, mapping={
+                factory.make_name('host'): HostnameIPMapping(
+                    None, 30, {factory.make_ipv4_address()}),
+            }).get_fingerprint()
+        self.assertThat(render_dns_template, MockNotCalled())
+
 
 class TestDNSReverseZoneConfig(MAASTestCase):
     """Tests for DNSReverseZoneConfig."""
@@ -570,6 +618,23 @@ class TestDNSReverseZoneConfig(MAASTestCase):
         dns_zone_config.write_config()
         self.assertThat(get_generate_directives, MockNotCalled())
 
+    def test_zone_names_lists_all_zones(self):
+        network = IPNetwork("10.0.0.0/23")
+        dns_zone_config = DNSReverseZoneConfig(
+            factory.make_string(), network=network)
+        self.assertEqual(
+            ["0.0.10.in-addr.arpa", "1.0.10.in-addr.arpa"],
+            dns_zone_config.zone_names)
+
+    def test_get_fingerprint_ignores_serial(self):
+        domain = factory.make_string()
+        network = IPNetwork("10.0.0.0/24")
+        self.assertEqual(
+            DNSReverseZoneConfig(
+                domain, serial=1, network=network).get_fingerprint(),
+            DNSReverseZoneConfig(
+                domain, serial=2, network=network).get_fingerprint())
+
     def test_reverse_config_file_is_world_readable(self):
         patch_dns_config_path(self)
         dns_zone_config = DNSReverseZoneConfig(
@@ -10,6 +10,7 @@ __all__ = [
     ]
 
 from datetime import datetime
+from hashlib import sha256
 from itertools import chain
 
 from netaddr import (
@@ -61,6 +62,31 @@ def enumerate_rrset_mapping(mapping):
             yield hostname, value[0], value[1], value[2]
 
 
+def describe_for_fingerprint(value):
+    """Return a string describing `value`, for fingerprinting.
+
+    Dicts and sets are described in sorted order, and other objects with
+    attributes by those attributes, so that equal values are described the
+    same way no matter how they were built.
+    """
+    if isinstance(value, dict):
+        return "{%s}" % ",".join(sorted(
+            "%s:%s" % (
+                describe_for_fingerprint(key), describe_for_fingerprint(item))
+            for key, item in value.items()))
+    elif isinstance(value, (set, frozenset)):
+        return "{%s}" % ",".join(sorted(
+            describe_for_fingerprint(item) for item in value))
+    elif isinstance(value, (list, tuple)):
+        return "[%s]" % ",".join(
+            describe_for_fingerprint(item) for item in value)
+    elif hasattr(value, "__dict__"):
+        return "%s(%s)" % (
+            type(value).__name__, describe_for_fingerprint(vars(value)))
+    else:
+        return repr(value)
+
+
 def get_details_for_ip_range(ip_range):
     """For a given IPRange, return all subnets, a useable prefix and the
     reverse DNS suffix calculated from that IP range.
@@ -163,6 +189,41 @@ class DomainConfigBase:
             'ns_host_name': self.ns_host_name,
         }
 
+    @property
+    def zone_names(self):
+        """The names of all the zones written by this config."""
+        return [zi.zone_name for zi in self.zone_info]
+
+    def get_zone_parameters(self, zone_info):
+        """Return the template parameters specific to the zone described by
+        `zone_info`, a `DomainInfo`."""
+        raise NotImplementedError()
+
+    def get_fingerprint_data(self):
+        """Return everything the zone files are generated from, except for
+        the serial and modification time."""
+        return [
+            self.domain, self.zone_names, self.ns_host_name,
+            self.default_ttl, self.ns_ttl,
+        ]
+
+    def get_fingerprint(self):
+        """Return a digest of what the zone files are generated from.
+
+        The zone files themselves are not rendered. The serial and
+        modification time are left out, so that configs only differing by
+        those produce the same fingerprint.
+        """
+        description = describe_for_fingerprint(self.get_fingerprint_data())
+        return sha256(description.encode("utf-8")).hexdigest()
+
+    def write_config(self):
+        """Write the zone files."""
+        for zi in self.zone_info:
+            self.write_zone_file(
+                zi.target_path, self.make_parameters(),
+                self.get_zone_parameters(zi))
+
     @classmethod
     def write_zone_file(cls, output_file, *parameters):
         """Write a zone file based on the zone file template.
@@ -212,6 +273,13 @@ class DNSForwardZoneConfig(DomainConfigBase):
             zone_info=[DomainInfo(None, domain)],
             **kwargs)
 
+    def get_fingerprint_data(self):
+        """See `DomainConfigBase.get_fingerprint_data`."""
+        return super(DNSForwardZoneConfig, self).get_fingerprint_data() + [
+            self._mapping, self._network, self._dynamic_ranges,
+            self._other_mapping, self._ipv4_ttl, self._ipv6_ttl,
+        ]
+
     @classmethod
     def get_mapping(cls, mapping, addr_ttl):
         """Return a generator mapping hostnames to IP addresses.
@@ -292,31 +360,28 @@ class DNSForwardZoneConfig(DomainConfigBase):
         return sorted(
             generate_directives, key=lambda directive: directive[2])
 
-    def write_config(self):
-        """Write the zone file."""
+    def get_zone_parameters(self, zone_info):
+        """See `DomainConfigBase.get_zone_parameters`."""
         # Create GENERATE directives for IPv4 ranges.
-        for zi in self.zone_info:
-            generate_directives = list(
-                chain.from_iterable(
-                    self.get_GENERATE_directives(dynamic_range)
-                    for dynamic_range in self._dynamic_ranges
-                    if dynamic_range.version == 4
-                ))
-            self.write_zone_file(
-                zi.target_path, self.make_parameters(),
-                {
-                    'mappings': {
-                        'A': self.get_A_mapping(
-                            self._mapping, self._ipv4_ttl),
-                        'AAAA': self.get_AAAA_mapping(
-                            self._mapping, self._ipv6_ttl),
-                    },
-                    'other_mapping': enumerate_rrset_mapping(
-                        self._other_mapping),
-                    'generate_directives': {
-                        'A': generate_directives,
-                    }
-                })
+        generate_directives = list(
+            chain.from_iterable(
+                self.get_GENERATE_directives(dynamic_range)
+                for dynamic_range in self._dynamic_ranges
+                if dynamic_range.version == 4
+            ))
+        return {
+            'mappings': {
+                'A': self.get_A_mapping(
+                    self._mapping, self._ipv4_ttl),
+                'AAAA': self.get_AAAA_mapping(
+                    self._mapping, self._ipv6_ttl),
+            },
+            'other_mapping': enumerate_rrset_mapping(
+                self._other_mapping),
+            'generate_directives': {
+                'A': generate_directives,
+            }
+        }
 
 
 class DNSReverseZoneConfig(DomainConfigBase):
@@ -350,6 +415,13 @@ class DNSReverseZoneConfig(DomainConfigBase):
         super(DNSReverseZoneConfig, self).__init__(
             domain, zone_info=zone_info, **kwargs)
 
+    def get_fingerprint_data(self):
+        """See `DomainConfigBase.get_fingerprint_data`."""
+        return super(DNSReverseZoneConfig, self).get_fingerprint_data() + [
+            self._mapping, self._network, self._dynamic_ranges,
+            self._rfc2317_ranges,
+        ]
+
     @classmethod
     def compose_zone_info(cls, network):
         """Return the names of the reverse zones."""
@@ -530,33 +602,29 @@ class DNSReverseZoneConfig(DomainConfigBase):
                 generate_directives.add((iterator, '${0,1,x}', hostname))
         return sorted(generate_directives)
 
-    def write_config(self):
-        """Write the zone file."""
+    def get_zone_parameters(self, zone_info):
+        """See `DomainConfigBase.get_zone_parameters`."""
         # Create GENERATE directives for IPv4 ranges.
-        for zi in self.zone_info:
-            generate_directives = list(
-                chain.from_iterable(
-                    self.get_GENERATE_directives(
-                        dynamic_range,
-                        self.domain,
-                        zi)
-                    for dynamic_range in self._dynamic_ranges
-                    if dynamic_range.version == 4
-                ))
-            self.write_zone_file(
-                zi.target_path, self.make_parameters(),
-                {
-                    'mappings': {
-                        'PTR': self.get_PTR_mapping(
-                            self._mapping, zi.subnetwork),
-                    },
-                    'other_mapping': [],
-                    'generate_directives': {
-                        'PTR': generate_directives,
-                        'CNAME': self.get_rfc2317_GENERATE_directives(
-                            zi.subnetwork,
-                            self._rfc2317_ranges,
-                            self.domain),
-                    }
-                }
-            )
+        generate_directives = list(
+            chain.from_iterable(
+                self.get_GENERATE_directives(
+                    dynamic_range,
+                    self.domain,
+                    zone_info)
+                for dynamic_range in self._dynamic_ranges
+                if dynamic_range.version == 4
+            ))
+        return {
+            'mappings': {
+                'PTR': self.get_PTR_mapping(
+                    self._mapping, zone_info.subnetwork),
+            },
+            'other_mapping': [],
+            'generate_directives': {
+                'PTR': generate_directives,
+                'CNAME': self.get_rfc2317_GENERATE_directives(
+                    zone_info.subnetwork,
+                    self._rfc2317_ranges,
+                    self.domain),
+            }
+        }
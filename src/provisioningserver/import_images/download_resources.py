@@ -23,6 +23,7 @@ from simplestreams.mirrors import (
 )
 from simplestreams.objectstores import FileStore
 from simplestreams.util import (
+    checksummer,
     item_checksums,
     path_from_mirror_url,
     products_exdata,
@@ -35,6 +36,77 @@ log = LegacyLogger()
 DEFAULT_KEYRING_PATH = "/usr/share/keyrings"
 
 
+class ResumingFileStore(FileStore):
+    """A simplestreams `FileStore` that resumes interrupted downloads.
+
+    Immutable content is downloaded into a partial file beside its final
+    path, and is only moved into place once its checksums have been
+    verified. When a partial file is left behind by an interrupted import,
+    the content source is asked to start where it left off; the region
+    serves boot resources with support for HTTP range requests.
+    """
+
+    read_size = 1024 * 1024
+
+    def insert(self, path, reader, checksums=None, mutable=True, size=None,
+               sparse=False):
+        """Overridable from `FileStore`."""
+        wpath = self._fullpath(path)
+        if mutable or sparse or not checksums or os.path.isfile(wpath):
+            return super(ResumingFileStore, self).insert(
+                path, reader, checksums, mutable=mutable, size=size,
+                sparse=sparse)
+
+        partial_path = wpath + '.partial'
+        offset = 0
+        if os.path.isfile(partial_path):
+            offset = os.path.getsize(partial_path)
+            if size is not None and offset > size:
+                offset = 0
+        if offset > 0:
+            try:
+                reader.set_start_pos(offset)
+            except (AttributeError, NotImplementedError):
+                # The content source cannot start part way through.
+                offset = 0
+            else:
+                log.debug(
+                    "Resuming download of {path} from {offset} bytes.",
+                    path=path, offset=offset)
+
+        cksummer = checksummer(checksums)
+        os.makedirs(os.path.dirname(wpath), exist_ok=True)
+        try:
+            with open(partial_path, 'r+b' if offset > 0 else 'wb') as stream:
+                # Checksum the content that was downloaded previously.
+                remaining = offset
+                while remaining > 0:
+                    buf = stream.read(min(self.read_size, remaining))
+                    if len(buf) == 0:
+                        break
+                    cksummer.update(buf)
+                    remaining -= len(buf)
+                stream.seek(offset)
+                stream.truncate()
+                while True:
+                    buf = reader.read(self.read_size)
+                    if len(buf) == 0:
+                        break
+                    cksummer.update(buf)
+                    stream.write(buf)
+        finally:
+            reader.close()
+
+        if not cksummer.check():
+            # Start again from scratch next time.
+            os.unlink(partial_path)
+            raise ValueError(
+                "Invalid %s checksum for %s (found: %s expected: %s)." % (
+                    cksummer.algorithm, path, cksummer.hexdigest(),
+                    cksummer.expected))
+        os.rename(partial_path, wpath)
+
+
 def insert_file(store, name, tag, checksums, size, content_source):
     """Insert a file into `store`.
 
@@ -318,16 +390,16 @@ def download_all_boot_resources(
     :param snapshot_path:
     :param product_mapping: A `ProductMapping` describing the resources to be
         downloaded.
-    :param store: A `FileStore` instance. Used only for testing.
+    :param store: A `ResumingFileStore` instance. Used only for testing.
     :return: Path to the snapshot directory.
     """
     storage_path = os.path.abspath(storage_path)
     snapshot_path = compose_snapshot_path(storage_path)
-    # Use a FileStore as our ObjectStore implementation.  It will write to the
-    # cache directory.
+    # Use a ResumingFileStore as our ObjectStore implementation.  It will
+    # write to the cache directory, resuming downloads that were interrupted.
     if store is None:
         cache_path = os.path.join(storage_path, 'cache')
-        store = FileStore(cache_path)
+        store = ResumingFileStore(cache_path)
     # XXX jtv 2014-04-11: FileStore now also takes an argument called
     # complete_callback, which can be used for progress reporting.
 
@@ -7,6 +7,7 @@ __all__ = []
 
 from datetime import datetime
 import hashlib
+from io import BytesIO
 import os
 import random
 import tarfile
@@ -37,6 +38,84 @@ class MockDateTime(mock.MagicMock):
         return cls._utcnow
 
 
+class ResumableContentSource(BytesIO):
+    """A content source that can start part way through its content."""
+
+    def set_start_pos(self, offset):
+        self.seek(offset)
+
+
+class TestResumingFileStore(MAASTestCase):
+    """Tests for `ResumingFileStore`."""
+
+    def make_content(self):
+        content = factory.make_bytes(1024)
+        checksums = {'sha256': hashlib.sha256(content).hexdigest()}
+        return content, checksums
+
+    def test_inserts_content(self):
+        store = download_resources.ResumingFileStore(self.make_dir())
+        content, checksums = self.make_content()
+        tag = checksums['sha256']
+        store.insert(
+            tag, ResumableContentSource(content), checksums, mutable=False,
+            size=len(content))
+        with open(store._fullpath(tag), 'rb') as stream:
+            self.assertEqual(content, stream.read())
+        self.assertFalse(os.path.exists(store._fullpath(tag) + '.partial'))
+
+    def test_resumes_partial_content(self):
+        store = download_resources.ResumingFileStore(self.make_dir())
+        content, checksums = self.make_content()
+        tag = checksums['sha256']
+        with open(store._fullpath(tag) + '.partial', 'wb') as stream:
+            stream.write(content[:100])
+        reader = ResumableContentSource(content)
+        set_start_pos = self.patch(reader, 'set_start_pos')
+        set_start_pos.side_effect = reader.seek
+        store.insert(
+            tag, reader, checksums, mutable=False, size=len(content))
+        self.assertThat(set_start_pos, MockCalledOnceWith(100))
+        with open(store._fullpath(tag), 'rb') as stream:
+            self.assertEqual(content, stream.read())
+
+    def test_restarts_when_source_cannot_resume(self):
+        store = download_resources.ResumingFileStore(self.make_dir())
+        content, checksums = self.make_content()
+        tag = checksums['sha256']
+        with open(store._fullpath(tag) + '.partial', 'wb') as stream:
+            stream.write(content[:100])
+        store.insert(
+            tag, BytesIO(content), checksums, mutable=False,
+            size=len(content))
+        with open(store._fullpath(tag), 'rb') as stream:
+            self.assertEqual(content, stream.read())
+
+    def test_discards_partial_content_on_bad_checksum(self):
+        store = download_resources.ResumingFileStore(self.make_dir())
+        content, checksums = self.make_content()
+        tag = checksums['sha256']
+        with open(store._fullpath(tag) + '.partial', 'wb') as stream:
+            stream.write(factory.make_bytes(100))
+        self.assertRaises(
+            ValueError, store.insert, tag, ResumableContentSource(content),
+            checksums, mutable=False, size=len(content))
+        self.assertFalse(os.path.exists(store._fullpath(tag)))
+        self.assertFalse(os.path.exists(store._fullpath(tag) + '.partial'))
+
+    def test_leaves_existing_content_alone(self):
+        store = download_resources.ResumingFileStore(self.make_dir())
+        content, checksums = self.make_content()
+        tag = checksums['sha256']
+        with open(store._fullpath(tag), 'wb') as stream:
+            stream.write(content)
+        reader = ResumableContentSource(content)
+        self.patch(reader, 'read')
+        store.insert(
+            tag, reader, checksums, mutable=False, size=len(content))
+        self.assertThat(reader.read, MockNotCalled())
+
+
 class TestDownloadAllBootResources(MAASTestCase):
     """Tests for `download_all_boot_resources`()."""
 
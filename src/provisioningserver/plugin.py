@@ -124,7 +124,9 @@ class ProvisioningServiceMaker:
     def _makeNodePowerMonitorService(self):
         from provisioningserver.rackdservices.node_power_monitor_service \
             import NodePowerMonitorService
-        node_monitor = NodePowerMonitorService(reactor)
+        with ClusterConfiguration.open() as config:
+            max_nodes_at_once = config.power_query_concurrency
+        node_monitor = NodePowerMonitorService(reactor, max_nodes_at_once)
         node_monitor.setName("node_monitor")
         return node_monitor
 
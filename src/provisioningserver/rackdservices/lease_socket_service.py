@@ -7,14 +7,20 @@ __all__ = [
     "LeaseSocketService",
     ]
 
-from collections import deque
+from collections import (
+    deque,
+    OrderedDict,
+)
 import json
 import os
 
 from provisioningserver.logger import get_maas_logger
 from provisioningserver.path import get_data_path
 from provisioningserver.rpc.exceptions import NoConnectionsAvailable
-from provisioningserver.rpc.region import UpdateLease
+from provisioningserver.rpc.region import (
+    UpdateLease,
+    UpdateLeases,
+)
 from provisioningserver.utils.twisted import (
     pause,
     retries,
@@ -24,8 +30,12 @@ from twisted.internet import (
     reactor,
     task,
 )
-from twisted.internet.defer import inlineCallbacks
+from twisted.internet.defer import (
+    inlineCallbacks,
+    returnValue,
+)
 from twisted.internet.protocol import DatagramProtocol
+from twisted.protocols.amp import UnhandledCommand
 
 
 maaslog = get_maas_logger("lease_socket_service")
@@ -42,6 +52,9 @@ class LeaseSocketService(Service, DatagramProtocol):
     # None, or a Deferred that will fire when the processor exits.
     done = None
 
+    # The most notifications that are sent to the region in one call.
+    batch_size = 100
+
     def __init__(self, client_service, reactor):
         self.client_service = client_service
         self.reactor = reactor
@@ -92,28 +105,63 @@ class LeaseSocketService(Service, DatagramProtocol):
         self.notifications.append(notification)
 
     def processNotifications(self, clock=reactor):
-        """Process all notifications."""
-        def gen_notifications(notifications):
-            while len(notifications) != 0:
-                yield notifications.popleft()
+        """Process all notifications.
+
+        Only the latest notification for each MAC and IP address is sent;
+        the region would only act on that one anyway. The rest are sent in
+        the order in which their latest notifications were received.
+        """
+        latest = OrderedDict()
+        while len(self.notifications) != 0:
+            notification = self.notifications.popleft()
+            key = notification.get("mac"), notification.get("ip")
+            latest.pop(key, None)
+            latest[key] = notification
+        notifications = list(latest.values())
         return task.coiterate(
-            self.processNotification(notification, clock=clock)
-            for notification in gen_notifications(self.notifications))
+            self.processNotificationBatch(
+                notifications[start:start + self.batch_size], clock=clock)
+            for start in range(0, len(notifications), self.batch_size))
 
     @inlineCallbacks
-    def processNotification(self, notification, clock=reactor):
-        """Send a notification to the region."""
-        client = None
+    def _getClient(self, clock):
+        """Return a client for the region, or None if there isn't one."""
         for elapsed, remaining, wait in retries(30, 10, clock):
             try:
                 client = yield self.client_service.getClientNow()
-                break
+                returnValue(client)
             except NoConnectionsAvailable:
-                yield pause(wait, self.clock)
+                yield pause(wait, clock)
         else:
             maaslog.error(
                 "Can't send DHCP lease information, no RPC "
                 "connection to region.")
+            returnValue(None)
+
+    @inlineCallbacks
+    def processNotificationBatch(self, notifications, clock=reactor):
+        """Send a batch of notifications to the region.
+
+        Regions that do not support `UpdateLeases` are sent each notification
+        with `UpdateLease` instead.
+        """
+        client = yield self._getClient(clock)
+        if client is None:
+            return
+        try:
+            yield client(
+                UpdateLeases, cluster_uuid=client.localIdent,
+                updates=notifications)
+        except UnhandledCommand:
+            # The region has not been upgraded to support batches.
+            for notification in notifications:
+                yield self.processNotification(notification, clock=clock)
+
+    @inlineCallbacks
+    def processNotification(self, notification, clock=reactor):
+        """Send a notification to the region."""
+        client = yield self._getClient(clock)
+        if client is None:
             return
 
         # Notification contains all the required data except for the cluster
@@ -19,10 +19,16 @@ from provisioningserver.rpc.exceptions import (
     NoConnectionsAvailable,
     NoSuchCluster,
 )
-from provisioningserver.rpc.power import query_all_nodes
+from provisioningserver.rpc.power import (
+    PowerQueryLimits,
+    query_all_nodes,
+)
 from provisioningserver.rpc.region import ListNodePowerParameters
 from twisted.application.internet import TimerService
-from twisted.internet.defer import inlineCallbacks
+from twisted.internet.defer import (
+    inlineCallbacks,
+    succeed,
+)
 from twisted.internet.error import ConnectionDone
 
 
@@ -36,11 +42,14 @@ class NodePowerMonitorService(TimerService, object):
     check_interval = timedelta(seconds=15).total_seconds()
     max_nodes_at_once = 5
 
-    def __init__(self, clock=None):
+    def __init__(self, clock=None, max_nodes_at_once=None):
         # Call self.query_nodes() every self.check_interval.
         super(NodePowerMonitorService, self).__init__(
             self.check_interval, self.try_query_nodes)
         self.clock = clock
+        # The number of nodes of each power type to query at once.
+        if max_nodes_at_once is not None:
+            self.max_nodes_at_once = max_nodes_at_once
 
     def try_query_nodes(self):
         """Attempt to query nodes' power states.
@@ -61,17 +70,23 @@ class NodePowerMonitorService(TimerService, object):
     @inlineCallbacks
     def query_nodes(self, client):
         # Get the nodes' power parameters from the region. Keep getting more
-        # power parameters until the region returns an empty list.
+        # power parameters until the region returns an empty list. The next
+        # list is fetched while the nodes of the previous one are queried;
+        # both share the same limits on concurrent queries.
+        limits = PowerQueryLimits(self.max_nodes_at_once)
+        previous = succeed(None)
         while True:
             response = yield client(
                 ListNodePowerParameters, uuid=client.localIdent)
             power_parameters = response['nodes']
             if len(power_parameters) > 0:
-                yield query_all_nodes(
-                    power_parameters, max_concurrency=self.max_nodes_at_once,
-                    clock=self.clock)
+                current = query_all_nodes(
+                    power_parameters, clock=self.clock, limits=limits)
+                yield previous
+                previous = current
             else:
                 break
+        yield previous
 
     def query_nodes_failed(self, failure, localIdent):
         if failure.check(NoSuchCluster):
@@ -10,12 +10,16 @@ import os
 import socket
 import time
 from unittest.mock import (
+    call,
     MagicMock,
     sentinel,
 )
 
 from maastesting.factory import factory
-from maastesting.matchers import MockCalledOnceWith
+from maastesting.matchers import (
+    MockCalledOnceWith,
+    MockCallsMatch,
+)
 from maastesting.testcase import (
     MAASTestCase,
     MAASTwistedRunTest,
@@ -25,7 +29,10 @@ from provisioningserver.rackdservices.lease_socket_service import (
     LeaseSocketService,
 )
 from provisioningserver.rpc import getRegionClient
-from provisioningserver.rpc.region import UpdateLease
+from provisioningserver.rpc.region import (
+    UpdateLease,
+    UpdateLeases,
+)
 from provisioningserver.rpc.testing import MockLiveClusterToRegionRPCFixture
 from provisioningserver.utils.twisted import (
     DeferredValue,
@@ -128,16 +135,18 @@ class TestLeaseSocketService(MAASTestCase):
         self.assertEquals([packet], list(service.notifications))
 
     @defer.inlineCallbacks
-    def test_processNotification_gets_called_with_notification(self):
+    def test_processNotificationBatch_gets_called_with_notification(self):
         socket_path = self.patch_socket_path()
         service = LeaseSocketService(
             sentinel.service, reactor)
         dv = DeferredValue()
 
-        # Mock processNotifcation to catch the call.
-        def mock_processNotification(*args, **kwargs):
+        # Mock processNotificationBatch to catch the call.
+        def mock_processNotificationBatch(*args, **kwargs):
             dv.set(args)
-        self.patch(service, "processNotification", mock_processNotification)
+        self.patch(
+            service, "processNotificationBatch",
+            mock_processNotificationBatch)
 
         # Start the service and stop it at the end of the test.
         service.startService()
@@ -152,26 +161,26 @@ class TestLeaseSocketService(MAASTestCase):
         yield deferToThread(self.send_notification, socket_path, packet)
         yield dv.get(timeout=10)
 
-        # Packet should be the argument passed to processNotifcation
-        self.assertEquals((packet,), dv.value)
+        # Packet should be in the batch passed to processNotificationBatch.
+        self.assertEquals(([packet],), dv.value)
 
     @defer.inlineCallbacks
-    def test_processNotification_gets_called_multiple_times(self):
+    def test_processNotificationBatch_gets_called_with_all_notifications(
+            self):
         socket_path = self.patch_socket_path()
         service = LeaseSocketService(
             sentinel.service, reactor)
-        dvs = [
-            DeferredValue(),
-            DeferredValue(),
-        ]
+        received = []
+        dv = DeferredValue()
 
-        # Mock processNotifcation to catch the call.
-        def mock_processNotification(*args, **kwargs):
-            for dv in dvs:
-                if not dv.isSet:
-                    dv.set(args)
-                    break
-        self.patch(service, "processNotification", mock_processNotification)
+        # Mock processNotificationBatch to catch the calls.
+        def mock_processNotificationBatch(notifications, **kwargs):
+            received.extend(notifications)
+            if len(received) == 2:
+                dv.set(None)
+        self.patch(
+            service, "processNotificationBatch",
+            mock_processNotificationBatch)
 
         # Start the service and stop it at the end of the test.
         service.startService()
@@ -179,22 +188,113 @@ class TestLeaseSocketService(MAASTestCase):
 
         # Create test payload to send.
         packet1 = {
-            "test1": factory.make_name("test1")
+            "mac": factory.make_mac_address(),
         }
         packet2 = {
-            "test2": factory.make_name("test2")
+            "mac": factory.make_mac_address(),
         }
 
         # Send notifications to the socket and wait for notifications.
         yield deferToThread(self.send_notification, socket_path, packet1)
         yield deferToThread(self.send_notification, socket_path, packet2)
-        yield dvs[0].get(timeout=10)
-        yield dvs[1].get(timeout=10)
+        yield dv.get(timeout=10)
+
+        # Packets should be passed to processNotificationBatch in order.
+        self.assertEquals([packet1, packet2], received)
 
-        # Packet should be the argument passed to processNotification in
-        # order.
-        self.assertEquals((packet1,), dvs[0].value)
-        self.assertEquals((packet2,), dvs[1].value)
+    @defer.inlineCallbacks
+    def test_processNotifications_keeps_latest_per_mac_and_ip(self):
+        service = LeaseSocketService(
+            sentinel.service, reactor)
+        batches = []
+        self.patch(
+            service, "processNotificationBatch",
+            lambda notifications, clock: batches.append(notifications))
+        mac1, mac2 = factory.make_mac_address(), factory.make_mac_address()
+        ip1, ip2 = factory.make_ipv4_address(), factory.make_ipv4_address()
+        notifications = [
+            {"action": "commit", "mac": mac1, "ip": ip1},
+            {"action": "commit", "mac": mac2, "ip": ip2},
+            {"action": "commit", "mac": mac1, "ip": ip2},
+            {"action": "expiry", "mac": mac1, "ip": ip1},
+        ]
+        service.notifications.extend(notifications)
+        yield service.processNotifications()
+        self.assertEquals(
+            [[notifications[1], notifications[2], notifications[3]]],
+            batches)
+        self.assertEquals(0, len(service.notifications))
+
+    @defer.inlineCallbacks
+    def test_processNotifications_sends_batches_of_batch_size(self):
+        service = LeaseSocketService(
+            sentinel.service, reactor)
+        service.batch_size = 2
+        batches = []
+        self.patch(
+            service, "processNotificationBatch",
+            lambda notifications, clock: batches.append(notifications))
+        notifications = [
+            {"mac": factory.make_mac_address()}
+            for _ in range(5)
+        ]
+        service.notifications.extend(notifications)
+        yield service.processNotifications()
+        self.assertEquals(
+            [notifications[0:2], notifications[2:4], notifications[4:]],
+            batches)
+
+    def make_lease_notification(self):
+        return {
+            "action": "commit",
+            "mac": factory.make_mac_address(),
+            "ip_family": "ipv4",
+            "ip": factory.make_ipv4_address(),
+            "timestamp": int(time.time()),
+            "lease_time": 30,
+            "hostname": factory.make_name("host"),
+        }
+
+    @defer.inlineCallbacks
+    def test_processNotificationBatch_send_to_region(self):
+        fixture = self.useFixture(MockLiveClusterToRegionRPCFixture())
+        protocol, connecting = fixture.makeEventLoop(UpdateLeases)
+        self.addCleanup((yield connecting))
+
+        client = getRegionClient()
+        rpc_service = MagicMock()
+        rpc_service.getClientNow.return_value = defer.succeed(client)
+        service = LeaseSocketService(
+            rpc_service, reactor)
+
+        notifications = [self.make_lease_notification() for _ in range(3)]
+        yield service.processNotificationBatch(notifications, clock=reactor)
+        self.assertThat(
+            protocol.UpdateLeases,
+            MockCalledOnceWith(
+                protocol,
+                cluster_uuid=client.localIdent,
+                updates=notifications))
+
+    @defer.inlineCallbacks
+    def test_processNotificationBatch_falls_back_to_UpdateLease(self):
+        protocol, connecting = self.patch_rpc_UpdateLease()
+        self.addCleanup((yield connecting))
+
+        client = getRegionClient()
+        rpc_service = MagicMock()
+        rpc_service.getClientNow.return_value = defer.succeed(client)
+        service = LeaseSocketService(
+            rpc_service, reactor)
+
+        notifications = [self.make_lease_notification() for _ in range(2)]
+        expected_calls = [
+            call(protocol, cluster_uuid=client.localIdent, **notification)
+            for notification in notifications
+        ]
+        yield service.processNotificationBatch(notifications, clock=reactor)
+        self.assertThat(
+            protocol.UpdateLease, MockCallsMatch(*expected_calls))
 
     @defer.inlineCallbacks
     def test_processNotification_send_to_region(self):
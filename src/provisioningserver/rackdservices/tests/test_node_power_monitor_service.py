@@ -14,7 +14,10 @@ from unittest.mock import (
 
 from fixtures import FakeLogger
 from maastesting.factory import factory
-from maastesting.matchers import MockCalledOnceWith
+from maastesting.matchers import (
+    IsUnfiredDeferred,
+    MockCalledOnceWith,
+)
 from maastesting.testcase import (
     MAASTestCase,
     MAASTwistedRunTest,
@@ -29,11 +32,18 @@ from provisioningserver.rackdservices import (
 from provisioningserver.rpc import (
     exceptions,
     getRegionClient,
+    power,
     region,
 )
 from provisioningserver.rpc.testing import MockClusterToRegionRPCFixture
-from testtools.matchers import MatchesStructure
+from testtools.matchers import (
+    Equals,
+    HasLength,
+    IsInstance,
+    MatchesStructure,
+)
 from twisted.internet.defer import (
+    Deferred,
     fail,
     succeed,
 )
@@ -51,6 +61,12 @@ class TestNodePowerMonitorService(MAASTestCase):
             call=(service.try_query_nodes, tuple(), {}),
             step=15, clock=None))
 
+    def test_init_sets_max_nodes_at_once(self):
+        service = npms.NodePowerMonitorService(
+            max_nodes_at_once=sentinel.max_nodes_at_once)
+        self.assertEqual(
+            sentinel.max_nodes_at_once, service.max_nodes_at_once)
+
     def make_monitor_service(self):
         service = npms.NodePowerMonitorService(Clock())
         return service
@@ -102,9 +118,65 @@ class TestNodePowerMonitorService(MAASTestCase):
         self.assertThat(
             query_all_nodes,
             MockCalledOnceWith(
-                [example_power_parameters],
-                max_concurrency=sentinel.max_nodes_at_once,
-                clock=service.clock))
+                [example_power_parameters], clock=service.clock,
+                limits=ANY))
+        [call] = query_all_nodes.call_args_list
+        limits = call[1]["limits"]
+        self.assertThat(limits, IsInstance(power.PowerQueryLimits))
+
+    def test_query_nodes_queries_next_nodes_while_querying(self):
+        service = self.make_monitor_service()
+        service.max_nodes_at_once = 20
+
+        def make_nodes(count):
+            return [
+                {
+                    "system_id": factory.make_name("system_id"),
+                    "hostname": factory.make_hostname(),
+                    "power_state": "on",
+                    "power_type": "ipmi",
+                    "context": {
+                        "power_address": factory.make_ipv4_address(),
+                    },
+                }
+                for _ in range(count)
+            ]
+
+        rpc_fixture = self.useFixture(MockClusterToRegionRPCFixture())
+        proto_region, io = rpc_fixture.makeEventLoop(
+            region.ListNodePowerParameters)
+        proto_region.ListNodePowerParameters.side_effect = [
+            succeed({"nodes": make_nodes(10)}),
+            succeed({"nodes": make_nodes(10)}),
+            succeed({"nodes": []}),
+        ]
+
+        queries = []
+
+        def get_power_state(system_id, hostname, power_type, context, clock):
+            queries.append(Deferred())
+            return queries[-1]
+
+        self.patch(power, "get_power_state", get_power_state)
+        reporter = self.patch(power, "power_reporter", Mock())
+        reporter.update.return_value = succeed(None)
+        reporter.event.return_value = succeed(None)
+
+        d = service.query_nodes(getRegionClient())
+        io.flush()
+
+        # The nodes of both lists are being queried at once.
+        self.assertThat(queries, HasLength(20))
+        self.assertThat(d, IsUnfiredDeferred())
+
+        for query in queries:
+            query.callback("on")
+        io.flush()
+
+        self.assertEqual(None, extract_result(d))
+        self.assertThat(
+            proto_region.ListNodePowerParameters.call_count, Equals(3))
+        self.assertThat(reporter.update.call_count, Equals(20))
 
     def test_query_nodes_copes_with_NoSuchCluster(self):
         service = self.make_monitor_service()
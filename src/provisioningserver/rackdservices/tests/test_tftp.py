@@ -48,6 +48,7 @@ from provisioningserver.rackdservices.tftp import (
     TFTPService,
     UDPServer,
 )
+from provisioningserver.rpc.boot_config import BootConfigCache
 from provisioningserver.rpc.exceptions import BootConfigNoResponse
 from provisioningserver.rpc.region import GetBootConfig
 from provisioningserver.testing.boot_images import (
@@ -217,6 +218,8 @@ class TestTFTPBackend(MAASTestCase):
         from provisioningserver import boot
         self.patch(boot, "find_mac_via_arp")
         self.patch(tftp_module, 'log_request')
+        # Each test gets its own cache of boot configurations.
+        self.patch(tftp_module, 'boot_config_cache', BootConfigCache())
 
     def test_init(self):
         temp_dir = self.make_dir()
@@ -434,12 +437,21 @@ class TestTFTPBackend(MAASTestCase):
         # Only one client is saved.
         self.assertEquals(clients[0], backend.client_to_remote[remote_ip])
 
-        # Only the first client should have been called twice, and all the
-        # other clients should not have been called.
-        self.assertEquals(2, clients[0].call_count)
+        # Only the first client should have been called, once, and all the
+        # other clients should not have been called. The second reader was
+        # rendered from the cached boot configuration.
+        self.assertEquals(1, clients[0].call_count)
         for idx in range(1, 10):
             self.assertThat(clients[idx], MockNotCalled())
 
+        # Once invalidated, the boot configuration is fetched again.
+        backend.boot_configs.invalidate()
+        params_with_ip = dict(fake_params)
+        params_with_ip['remote_ip'] = remote_ip
+        reader = yield backend.get_boot_method_reader(method, params_with_ip)
+        self.addCleanup(reader.finish)
+        self.assertEquals(2, clients[0].call_count)
+
     @inlineCallbacks
     def test_get_boot_method_reader_uses_different_clients(self):
         # Fake configuration parameters, as discovered from the file path.
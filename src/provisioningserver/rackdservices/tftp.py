@@ -27,7 +27,11 @@ from provisioningserver.logger import (
     get_maas_logger,
     LegacyLogger,
 )
-from provisioningserver.rpc.boot_images import list_boot_images
+from provisioningserver.rpc.boot_config import boot_config_cache
+from provisioningserver.rpc.boot_images import (
+    index_boot_images,
+    list_boot_images,
+)
 from provisioningserver.rpc.exceptions import BootConfigNoResponse
 from provisioningserver.rpc.region import (
     GetBootConfig,
@@ -81,32 +85,14 @@ def get_boot_image(params):
     if purpose == "enlist":
         purpose = "commissioning"
 
-    # Get the matching boot images, minus subarchitecture.
-    boot_images = list_boot_images()
-    boot_images = [
-        image
-        for image in boot_images
-        if (image['osystem'] == params['osystem'] and
-            image['release'] == params['release'] and
-            image['architecture'] == params['arch'] and
-            image['purpose'] == purpose)
-    ]
-
-    # See if exact subarchitecture match.
-    for image in boot_images:
-        if image["subarchitecture"] == params["subarch"]:
-            return image
+    # Get the matching boot images, minus subarchitecture. The index
+    # prefers an exact subarchitecture match over a supported one.
+    index = index_boot_images(list_boot_images())
+    subarches = index.get((
+        params['osystem'], params['release'], params['arch'], purpose), {})
 
-    # Not exact match check if subarchitecture is in the supported
-    # subarchitectures list.
-    for image in boot_images:
-        subarches = image.get("supported_subarches", "")
-        subarches = subarches.split(",")
-        if params["subarch"] in subarches:
-            return image
-
-    # No matching boot image was found.
-    return None
+    # Returns None when no matching boot image was found.
+    return subarches.get(params["subarch"])
 
 
 def log_request(file_name, clock=reactor):
@@ -166,6 +152,7 @@ class TFTPBackend(FilesystemSynchronousBackend):
         self.client_to_remote = {}
         self.client_service = client_service
         self.fetcher = RPCFetcher()
+        self.boot_configs = boot_config_cache
 
     def _get_new_client_for_remote(self, remote_ip):
         """Return a new client for the `remote_ip`.
@@ -290,9 +277,18 @@ class TFTPBackend(FilesystemSynchronousBackend):
             if name in params
         }
 
+        def cache(config, params):
+            self.boot_configs.set(params, config)
+            return config
+
         def fetch(client, params):
             params["system_id"] = client.localIdent
-            d = self.fetcher(client, GetBootConfig, **params)
+            config = self.boot_configs.get(params)
+            if config is None:
+                d = self.fetcher(client, GetBootConfig, **params)
+                d.addCallback(cache, params)
+            else:
+                d = succeed(config)
             d.addCallback(self.get_boot_image, client, params['remote_ip'])
             d.addCallback(lambda data: KernelParameters(**data))
             return d
@@ -0,0 +1,99 @@
+# Copyright 2018 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Cache of boot configurations obtained from the region."""
+
+__all__ = [
+    "boot_config_cache",
+    "BootConfigCache",
+    "invalidate_boot_configs",
+    ]
+
+from datetime import timedelta
+
+from twisted.internet import reactor
+
+
+class BootConfigCache:
+    """Cache of `GetBootConfig` responses.
+
+    Responses are kept for `ttl` seconds so that retries, and the several
+    stages of a boot loader (e.g. pxelinux then grub), do not each make a
+    round trip to the region. The region invalidates the responses for a
+    node when its boot configuration changes; see `InvalidateBootConfigs`.
+    """
+
+    ttl = timedelta(seconds=30).total_seconds()
+
+    # Expired responses are discarded when this many are held.
+    max_size = 10000
+
+    def __init__(self, clock=reactor):
+        super(BootConfigCache, self).__init__()
+        self.clock = clock
+        self.configs = {}
+
+    def _get_key(self, params):
+        return tuple(sorted(params.items()))
+
+    def get(self, params):
+        """Return a copy of the cached response for `params`, or `None`.
+
+        :param params: The arguments of the `GetBootConfig` call.
+        """
+        key = self._get_key(params)
+        try:
+            expires, config = self.configs[key]
+        except KeyError:
+            return None
+        if expires <= self.clock.seconds():
+            del self.configs[key]
+            return None
+        return dict(config)
+
+    def set(self, params, config):
+        """Cache a copy of `config`, the response for `params`.
+
+        :param params: The arguments of the `GetBootConfig` call.
+        """
+        if len(self.configs) >= self.max_size:
+            self.expire()
+        expires = self.clock.seconds() + self.ttl
+        self.configs[self._get_key(params)] = expires, dict(config)
+
+    def expire(self):
+        """Discard all expired responses."""
+        now = self.clock.seconds()
+        self.configs = {
+            key: (expires, config)
+            for key, (expires, config) in self.configs.items()
+            if expires > now
+        }
+
+    def invalidate(self, system_ids=None):
+        """Discard the responses for the nodes in `system_ids`.
+
+        :param system_ids: The system IDs of nodes whose boot configuration
+            has changed, or `None` to discard all responses.
+        """
+        if system_ids is None:
+            self.configs.clear()
+        else:
+            system_ids = set(system_ids)
+            self.configs = {
+                key: (expires, config)
+                for key, (expires, config) in self.configs.items()
+                if config.get("system_id") not in system_ids
+            }
+
+
+# The cache used by the TFTP service.
+boot_config_cache = BootConfigCache()
+
+
+def invalidate_boot_configs(system_ids=None):
+    """Discard cached boot configurations.
+
+    See `BootConfigCache.invalidate`.
+    """
+    boot_config_cache.invalidate(system_ids)
@@ -5,10 +5,12 @@
 
 __all__ = [
     "import_boot_images",
+    "index_boot_images",
     "list_boot_images",
     "is_import_boot_images_running",
     ]
 
+from collections import defaultdict
 from urllib.parse import urlparse
 
 from provisioningserver import concurrency
@@ -36,6 +38,9 @@ log = LegacyLogger()
 
 CACHED_BOOT_IMAGES = None
 
+# The most recently indexed boot images and their index.
+CACHED_BOOT_IMAGES_INDEX = None, None
+
 
 def list_boot_images():
     """List the boot images that exist on the cluster.
@@ -60,6 +65,42 @@ def reload_boot_images():
     with ClusterConfiguration.open() as config:
         tftp_root = config.tftp_root
     CACHED_BOOT_IMAGES = tftppath.list_boot_images(tftp_root)
+    index_boot_images(CACHED_BOOT_IMAGES)
+
+
+def index_boot_images(boot_images):
+    """Index the given boot images for selection by subarchitecture.
+
+    The index maps each ``(osystem, release, architecture, purpose)`` to a
+    dict of subarchitecture to boot image. An image is preferred for its own
+    subarchitecture over one that merely lists it in `supported_subarches`;
+    otherwise the first image in `boot_images` wins.
+
+    The index of the most recently given list of boot images is cached, so
+    this is a cheap call when passed the result of `list_boot_images`.
+    """
+    global CACHED_BOOT_IMAGES_INDEX
+    indexed, index = CACHED_BOOT_IMAGES_INDEX
+    if indexed is boot_images:
+        return index
+
+    index = defaultdict(dict)
+    for image in boot_images:
+        subarches = index[
+            image['osystem'], image['release'],
+            image['architecture'], image['purpose']]
+        subarches.setdefault(image['subarchitecture'], image)
+    for image in boot_images:
+        subarches = index[
+            image['osystem'], image['release'],
+            image['architecture'], image['purpose']]
+        supported = image.get('supported_subarches', '')
+        for subarch in supported.split(','):
+            subarches.setdefault(subarch, image)
+    index = dict(index)
+
+    CACHED_BOOT_IMAGES_INDEX = boot_images, index
+    return index
 
 
 def get_hosts_from_sources(sources):
@@ -18,6 +18,7 @@ __all__ = [
     "DescribeNOSTypes",
     "GetPreseedData",
     "Identify",
+    "InvalidateBootConfigs",
     "ListBootImages",
     "ListOperatingSystems",
     "ListSupportedArchitectures",
@@ -567,9 +568,12 @@ class EvaluateTag(amp.Command):
         ])),
         # A 3-part credential string for the web API.
         (b"credentials", amp.Unicode()),
-        # List of nodes the rack controller should evaluate.
+        # List of nodes the rack controller should evaluate, with the
+        # digest of their details so that unchanged details need not be
+        # downloaded again. The digest was added in 2.5.
         (b"nodes", AmpList([
             (b"system_id", amp.Unicode()),
+            (b"digest", amp.Unicode(optional=True)),
         ])),
     ]
     response = []
@@ -588,6 +592,20 @@ class IsImportBootImagesRunning(amp.Command):
     errors = {}
 
 
+class InvalidateBootConfigs(amp.Command):
+    """Discard the boot configurations cached for the given nodes.
+
+    :since: 2.5
+    """
+    arguments = [
+        # The system IDs of the nodes whose boot configuration changed, or
+        # nothing to discard the boot configurations of all nodes.
+        (b"system_ids", amp.ListOf(amp.Unicode(), optional=True)),
+    ]
+    response = []
+    errors = {}
+
+
 class RefreshRackControllerInfo(amp.Command):
     """Refresh the rack controller's hardware and network details.
 
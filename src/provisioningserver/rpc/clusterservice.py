@@ -58,6 +58,7 @@ from provisioningserver.rpc import (
     pods,
     region,
 )
+from provisioningserver.rpc.boot_config import invalidate_boot_configs
 from provisioningserver.rpc.boot_images import (
     import_boot_images,
     is_import_boot_images_running,
@@ -318,6 +319,16 @@ class Cluster(RPCProtocol):
         """
         return {"running": is_import_boot_images_running()}
 
+    @cluster.InvalidateBootConfigs.responder
+    def invalidate_boot_configs(self, system_ids=None):
+        """invalidate_boot_configs()
+
+        Implementation of
+        :py:class:`~provisioningserver.rpc.cluster.InvalidateBootConfigs`.
+        """
+        invalidate_boot_configs(system_ids)
+        return {}
+
     @cluster.DescribePowerTypes.responder
     def describe_power_types(self):
         """describe_power_types()
@@ -803,12 +814,27 @@ class ClusterClient(Cluster):
         if the client service is not running; `KeyError` if there's already a
         live connection for this event-loop; or `AuthenticationFailed` if,
         guess, the authentication failed.
+
+    :ivar inFlight: The number of calls made over this connection that have
+        not yet completed.
+
+    :ivar latency: An exponentially weighted moving average of the time, in
+        seconds, that calls made over this connection take to complete. It
+        decays while no calls complete, so that one slow call does not keep
+        an otherwise idle connection from being used.
     """
 
     address = None
     eventloop = None
     service = None
 
+    # The weight given to the most recent call when updating `latency`.
+    latencyWeight = 0.2
+
+    # The time, in seconds, over which `latency` halves when no calls
+    # complete.
+    latencyHalfLife = 30.0
+
     def __init__(self, address, eventloop, service):
         super(ClusterClient, self).__init__()
         self.address = address
@@ -819,12 +845,42 @@ class ClusterClient(Cluster):
         self.ready = DeferredValue()
         self.localIdent = None
         self.remoteVersion = None
+        # Load on this connection; see `ClusterClientService.getClient`.
+        self.inFlight = 0
+        self._latency = 0.0
+        self._latencyUpdated = None
+
+    @property
+    def latency(self):
+        """The moving average latency, decayed since it was last updated."""
+        if self._latencyUpdated is None:
+            return self._latency
+        idle = self.service.clock.seconds() - self._latencyUpdated
+        return self._latency * 0.5 ** (idle / self.latencyHalfLife)
 
     @property
     def ident(self):
         """The ident of the remote event-loop."""
         return self.eventloop
 
+    def callRemote(self, command, **kwargs):
+        """Call up, but keep track of `inFlight` and `latency`."""
+        clock = self.service.clock
+        started = clock.seconds()
+
+        def completed(result):
+            self.inFlight -= 1
+            elapsed = clock.seconds() - started
+            latency = self.latency
+            self._latency = latency + self.latencyWeight * (elapsed - latency)
+            self._latencyUpdated = clock.seconds()
+            return result
+
+        self.inFlight += 1
+        d = maybeDeferred(
+            super(ClusterClient, self).callRemote, command, **kwargs)
+        return d.addBoth(completed)
+
     @inlineCallbacks
     def authenticateRegion(self):
         """Authenticate the region."""
@@ -1031,10 +1087,24 @@ class ClusterClientService(TimerService, object):
         self.time_started = self.clock.seconds()
         super(ClusterClientService, self).startService()
 
+    @staticmethod
+    def _getLoad(conn):
+        """Return a sort key for the load on `conn`.
+
+        Connections with fewer calls in flight come first, and of those the
+        ones to region processes that have been answering more quickly.
+        """
+        if IConnectionToRegion.providedBy(conn):
+            return conn.inFlight, conn.latency
+        else:
+            return 0, 0.0
+
     def getClient(self):
         """Returns a :class:`common.Client` connected to a region.
 
-        The client is chosen at random.
+        The client is chosen from the connections with the least load (see
+        `_getLoad`), at random when several are equally loaded, so that calls
+        are spread across all of the region's event-loops.
 
         :raises: :py:class:`~.exceptions.NoConnectionsAvailable` when
             there are no open connections to a region controller.
@@ -1043,7 +1113,8 @@ class ClusterClientService(TimerService, object):
         if len(conns) == 0:
             raise exceptions.NoConnectionsAvailable()
         else:
-            return common.Client(random.choice(conns))
+            random.shuffle(conns)
+            return common.Client(min(conns, key=self._getLoad))
 
     @deferred
     def getClientNow(self):
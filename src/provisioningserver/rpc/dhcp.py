@@ -23,7 +23,7 @@ from provisioningserver.dhcp import (
     DHCPv6Server,
 )
 from provisioningserver.dhcp.config import get_config
-from provisioningserver.dhcp.omshell import Omshell
+from provisioningserver.dhcp.omapi import OmapiClient
 from provisioningserver.logger import (
     get_maas_logger,
     LegacyLogger,
@@ -187,62 +187,76 @@ def _delete_config(server):
         sudo_delete_file(server.config_filename)
 
 
-def _remove_host_map(omshell, mac):
-    """Remove host by `mac`."""
-    try:
-        omshell.remove(mac)
-    except ExternalProcessError as e:
-        if 'not connected.' in e.output_as_unicode:
-            msg = "The DHCP server could not be reached."
-        else:
-            msg = str(e)
-        err = "Could not remove host map for %s: %s" % (mac, msg)
-        maaslog.error(err)
-        raise CannotRemoveHostMap(err)
+# Persistent OMAPI connections, keyed by the name of the DHCP service.
+_omapi_clients = {}
 
 
-def _create_host_map(omshell, mac, ip_address):
-    """Create host with `mac` -> `ip_address`."""
-    try:
-        omshell.create(ip_address, mac)
-    except ExternalProcessError as e:
-        if 'not connected.' in e.output_as_unicode:
-            msg = "The DHCP server could not be reached."
-        else:
-            msg = str(e)
-        err = "Could not create host map for %s -> %s: %s" % (
-            mac, ip_address, msg)
-        maaslog.error(err)
-        raise CannotCreateHostMap(err)
+# The exception raised, and the message logged, when a host map cannot be
+# changed, keyed by the OMAPI action.
+_host_map_errors = {
+    "remove": (
+        CannotRemoveHostMap,
+        "Could not remove host map for {mac}: {error}"),
+    "create": (
+        CannotCreateHostMap,
+        "Could not create host map for {mac} -> {ip}: {error}"),
+    "modify": (
+        CannotModifyHostMap,
+        "Could not modify host map for {mac} -> {ip}: {error}"),
+}
+
 
+def _get_omapi_client(server):
+    """Return the persistent `OmapiClient` for `server`.
 
-def _modify_host_map(omshell, mac, ip_address):
-    """Modify host with `mac` -> `ip_address`."""
+    A new client is made when the OMAPI key has changed.
+    """
+    client = _omapi_clients.get(server.dhcp_service)
+    if client is None or client.shared_key != server.omapi_key:
+        if client is not None:
+            client.close()
+        client = OmapiClient(
+            server_address='127.0.0.1', shared_key=server.omapi_key,
+            ipv6=server.ipv6)
+        _omapi_clients[server.dhcp_service] = client
+    return client
+
+
+@synchronous
+def _update_hosts(server, remove, add, modify):
+    """Update the hosts using the OMAPI.
+
+    The whole change is sent as one batch over a persistent connection.
+    Every host is attempted; each failure is logged, then the first one is
+    raised.
+    """
+    client = _get_omapi_client(server)
     try:
-        omshell.modify(ip_address, mac)
-    except ExternalProcessError as e:
-        if 'not connected.' in e.output_as_unicode:
+        results = client.update_hosts(
+            remove=[host["mac"] for host in remove],
+            add=[(host["mac"], host["ip"]) for host in add],
+            modify=[(host["mac"], host["ip"]) for host in modify])
+    except Exception as e:
+        client.close()
+        if isinstance(e, OSError):
             msg = "The DHCP server could not be reached."
         else:
             msg = str(e)
-        err = "Could not modify host map for %s -> %s: %s" % (
-            mac, ip_address, msg)
+        err = "Could not update host maps for %s: %s" % (
+            server.descriptive_name, msg)
         maaslog.error(err)
-        raise CannotModifyHostMap(err)
-
-
-@synchronous
-def _update_hosts(server, remove, add, modify):
-    """Update the hosts using the OMAPI."""
-    omshell = Omshell(
-        server_address='127.0.0.1', shared_key=server.omapi_key,
-        ipv6=server.ipv6)
-    for host in remove:
-        _remove_host_map(omshell, host["mac"])
-    for host in add:
-        _create_host_map(omshell, host["mac"], host["ip"])
-    for host in modify:
-        _modify_host_map(omshell, host["mac"], host["ip"])
+        raise CannotConfigureDHCP(err) from e
+
+    failures = []
+    for result in results:
+        if result.error is not None:
+            exception, template = _host_map_errors[result.action]
+            err = template.format(
+                mac=result.mac, ip=result.ip, error=result.error)
+            maaslog.error(err)
+            failures.append(exception(err))
+    if len(failures) > 0:
+        raise failures[0]
 
 
 @asynchronous
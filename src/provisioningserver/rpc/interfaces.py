@@ -33,3 +33,9 @@ class IConnectionToRegion(IConnection):
 
     address = interface.Attribute(
         "address", "The address of the far end of the connection.")
+
+    inFlight = interface.Attribute(
+        "inFlight", "The number of calls that have not yet completed.")
+
+    latency = interface.Attribute(
+        "latency", "The moving average time taken by calls, in seconds.")
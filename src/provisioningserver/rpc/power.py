@@ -9,8 +9,10 @@ __all__ = [
     "maybe_change_power_state",
 ]
 
+from collections import defaultdict
 from datetime import timedelta
 from functools import partial
+import json
 import sys
 
 from provisioningserver.drivers.power import (
@@ -20,7 +22,7 @@ from provisioningserver.drivers.power import (
 from provisioningserver.drivers.power.registry import PowerDriverRegistry
 from provisioningserver.events import (
     EVENT_TYPES,
-    send_node_event,
+    nodeEventHub,
 )
 from provisioningserver.logger import (
     get_maas_logger,
@@ -34,24 +36,31 @@ from provisioningserver.rpc.exceptions import (
 )
 from provisioningserver.rpc.region import (
     MarkNodeFailed,
+    SendEvents,
     UpdateNodePowerState,
+    UpdateNodePowerStates,
 )
 from provisioningserver.utils.twisted import (
     asynchronous,
     callOut,
     deferred,
+    DeferredValue,
     deferWithTimeout,
 )
 from twisted.internet import reactor
 from twisted.internet.defer import (
     CancelledError,
+    Deferred,
     DeferredList,
+    DeferredLock,
     DeferredSemaphore,
     inlineCallbacks,
     returnValue,
     succeed,
 )
 from twisted.internet.task import deferLater
+from twisted.protocols.amp import UnhandledCommand
+from twisted.python.failure import Failure
 
 
 maaslog = get_maas_logger("power")
@@ -80,6 +89,138 @@ def power_state_update(system_id, state):
         power_state=state)
 
 
+class PowerStateReporter:
+    """Report the power states and events of many nodes to the region.
+
+    Power states passed to `update` and events passed to `event` are queued,
+    then sent to the region with `UpdateNodePowerStates` and `SendEvents`
+    calls of up to `batch_size` items each. A batch is sent straight away
+    when the reporter is idle; otherwise everything queued while the previous
+    batch is in flight goes in the next one. Regions that do not support
+    those commands are sent an `UpdateNodePowerState` or `SendEvent` call
+    per item instead.
+    """
+
+    batch_size = 100
+
+    def __init__(self):
+        super(PowerStateReporter, self).__init__()
+        self.states = []
+        self.events = []
+        self.lock = DeferredLock()
+
+    def update(self, system_id, state):
+        """Report the power state of a node to the region.
+
+        This has the same signature as `power_state_update`.
+
+        :return: A `Deferred` that fires once the state has been sent.
+        """
+        d = Deferred()
+        self.states.append((system_id, state, d))
+        self._send()
+        return d
+
+    def event(self, event_type, system_id, hostname, description=''):
+        """Report an event for a node to the region.
+
+        This has the same signature as `send_node_event`.
+
+        :return: A `Deferred` that fires once the event has been sent.
+        """
+        d = Deferred()
+        self.events.append((event_type, system_id, description, d))
+        self._send()
+        return d
+
+    def _send(self):
+        if not self.lock.locked:
+            d = self.flush()
+            d.addErrback(log.err, "Failed to report power states.")
+
+    @asynchronous
+    def flush(self):
+        """Send all queued power states and events to the region."""
+        return self.lock.run(self._flush)
+
+    @inlineCallbacks
+    def _flush(self):
+        while len(self.states) != 0 or len(self.events) != 0:
+            states = self.states[:self.batch_size]
+            del self.states[:self.batch_size]
+            events = self.events[:self.batch_size]
+            del self.events[:self.batch_size]
+            if len(states) != 0:
+                yield self._report(self._send_states, states)
+            if len(events) != 0:
+                yield self._report(self._send_events, events)
+
+    @inlineCallbacks
+    def _report(self, send, items):
+        """Call `send` with `items`, then fire each item's `Deferred`."""
+        try:
+            yield send(items)
+        except Exception:
+            failure = Failure()
+            for item in items:
+                item[-1].errback(failure)
+        else:
+            for item in items:
+                item[-1].callback(None)
+
+    @inlineCallbacks
+    def _send_states(self, states):
+        client = getRegionClient()
+        try:
+            response = yield client(
+                UpdateNodePowerStates, power_states=[
+                    {"system_id": system_id, "power_state": state}
+                    for system_id, state, _ in states
+                ])
+        except UnhandledCommand:
+            # The region has not been upgraded to support batches.
+            missing = []
+            for system_id, state, _ in states:
+                try:
+                    yield client(
+                        UpdateNodePowerState,
+                        system_id=system_id, power_state=state)
+                except NoSuchNode:
+                    missing.append(system_id)
+        else:
+            missing = response["missing"]
+        for system_id in missing:
+            log.debug(
+                "{system_id}: Could not update power state: no such node.",
+                system_id=system_id)
+
+    @inlineCallbacks
+    def _send_events(self, events):
+        for event_type in {event_type for event_type, _, _, _ in events}:
+            yield nodeEventHub.ensureEventTypeRegistered(event_type)
+        client = getRegionClient()
+        try:
+            yield client(
+                SendEvents, node_events=[
+                    {
+                        "system_id": system_id,
+                        "type_name": event_type,
+                        "description": description,
+                    }
+                    for event_type, system_id, description, _ in events
+                ])
+        except UnhandledCommand:
+            # The region has not been upgraded to support batches.
+            for event_type, system_id, description, _ in events:
+                yield nodeEventHub.logByID(
+                    event_type, system_id, description)
+
+
+# The reporter used for power changes and queries, so that those of many
+# nodes share calls to the region.
+power_reporter = PowerStateReporter()
+
+
 @asynchronous(timeout=15)
 @inlineCallbacks
 def power_change_failure(system_id, hostname, power_change, message):
@@ -101,7 +242,7 @@ def power_change_failure(system_id, hostname, power_change, message):
         event_type = EVENT_TYPES.NODE_POWER_OFF_FAILED
     elif power_change == 'cycle':
         event_type = EVENT_TYPES.NODE_POWER_CYCLE_FAILED
-    yield send_node_event(event_type, system_id, hostname, message)
+    yield power_reporter.event(event_type, system_id, hostname, message)
 
 
 @asynchronous
@@ -145,7 +286,7 @@ def power_change_success(system_id, hostname, power_change):
     """
     assert power_change in ['on', 'off'], (
         "Unknown power change: %s" % power_change)
-    yield power_state_update(system_id, power_change)
+    yield power_reporter.update(system_id, power_change)
     maaslog.info(
         "Changed power state (%s) of node: %s (%s)",
         power_change, hostname, system_id)
@@ -154,7 +295,7 @@ def power_change_success(system_id, hostname, power_change):
         event_type = EVENT_TYPES.NODE_POWERED_ON
     elif power_change == 'off':
         event_type = EVENT_TYPES.NODE_POWERED_OFF
-    yield send_node_event(event_type, system_id, hostname)
+    yield power_reporter.event(event_type, system_id, hostname)
 
 
 @asynchronous
@@ -180,7 +321,7 @@ def power_change_starting(system_id, hostname, power_change):
         event_type = EVENT_TYPES.NODE_POWER_OFF_STARTING
     elif power_change == 'cycle':
         event_type = EVENT_TYPES.NODE_POWER_CYCLE_STARTING
-    yield send_node_event(event_type, system_id, hostname)
+    yield power_reporter.event(event_type, system_id, hostname)
 
 
 @asynchronous
@@ -360,41 +501,47 @@ def get_power_state(system_id, hostname, power_type, context, clock=reactor):
 
 
 @inlineCallbacks
-def power_query_success(system_id, hostname, state):
+def power_query_success(system_id, hostname, state, reporter=None):
     """Report a node that for which power querying has succeeded."""
+    if reporter is None:
+        reporter = power_reporter
     message = "Power state queried: %s" % state
-    yield power_state_update(system_id, state)
-    yield send_node_event(
+    yield reporter.update(system_id, state)
+    yield reporter.event(
         EVENT_TYPES.NODE_POWER_QUERIED_DEBUG,
         system_id, hostname, message)
 
 
 @inlineCallbacks
-def power_query_failure(system_id, hostname, failure):
+def power_query_failure(system_id, hostname, failure, reporter=None):
     """Report a node that for which power querying has failed."""
+    if reporter is None:
+        reporter = power_reporter
     maaslog.error("%s: Power state could not be queried: %s" % (
         hostname, failure.getErrorMessage()))
-    yield power_state_update(system_id, 'error')
-    yield send_node_event(
+    yield reporter.update(system_id, 'error')
+    yield reporter.event(
         EVENT_TYPES.NODE_POWER_QUERY_FAILED,
         system_id, hostname, failure.getErrorMessage())
 
 
 @asynchronous
-def report_power_state(d, system_id, hostname):
+def report_power_state(d, system_id, hostname, reporter=None):
     """Report the result of a power query.
 
     :param d: A `Deferred` that will fire with the node's updated power state,
         or an error condition. The callback/errback values are passed through
         unaltered. See `get_power_state` for details.
+    :param reporter: The `PowerStateReporter` with which to send the power
+        state to the region; `power_reporter` by default.
     """
     def cb(state):
-        d = power_query_success(system_id, hostname, state)
+        d = power_query_success(system_id, hostname, state, reporter)
         d.addCallback(lambda _: state)
         return d
 
     def eb(failure):
-        d = power_query_failure(system_id, hostname, failure)
+        d = power_query_failure(system_id, hostname, failure, reporter)
         d.addCallback(lambda _: failure)
         return d
 
@@ -431,10 +578,15 @@ def maaslog_report_failure(node, failure):
         # log.err(failure, "Failed to refresh power state.")
 
 
-def query_node(node, clock):
+def query_node(node, clock, reporter=None, query=None):
     """Calls `get_power_state` on the given node.
 
     Logs to maaslog as errors and power states change.
+
+    :param reporter: The `PowerStateReporter` with which to send the power
+        state to the region; `power_reporter` by default.
+    :param query: A function with the same signature as `get_power_state`
+        to call in its place.
     """
     if node['system_id'] in power_action_registry:
         log.debug(
@@ -443,26 +595,84 @@ def query_node(node, clock):
             hostname=node['hostname'])
         return succeed(None)
     else:
-        d = get_power_state(
+        if query is None:
+            query = get_power_state
+        d = query(
             node['system_id'], node['hostname'], node['power_type'],
             node['context'], clock=clock)
-        d = report_power_state(d, node['system_id'], node['hostname'])
+        d = report_power_state(
+            d, node['system_id'], node['hostname'], reporter=reporter)
         d.addCallbacks(
             partial(maaslog_report_success, node),
             partial(maaslog_report_failure, node))
         return d
 
 
-def query_all_nodes(nodes, max_concurrency=5, clock=reactor):
+def get_bmc_key(node):
+    """Return a key identifying the BMC that `node` is queried through.
+
+    Nodes with the same power type and power parameters share a BMC. For
+    chassis power types the blades of a chassis differ only in the node ID
+    that is passed to the chassis, so they share the chassis' address.
+    """
+    power_type = node['power_type']
+    power_driver = PowerDriverRegistry.get_item(power_type)
+    if power_driver is not None and power_driver.chassis:
+        address = node['context'].get('power_address')
+        if address:
+            return power_type, address
+    return power_type, json.dumps(node['context'], sort_keys=True)
+
+
+class PowerQueryLimits:
+    """Limits on concurrent power queries.
+
+    Each power type has its own limit of `max_concurrency` queries at a
+    time, so that slow BMCs of one type do not hold up the nodes of other
+    types, and the nodes behind each BMC, like the blades of a chassis, are
+    queried one at a time.
+    """
+
+    def __init__(self, max_concurrency=5):
+        super(PowerQueryLimits, self).__init__()
+        self.power_types = defaultdict(
+            partial(DeferredSemaphore, max_concurrency))
+        self.bmcs = defaultdict(DeferredLock)
+
+    def run(self, node, f, *args, **kwargs):
+        """Call `f` for `node` once the limits allow it."""
+        semaphore = self.power_types[node['power_type']]
+        lock = self.bmcs[get_bmc_key(node)]
+        return lock.run(semaphore.run, f, *args, **kwargs)
+
+
+def query_all_nodes(nodes, max_concurrency=5, clock=reactor, limits=None):
     """Queries the given nodes for their power state.
 
-    Nodes' states are reported back to the region.
+    Nodes' states are reported back to the region in batches.
+
+    Nodes that share the same power parameters are queried only once.
 
+    :param limits: The `PowerQueryLimits` to query the nodes within; pass
+        the same limits to concurrent calls so they share them. By default
+        new limits of `max_concurrency` are used.
     :return: A deferred, which fires once all nodes have been queried,
         successfully or not.
     """
-    semaphore = DeferredSemaphore(tokens=max_concurrency)
-    queries = (
-        semaphore.run(query_node, node, clock)
-        for node in nodes if node['power_type'] in PowerDriverRegistry)
-    return DeferredList(queries, consumeErrors=True)
+    if limits is None:
+        limits = PowerQueryLimits(max_concurrency)
+    queries = {}
+
+    def query_shared(system_id, hostname, power_type, context, clock):
+        key = power_type, json.dumps(context, sort_keys=True)
+        if key in queries:
+            return queries[key].get()
+        else:
+            queries[key] = DeferredValue()
+            return queries[key].observe(get_power_state(
+                system_id, hostname, power_type, context, clock=clock))
+
+    return DeferredList((
+        limits.run(node, query_node, node, clock, query=query_shared)
+        for node in nodes if node['power_type'] in PowerDriverRegistry),
+        consumeErrors=True)
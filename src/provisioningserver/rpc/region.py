@@ -31,9 +31,12 @@ __all__ = [
     "RequestNodeInfoByMACAddress",
     "SendEvent",
     "SendEventMACAddress",
+    "SendEvents",
     "UpdateInterfaces",
     "UpdateLastImageSync",
+    "UpdateLeases",
     "UpdateNodePowerState",
+    "UpdateNodePowerStates",
 ]
 
 from provisioningserver.rpc.arguments import (
@@ -316,6 +319,24 @@ class UpdateNodePowerState(amp.Command):
     errors = {NoSuchNode: b"NoSuchNode"}
 
 
+class UpdateNodePowerStates(amp.Command):
+    """Update the power states of many nodes at once.
+
+    :since: 2.5
+    """
+
+    arguments = [
+        (b"power_states", AmpList(
+            [(b"system_id", amp.Unicode()),
+             (b"power_state", amp.Unicode())])),
+    ]
+    response = [
+        # The system IDs that did not match a node.
+        (b"missing", amp.ListOf(amp.Unicode())),
+    ]
+    errors = []
+
+
 class RegisterEventType(amp.Command):
     """Register an event type.
 
@@ -352,6 +373,22 @@ class SendEvent(amp.Command):
     }
 
 
+class SendEvents(amp.Command):
+    """Send many node events at once.
+
+    :since: 2.5
+    """
+
+    arguments = [
+        (b"node_events", AmpList(
+            [(b"system_id", amp.Unicode()),
+             (b"type_name", amp.Unicode()),
+             (b"description", amp.Unicode())])),
+    ]
+    response = []
+    errors = []
+
+
 class SendEventMACAddress(amp.Command):
     """Send an event.
 
@@ -554,6 +591,30 @@ class UpdateLease(amp.Command):
     }
 
 
+class UpdateLeases(amp.Command):
+    """Report many DHCP lease updates from a cluster controller at once.
+
+    Each update has the same fields as `UpdateLease`.
+
+    :since: 2.5
+    """
+    arguments = [
+        (b"cluster_uuid", amp.Unicode()),
+        (b"updates", AmpList(
+            [(b"action", amp.Unicode()),
+             (b"mac", amp.Unicode()),
+             (b"ip_family", amp.Unicode()),
+             (b"ip", amp.Unicode()),
+             (b"timestamp", amp.Integer()),
+             (b"lease_time", amp.Integer(optional=True)),
+             (b"hostname", amp.Unicode(optional=True))])),
+    ]
+    response = []
+    errors = {
+        NoSuchCluster: b"NoSuchCluster",
+    }
+
+
 class UpdateServices(amp.Command):
     """Report service statuses that are monitored on the rackd.
 
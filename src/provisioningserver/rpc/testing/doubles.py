@@ -56,6 +56,8 @@ class FakeConnectionToRegion:
     address = attr.ib(default=(sentinel.host, sentinel.port))
     hostCertificate = attr.ib(default=sentinel.hostCertificate)
     peerCertificate = attr.ib(default=sentinel.peerCertificate)
+    inFlight = attr.ib(default=0)
+    latency = attr.ib(default=0.0)
 
     def callRemote(self, cmd, **arguments):
         return succeed(sentinel.response)
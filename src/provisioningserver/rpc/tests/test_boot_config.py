@@ -0,0 +1,97 @@
+# Copyright 2018 Canonical Ltd.  This software is licensed under the
+# GNU Affero General Public License version 3 (see the file LICENSE).
+
+"""Tests for :py:module:`~provisioningserver.rpc.boot_config`."""
+
+__all__ = []
+
+from maastesting.factory import factory
+from maastesting.testcase import MAASTestCase
+from provisioningserver.rpc import boot_config
+from provisioningserver.rpc.boot_config import BootConfigCache
+from testtools.matchers import HasLength
+from twisted.internet.task import Clock
+
+
+def make_params():
+    return {
+        "system_id": factory.make_name("system_id"),
+        "local_ip": factory.make_ipv4_address(),
+        "remote_ip": factory.make_ipv4_address(),
+        "mac": factory.make_mac_address("-"),
+    }
+
+
+def make_config(system_id=None):
+    config = {
+        "arch": factory.make_name("arch"),
+        "purpose": factory.make_name("purpose"),
+    }
+    if system_id is not None:
+        config["system_id"] = system_id
+    return config
+
+
+class TestBootConfigCache(MAASTestCase):
+
+    def test_get_returns_None_when_not_cached(self):
+        cache = BootConfigCache(Clock())
+        self.assertIsNone(cache.get(make_params()))
+
+    def test_get_returns_copy_of_cached_config(self):
+        cache = BootConfigCache(Clock())
+        params, config = make_params(), make_config()
+        cache.set(params, config)
+        cached = cache.get(dict(params))
+        self.assertEqual(config, cached)
+        self.assertIsNot(config, cached)
+        cached.clear()
+        self.assertEqual(config, cache.get(params))
+
+    def test_get_returns_None_once_expired(self):
+        clock = Clock()
+        cache = BootConfigCache(clock)
+        params = make_params()
+        cache.set(params, make_config())
+        clock.advance(cache.ttl)
+        self.assertIsNone(cache.get(params))
+        self.assertEqual({}, cache.configs)
+
+    def test_set_expires_configs_when_full(self):
+        clock = Clock()
+        cache = BootConfigCache(clock)
+        cache.max_size = 2
+        cache.set(make_params(), make_config())
+        cache.set(make_params(), make_config())
+        clock.advance(cache.ttl)
+        cache.set(make_params(), make_config())
+        self.assertThat(cache.configs, HasLength(1))
+
+    def test_invalidate_discards_configs_of_given_nodes(self):
+        cache = BootConfigCache(Clock())
+        system_id = factory.make_name("system_id")
+        params, other_params = make_params(), make_params()
+        cache.set(params, make_config(system_id))
+        cache.set(other_params, make_config(factory.make_name("system_id")))
+        cache.invalidate([system_id])
+        self.assertIsNone(cache.get(params))
+        self.assertIsNotNone(cache.get(other_params))
+
+    def test_invalidate_discards_all_configs(self):
+        cache = BootConfigCache(Clock())
+        cache.set(make_params(), make_config())
+        cache.set(make_params(), make_config(factory.make_name("system_id")))
+        cache.invalidate()
+        self.assertEqual({}, cache.configs)
+
+
+class TestInvalidateBootConfigs(MAASTestCase):
+
+    def test_invalidates_boot_config_cache(self):
+        cache = BootConfigCache(Clock())
+        self.patch(boot_config, "boot_config_cache", cache)
+        system_id = factory.make_name("system_id")
+        params = make_params()
+        cache.set(params, make_config(system_id))
+        boot_config.invalidate_boot_configs([system_id])
+        self.assertIsNone(cache.get(params))
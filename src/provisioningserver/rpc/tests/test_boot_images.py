@@ -34,6 +34,7 @@ from provisioningserver.rpc.boot_images import (
     fix_sources_for_cluster,
     get_hosts_from_sources,
     import_boot_images,
+    index_boot_images,
     is_import_boot_images_running,
     list_boot_images,
     reload_boot_images,
@@ -47,6 +48,7 @@ from provisioningserver.testing.config import (
 from provisioningserver.utils.twisted import pause
 from testtools.matchers import (
     Equals,
+    HasLength,
     Is,
 )
 from twisted.internet import defer
@@ -57,6 +59,21 @@ from twisted.internet.defer import (
 from twisted.internet.task import Clock
 
 
+def make_boot_image(subarch=None, subarches=None, **params):
+    image = {
+        "osystem": factory.make_name("os"),
+        "release": factory.make_name("release"),
+        "architecture": factory.make_name("arch"),
+        "subarchitecture": (
+            factory.make_name("subarch") if subarch is None else subarch),
+        "purpose": factory.make_name("purpose"),
+    }
+    image.update(params)
+    if subarches is not None:
+        image["supported_subarches"] = subarches
+    return image
+
+
 def make_sources():
     hosts = [factory.make_hostname().lower() for _ in range(2)]
     hosts.append(factory.make_ipv4_address())
@@ -111,13 +128,66 @@ class TestReloadBootImages(MAASTestCase):
     def test__sets_CACHED_BOOT_IMAGES(self):
         self.patch(
             boot_images, 'CACHED_BOOT_IMAGES', factory.make_name('old_cache'))
-        fake_boot_images = [factory.make_name('image') for _ in range(3)]
+        fake_boot_images = [make_boot_image() for _ in range(3)]
         mock_list_boot_images = self.patch(tftppath, 'list_boot_images')
         mock_list_boot_images.return_value = fake_boot_images
         reload_boot_images()
         self.assertEqual(
             boot_images.CACHED_BOOT_IMAGES, fake_boot_images)
 
+    def test__rebuilds_CACHED_BOOT_IMAGES_INDEX(self):
+        self.patch(boot_images, 'CACHED_BOOT_IMAGES_INDEX', (None, None))
+        fake_boot_images = [make_boot_image() for _ in range(3)]
+        mock_list_boot_images = self.patch(tftppath, 'list_boot_images')
+        mock_list_boot_images.return_value = fake_boot_images
+        reload_boot_images()
+        indexed, index = boot_images.CACHED_BOOT_IMAGES_INDEX
+        self.assertIs(fake_boot_images, indexed)
+        self.assertThat(index, HasLength(3))
+
+
+class TestIndexBootImages(MAASTestCase):
+
+    def setUp(self):
+        super(TestIndexBootImages, self).setUp()
+        self.patch(boot_images, 'CACHED_BOOT_IMAGES_INDEX', (None, None))
+
+    def get_key(self, image):
+        return (
+            image["osystem"], image["release"],
+            image["architecture"], image["purpose"])
+
+    def test__indexes_by_subarchitecture(self):
+        image = make_boot_image()
+        index = index_boot_images([image])
+        self.assertEqual(
+            {self.get_key(image): {image["subarchitecture"]: image}}, index)
+
+    def test__indexes_by_supported_subarches(self):
+        subarches = [factory.make_name("hwe") for _ in range(3)]
+        image = make_boot_image(subarches=",".join(subarches))
+        index = index_boot_images([image])
+        self.assertItemsEqual(
+            [image["subarchitecture"]] + subarches,
+            index[self.get_key(image)])
+
+    def test__prefers_exact_subarchitecture(self):
+        subarch = factory.make_name("hwe")
+        supporting = make_boot_image(subarch="generic", subarches=subarch)
+        exact = make_boot_image(
+            subarch=subarch, osystem=supporting["osystem"],
+            release=supporting["release"],
+            architecture=supporting["architecture"],
+            purpose=supporting["purpose"])
+        index = index_boot_images([supporting, exact])
+        self.assertIs(exact, index[self.get_key(exact)][subarch])
+
+    def test__caches_index_of_last_boot_images(self):
+        images = [make_boot_image()]
+        self.assertIs(index_boot_images(images), index_boot_images(images))
+        self.assertIsNot(
+            index_boot_images(images), index_boot_images(list(images)))
+
 
 class TestGetHostsFromSources(MAASTestCase):
 
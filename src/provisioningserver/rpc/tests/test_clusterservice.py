@@ -105,6 +105,7 @@ from provisioningserver.rpc.testing import (
 )
 from provisioningserver.rpc.testing.doubles import (
     DummyConnection,
+    FakeConnectionToRegion,
     StubOS,
 )
 from provisioningserver.security import set_shared_secret_on_filesystem
@@ -129,6 +130,7 @@ from testtools.matchers import (
     Is,
     IsInstance,
     KeysEqual,
+    LessThan,
     MatchesAll,
     MatchesListwise,
     MatchesStructure,
@@ -423,6 +425,35 @@ class TestClusterProtocol_IsImportBootImagesRunning(MAASTestCase):
         self.assertEqual({"running": True}, response)
 
 
+class TestClusterProtocol_InvalidateBootConfigs(MAASTestCase):
+
+    run_tests_with = MAASTwistedRunTest.make_factory(timeout=5)
+
+    def test_invalidate_boot_configs_is_registered(self):
+        protocol = Cluster()
+        responder = protocol.locateResponder(
+            cluster.InvalidateBootConfigs.commandName)
+        self.assertIsNotNone(responder)
+
+    @inlineCallbacks
+    def test_invalidate_boot_configs_invalidates_given_nodes(self):
+        invalidate = self.patch(clusterservice, "invalidate_boot_configs")
+        system_ids = [factory.make_name("system_id") for _ in range(3)]
+        response = yield call_responder(
+            Cluster(), cluster.InvalidateBootConfigs,
+            {"system_ids": system_ids})
+        self.assertEqual({}, response)
+        self.assertThat(invalidate, MockCalledOnceWith(system_ids))
+
+    @inlineCallbacks
+    def test_invalidate_boot_configs_invalidates_all_nodes(self):
+        invalidate = self.patch(clusterservice, "invalidate_boot_configs")
+        response = yield call_responder(
+            Cluster(), cluster.InvalidateBootConfigs, {})
+        self.assertEqual({}, response)
+        self.assertThat(invalidate, MockCalledOnceWith(None))
+
+
 class TestClusterProtocol_DescribePowerTypes(MAASTestCase):
 
     run_tests_with = MAASTwistedRunTest.make_factory(timeout=5)
@@ -1147,6 +1178,29 @@ class TestClusterClientService(MAASTestCase):
                 for conn in service.connections.values()
             })
 
+    def test_getClient_prefers_connection_with_fewest_calls_in_flight(self):
+        service = ClusterClientService(Clock())
+        service.connections = {
+            sentinel.eventloop01: FakeConnectionToRegion(inFlight=3),
+            sentinel.eventloop02: FakeConnectionToRegion(inFlight=1),
+            sentinel.eventloop03: FakeConnectionToRegion(inFlight=2),
+        }
+        self.assertEqual(
+            common.Client(service.connections[sentinel.eventloop02]),
+            service.getClient())
+
+    def test_getClient_prefers_faster_connection_when_equally_busy(self):
+        service = ClusterClientService(Clock())
+        service.connections = {
+            sentinel.eventloop01: FakeConnectionToRegion(latency=0.5),
+            sentinel.eventloop02: FakeConnectionToRegion(latency=0.1),
+            sentinel.eventloop03: FakeConnectionToRegion(
+                inFlight=1, latency=0.0),
+        }
+        self.assertEqual(
+            common.Client(service.connections[sentinel.eventloop02]),
+            service.getClient())
+
     def test_getClient_when_there_are_no_connections(self):
         service = ClusterClientService(Clock())
         service.connections = {}
@@ -1358,6 +1412,38 @@ class TestClusterClient(MAASTestCase):
         self.patch(client, "transport")
         verifyObject(IConnection, client)
 
+    def test_callRemote_tracks_calls_in_flight_and_latency(self):
+        client = self.make_running_client()
+        clock = client.service.clock
+        calls = [Deferred(), Deferred()]
+        self.patch(Cluster, "callRemote").side_effect = (
+            lambda command, **kwargs: calls.pop(0))
+        d1 = client.callRemote(sentinel.command, arg=sentinel.arg)
+        clock.advance(5)
+        d2 = client.callRemote(sentinel.command)
+        self.assertThat(client.inFlight, Equals(2))
+        clock.advance(5)
+        d1.callback(sentinel.response1)
+        self.assertThat(client.inFlight, Equals(1))
+        self.assertThat(client.latency, Equals(10 * client.latencyWeight))
+        d2.errback(Failure(ZeroDivisionError()))
+        self.assertThat(client.inFlight, Equals(0))
+        self.assertRaises(ZeroDivisionError, extract_result, d2)
+
+    def test_latency_decays_while_idle(self):
+        client = self.make_running_client()
+        clock = client.service.clock
+        call = Deferred()
+        self.patch(Cluster, "callRemote").return_value = call
+        client.callRemote(sentinel.command)
+        clock.advance(10)
+        call.callback(sentinel.response)
+        latency = client.latency
+        clock.advance(client.latencyHalfLife)
+        self.assertThat(client.latency, Equals(latency / 2))
+        clock.advance(client.latencyHalfLife * 10)
+        self.assertThat(client.latency, LessThan(latency / 1000))
+
     def test_ident(self):
         client = self.make_running_client()
         client.eventloop = self.getUniqueString()
@@ -36,6 +36,7 @@ from provisioningserver.dhcp.testing.config import (
     make_shared_network,
     make_subnet_dhcp_snippets,
 )
+from provisioningserver.dhcp.omapi import OmapiResult
 from provisioningserver.rpc import (
     dhcp,
     exceptions,
@@ -299,154 +300,96 @@ class TestDHCPState(MAASTestCase):
                     global_dhcp_snippets, key=itemgetter("name"))))
 
 
-class TestRemoveHostMap(MAASTestCase):
-
-    def test_calls_omshell_remove(self):
-        omshell = Mock()
-        mac = factory.make_mac_address()
-        dhcp._remove_host_map(omshell, mac)
-        self.assertThat(omshell.remove, MockCalledOnceWith(mac))
-
-    def test_raises_error_when_omshell_crashes(self):
-        error_message = factory.make_name("error").encode("ascii")
-        omshell = Mock()
-        omshell.remove.side_effect = ExternalProcessError(
-            returncode=2, cmd=("omshell",), output=error_message)
-        mac = factory.make_mac_address()
-        with FakeLogger("maas.dhcp") as logger:
-            error = self.assertRaises(
-                exceptions.CannotRemoveHostMap, dhcp._remove_host_map,
-                omshell, mac)
-        # The CannotRemoveHostMap exception includes a message describing the
-        # problematic mapping.
-        self.assertDocTestMatches(
-            "Could not remove host map for %s: ..." % (mac),
-            str(error))
-        # A message is also written to the maas.dhcp logger that describes the
-        # problematic mapping.
-        self.assertDocTestMatches(
-            "Could not remove host map for %s: ..." % (mac),
-            logger.output)
-
-    def test_raises_error_when_omshell_not_connected(self):
-        error = ExternalProcessError(
-            returncode=2, cmd=("omshell",), output="")
-        self.patch(ExternalProcessError, 'output_as_unicode', 'not connected.')
-        omshell = Mock()
-        omshell.remove.side_effect = error
-        mac = factory.make_mac_address()
-        with FakeLogger("maas.dhcp") as logger:
-            error = self.assertRaises(
-                exceptions.CannotRemoveHostMap, dhcp._remove_host_map,
-                omshell, mac)
-        # The CannotCreateHostMap exception includes a message describing the
-        # problematic mapping.
-        self.assertDocTestMatches(
-            "Could not remove host map for %s: "
-            "The DHCP server could not be reached." % (mac),
-            str(error))
-        # A message is also written to the maas.dhcp logger that describes the
-        # problematic mapping.
-        self.assertDocTestMatches(
-            "Could not remove host map for %s: "
-            "The DHCP server could not be reached." % (mac),
-            logger.output)
-
-
-class TestCreateHostMap(MAASTestCase):
-
-    def test_calls_omshell_create(self):
-        omshell = Mock()
-        mac = factory.make_mac_address()
-        ip = factory.make_ip_address()
-        dhcp._create_host_map(omshell, mac, ip)
-        self.assertThat(omshell.create, MockCalledOnceWith(ip, mac))
-
-    def test_raises_error_when_omshell_crashes(self):
-        error_message = factory.make_name("error").encode("ascii")
-        omshell = Mock()
-        omshell.create.side_effect = ExternalProcessError(
-            returncode=2, cmd=("omshell",), output=error_message)
-        mac = factory.make_mac_address()
-        ip = factory.make_ip_address()
-        with FakeLogger("maas.dhcp") as logger:
-            error = self.assertRaises(
-                exceptions.CannotCreateHostMap, dhcp._create_host_map,
-                omshell, mac, ip)
-        # The CannotCreateHostMap exception includes a message describing the
-        # problematic mapping.
-        self.assertDocTestMatches(
-            "Could not create host map for %s -> %s: ..." % (mac, ip),
-            str(error))
-        # A message is also written to the maas.dhcp logger that describes the
-        # problematic mapping.
-        self.assertDocTestMatches(
-            "Could not create host map for %s -> %s: ..." % (mac, ip),
-            logger.output)
-
-    def test_raises_error_when_omshell_not_connected(self):
-        error = ExternalProcessError(
-            returncode=2, cmd=("omshell",), output="")
-        self.patch(ExternalProcessError, 'output_as_unicode', 'not connected.')
-        omshell = Mock()
-        omshell.create.side_effect = error
-        mac = factory.make_mac_address()
-        ip = factory.make_ip_address()
-        with FakeLogger("maas.dhcp") as logger:
-            error = self.assertRaises(
-                exceptions.CannotCreateHostMap, dhcp._create_host_map,
-                omshell, mac, ip)
-        # The CannotCreateHostMap exception includes a message describing the
-        # problematic mapping.
-        self.assertDocTestMatches(
-            "Could not create host map for %s -> %s: "
-            "The DHCP server could not be reached." % (mac, ip),
-            str(error))
-        # A message is also written to the maas.dhcp logger that describes the
-        # problematic mapping.
-        self.assertDocTestMatches(
-            "Could not create host map for %s -> %s: "
-            "The DHCP server could not be reached." % (mac, ip),
-            logger.output)
-
-
 class TestUpdateHost(MAASTestCase):
 
-    def test__creates_omshell_with_correct_arguments(self):
-        omshell = self.patch(dhcp, "Omshell")
+    def setUp(self):
+        super(TestUpdateHost, self).setUp()
+        self.patch(dhcp, "_omapi_clients", {})
+
+    def make_server(self):
         server = Mock()
         server.ipv6 = factory.pick_bool()
+        server.omapi_key = factory.make_name("omapi_key")
+        return server
+
+    def test__creates_client_with_correct_arguments(self):
+        client = self.patch(dhcp, "OmapiClient")
+        client.return_value.update_hosts.return_value = []
+        server = self.make_server()
         dhcp._update_hosts(server, [], [], [])
-        self.assertThat(omshell, MockCallsMatch(
+        self.assertThat(client, MockCallsMatch(
             call(
                 ipv6=server.ipv6, server_address="127.0.0.1",
                 shared_key=server.omapi_key),
         ))
 
-    def test__performs_operations(self):
-        omshell = Mock()
-        self.patch(dhcp, "Omshell").return_value = omshell
+    def test__reuses_client_while_key_unchanged(self):
+        client = self.patch(dhcp, "OmapiClient")
+        client.return_value.shared_key = sentinel.omapi_key
+        client.return_value.update_hosts.return_value = []
+        server = self.make_server()
+        server.omapi_key = sentinel.omapi_key
+        dhcp._update_hosts(server, [], [], [])
+        dhcp._update_hosts(server, [], [], [])
+        self.assertThat(client, MockCalledOnceWith(
+            ipv6=server.ipv6, server_address="127.0.0.1",
+            shared_key=sentinel.omapi_key))
+
+    def test__performs_operations_as_one_batch(self):
+        client = self.patch(dhcp, "OmapiClient").return_value
+        client.update_hosts.return_value = []
         remove_host = make_host()
         add_host = make_host()
         modify_host = make_host()
-        server = Mock()
-        server.ipv6 = factory.pick_bool()
+        server = self.make_server()
         dhcp._update_hosts(server, [remove_host], [add_host], [modify_host])
         self.assertThat(
-            omshell.remove,
-            MockCallsMatch(
-                call(remove_host["mac"]),
-            ))
-        self.assertThat(
-            omshell.create,
-            MockCallsMatch(
-                call(add_host["ip"], add_host["mac"]),
-            ))
-        self.assertThat(
-            omshell.modify,
-            MockCallsMatch(
-                call(modify_host["ip"], modify_host["mac"]),
-            ))
+            client.update_hosts,
+            MockCalledOnceWith(
+                remove=[remove_host["mac"]],
+                add=[(add_host["mac"], add_host["ip"])],
+                modify=[(modify_host["mac"], modify_host["ip"])]))
+
+    def test__logs_every_failure_and_raises_first(self):
+        client = self.patch(dhcp, "OmapiClient").return_value
+        remove_mac = factory.make_mac_address()
+        modify_mac = factory.make_mac_address()
+        modify_ip = factory.make_ip_address()
+        client.update_hosts.return_value = [
+            OmapiResult("remove", remove_mac, None, "not connected"),
+            OmapiResult(
+                "create", factory.make_mac_address(),
+                factory.make_ip_address(), None),
+            OmapiResult("modify", modify_mac, modify_ip, "not found"),
+        ]
+        with FakeLogger("maas.dhcp") as logger:
+            error = self.assertRaises(
+                exceptions.CannotRemoveHostMap, dhcp._update_hosts,
+                self.make_server(), [], [], [])
+        self.assertEqual(
+            "Could not remove host map for %s: not connected" % remove_mac,
+            str(error))
+        self.assertDocTestMatches(
+            "Could not remove host map for %s: not connected\n"
+            "Could not modify host map for %s -> %s: not found" % (
+                remove_mac, modify_mac, modify_ip),
+            logger.output)
+
+    def test__raises_error_when_server_not_reachable(self):
+        client = self.patch(dhcp, "OmapiClient").return_value
+        client.update_hosts.side_effect = ConnectionRefusedError()
+        server = self.make_server()
+        with FakeLogger("maas.dhcp") as logger:
+            error = self.assertRaises(
+                exceptions.CannotConfigureDHCP, dhcp._update_hosts,
+                server, [], [], [])
+        self.assertDocTestMatches(
+            "Could not update host maps for %s: "
+            "The DHCP server could not be reached." % (
+                server.descriptive_name),
+            str(error))
+        self.assertDocTestMatches(str(error), logger.output)
+        self.assertThat(client.close, MockCalledOnceWith())
 
 
 class TestConfigureDHCP(MAASTestCase):
@@ -53,6 +53,7 @@ from testtools import ExpectedException
 from testtools.deferredruntest import assert_fails_with
 from testtools.matchers import (
     Equals,
+    HasLength,
     IsInstance,
     Not,
 )
@@ -72,7 +73,21 @@ from twisted.python.failure import Failure
 def suppress_reporting(test):
     # Skip telling the region; just pass-through the query result.
     report_power_state = test.patch(power, "report_power_state")
-    report_power_state.side_effect = lambda d, system_id, hostname: d
+    report_power_state.side_effect = (
+        lambda d, system_id, hostname, reporter=None: d)
+
+
+def use_new_reporter(test):
+    # Don't share queued reports with other tests.
+    return test.patch(power, "power_reporter", power.PowerStateReporter())
+
+
+def patch_reporter(test):
+    # Skip telling the region; just record what would be reported.
+    reporter = test.patch(power, "power_reporter", MagicMock())
+    reporter.update.return_value = succeed(None)
+    reporter.event.return_value = succeed(None)
+    return reporter
 
 
 class TestPowerHelpers(MAASTestCase):
@@ -81,6 +96,7 @@ class TestPowerHelpers(MAASTestCase):
 
     def setUp(self):
         super(TestPowerHelpers, self).setUp()
+        use_new_reporter(self)
         self.useFixture(EventTypesAllRegistered())
 
     def patch_rpc_methods(self):
@@ -131,6 +147,33 @@ class TestPowerHelpers(MAASTestCase):
         )
         self.assertIsNone(extract_result(d))
 
+    def test_power_change_success_reports_in_batches(self):
+        system_id = factory.make_name('system_id')
+        hostname = factory.make_name('hostname')
+        fixture = self.useFixture(MockClusterToRegionRPCFixture())
+        protocol, io = fixture.makeEventLoop(
+            region.UpdateNodePowerStates, region.SendEvents)
+        protocol.UpdateNodePowerStates.return_value = succeed(
+            {"missing": []})
+        protocol.SendEvents.return_value = succeed({})
+        d = power.power_change_success(system_id, hostname, 'off')
+        io.flush()
+        self.assertThat(
+            protocol.UpdateNodePowerStates, MockCalledOnceWith(
+                ANY, power_states=[
+                    {"system_id": system_id, "power_state": 'off'},
+                ]))
+        self.assertThat(
+            protocol.SendEvents, MockCalledOnceWith(
+                ANY, node_events=[
+                    {
+                        "system_id": system_id,
+                        "type_name": EVENT_TYPES.NODE_POWERED_OFF,
+                        "description": '',
+                    },
+                ]))
+        self.assertIsNone(extract_result(d))
+
     def test_power_change_starting_emits_event(self):
         system_id = factory.make_name('system_id')
         hostname = factory.make_name('hostname')
@@ -175,6 +218,7 @@ class TestChangePowerState(MAASTestCase):
 
     def setUp(self):
         super(TestChangePowerState, self).setUp()
+        use_new_reporter(self)
         self.useFixture(EventTypesAllRegistered())
 
     @inlineCallbacks
@@ -414,6 +458,7 @@ class TestMaybeChangePowerState(MAASTestCase):
 
     def setUp(self):
         super(TestMaybeChangePowerState, self).setUp()
+        use_new_reporter(self)
         self.patch(power, 'power_action_registry', {})
         for _, power_driver in PowerDriverRegistry:
             self.patch(
@@ -706,6 +751,7 @@ class TestPowerQuery(MAASTestCase):
 
     def setUp(self):
         super(TestPowerQuery, self).setUp()
+        use_new_reporter(self)
         self.useFixture(EventTypesAllRegistered())
         self.patch(power, "deferToThread", maybeDeferred)
         for _, power_driver in PowerDriverRegistry:
@@ -818,7 +864,7 @@ class TestPowerQuery(MAASTestCase):
         err_msg = factory.make_name('error')
 
         _, _, io = self.patch_rpc_methods()
-        self.patch_autospec(power, 'power_state_update')
+        reporter = patch_reporter(self)
 
         # Simulate a failure when querying state.
         query = fail(exceptions.PowerActionFail(err_msg))
@@ -830,8 +876,7 @@ class TestPowerQuery(MAASTestCase):
             exceptions.PowerActionFail, extract_result, report)
         self.assertEqual(err_msg, str(error))
         self.assertThat(
-            power.power_state_update,
-            MockCalledOnceWith(system_id, 'error'))
+            reporter.update, MockCalledOnceWith(system_id, 'error'))
 
     def test_report_power_state_changes_power_state_if_success(self):
         system_id = factory.make_name('system_id')
@@ -839,7 +884,7 @@ class TestPowerQuery(MAASTestCase):
         power_state = random.choice(['on', 'off'])
 
         _, _, io = self.patch_rpc_methods()
-        self.patch_autospec(power, 'power_state_update')
+        reporter = patch_reporter(self)
 
         # Simulate a success when querying state.
         query = succeed(power_state)
@@ -849,8 +894,7 @@ class TestPowerQuery(MAASTestCase):
 
         self.assertEqual(power_state, extract_result(report))
         self.assertThat(
-            power.power_state_update,
-            MockCalledOnceWith(system_id, power_state))
+            reporter.update, MockCalledOnceWith(system_id, power_state))
 
     def test_report_power_state_changes_power_state_if_unknown(self):
         system_id = factory.make_name('system_id')
@@ -858,7 +902,7 @@ class TestPowerQuery(MAASTestCase):
         power_state = "unknown"
 
         _, _, io = self.patch_rpc_methods()
-        self.patch_autospec(power, 'power_state_update')
+        reporter = patch_reporter(self)
 
         # Simulate a success when querying state.
         query = succeed(power_state)
@@ -868,8 +912,173 @@ class TestPowerQuery(MAASTestCase):
 
         self.assertEqual(power_state, extract_result(report))
         self.assertThat(
-            power.power_state_update,
-            MockCalledOnceWith(system_id, power_state))
+            reporter.update, MockCalledOnceWith(system_id, power_state))
+
+
+class TestPowerStateReporter(MAASTestCase):
+
+    run_tests_with = MAASTwistedRunTest.make_factory(timeout=5)
+
+    def setUp(self):
+        super(TestPowerStateReporter, self).setUp()
+        self.useFixture(EventTypesAllRegistered())
+
+    def patch_rpc_methods(self, *commands):
+        fixture = self.useFixture(MockClusterToRegionRPCFixture())
+        protocol, io = fixture.makeEventLoop(*commands)
+        return protocol, io
+
+    def make_power_states(self, count=3):
+        return [
+            (factory.make_name('system_id'), random.choice(['on', 'off']))
+            for _ in range(count)
+        ]
+
+    def make_events(self, count=3):
+        return [
+            (factory.make_name('system_id'), factory.make_name('event'))
+            for _ in range(count)
+        ]
+
+    def test_update_calls_UpdateNodePowerStates(self):
+        protocol, io = self.patch_rpc_methods(region.UpdateNodePowerStates)
+        protocol.UpdateNodePowerStates.return_value = succeed(
+            {"missing": []})
+        system_id = factory.make_name('system_id')
+        d = power.PowerStateReporter().update(system_id, 'on')
+        io.flush()
+        self.assertIsNone(extract_result(d))
+        self.assertThat(
+            protocol.UpdateNodePowerStates, MockCalledOnceWith(
+                ANY, power_states=[
+                    {"system_id": system_id, "power_state": 'on'},
+                ]))
+
+    def test_update_queues_power_states_while_sending(self):
+        protocol, io = self.patch_rpc_methods(region.UpdateNodePowerStates)
+        responses = [Deferred(), succeed({"missing": []})]
+        protocol.UpdateNodePowerStates.side_effect = responses
+        power_states = self.make_power_states()
+        reporter = power.PowerStateReporter()
+        ds = [
+            reporter.update(system_id, state)
+            for system_id, state in power_states
+        ]
+        io.flush()
+        self.assertThat(
+            protocol.UpdateNodePowerStates, MockCalledOnceWith(
+                ANY, power_states=[
+                    {"system_id": system_id, "power_state": state}
+                    for system_id, state in power_states[:1]
+                ]))
+        responses[0].callback({"missing": []})
+        io.flush()
+        self.assertThat(
+            protocol.UpdateNodePowerStates, MockCalledWith(
+                ANY, power_states=[
+                    {"system_id": system_id, "power_state": state}
+                    for system_id, state in power_states[1:]
+                ]))
+        self.assertEqual([None] * len(ds), list(map(extract_result, ds)))
+
+    def test_flush_sends_at_most_batch_size_at_once(self):
+        protocol, io = self.patch_rpc_methods(region.UpdateNodePowerStates)
+        protocol.UpdateNodePowerStates.return_value = succeed(
+            {"missing": []})
+        power_states = self.make_power_states()
+        reporter = power.PowerStateReporter()
+        reporter.batch_size = 2
+        # Queue the states without sending them.
+        reporter.lock.acquire()
+        for system_id, state in power_states:
+            reporter.update(system_id, state)
+        reporter.lock.release()
+        d = reporter.flush()
+        io.flush()
+        self.assertIsNone(extract_result(d))
+        self.assertThat(
+            protocol.UpdateNodePowerStates, MockCallsMatch(*(
+                call(ANY, power_states=[
+                    {"system_id": system_id, "power_state": state}
+                    for system_id, state in batch
+                ])
+                for batch in (power_states[:2], power_states[2:])
+            )))
+
+    def test_flush_does_nothing_when_nothing_is_pending(self):
+        protocol, io = self.patch_rpc_methods(region.UpdateNodePowerStates)
+        d = power.PowerStateReporter().flush()
+        io.flush()
+        self.assertIsNone(extract_result(d))
+        self.assertThat(protocol.UpdateNodePowerStates, MockNotCalled())
+
+    def test_update_falls_back_to_UpdateNodePowerState(self):
+        protocol, io = self.patch_rpc_methods(region.UpdateNodePowerState)
+        protocol.UpdateNodePowerState.return_value = succeed({})
+        power_states = self.make_power_states()
+        reporter = power.PowerStateReporter()
+        for system_id, state in power_states:
+            reporter.update(system_id, state)
+        io.flush()
+        self.assertThat(
+            protocol.UpdateNodePowerState, MockCallsMatch(*(
+                call(ANY, system_id=system_id, power_state=state)
+                for system_id, state in power_states
+            )))
+
+    def test_update_fails_when_the_region_is_unavailable(self):
+        self.patch(power, "getRegionClient").side_effect = (
+            exceptions.NoConnectionsAvailable())
+        d = power.PowerStateReporter().update(
+            factory.make_name('system_id'), 'on')
+        return assert_fails_with(d, exceptions.NoConnectionsAvailable)
+
+    def test_event_calls_SendEvents(self):
+        protocol, io = self.patch_rpc_methods(region.SendEvents)
+        protocol.SendEvents.return_value = succeed({})
+        events = self.make_events()
+        reporter = power.PowerStateReporter()
+        # Queue the events without sending them.
+        reporter.lock.acquire()
+        ds = [
+            reporter.event(
+                EVENT_TYPES.NODE_POWERED_ON, system_id,
+                factory.make_name('hostname'), description)
+            for system_id, description in events
+        ]
+        reporter.lock.release()
+        reporter.flush()
+        io.flush()
+        self.assertEqual([None] * len(ds), list(map(extract_result, ds)))
+        self.assertThat(
+            protocol.SendEvents, MockCalledOnceWith(
+                ANY, node_events=[
+                    {
+                        "system_id": system_id,
+                        "type_name": EVENT_TYPES.NODE_POWERED_ON,
+                        "description": description,
+                    }
+                    for system_id, description in events
+                ]))
+
+    def test_event_falls_back_to_SendEvent(self):
+        protocol, io = self.patch_rpc_methods(region.SendEvent)
+        protocol.SendEvent.return_value = succeed({})
+        events = self.make_events()
+        reporter = power.PowerStateReporter()
+        for system_id, description in events:
+            reporter.event(
+                EVENT_TYPES.NODE_POWERED_ON, system_id,
+                factory.make_name('hostname'), description)
+        io.flush()
+        self.assertThat(
+            protocol.SendEvent, MockCallsMatch(*(
+                call(
+                    ANY, system_id=system_id,
+                    type_name=EVENT_TYPES.NODE_POWERED_ON,
+                    description=description)
+                for system_id, description in events
+            )))
 
 
 class TestPowerQueryExceptions(MAASTestCase):
@@ -906,11 +1115,8 @@ class TestPowerQueryExceptions(MAASTestCase):
         query = self.patch_autospec(power, self.func)
         query.side_effect = always_fail_with(exception)
 
-        # Intercept calls to power_state_update() and send_node_event().
-        power_state_update = self.patch_autospec(power, "power_state_update")
-        power_state_update.return_value = succeed(None)
-        send_node_event = self.patch_autospec(power, "send_node_event")
-        send_node_event.return_value = succeed(None)
+        # Intercept the reports of the power state and the node event.
+        reporter = patch_reporter(self)
 
         self.patch(
             self.power_driver, "detect_missing_packages").return_value = []
@@ -946,10 +1152,10 @@ class TestPowerQueryExceptions(MAASTestCase):
 
         # An attempt was made to report the failure to the region.
         self.assertThat(
-            power_state_update, MockCalledOnceWith(system_id, 'error'))
+            reporter.update, MockCalledOnceWith(system_id, 'error'))
         # An attempt was made to log a node event with details.
         self.assertThat(
-            send_node_event, MockCalledOnceWith(
+            reporter.event, MockCalledOnceWith(
                 EVENT_TYPES.NODE_POWER_QUERY_FAILED,
                 system_id, hostname, exception_message))
 
@@ -965,6 +1171,7 @@ class TestPowerQueryAsync(MAASTestCase):
 
     def setUp(self):
         super(TestPowerQueryAsync, self).setUp()
+        use_new_reporter(self)
 
     def make_node(self, power_type=None):
         system_id = factory.make_name('system_id')
@@ -1010,7 +1217,7 @@ class TestPowerQueryAsync(MAASTestCase):
         get_power_state = self.patch(power, 'get_power_state')
         get_power_state.side_effect = queries
         report_power_state = self.patch(power, 'report_power_state')
-        report_power_state.side_effect = lambda d, sid, hn: d
+        report_power_state.side_effect = lambda d, sid, hn, reporter: d
 
         yield power.query_all_nodes(nodes)
         self.assertThat(get_power_state, MockCallsMatch(*(
@@ -1021,10 +1228,97 @@ class TestPowerQueryAsync(MAASTestCase):
             for node in nodes
         )))
         self.assertThat(report_power_state, MockCallsMatch(*(
-            call(query, node['system_id'], node['hostname'])
+            call(query, node['system_id'], node['hostname'], reporter=None)
             for query, node in zip(queries, nodes)
         )))
 
+    def test_query_all_nodes_reports_power_states_in_batches(self):
+        self.useFixture(EventTypesAllRegistered())
+        fixture = self.useFixture(MockClusterToRegionRPCFixture())
+        protocol, io = fixture.makeEventLoop(
+            region.UpdateNodePowerStates, region.SendEvents)
+        protocol.UpdateNodePowerStates.return_value = succeed(
+            {"missing": []})
+        protocol.SendEvents.return_value = succeed({})
+        nodes = self.make_nodes(5)
+        queries = [Deferred() for _ in nodes]
+        get_power_state = self.patch(power, 'get_power_state')
+        get_power_state.side_effect = queries
+
+        d = power.query_all_nodes(nodes)
+        for query, node in zip(queries, nodes):
+            query.callback(node['power_state'])
+        io.flush()
+
+        self.assertThat(extract_result(d), HasLength(len(nodes)))
+        # The first state is sent straight away; the others are sent
+        # together once it has been reported.
+        self.assertThat(
+            protocol.UpdateNodePowerStates, MockCallsMatch(*(
+                call(ANY, power_states=[
+                    {
+                        "system_id": node['system_id'],
+                        "power_state": node['power_state'],
+                    }
+                    for node in batch
+                ])
+                for batch in (nodes[:1], nodes[1:])
+            )))
+
+    @inlineCallbacks
+    def test_query_all_nodes_queries_shared_power_parameters_once(self):
+        node1, node2 = self.make_nodes(2)
+        node2['context'] = node1['context']
+        node2['power_type'] = node1['power_type']
+        get_power_state = self.patch(power, 'get_power_state')
+        get_power_state.return_value = succeed('on')
+        suppress_reporting(self)
+
+        results = yield power.query_all_nodes([node1, node2])
+        self.assertThat(get_power_state, MockCalledOnceWith(
+            node1['system_id'], node1['hostname'],
+            node1['power_type'], node1['context'], clock=reactor))
+        self.assertEqual([(True, 'on'), (True, 'on')], results)
+
+    def test_query_all_nodes_limits_concurrency_per_power_type(self):
+        nodes = self.make_nodes(3)
+        for node in nodes:
+            node['power_type'] = nodes[0]['power_type']
+        queries = [Deferred() for _ in nodes]
+        get_power_state = self.patch(power, 'get_power_state')
+        get_power_state.side_effect = queries
+        suppress_reporting(self)
+
+        d = power.query_all_nodes(nodes, max_concurrency=2)
+        self.assertEqual(2, get_power_state.call_count)
+        queries[0].callback('on')
+        self.assertEqual(3, get_power_state.call_count)
+        queries[1].callback('on')
+        queries[2].callback('on')
+        return d
+
+    def test_query_all_nodes_queries_blades_of_chassis_one_at_a_time(self):
+        power_type = random.choice([
+            driver.name
+            for _, driver in PowerDriverRegistry
+            if driver.queryable and driver.chassis
+        ])
+        power_address = factory.make_ipv4_address()
+        nodes = [self.make_node(power_type) for _ in range(2)]
+        for node in nodes:
+            node['context']['power_address'] = power_address
+        queries = [Deferred() for _ in nodes]
+        get_power_state = self.patch(power, 'get_power_state')
+        get_power_state.side_effect = queries
+        suppress_reporting(self)
+
+        d = power.query_all_nodes(nodes)
+        self.assertEqual(1, get_power_state.call_count)
+        queries[0].callback('on')
+        self.assertEqual(2, get_power_state.call_count)
+        queries[1].callback('off')
+        return d
+
     @inlineCallbacks
     def test_query_all_nodes_skips_nodes_in_action_registry(self):
         nodes = self.make_nodes()
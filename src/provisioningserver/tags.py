@@ -4,15 +4,21 @@
 """Cluster-side evaluation of tags."""
 
 __all__ = [
+    'DetailsDocumentCache',
+    'combine_detail_digests',
+    'digest_details',
     'merge_details',
+    'merge_details_cached',
     'merge_details_cleanly',
     'process_node_tags',
     ]
 
 from collections import OrderedDict
 from functools import partial
+import hashlib
 import http.client
 import json
+import threading
 import urllib.error
 import urllib.parse
 import urllib.request
@@ -38,6 +44,10 @@ maaslog = get_maas_logger("tag_processing")
 # face of it, appears excessive.
 DEFAULT_BATCH_SIZE = 100
 
+# Merged details documents are cached until their details add up to this
+# many bytes of XML; the parsed documents take a few times as much memory.
+DEFAULT_DETAILS_CACHE_SIZE = 64 * 1024 * 1024
+
 
 def process_response(response):
     """All responses should be httplib.OK.
@@ -227,6 +237,105 @@ def merge_details_cleanly(details):
     return _details_do_merge(details, root)
 
 
+def combine_detail_digests(digests):
+    """Combine the digests of each of a node's details into one.
+
+    :param digests: A ``{"name": digest, ...}`` map, where `name` is the
+        namespace of the detail, and `digest` is a string digest of its XML,
+        or `None` if the node does not have that detail.
+    :return: A string digest.
+    """
+    combined = hashlib.sha1()
+    for namespace in sorted(digests):
+        digest = digests[namespace]
+        combined.update(("%s=%s;" % (
+            namespace, "" if digest is None else digest)).encode("utf-8"))
+    return combined.hexdigest()
+
+
+def digest_details(details):
+    """Return a digest of node details.
+
+    `details` should be of the form accepted by `merge_details`.
+    """
+    return combine_detail_digests({
+        namespace: None if xmldata is None else hashlib.md5(
+            xmldata).hexdigest()
+        for namespace, xmldata in details.items()
+    })
+
+
+class DetailsDocumentCache:
+    """Remember merged details documents.
+
+    Documents are keyed by a digest of the details they were merged from
+    (see `digest_details`), not by any tag definition, so any expression can
+    be evaluated against them. A node's details only need to be fetched and
+    merged again when they change. The least recently used documents are
+    forgotten first once their details add up to more than `size` bytes.
+    """
+
+    def __init__(self, size=DEFAULT_DETAILS_CACHE_SIZE):
+        super().__init__()
+        self.size = size
+        self._documents = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def get(self, digest):
+        """Return the cached document, or `None` if there isn't one."""
+        with self._lock:
+            entry = self._documents.get(digest)
+            if entry is None:
+                return None
+            else:
+                self._documents.move_to_end(digest)
+                document, _ = entry
+                return document
+
+    def set(self, digest, document, size):
+        """Cache `document`, merged from `size` bytes of details."""
+        if size > self.size:
+            return  # It would only push everything else out.
+        with self._lock:
+            previous = self._documents.pop(digest, None)
+            if previous is not None:
+                self._total -= previous[1]
+            self._documents[digest] = document, size
+            self._total += size
+            while self._total > self.size:
+                _, (_, evicted) = self._documents.popitem(last=False)
+                self._total -= evicted
+
+
+def size_details(details):
+    """Return the number of bytes of XML in node details.
+
+    `details` should be of the form accepted by `merge_details`.
+    """
+    return sum(
+        len(xmldata) for xmldata in details.values()
+        if xmldata is not None)
+
+
+def merge_details_cached(details, cache):
+    """Merge `details` as `merge_details` does, remembering the result.
+
+    :param cache: A `DetailsDocumentCache`.
+    :return: A ``(digest, document)`` tuple.
+    """
+    digest = digest_details(details)
+    document = cache.get(digest)
+    if document is None:
+        document = merge_details(details)
+        cache.set(digest, document, size_details(details))
+    return digest, document
+
+
+# Merged details documents in this process.
+details_documents = DetailsDocumentCache()
+
+
 def gen_batch_slices(count, size):
     """Generate `slice`s to split `count` objects into batches.
 
@@ -274,19 +383,58 @@ def gen_node_details(client, batches):
             yield system_id, merge_details(details)
 
 
-def process_all(client, rack_id, tag_name, tag_definition, system_ids,
+def gen_node_documents(client, batches):
+    """Fetch and merge node details, reusing cached documents.
+
+    Like `gen_node_details` this fetches details lazily in batches, but
+    nodes whose digest is given, and whose document is in
+    `details_documents`, are not fetched or merged again.
+
+    :param batches: An iterator of lists of ``{"system_id": ...,
+        "digest": ...}`` dicts, where the digest may be missing or `None`.
+    :return: An iterator of ``(system-id, details-document)`` tuples.
+    """
+    get_details = partial(get_details_for_nodes, client)
+    for batch in batches:
+        system_ids = []
+        for node in batch:
+            digest = node.get("digest")
+            document = (
+                None if digest is None else details_documents.get(digest))
+            if document is None:
+                system_ids.append(node["system_id"])
+            else:
+                yield node["system_id"], document
+        if len(system_ids) > 0:
+            for system_id, details in get_details(system_ids).items():
+                _, document = merge_details_cached(
+                    details, details_documents)
+                yield system_id, document
+
+
+def gen_node_results(client, batches, xpath):
+    """Evaluate `xpath` against the details of nodes.
+
+    See `gen_node_documents` for how details are fetched.
+
+    :return: An iterator of ``(system-id, matched)`` tuples.
+    """
+    for system_id, document in gen_node_documents(client, batches):
+        yield system_id, try_match_xpath(xpath, document, logger=maaslog)
+
+
+def process_all(client, rack_id, tag_name, tag_definition, nodes,
                 xpath, batch_size=None):
     log.debug(
         "Processing {nums} system_ids for tag {name}.",
-        nums=len(system_ids), name=tag_name)
+        nums=len(nodes), name=tag_name)
 
     if batch_size is None:
         batch_size = DEFAULT_BATCH_SIZE
 
-    batches = gen_batches(system_ids, batch_size)
-    node_details = gen_node_details(client, batches)
-    nodes_matched, nodes_unmatched = classify(
-        partial(try_match_xpath, xpath, logger=maaslog), node_details)
+    batches = gen_batches(nodes, batch_size)
+    node_results = gen_node_results(client, batches, xpath)
+    nodes_matched, nodes_unmatched = classify(bool, node_results)
     post_updated_nodes(
         client, rack_id, tag_name, tag_definition,
         nodes_matched, nodes_unmatched)
@@ -298,7 +446,8 @@ def process_node_tags(
     """Update the nodes for a new/changed tag definition.
 
     :param rack_id: System ID for the rack controller.
-    :param nodes: List of nodes to process tags for.
+    :param nodes: List of nodes to process tags for, as dicts with a
+        "system_id" and, optionally, the "digest" of their details.
     :param client: A `MAASClient` used to fetch the node's details via
         calls to the web API.
     :param tag_name: Name of the tag to update nodes for
@@ -308,10 +457,6 @@ def process_node_tags(
     # We evaluate this early, so we can fail before sending a bunch of data to
     # the server
     xpath = etree.XPath(tag_definition, namespaces=tag_nsmap)
-    system_ids = [
-        node["system_id"]
-        for node in nodes
-    ]
     process_all(
-        client, rack_id, tag_name, tag_definition, system_ids, xpath,
+        client, rack_id, tag_name, tag_definition, list(nodes), xpath,
         batch_size=batch_size)
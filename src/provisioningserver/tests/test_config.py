@@ -12,6 +12,7 @@ from operator import (
     setitem,
 )
 import os.path
+import random
 import sqlite3
 from unittest.mock import sentinel
 from uuid import uuid4
@@ -662,6 +663,25 @@ class TestClusterConfiguration(MAASTestCase):
         # It's also stored in the configuration database.
         self.assertEqual({"cluster_uuid": str(example_uuid)}, config.store)
 
+    def test_default_power_query_concurrency(self):
+        config = ClusterConfiguration({})
+        self.assertEqual(5, config.power_query_concurrency)
+
+    def test_set_and_get_power_query_concurrency(self):
+        config = ClusterConfiguration({})
+        example_concurrency = random.randint(1, 100)
+        config.power_query_concurrency = example_concurrency
+        self.assertEqual(
+            example_concurrency, config.power_query_concurrency)
+        # It's also stored in the configuration database.
+        self.assertEqual(
+            {"power_query_concurrency": example_concurrency}, config.store)
+
+    def test_power_query_concurrency_must_be_positive(self):
+        config = ClusterConfiguration({})
+        with ExpectedException(formencode.api.Invalid):
+            config.power_query_concurrency = 0
+
 
 class TestClusterConfigurationGRUBRoot(MAASTestCase):
     """Tests for `ClusterConfiguration.grub_root`."""
@@ -5,6 +5,8 @@
 
 __all__ = []
 
+import random
+
 import crochet
 from maastesting.matchers import MockCalledOnceWith
 from maastesting.testcase import (
@@ -181,6 +183,16 @@ class TestProvisioningServiceMaker(MAASTestCase):
         node_monitor = service.getServiceNamed("node_monitor")
         self.assertIsInstance(node_monitor, NodePowerMonitorService)
 
+    def test_node_monitor_service_uses_power_query_concurrency(self):
+        concurrency = random.randint(1, 100)
+        self.useFixture(ClusterConfigurationFixture(
+            power_query_concurrency=concurrency))
+        options = Options()
+        service_maker = ProvisioningServiceMaker("Harry", "Hill")
+        service = service_maker.makeService(options, clock=None)
+        node_monitor = service.getServiceNamed("node_monitor")
+        self.assertEqual(concurrency, node_monitor.max_nodes_at_once)
+
     def test_networks_monitor_service(self):
         options = Options()
         service_maker = ProvisioningServiceMaker("Spike", "Milligan")
@@ -6,6 +6,7 @@
 __all__ = []
 
 import doctest
+import hashlib
 import http.client
 from itertools import chain
 import json
@@ -27,7 +28,9 @@ from maastesting.factory import factory
 from maastesting.matchers import (
     IsCallable,
     MockCalledOnceWith,
+    MockCalledWith,
     MockCallsMatch,
+    MockNotCalled,
 )
 from maastesting.testcase import MAASTestCase
 from provisioningserver import tags
@@ -472,6 +475,134 @@ class TestGenNodeDetails(MAASTestCase):
             get_details_for_nodes.mock_calls)
 
 
+class TestDigestDetails(MAASTestCase):
+
+    def test__is_stable(self):
+        details = {"lshw": b"<list/>", "lldp": None}
+        self.assertEqual(
+            tags.digest_details(details), tags.digest_details(dict(details)))
+
+    def test__changes_with_details(self):
+        self.assertNotEqual(
+            tags.digest_details({"lshw": b"<list/>", "lldp": None}),
+            tags.digest_details({"lshw": b"<list/>", "lldp": b"<lldp/>"}))
+
+    def test__matches_combined_digests(self):
+        self.assertEqual(
+            tags.combine_detail_digests({
+                "lshw": hashlib.md5(b"<list/>").hexdigest(), "lldp": None}),
+            tags.digest_details({"lshw": b"<list/>", "lldp": None}))
+
+
+class TestDetailsDocumentCache(MAASTestCase):
+
+    def test_get_returns_None_when_not_cached(self):
+        cache = tags.DetailsDocumentCache()
+        self.assertIsNone(cache.get("digest"))
+
+    def test_get_returns_cached_document(self):
+        cache = tags.DetailsDocumentCache()
+        cache.set("digest1", sentinel.document1, 10)
+        cache.set("digest2", sentinel.document2, 10)
+        self.assertIs(sentinel.document1, cache.get("digest1"))
+        self.assertIs(sentinel.document2, cache.get("digest2"))
+
+    def test_set_forgets_least_recently_used_documents(self):
+        cache = tags.DetailsDocumentCache(size=20)
+        cache.set("digest1", sentinel.document1, 10)
+        cache.set("digest2", sentinel.document2, 10)
+        cache.get("digest1")
+        cache.set("digest3", sentinel.document3, 5)
+        self.assertIs(sentinel.document1, cache.get("digest1"))
+        self.assertIsNone(cache.get("digest2"))
+        self.assertIs(sentinel.document3, cache.get("digest3"))
+
+    def test_set_does_not_count_replaced_documents_twice(self):
+        cache = tags.DetailsDocumentCache(size=20)
+        cache.set("digest1", sentinel.document1, 10)
+        cache.set("digest2", sentinel.document2, 10)
+        cache.set("digest2", sentinel.document2, 10)
+        self.assertIs(sentinel.document1, cache.get("digest1"))
+
+    def test_set_does_not_cache_documents_larger_than_the_cache(self):
+        cache = tags.DetailsDocumentCache(size=20)
+        cache.set("digest1", sentinel.document1, 10)
+        cache.set("digest2", sentinel.document2, 30)
+        self.assertIs(sentinel.document1, cache.get("digest1"))
+        self.assertIsNone(cache.get("digest2"))
+
+
+class TestMergeDetailsCached(MAASTestCase):
+
+    def test__merges_details_once(self):
+        cache = tags.DetailsDocumentCache()
+        details = {"lshw": b"<node/>", "lldp": None}
+        digest, document = tags.merge_details_cached(details, cache)
+        self.assertEqual(tags.digest_details(details), digest)
+        self.assertIs(document, cache.get(digest))
+        merge_details = self.patch(tags, "merge_details")
+        self.assertEqual(
+            (digest, document), tags.merge_details_cached(details, cache))
+        self.assertThat(merge_details, MockNotCalled())
+
+
+class TestGenNodeResults(MAASTestCase):
+
+    def setUp(self):
+        super(TestGenNodeResults, self).setUp()
+        self.patch(tags, "details_documents", tags.DetailsDocumentCache())
+
+    def test__evaluates_node_details(self):
+        batches = [
+            [{"system_id": "s1"}, {"system_id": "s2"}],
+            [{"system_id": "s3"}],
+        ]
+        responses = [
+            {"s1": {"lshw": b"<node/>"}, "s2": {"lshw": b"<not-node/>"}},
+            {"s3": {"lshw": b"<parent><node/></parent>"}},
+        ]
+        get_details_for_nodes = self.patch(tags, "get_details_for_nodes")
+        get_details_for_nodes.side_effect = lambda *args: responses.pop(0)
+        xpath = etree.XPath("//node")
+        self.assertItemsEqual(
+            [("s1", True), ("s2", False), ("s3", True)],
+            tags.gen_node_results(sentinel.client, batches, xpath))
+
+    def test__does_not_fetch_unchanged_details_again(self):
+        details = {"lshw": b"<node/>"}
+        get_details_for_nodes = self.patch(tags, "get_details_for_nodes")
+        get_details_for_nodes.side_effect = lambda *args: {"s1": details}
+        nodes = [{"system_id": "s1", "digest": tags.digest_details(details)}]
+        self.assertEqual(
+            [("s1", True)],
+            list(tags.gen_node_results(
+                sentinel.client, [nodes], etree.XPath("//node"))))
+        get_details_for_nodes.reset_mock()
+        merge_details = self.patch(tags, "merge_details")
+        # A different expression is evaluated against the same document.
+        self.assertEqual(
+            [("s1", False)],
+            list(tags.gen_node_results(
+                sentinel.client, [nodes], etree.XPath("//other"))))
+        self.assertThat(get_details_for_nodes, MockNotCalled())
+        self.assertThat(merge_details, MockNotCalled())
+
+    def test__fetches_changed_details(self):
+        details = {"lshw": b"<node/>"}
+        get_details_for_nodes = self.patch(tags, "get_details_for_nodes")
+        get_details_for_nodes.side_effect = lambda *args: {"s1": details}
+        nodes = [{"system_id": "s1", "digest": tags.digest_details(details)}]
+        xpath = etree.XPath("//node")
+        list(tags.gen_node_results(sentinel.client, [nodes], xpath))
+        details = {"lshw": b"<other/>"}
+        nodes = [{"system_id": "s1", "digest": tags.digest_details(details)}]
+        self.assertEqual(
+            [("s1", False)],
+            list(tags.gen_node_results(sentinel.client, [nodes], xpath)))
+        self.assertThat(
+            get_details_for_nodes, MockCalledWith(sentinel.client, ["s1"]))
+
+
 class TestTagUpdating(MAASTestCase):
 
     def setUp(self):
@@ -62,6 +62,15 @@ ARPPacket = namedtuple('ARPPacket', (
 
 SIZEOF_ARP_PACKET = 28
 
+# Used by `get_raw_bindings` to read ARP packets in place in their Ethernet
+# frames, which may carry an 802.1q header; see `Ethernet`.
+ARP_STRUCT = struct.Struct(ARP_PACKET)
+ETHERTYPE_STRUCT = struct.Struct('!H')
+ETHERTYPE_OFFSET = 12
+ETHERTYPE_ARP = 0x0806
+ETHERTYPE_VLAN = 0x8100
+NULL_MAC = bytes(6)
+
 
 class ARP_OPERATION:
     """Enumeration to represent ARP operation types."""
@@ -277,6 +286,75 @@ def update_bindings_and_get_event(bindings, vid, ip, mac, time):
             event="NEW", vid=vid)
 
 
+def get_raw_bindings(frame):
+    """Return the (VID, IP, MAC) bindings found in the given Ethernet frame.
+
+    This finds the same bindings as decoding the frame with `Ethernet` and
+    `ARP` and calling `ARP.bindings`, but reads the fields in place, and
+    returns the IP address as an integer and the MAC address as bytes. The
+    VID is None if the frame is untagged.
+
+    :param frame: The bytes of the Ethernet frame.
+    :return: A list of `(vid, ip, mac)` tuples; empty if the frame is not a
+        valid ARP packet.
+    """
+    offset = ETHERTYPE_OFFSET
+    if len(frame) < offset + 2:
+        return []
+    ethertype, = ETHERTYPE_STRUCT.unpack_from(frame, offset)
+    offset += 2
+    vid = None
+    if ethertype == ETHERTYPE_VLAN:
+        if len(frame) < offset + 4:
+            return []
+        vid, = ETHERTYPE_STRUCT.unpack_from(frame, offset)
+        # The VLAN is the lower 12 bits; the upper 4 bits are for QoS.
+        vid &= 0xFFF
+        ethertype, = ETHERTYPE_STRUCT.unpack_from(frame, offset + 2)
+        offset += 4
+    if ethertype != ETHERTYPE_ARP or len(frame) < offset + SIZEOF_ARP_PACKET:
+        return []
+    (hardware_type, protocol, hardware_length, protocol_length, operation,
+     sender_mac, sender_ip, target_mac, target_ip) = ARP_STRUCT.unpack_from(
+        frame, offset)
+    # See `ARP.is_valid` and `ARP.bindings`.
+    if (hardware_type != 1 or protocol != 0x800 or
+            hardware_length != 6 or protocol_length != 4):
+        return []
+    bindings = []
+    if operation in (1, 2):
+        if sender_ip != 0 and sender_mac != NULL_MAC:
+            bindings.append((vid, sender_ip, sender_mac))
+    if operation == 2:
+        if target_ip != 0 and target_mac != NULL_MAC:
+            bindings.append((vid, target_ip, target_mac))
+    return bindings
+
+
+def update_and_print_raw_bindings(bindings, seen, frame, time, out=sys.stdout):
+    """Update the specified bindings dictionary with the given Ethernet frame.
+
+    Like `update_and_print_bindings`, but most packets repeat bindings that
+    are already known, so those are skipped before their addresses are
+    decoded. `seen` maps the raw `(vid, ip)` of each binding to its raw MAC
+    and the time it was last reported, as `bindings` does for the decoded
+    ones.
+    """
+    for vid, ip, mac in get_raw_bindings(frame):
+        previous = seen.get((vid, ip))
+        if previous is not None:
+            previous_mac, previous_time = previous
+            if (previous_mac == mac and
+                    time - previous_time < SEEN_AGAIN_THRESHOLD):
+                continue
+        event = update_bindings_and_get_event(
+            bindings, vid, IPAddress(ip), EUI(bytes_to_int(mac)), time)
+        if event is not None:
+            seen[(vid, ip)] = (mac, time)
+            out.write("%s\n" % json.dumps(event))
+            out.flush()
+
+
 def update_and_print_bindings(bindings, arp, out=sys.stdout):
     """Update the specified bindings dictionary with the given ARP packet.
 
@@ -306,6 +384,7 @@ def observe_arp_packets(
     """
     if bindings:
         bindings = dict()
+        seen = dict()
     else:
         bindings = None
     try:
@@ -315,6 +394,11 @@ def observe_arp_packets(
             # assumptions about the link layer header won't be correct.
             return 4
         for header, packet in pcap:
+            if bindings is not None:
+                update_and_print_raw_bindings(
+                    bindings, seen, packet, header.timestamp_seconds, output)
+            if not verbose:
+                continue
             ethernet = Ethernet(packet, time=header.timestamp_seconds)
             if not ethernet.is_valid():
                 # Ignore packets with a truncated Ethernet header.
@@ -329,10 +413,7 @@ def observe_arp_packets(
                 ethernet.payload, src_mac=ethernet.src_mac,
                 dst_mac=ethernet.dst_mac, vid=ethernet.vid,
                 time=ethernet.time)
-            if bindings is not None:
-                update_and_print_bindings(bindings, arp, output)
-            if verbose:
-                arp.write()
+            arp.write()
     except EOFError:
         # Capture aborted before it could even begin. Note that this does not
         # occur if the end-of-stream occurs normally. (In that case, the
@@ -82,6 +82,9 @@ log = LegacyLogger()
 class JSONPerLineProtocol(ProcessProtocol):
     """ProcessProtocol which parses a single JSON object per line of text.
 
+    The objects parsed from each chunk of output are passed to the callback
+    together, as a list, rather than one at a time.
+
     This expects that a UTF-8 locale is used, i.e. that text written to stdout
     and stderr by the spawned process uses the UTF-8 character set.
     """
@@ -89,6 +92,7 @@ class JSONPerLineProtocol(ProcessProtocol):
     def __init__(self, callback):
         super().__init__()
         self._callback = callback
+        self._objects = []
         self.done = Deferred()
 
     def connectionMade(self):
@@ -100,6 +104,9 @@ class JSONPerLineProtocol(ProcessProtocol):
         lines, self._outbuf = self.splitLines(self._outbuf + data)
         for line in lines:
             self.outLineReceived(line)
+        objects, self._objects = self._objects, []
+        if len(objects) > 0:
+            self._callback(objects)
 
     def errReceived(self, data):
         lines, self._errbuf = self.splitLines(self._errbuf + data)
@@ -130,7 +137,7 @@ class JSONPerLineProtocol(ProcessProtocol):
             self.objectReceived(obj)
 
     def objectReceived(self, obj):
-        self._callback([obj])
+        self._objects.append(obj)
 
     def errLineReceived(self, line):
         line = line.decode("utf-8")
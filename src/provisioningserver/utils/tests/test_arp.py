@@ -27,12 +27,15 @@ from provisioningserver.utils.arp import (
     add_arguments,
     ARP,
     ARP_OPERATION,
+    get_raw_bindings,
     run,
     SEEN_AGAIN_THRESHOLD,
     update_and_print_bindings,
+    update_and_print_raw_bindings,
     update_bindings_and_get_event,
 )
 from provisioningserver.utils.network import (
+    bytes_to_int,
     format_eui,
     hex_str_to_bytes,
     ipv4_to_bytes,
@@ -65,6 +68,15 @@ def make_arp_packet(
     return arp_packet
 
 
+def make_ethernet_frame(payload, vid=None, ethertype='0806'):
+    # Broadcast destination, followed by an arbitrary source MAC.
+    frame = hex_str_to_bytes('ffffffffffff') + hex_str_to_bytes(
+        '020304050607')
+    if vid is not None:
+        frame += hex_str_to_bytes('8100') + bytes.fromhex("%04x" % vid)
+    return frame + hex_str_to_bytes(ethertype) + payload
+
+
 class TestARP(MAASTestCase):
 
     def test__operation_enum__str(self):
@@ -405,6 +417,105 @@ class TestUpdateAndPrintBindings(MAASTestCase):
             "vid": None
         }))
 
+
+class TestGetRawBindings(MAASTestCase):
+
+    def test__returns_sender_for_request(self):
+        frame = make_ethernet_frame(make_arp_packet(
+            '192.168.0.1', '01:02:03:04:05:06', '192.168.0.2'))
+        self.assertThat(get_raw_bindings(frame), Equals([
+            (None, int(IPAddress('192.168.0.1')),
+             hex_str_to_bytes('01:02:03:04:05:06')),
+        ]))
+
+    def test__returns_sender_and_target_for_reply(self):
+        frame = make_ethernet_frame(make_arp_packet(
+            '192.168.0.1', '01:02:03:04:05:06', '192.168.0.2',
+            '02:03:04:05:06:07', op=ARP_OPERATION.REPLY))
+        self.assertThat(get_raw_bindings(frame), Equals([
+            (None, int(IPAddress('192.168.0.1')),
+             hex_str_to_bytes('01:02:03:04:05:06')),
+            (None, int(IPAddress('192.168.0.2')),
+             hex_str_to_bytes('02:03:04:05:06:07')),
+        ]))
+
+    def test__skips_null_bindings(self):
+        frame = make_ethernet_frame(make_arp_packet(
+            '0.0.0.0', '01:02:03:04:05:06', '192.168.0.2',
+            op=ARP_OPERATION.REPLY))
+        self.assertThat(get_raw_bindings(frame), Equals([]))
+
+    def test__returns_vid_for_tagged_frame(self):
+        frame = make_ethernet_frame(make_arp_packet(
+            '192.168.0.1', '01:02:03:04:05:06', '192.168.0.2'), vid=0x2005)
+        [(vid, _, _)] = get_raw_bindings(frame)
+        self.assertThat(vid, Equals(5))
+
+    def test__matches_arp_bindings(self):
+        arp_packet = make_arp_packet(
+            factory.make_ipv4_address(), factory.make_mac_address(),
+            factory.make_ipv4_address(), factory.make_mac_address(),
+            op=ARP_OPERATION.REPLY)
+        frame = make_ethernet_frame(arp_packet)
+        self.assertThat(
+            [(IPAddress(ip), EUI(bytes_to_int(mac)))
+             for _, ip, mac in get_raw_bindings(frame)],
+            Equals(list(ARP(arp_packet).bindings())))
+
+    def test__ignores_invalid_frames(self):
+        arp_packet = make_arp_packet(
+            '192.168.0.1', '01:02:03:04:05:06', '192.168.0.2')
+        self.assertThat(
+            get_raw_bindings(make_ethernet_frame(arp_packet)[:40]),
+            Equals([]))
+        self.assertThat(
+            get_raw_bindings(make_ethernet_frame(
+                arp_packet, ethertype='0800')),
+            Equals([]))
+        self.assertThat(
+            get_raw_bindings(make_ethernet_frame(make_arp_packet(
+                '192.168.0.1', '01:02:03:04:05:06', '192.168.0.2',
+                hardware_type='0x0002'))),
+            Equals([]))
+
+
+class TestUpdateAndPrintRawBindings(MAASTestCase):
+
+    def test__prints_same_events_as_update_and_print_bindings(self):
+        ip = IPAddress("192.168.0.1")
+        mac1 = EUI("00:01:02:03:04:05")
+        mac2 = EUI("02:03:04:05:06:07")
+        arp_packets = [
+            (make_arp_packet(str(ip), str(mac1), "192.168.0.2"), 0),
+            (make_arp_packet(str(ip), str(mac1), "192.168.0.2"), 1),
+            (make_arp_packet(str(ip), str(mac2), "192.168.0.2"), 2),
+            (make_arp_packet(str(ip), str(mac2), "192.168.0.2"),
+             SEEN_AGAIN_THRESHOLD + 2),
+        ]
+        bindings, out = {}, io.StringIO()
+        for arp_packet, when in arp_packets:
+            update_and_print_bindings(
+                bindings, ARP(arp_packet, time=when), out)
+        raw_bindings, seen, raw_out = {}, {}, io.StringIO()
+        for arp_packet, when in arp_packets:
+            update_and_print_raw_bindings(
+                raw_bindings, seen, make_ethernet_frame(arp_packet), when,
+                raw_out)
+        self.assertThat(raw_out.getvalue(), Equals(out.getvalue()))
+        self.assertThat(raw_bindings, Equals(bindings))
+        self.assertThat(raw_out.getvalue().splitlines(), HasLength(3))
+
+    def test__skips_known_bindings_without_decoding(self):
+        frame = make_ethernet_frame(make_arp_packet(
+            '192.168.0.1', '01:02:03:04:05:06', '192.168.0.2'))
+        bindings, seen, out = {}, {}, io.StringIO()
+        update_and_print_raw_bindings(bindings, seen, frame, 0, out)
+        update_bindings_and_get_event = self.patch(
+            arp_module, "update_bindings_and_get_event")
+        update_and_print_raw_bindings(bindings, seen, frame, 1, out)
+        self.assertThat(update_bindings_and_get_event.call_count, Equals(0))
+
+
 # Test data expected from an input PCAP file.
 test_input = (
     b'\xd4\xc3\xb2\xa1\x02\x00\x04\x00\x00\x00\x00\x00\x00\x00\x00\x00'
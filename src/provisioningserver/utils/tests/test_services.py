@@ -346,6 +346,18 @@ class TestJSONPerLineProtocol(MAASTestCase):
         proto.outReceived(b"{}\n")
         self.expectThat(callback, MockCallsMatch(call([{}]), call([{}])))
 
+    def test__passes_objects_from_each_read_together(self):
+        callback = Mock()
+        proto = JSONPerLineProtocol(callback=callback)
+        proto.connectionMade()
+        proto.outReceived(b'{"a": 1}\n{"b": 2}\n{"c"')
+        self.expectThat(
+            callback, MockCallsMatch(call([{"a": 1}, {"b": 2}])))
+        proto.outReceived(b': 3}\n')
+        self.expectThat(
+            callback, MockCallsMatch(
+                call([{"a": 1}, {"b": 2}]), call([{"c": 3}])))
+
     def test__logs_non_json_output(self):
         callback = Mock()
         proto = JSONPerLineProtocol(callback=callback)